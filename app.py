@@ -23,14 +23,19 @@ def create_app(db_type=None):
     app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-change-this-for-production')
     
     # Configure database
-    from db_utils import get_db_uri
+    from db_utils import get_db_uri, get_engine_options
     app.config['SQLALCHEMY_DATABASE_URI'] = get_db_uri(db_type)
+    # Pool sized for the gunicorn worker model (WEB_WORKER_CLASS, see gunicorn.conf.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
     # Initialize SQLAlchemy
     from models import db
     db.init_app(app)
     
+    # Reference data cache for dropdowns (registers the listeners bumping its versions on writes)
+    import core.refdata
+    
     # Import blueprints after app is created
     from auth.blueprint import auth_bp
     from core.blueprint import core_bp
@@ -71,39 +76,34 @@ def create_app(db_type=None):
     def products():
         """Products dashboard - display all products as cards with search, filter, and pagination"""
         from models import Item, Brand
-        from sqlalchemy import or_
+        from sqlalchemy import func
+        from core.search import match_filter, match_rank_keys
+        from core.pagination import keyset_paginate
         
         # Get query parameters
         search_query = request.args.get('search', '').strip()
         brand_id = request.args.get('brand_id', type=int)
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
         per_page = 24  # Items per page
         
         # Build base query
         query = Item.query.join(Brand)
         
-        # Apply search filter (search in essor_name and essor_code)
-        if search_query:
-            query = query.filter(
-                or_(
-                    Item.essor_name.ilike(f'%{search_query}%'),
-                    Item.essor_code.ilike(f'%{search_query}%')
-                )
-            )
-        
         # Apply brand filter
         if brand_id:
             query = query.filter(Item.brand_id == brand_id)
         
-        # Order by brand name and item code
-        query = query.order_by(Brand.name, Item.essor_code)
+        # Order by brand name and item code (id makes the order unique for keyset pagination)
+        keys = [(Brand.name, 'asc'), (func.coalesce(Item.essor_code, ''), 'asc'), (Item.id, 'asc')]
+        
+        # Apply search filter (substring or fuzzy match in essor_name and essor_code, best matches first)
+        if search_query:
+            columns = [Item.essor_code, Item.essor_name]
+            query = query.filter(match_filter(columns, search_query))
+            keys = [(key, 'desc') for key in match_rank_keys(columns, search_query)] + keys
         
         # Paginate results
-        pagination = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        pagination = keyset_paginate(query, keys, cursor=cursor, per_page=per_page, count='exact')
         
         # Get all brands for the filter dropdown
         brands = Brand.query.order_by(Brand.name).all()
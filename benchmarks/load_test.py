@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Throughput and p95 latency of scripted dashboard journeys under each gunicorn worker model
+
+For each worker class (sync, gthread, gevent), starts gunicorn with gunicorn.conf.py on
+the local database (filled with database/generate_synthetic_data.py), logs in --users
+virtual users and has them run weighted journeys (brand dashboard, customer review,
+SPINS ranks, the slow channel assortment and a sellthrough import) with think times for
+--duration seconds after a warm-up. The report gives per model the throughput, error
+count and p50/p95/p99 latencies, overall and per journey step, so the dashboards stuck
+behind a slow call show up. gevent is skipped when not installed.
+
+With --url, the journeys run against an already started server instead.
+
+Usage: python benchmarks/load_test.py [--worker-classes sync,gthread,gevent] [--users 20] [--duration 60] [--output load.json]
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import socket
+import tempfile
+import argparse
+import threading
+import subprocess
+import importlib.util
+from datetime import datetime
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Environment of the gunicorn servers, before run_benchmarks adjusts the one of this process
+BASE_ENV = dict(os.environ)
+
+from run_benchmarks import ENDPOINTS, _sample_ids, _walmart_csv
+from app import create_app
+from db_utils import get_config
+
+WORKER_CLASSES = ('sync', 'gthread', 'gevent')
+
+# name -> (weight, steps); a step is the name of an ENDPOINTS case, or 'import_sellthrough'
+JOURNEYS = {
+    'brand_dashboard': (4, ['netsuite_totals', 'netsuite_chart', 'faire_chart']),
+    'customer_review': (3, ['customers_list', 'customer_assortment', 'customer_monthly_revenues']),
+    'spins_ranks': (2, ['spins_item_ranks', 'spins_brand_ranks', 'spins_ranking_graph']),
+    'channel_assortment': (1, ['assortment_by_channel']),
+    'sellthrough_import': (1, ['import_sellthrough']),
+}
+
+
+# ==================== Virtual users ====================
+
+class VirtualUser(threading.Thread):
+    """Logs in, then runs random journeys until the deadline, recording each request"""
+
+    def __init__(self, index, base_url, credentials, ids, csv_content, deadline, think, samples, lock):
+        super().__init__(name=f'user-{index}', daemon=True)
+        self.random = random.Random(index)
+        self.base_url = base_url
+        self.credentials = credentials
+        self.ids = ids
+        self.csv_content = csv_content
+        self.deadline = deadline
+        self.think = think
+        self.samples = samples
+        self.lock = lock
+
+    def _request(self, session, step):
+        if step == 'import_sellthrough':
+            return session.post(f'{self.base_url}/sellthrough/import', allow_redirects=False, timeout=300,
+                                files={'file': ('load_test.csv', self.csv_content)})
+        return session.get(self.base_url + ENDPOINTS[step].format(**self.ids), timeout=300)
+
+    def run(self):
+        session = requests.Session()
+        response = session.post(f'{self.base_url}/auth/login', data=self.credentials, allow_redirects=False, timeout=60)
+        if response.status_code != 302:  # a failed login renders the form again
+            with self.lock:
+                self.samples.append(('login', 'login', 0.0, 'login failed'))
+            return
+
+        names = [name for name, (_, steps) in JOURNEYS.items()
+                 if self.csv_content is not None or 'import_sellthrough' not in steps]
+        weights = [JOURNEYS[name][0] for name in names]
+        while time.time() < self.deadline:
+            journey = self.random.choices(names, weights)[0]
+            for step in JOURNEYS[journey][1]:
+                if time.time() >= self.deadline:
+                    return
+                started = time.perf_counter()
+                try:
+                    response = self._request(session, step)
+                    error = f'HTTP {response.status_code}' if response.status_code >= 400 else None
+                except requests.RequestException as e:
+                    error = type(e).__name__
+                latency = (time.perf_counter() - started) * 1000
+                with self.lock:
+                    self.samples.append((journey, step, latency, error))
+                time.sleep(self.random.uniform(0, self.think))
+
+
+def run_load(base_url, credentials, ids, csv_content, users, duration, think):
+    """Samples (journey, step, latency ms, error) of users running journeys for duration seconds"""
+    samples, lock = [], threading.Lock()
+    deadline = time.time() + duration
+    threads = [VirtualUser(index, base_url, credentials, ids, csv_content, deadline, think, samples, lock)
+               for index in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+# ==================== Servers ====================
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(worker_class, port, log_path, workers=None, threads=None):
+    """Start gunicorn with gunicorn.conf.py and the given worker class, wait until it answers"""
+    env = dict(BASE_ENV, DB_TYPE='local', WEB_WORKER_CLASS=worker_class)
+    if workers:
+        env['WEB_WORKERS'] = str(workers)
+    if threads:
+        env['WEB_THREADS'] = str(threads)
+    log = open(log_path, 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', os.path.join(ROOT, 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{port}', 'app:app'],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    for _ in range(120):
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}, see {log_path}')
+        try:
+            requests.get(f'http://127.0.0.1:{port}/auth/login', timeout=2)
+            return process
+        except requests.RequestException:
+            time.sleep(0.5)
+    stop_server(process)
+    raise RuntimeError(f'gunicorn did not answer within 60 seconds, see {log_path}')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# ==================== Report ====================
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of values"""
+    ordered = sorted(values)
+    return round(ordered[max(0, -(-len(ordered) * percent // 100) - 1)], 1)
+
+
+def _latencies(samples):
+    latencies = [latency for _, _, latency, error in samples if not error]
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    return {'p50_ms': _percentile(latencies, 50), 'p95_ms': _percentile(latencies, 95),
+            'p99_ms': _percentile(latencies, 99)}
+
+
+def summarize(samples, duration):
+    """Throughput, errors and latency percentiles, overall and per step"""
+    steps = {}
+    for sample in samples:
+        steps.setdefault(sample[1], []).append(sample)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[3]),
+        'throughput_rps': round(sum(1 for sample in samples if not sample[3]) / duration, 2),
+        **_latencies(samples),
+        'steps': {step: {'requests': len(step_samples), 'errors': sum(1 for sample in step_samples if sample[3]),
+                         **_latencies(step_samples)}
+                  for step, step_samples in sorted(steps.items())},
+    }
+
+
+def _print_report(results):
+    print("\n" + "="*78)
+    print(f"{'worker class':<16}{'req/s':>9}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print("-"*78)
+    for name, result in results['models'].items():
+        if 'error' in result:
+            print(f"{name:<16}  ❌ {result['error']}")
+            continue
+        print(f"{name:<16}{result['throughput_rps']:>9}{result['requests']:>10}{result['errors']:>8}"
+              f"{result['p50_ms']!s:>10}{result['p95_ms']!s:>10}{result['p99_ms']!s:>10}")
+    print("="*78)
+
+    measured = {name: result for name, result in results['models'].items() if 'steps' in result}
+    if measured:
+        step_names = sorted({step for result in measured.values() for step in result['steps']})
+        print(f"\n{'p95 ms per step':<30}{''.join(f'{name:>14}' for name in measured)}")
+        for step in step_names:
+            values = [str(result['steps'].get(step, {}).get('p95_ms', '-')) for result in measured.values()]
+            print(f"  {step:<28}{''.join(f'{value:>14}' for value in values)}")
+
+
+# ==================== Main ====================
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the dashboards under each gunicorn worker model')
+    parser.add_argument('--worker-classes', default=','.join(WORKER_CLASSES),
+                        help=f"Comma-separated worker classes to compare (default: {','.join(WORKER_CLASSES)})")
+    parser.add_argument('--url', help='Run against this already started server instead of starting gunicorn')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users (default: 20)')
+    parser.add_argument('--duration', type=int, default=60, help='Measured seconds per worker class (default: 60)')
+    parser.add_argument('--warmup', type=int, default=10, help='Unmeasured seconds before each run (default: 10)')
+    parser.add_argument('--think', type=float, default=1.0, help='Maximum think time between requests (default: 1.0s)')
+    parser.add_argument('--workers', type=int, help='WEB_WORKERS of the servers (default: gunicorn.conf.py)')
+    parser.add_argument('--threads', type=int, help='WEB_THREADS of the gthread servers (default: gunicorn.conf.py)')
+    parser.add_argument('--no-imports', action='store_true', help='Leave the sellthrough import journey out')
+    parser.add_argument('--username', help='Login of the virtual users (default: [auth] of config.ini)')
+    parser.add_argument('--password', help='Password of the virtual users (default: [auth] of config.ini)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    config = get_config()
+    credentials = {
+        'username': args.username or config.get('auth', 'username', fallback='admin'),
+        'password': args.password or config.get('auth', 'password', fallback='12345678'),
+    }
+
+    app = create_app(db_type='local')
+    with app.app_context():
+        ids = _sample_ids()
+        csv_content = None if args.no_imports else _walmart_csv()
+    if not ids['brand_id']:
+        print("❌ No data, run database/generate_synthetic_data.py first")
+        return 1
+
+    results = {'created_at': datetime.utcnow().isoformat(), 'users': args.users, 'duration': args.duration,
+               'models': {}}
+
+    if args.url:
+        targets = [('external', args.url.rstrip('/'))]
+    else:
+        targets = [(name.strip(), None) for name in args.worker_classes.split(',') if name.strip()]
+
+    for name, url in targets:
+        if name == 'gevent' and importlib.util.find_spec('gevent') is None:
+            print("⏭ gevent: not installed (pip install gevent psycogreen)")
+            results['models'][name] = {'error': 'gevent not installed'}
+            continue
+
+        process = None
+        try:
+            if url is None:
+                port = _free_port()
+                print(f"🚀 Starting gunicorn with {name} workers on port {port}...", flush=True)
+                process = start_server(name, port, os.path.join(tempfile.gettempdir(), f'load_test_{name}.log'),
+                                       workers=args.workers, threads=args.threads)
+                url = f'http://127.0.0.1:{port}'
+            if args.warmup:
+                print(f"  🔥 Warming up for {args.warmup}s...", flush=True)
+                run_load(url, credentials, ids, csv_content, args.users, args.warmup, args.think)
+            print(f"  ⏱  {args.users} users for {args.duration}s...", flush=True)
+            samples = run_load(url, credentials, ids, csv_content, args.users, args.duration, args.think)
+            results['models'][name] = summarize(samples, args.duration)
+            print(f"  ✓ {results['models'][name]['throughput_rps']} req/s, p95 {results['models'][name]['p95_ms']} ms")
+        except Exception as e:
+            results['models'][name] = {'error': str(e)}
+            print(f"  ❌ {name}: {str(e)}")
+        finally:
+            if process is not None:
+                stop_server(process)
+
+    _print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
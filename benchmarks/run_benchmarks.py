@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Latency, query count and peak memory of the key endpoints and importers
+
+Runs against the local database, filled with database/generate_synthetic_data.py at
+the scale to measure. Each case is requested --rounds times through the Flask test
+client with the in-process caches emptied first (cold requests, what the first user
+after an import gets), then once more under tracemalloc for its peak Python memory.
+Importers re-import weeks that already exist (updates), so the dataset stays stable.
+With SNOWFLAKE_MODE=replay, the Netsuite, Faire and ASIN sync imports also run, from the
+recordings of core/snowflake_replay.py instead of Snowflake.
+
+Results are printed and written as JSON; with --baseline, a case whose median latency
+or peak memory grew beyond the tolerance, or which issues more queries, is reported
+as a regression and the exit status is 1, so the run can gate a deploy.
+
+Usage: python benchmarks/run_benchmarks.py [--rounds 5] [--only netsuite] [--output results.json] [--baseline base.json]
+"""
+
+import sys
+import os
+import io
+import csv
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DB_TYPE'] = 'local'  # app.py creates its app on import
+os.environ.setdefault('RESULT_CACHE_BACKEND', 'local')
+
+from sqlalchemy import event, func
+from app import create_app
+from models import (db, ChannelItem, NetsuiteData, FaireData, SellthroughData, SpinsData, SpinsChannel,
+                    SpinsBrand, SpinsItem)
+from core import http_cache, result_cache
+from core.snowflake_replay import get_mode
+
+LATENCY_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.5
+IMPORT_ROWS = 500
+
+# name -> URL, formatted with the sample ids of _sample_ids()
+ENDPOINTS = {
+    'customers_list': '/core/customers?channel_id={channel_id}',
+    'customer_assortment': '/core/customers/{customer_id}/api/assortment',
+    'customer_monthly_revenues': '/core/customers/{customer_id}/api/monthly-revenues',
+    'assortment_by_channel': '/core/customers/api/assortment-by-channel?channel_id={channel_id}&brand_id={brand_id}',
+    'spins_item_ranks': '/spins/items/ranks?week={spins_week}&channel_id={spins_channel_id}',
+    'spins_brand_ranks': '/spins/brands/ranks?week={spins_week}&channel_id={spins_channel_id}',
+    'spins_ranking_graph': '/spins/api/brands-ranking-data?channel_id={spins_channel_id}',
+    'netsuite_totals': '/netsuite/api/totals?brand_id={brand_id}',
+    'netsuite_chart': '/netsuite/api/chart-data?brand_id={brand_id}',
+    'faire_chart': '/faire/api/chart-data?brand_id={brand_id}',
+}
+
+
+# ==================== Samples ====================
+
+def _busiest(column, *filters):
+    return db.session.query(column).filter(column.isnot(None), *filters).group_by(column) \
+        .order_by(func.count().desc()).limit(1).scalar()
+
+
+def _sample_ids():
+    """Busiest brand, channel, customer and SPINS channel/week, so cases look like real dashboards"""
+    return {
+        'brand_id': _busiest(NetsuiteData.brand_id),
+        'channel_id': _busiest(NetsuiteData.channel_id),
+        'customer_id': _busiest(NetsuiteData.customer_id),
+        'spins_channel_id': _busiest(SpinsData.channel_id),
+        'spins_week': db.session.query(func.max(SpinsData.week)).scalar(),
+    }
+
+
+def _walmart_csv():
+    """Walmart sellthrough file re-importing the latest week of listed items"""
+    week = db.session.query(func.max(SellthroughData.date)).filter(SellthroughData.channel_id == 2).scalar()
+    listings = ChannelItem.query.filter_by(channel_id=2).limit(IMPORT_ROWS).all()
+    if week is None or not listings:
+        return None
+    year, iso_week, _ = week.isocalendar()
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['walmart_calendar_week', 'walmart_item_number', 'item_name', 'pos_sales_this_year',
+                     'pos_quantity_this_year', 'dollar_per_store_per_week_or_per_day_this_year',
+                     'units_per_store_per_week_or_per_day_this_year', 'traited_store_count_this_year',
+                     'repl_instock_percentage_this_year'])
+    for index, listing in enumerate(listings):
+        writer.writerow([f'{year}{iso_week:02d}', listing.channel_code, listing.channel_name,
+                         f'{1000 + index}.50', 100 + index, '2.10', '0.3', 480, '97.5%'])
+    return output.getvalue().encode()
+
+
+def _spins_csv():
+    """SPINS file re-importing the rows of the latest week"""
+    week = db.session.query(func.max(SpinsData.week)).scalar()
+    if week is None:
+        return None
+    rows = db.session.query(SpinsChannel.name, SpinsBrand.name, SpinsItem.name, SpinsItem.upc, SpinsData) \
+        .join(SpinsChannel, SpinsData.channel_id == SpinsChannel.id) \
+        .join(SpinsBrand, SpinsData.brand_id == SpinsBrand.id) \
+        .join(SpinsItem, SpinsData.item_id == SpinsItem.id) \
+        .filter(SpinsData.week == week).limit(IMPORT_ROWS).all()
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['TIME FRAME', 'GEOGRAPHY', 'BRAND', 'DESCRIPTION', 'UPC', '# of Stores', '# of Stores Selling',
+                     'Dollars', 'Units', 'ARP', 'Average Weekly Dollars', 'Average Weekly Units',
+                     'Average Weekly Dollars Per Store Selling Per Item', 'Average Weekly Units Per Store Selling Per Item'])
+    for channel, brand, description, upc, data in rows:
+        writer.writerow([f"1 Week End {week.strftime('%m/%d/%Y')}", channel, brand, description, upc,
+                         data.stores_total, data.stores_selling, f'${data.revenues}', data.units, f'${data.arp or 0}',
+                         f'${data.revenues}', data.units, data.average_weekly_revenues_per_selling_item,
+                         data.average_weekly_units_per_selling_item])
+    return output.getvalue().encode()
+
+
+def _importers():
+    """name -> (URL, CSV bytes) of the file importers; Netsuite and Faire import from Snowflake"""
+    return {
+        'import_sellthrough_walmart': ('/sellthrough/import', _walmart_csv()),
+        'import_spins': ('/spins/import', _spins_csv()),
+    }
+
+
+def _snowflake_importers():
+    """name -> function of the Snowflake importers, only when they replay recordings"""
+    if get_mode() != 'replay':
+        return {}
+    from scheduler.jobs import _run_netsuite_import, _run_faire_import, _run_asin_sync
+    return {
+        'import_netsuite': _run_netsuite_import,
+        'import_faire': _run_faire_import,
+        'sync_asin_status': _run_asin_sync,
+    }
+
+
+class _Done:
+    """Response of a case run in-process rather than through the test client"""
+    status_code = 200
+
+
+def _in_app(app, function):
+    """Case calling function in an app context (a missing recording raises like an HTTP error)"""
+    def request():
+        with app.app_context():
+            function()
+        return _Done()
+    return request
+
+
+# ==================== Measures ====================
+
+class QueryCounter:
+    """Count the statements sent to the database"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def _cold():
+    """Empty the in-process caches a fresh worker would not have"""
+    http_cache.clear()
+    result_cache.clear_local()
+
+
+def _run_case(client, counter, request, rounds):
+    """Median/min/max latency (ms), queries per request and peak Python memory (MB) of a case"""
+    latencies, queries = [], []
+    for _ in range(rounds):
+        _cold()
+        counter.count = 0
+        started = time.perf_counter()
+        response = request()
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+        if response.status_code >= 400:
+            raise RuntimeError(f'HTTP {response.status_code}')
+
+    _cold()
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_ms': round(statistics.median(latencies), 1),
+        'min_ms': round(min(latencies), 1),
+        'max_ms': round(max(latencies), 1),
+        'queries': max(queries),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+    }
+
+
+# ==================== Comparison ====================
+
+def compare(results, baseline, latency_tolerance=LATENCY_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Regressions of results against a baseline run, as printable strings"""
+    regressions = []
+    for name, current in results['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous or 'error' in current or 'error' in previous:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{name}: {previous['queries']} → {current['queries']} queries")
+        if current['median_ms'] > previous['median_ms'] * (1 + latency_tolerance):
+            regressions.append(f"{name}: median {previous['median_ms']} → {current['median_ms']} ms")
+        if current['peak_mb'] > previous['peak_mb'] * (1 + memory_tolerance):
+            regressions.append(f"{name}: peak memory {previous['peak_mb']} → {current['peak_mb']} MB")
+    return regressions
+
+
+# ==================== Main ====================
+
+def run(rounds=5, only=None):
+    """Run every case (or those whose name contains only), returns the results dict"""
+    app = create_app(db_type='local')
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+        ids = _sample_ids()
+        importers = _importers()
+        rows = {table.__tablename__: db.session.query(func.count(table.id)).scalar()
+                for table in (NetsuiteData, FaireData, SellthroughData, SpinsData)}
+    if not ids['brand_id']:
+        raise RuntimeError('No data, run database/generate_synthetic_data.py first')
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['is_admin'] = True
+
+    cases = [(name, (lambda url=url.format(**ids): client.get(url))) for name, url in ENDPOINTS.items()]
+    for name, (url, content) in importers.items():
+        if content is None:
+            print(f"  ⏭ {name}: no data to re-import")
+            continue
+        cases.append((name, lambda url=url, content=content: client.post(
+            url, data={'file': (io.BytesIO(content), 'benchmark.csv')}, content_type='multipart/form-data')))
+    cases += [(name, _in_app(app, function)) for name, function in _snowflake_importers().items()]
+
+    results = {'created_at': datetime.utcnow().isoformat(), 'rounds': rounds, 'rows': rows, 'cases': {}}
+    for name, request in cases:
+        if only and only not in name:
+            continue
+        print(f"⏱  {name}...", flush=True)
+        try:
+            results['cases'][name] = _run_case(client, counter, request, rounds)
+        except Exception as e:
+            results['cases'][name] = {'error': str(e)}
+            print(f"  ❌ {name}: {str(e)}")
+    return results
+
+
+def _print_results(results):
+    print("\n" + "="*78)
+    print(f"{'case':<30}{'median ms':>11}{'min ms':>9}{'max ms':>9}{'queries':>9}{'peak MB':>10}")
+    print("-"*78)
+    for name, case in results['cases'].items():
+        if 'error' in case:
+            print(f"{name:<30}  ❌ {case['error']}")
+        else:
+            print(f"{name:<30}{case['median_ms']:>11}{case['min_ms']:>9}{case['max_ms']:>9}{case['queries']:>9}{case['peak_mb']:>10}")
+    print("="*78)
+    print(f"Rows: {', '.join(f'{table} {count}' for table, count in results['rows'].items())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the key endpoints and importers on the local database')
+    parser.add_argument('--rounds', type=int, default=5, help='Timed requests per case (default: 5)')
+    parser.add_argument('--only', help='Only run the cases whose name contains this')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='Results JSON of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=LATENCY_TOLERANCE,
+                        help=f'Allowed median latency growth over the baseline (default: {LATENCY_TOLERANCE})')
+    args = parser.parse_args()
+
+    results = run(rounds=args.rounds, only=args.only)
+    _print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), latency_tolerance=args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\n✓ No regression against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,16 +3,78 @@
 Core blueprint for managing brands, categories, channels, locations, and items
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from functools import wraps
 from datetime import datetime
 import csv
 import io
 from models import db, Brand, Category, Channel, ChannelCustomer, Item, ChannelItem, Asin, ImportError, ChannelCustomerType
 from auth.blueprint import login_required, admin_required
+from imports.error_sink import ImportErrorSink, record_import_error
+from core.search import SEARCHES
+from core.export import FORMATS, build_export, stream_csv, stream_parquet, parquet_available
+from core.result_cache import shared_result
+from core.periods import in_period, in_years
 
 core_bp = Blueprint('core', __name__, template_folder='templates')
 
+# ==================== Typeahead ====================
+
+@core_bp.route('/api/typeahead/<kind>')
+@login_required
+def api_typeahead(kind):
+    """Ranked prefix/fuzzy search used by the async pickers (kind: items, customers, spins-items)"""
+    if kind not in SEARCHES:
+        return jsonify({'error': f'Unknown search: {kind}'}), 404
+    
+    search, filters = SEARCHES[kind]
+    kwargs = {name: request.args.get(name, type=cast) for name, cast in filters.items()}
+    results = search(
+        request.args.get('q', ''),
+        limit=request.args.get('limit', type=int),
+        **kwargs
+    )
+    return jsonify(results)
+
+# ==================== Exports ====================
+
+@core_bp.route('/export/<dataset>')
+@login_required
+def export_data(dataset):
+    """Stream a fact table export (dataset: netsuite, sellthrough, faire, spins, items)
+    
+    Query params: format (csv, csv.gz or parquet) and the list view filters
+    (brand_id, item_id, channel_id, customer_id, date_from, date_to)
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in FORMATS:
+        return jsonify({'error': f'Unknown format: {export_format} (use csv, csv.gz or parquet)'}), 400
+    if export_format == 'parquet' and not parquet_available():
+        return jsonify({'error': 'Parquet export requires pyarrow to be installed'}), 400
+    
+    try:
+        columns, stmt = build_export(dataset, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if export_format == 'parquet':
+        chunks = stream_parquet(columns, stmt)
+    else:
+        chunks = stream_csv(columns, stmt, compress=export_format == 'csv.gz')
+    
+    mimetype, extension = FORMATS[export_format]
+    filename = f"{dataset}_export_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    print(f"📤 Streaming {dataset} export as {export_format}")
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            # Let proxies pass chunks through as they are produced
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 # ==================== Brands ====================
 
 @core_bp.route('/brands')
@@ -382,14 +444,14 @@ def customers_list():
                     func.coalesce(func.sum(FaireData.revenues), 0)
                 ).filter(
                     FaireData.customer_id == customer.id,
-                    extract('year', FaireData.date) == 2024
+                    in_period(FaireData.date, 2024)
                 ).scalar() or 0
                 
                 rev_2025 = db.session.query(
                     func.coalesce(func.sum(FaireData.revenues), 0)
                 ).filter(
                     FaireData.customer_id == customer.id,
-                    extract('year', FaireData.date) == 2025
+                    in_period(FaireData.date, 2025)
                 ).scalar() or 0
             else:
                 # For other channels, use SellthroughData and NetsuiteData
@@ -398,7 +460,7 @@ def customers_list():
                     func.coalesce(func.sum(SellthroughData.revenues), 0)
                 ).filter(
                     SellthroughData.customer_id == customer.id,
-                    extract('year', SellthroughData.date) == 2024
+                    in_period(SellthroughData.date, 2024)
                 ).scalar() or 0
                 
                 # Get 2024 revenues from NetsuiteData
@@ -406,7 +468,7 @@ def customers_list():
                     func.coalesce(func.sum(NetsuiteData.revenues), 0)
                 ).filter(
                     NetsuiteData.customer_id == customer.id,
-                    extract('year', NetsuiteData.date) == 2024
+                    in_period(NetsuiteData.date, 2024)
                 ).scalar() or 0
                 
                 # Get 2025 revenues from SellthroughData
@@ -414,7 +476,7 @@ def customers_list():
                     func.coalesce(func.sum(SellthroughData.revenues), 0)
                 ).filter(
                     SellthroughData.customer_id == customer.id,
-                    extract('year', SellthroughData.date) == 2025
+                    in_period(SellthroughData.date, 2025)
                 ).scalar() or 0
                 
                 # Get 2025 revenues from NetsuiteData
@@ -422,7 +484,7 @@ def customers_list():
                     func.coalesce(func.sum(NetsuiteData.revenues), 0)
                 ).filter(
                     NetsuiteData.customer_id == customer.id,
-                    extract('year', NetsuiteData.date) == 2025
+                    in_period(NetsuiteData.date, 2025)
                 ).scalar() or 0
                 
                 # Combine revenues from both sources
@@ -477,14 +539,14 @@ def customer_detail(customer_id):
             func.coalesce(func.sum(FaireData.revenues), 0)
         ).filter(
             FaireData.customer_id == customer_id,
-            extract('year', FaireData.date) == 2024
+            in_period(FaireData.date, 2024)
         ).scalar() or 0
         
         total_rev_2025 = db.session.query(
             func.coalesce(func.sum(FaireData.revenues), 0)
         ).filter(
             FaireData.customer_id == customer_id,
-            extract('year', FaireData.date) == 2025
+            in_period(FaireData.date, 2025)
         ).scalar() or 0
         
         total_rev_2024 = float(total_rev_2024)
@@ -495,14 +557,14 @@ def customer_detail(customer_id):
             func.coalesce(func.sum(SellthroughData.revenues), 0)
         ).filter(
             SellthroughData.customer_id == customer_id,
-            extract('year', SellthroughData.date) == 2024
+            in_period(SellthroughData.date, 2024)
         ).scalar() or 0
         
         rev_2025_sellthrough = db.session.query(
             func.coalesce(func.sum(SellthroughData.revenues), 0)
         ).filter(
             SellthroughData.customer_id == customer_id,
-            extract('year', SellthroughData.date) == 2025
+            in_period(SellthroughData.date, 2025)
         ).scalar() or 0
         
         # From NetsuiteData
@@ -510,14 +572,14 @@ def customer_detail(customer_id):
             func.coalesce(func.sum(NetsuiteData.revenues), 0)
         ).filter(
             NetsuiteData.customer_id == customer_id,
-            extract('year', NetsuiteData.date) == 2024
+            in_period(NetsuiteData.date, 2024)
         ).scalar() or 0
         
         rev_2025_netsuite = db.session.query(
             func.coalesce(func.sum(NetsuiteData.revenues), 0)
         ).filter(
             NetsuiteData.customer_id == customer_id,
-            extract('year', NetsuiteData.date) == 2025
+            in_period(NetsuiteData.date, 2025)
         ).scalar() or 0
         
         total_rev_2024 = float(rev_2024_sellthrough) + float(rev_2024_netsuite)
@@ -550,7 +612,7 @@ def api_customer_assortment(customer_id):
             func.sum(FaireData.revenues).label('revenues')
         ).filter(
             FaireData.customer_id == customer_id,
-            extract('year', FaireData.date) == 2024
+            in_period(FaireData.date, 2024)
         ).group_by(FaireData.item_id).all()
         
         faire_items_2025 = db.session.query(
@@ -558,7 +620,7 @@ def api_customer_assortment(customer_id):
             func.sum(FaireData.revenues).label('revenues')
         ).filter(
             FaireData.customer_id == customer_id,
-            extract('year', FaireData.date) == 2025
+            in_period(FaireData.date, 2025)
         ).group_by(FaireData.item_id).all()
         
         for row in faire_items_2024:
@@ -576,7 +638,7 @@ def api_customer_assortment(customer_id):
             func.sum(SellthroughData.revenues).label('revenues')
         ).filter(
             SellthroughData.customer_id == customer_id,
-            extract('year', SellthroughData.date) == 2024
+            in_period(SellthroughData.date, 2024)
         ).group_by(SellthroughData.item_id).all()
         
         sellthrough_items_2025 = db.session.query(
@@ -584,7 +646,7 @@ def api_customer_assortment(customer_id):
             func.sum(SellthroughData.revenues).label('revenues')
         ).filter(
             SellthroughData.customer_id == customer_id,
-            extract('year', SellthroughData.date) == 2025
+            in_period(SellthroughData.date, 2025)
         ).group_by(SellthroughData.item_id).all()
         
         # Query from NetsuiteData
@@ -593,7 +655,7 @@ def api_customer_assortment(customer_id):
             func.sum(NetsuiteData.revenues).label('revenues')
         ).filter(
             NetsuiteData.customer_id == customer_id,
-            extract('year', NetsuiteData.date) == 2024
+            in_period(NetsuiteData.date, 2024)
         ).group_by(NetsuiteData.item_id).all()
         
         netsuite_items_2025 = db.session.query(
@@ -601,7 +663,7 @@ def api_customer_assortment(customer_id):
             func.sum(NetsuiteData.revenues).label('revenues')
         ).filter(
             NetsuiteData.customer_id == customer_id,
-            extract('year', NetsuiteData.date) == 2025
+            in_period(NetsuiteData.date, 2025)
         ).group_by(NetsuiteData.item_id).all()
         
         # Combine revenues by item_id
@@ -692,8 +754,7 @@ def api_customer_monthly_revenues(customer_id):
                     func.coalesce(func.sum(FaireData.revenues), 0)
                 ).filter(
                     FaireData.customer_id == customer_id,
-                    extract('year', FaireData.date) == year,
-                    extract('month', FaireData.date) == month
+                    in_period(FaireData.date, year, month)
                 ).scalar() or 0
                 total_rev = float(total_rev)
             else:
@@ -702,8 +763,7 @@ def api_customer_monthly_revenues(customer_id):
                     func.coalesce(func.sum(SellthroughData.revenues), 0)
                 ).filter(
                     SellthroughData.customer_id == customer_id,
-                    extract('year', SellthroughData.date) == year,
-                    extract('month', SellthroughData.date) == month
+                    in_period(SellthroughData.date, year, month)
                 ).scalar() or 0
                 
                 # Query NetsuiteData
@@ -711,8 +771,7 @@ def api_customer_monthly_revenues(customer_id):
                     func.coalesce(func.sum(NetsuiteData.revenues), 0)
                 ).filter(
                     NetsuiteData.customer_id == customer_id,
-                    extract('year', NetsuiteData.date) == year,
-                    extract('month', NetsuiteData.date) == month
+                    in_period(NetsuiteData.date, year, month)
                 ).scalar() or 0
                 
                 total_rev = float(sellthrough_rev) + float(netsuite_rev)
@@ -737,14 +796,158 @@ def customers_assortment_by_channel():
                          channels=channels,
                          brands=brands)
 
+@shared_result('assortment_by_channel', tables=('netsuite_data', 'faire_data', 'channel_customers', 'items', 'asins'))
+def _assortment_items(channel_id, brand_id):
+    """Items sold to the customers of a channel and brand, with 2024/2025 revenues and YoY growth (unsorted)"""
+    from models import NetsuiteData, FaireData
+    from sqlalchemy import func, extract, or_, case
+    
+    customer_ids = [customer_id for customer_id, in db.session.query(ChannelCustomer.id).filter_by(
+        channel_id=channel_id,
+        brand_id=brand_id
+    )]
+    print(f"[ASSORTMENT API] Found {len(customer_ids)} customers")
+    if not customer_ids:
+        return []
+    
+    # Check if this is Faire channel (id=11)
+    is_faire_channel = (channel_id == 11)
+    
+    # Single SQL query with joins to get all data at once
+    print(f"[ASSORTMENT API] Executing single SQL query with joins... (Faire channel: {is_faire_channel})")
+    
+    if is_faire_channel:
+        # For Faire channel, use FaireData
+        query = db.session.query(
+            Item.id.label('item_id'),
+            Item.essor_code,
+            Item.essor_name,
+            Item.status.label('item_status'),
+            Asin.img_url.label('asin_img_url'),
+            Asin.status.label('asin_status'),
+            func.coalesce(
+                func.sum(
+                    case(
+                        (in_period(FaireData.date, 2024), FaireData.revenues),
+                        else_=0
+                    )
+                ),
+                0
+            ).label('revenues_2024'),
+            func.coalesce(
+                func.sum(
+                    case(
+                        (in_period(FaireData.date, 2025), FaireData.revenues),
+                        else_=0
+                    )
+                ),
+                0
+            ).label('revenues_2025')
+        ).join(
+            FaireData, Item.id == FaireData.item_id
+        ).outerjoin(
+            Asin, Item.asin_id == Asin.id
+        ).filter(
+            FaireData.customer_id.in_(customer_ids),
+            FaireData.brand_id == brand_id,
+            in_years(FaireData.date, 2024, 2025)
+        ).group_by(
+            Item.id,
+            Item.essor_code,
+            Item.essor_name,
+            Item.status,
+            Asin.img_url,
+            Asin.status
+        )
+    else:
+        # For other channels, use NetsuiteData
+        query = db.session.query(
+            Item.id.label('item_id'),
+            Item.essor_code,
+            Item.essor_name,
+            Item.status.label('item_status'),
+            Asin.img_url.label('asin_img_url'),
+            Asin.status.label('asin_status'),
+            func.coalesce(
+                func.sum(
+                    case(
+                        (in_period(NetsuiteData.date, 2024), NetsuiteData.revenues),
+                        else_=0
+                    )
+                ),
+                0
+            ).label('revenues_2024'),
+            func.coalesce(
+                func.sum(
+                    case(
+                        (in_period(NetsuiteData.date, 2025), NetsuiteData.revenues),
+                        else_=0
+                    )
+                ),
+                0
+            ).label('revenues_2025')
+        ).join(
+            NetsuiteData, Item.id == NetsuiteData.item_id
+        ).outerjoin(
+            Asin, Item.asin_id == Asin.id
+        ).filter(
+            NetsuiteData.customer_id.in_(customer_ids),
+            or_(NetsuiteData.channel_id == channel_id, NetsuiteData.channel_id.is_(None)),
+            NetsuiteData.brand_id == brand_id,
+            in_years(NetsuiteData.date, 2024, 2025)
+        ).group_by(
+            Item.id,
+            Item.essor_code,
+            Item.essor_name,
+            Item.status,
+            Asin.img_url,
+            Asin.status
+        )
+    
+    results = query.all()
+    print(f"[ASSORTMENT API] Query returned {len(results)} items")
+    
+    # Build items data from query results
+    items_data = []
+    for row in results:
+        rev_2024 = float(row.revenues_2024 or 0)
+        rev_2025 = float(row.revenues_2025 or 0)
+        
+        # Only include items with revenue in at least one year
+        if rev_2024 == 0 and rev_2025 == 0:
+            continue
+        
+        # Calculate YoY growth percentage
+        yoy_growth = None
+        if rev_2024 > 0:
+            yoy_growth = ((rev_2025 - rev_2024) / rev_2024) * 100
+        elif rev_2025 > 0:
+            yoy_growth = 100  # Infinite growth (from 0 to positive)
+        else:
+            yoy_growth = 0  # No growth (both 0)
+        
+        # Get ASIN status (prefer ASIN status, fallback to item status)
+        asin_status = row.asin_status if row.asin_status else (row.item_status if row.item_status else None)
+        
+        items_data.append({
+            'item_id': row.item_id,
+            'essor_code': row.essor_code or '',
+            'essor_name': row.essor_name or '',
+            'revenues_2024': rev_2024,
+            'revenues_2025': rev_2025,
+            'yoy_growth': yoy_growth,
+            'asin_img_url': row.asin_img_url,
+            'asin_status': asin_status
+        })
+    
+    return items_data
+
+
 @core_bp.route('/customers/api/assortment-by-channel')
 @login_required
 def api_assortment_by_channel():
     """API endpoint for assortment filtered by channel and brand"""
-    from models import Item, NetsuiteData, FaireData, Asin, db
-    from sqlalchemy import func, extract, or_, case
     import math
-    import traceback
     
     print(f"[ASSORTMENT API] Request received: {request.args}")
     
@@ -786,166 +989,9 @@ def api_assortment_by_channel():
         traceback.print_exc()
         return jsonify({'error': f'Channel or Brand not found: {str(e)}'}), 404
     
-    # Get all customers matching the channel and brand
     try:
-        customers = ChannelCustomer.query.filter_by(
-            channel_id=channel_id,
-            brand_id=brand_id
-        ).all()
-        print(f"[ASSORTMENT API] Found {len(customers)} customers")
-    except Exception as e:
-        print(f"[ASSORTMENT API] ERROR querying customers: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': f'Error querying customers: {str(e)}'}), 500
-    
-    if not customers:
-        print(f"[ASSORTMENT API] No customers found, returning empty result")
-        return jsonify({
-            'items': [],
-            'pagination': {
-                'total': 0,
-                'page': page,
-                'per_page': per_page,
-                'total_pages': 0
-            }
-        })
-    
-    customer_ids = [c.id for c in customers]
-    print(f"[ASSORTMENT API] Customer IDs: {customer_ids}")
-    
-    try:
-        # Check if this is Faire channel (id=11)
-        is_faire_channel = (channel_id == 11)
-        
-        # Single SQL query with joins to get all data at once
-        print(f"[ASSORTMENT API] Executing single SQL query with joins... (Faire channel: {is_faire_channel})")
-        
-        from sqlalchemy import case
-        
-        if is_faire_channel:
-            # For Faire channel, use FaireData
-            query = db.session.query(
-                Item.id.label('item_id'),
-                Item.essor_code,
-                Item.essor_name,
-                Item.status.label('item_status'),
-                Asin.img_url.label('asin_img_url'),
-                Asin.status.label('asin_status'),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (extract('year', FaireData.date) == 2024, FaireData.revenues),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('revenues_2024'),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (extract('year', FaireData.date) == 2025, FaireData.revenues),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('revenues_2025')
-            ).join(
-                FaireData, Item.id == FaireData.item_id
-            ).outerjoin(
-                Asin, Item.asin_id == Asin.id
-            ).filter(
-                FaireData.customer_id.in_(customer_ids),
-                FaireData.brand_id == brand_id
-            ).group_by(
-                Item.id,
-                Item.essor_code,
-                Item.essor_name,
-                Item.status,
-                Asin.img_url,
-                Asin.status
-            )
-        else:
-            # For other channels, use NetsuiteData
-            query = db.session.query(
-                Item.id.label('item_id'),
-                Item.essor_code,
-                Item.essor_name,
-                Item.status.label('item_status'),
-                Asin.img_url.label('asin_img_url'),
-                Asin.status.label('asin_status'),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (extract('year', NetsuiteData.date) == 2024, NetsuiteData.revenues),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('revenues_2024'),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (extract('year', NetsuiteData.date) == 2025, NetsuiteData.revenues),
-                            else_=0
-                        )
-                    ),
-                    0
-                ).label('revenues_2025')
-            ).join(
-                NetsuiteData, Item.id == NetsuiteData.item_id
-            ).outerjoin(
-                Asin, Item.asin_id == Asin.id
-            ).filter(
-                NetsuiteData.customer_id.in_(customer_ids),
-                or_(NetsuiteData.channel_id == channel_id, NetsuiteData.channel_id.is_(None)),
-                NetsuiteData.brand_id == brand_id
-            ).group_by(
-                Item.id,
-                Item.essor_code,
-                Item.essor_name,
-                Item.status,
-                Asin.img_url,
-                Asin.status
-            )
-        
-        print(f"[ASSORTMENT API] Query built, executing...")
-        results = query.all()
-        print(f"[ASSORTMENT API] Query returned {len(results)} items")
-        
-        # Build items data from query results
-        items_data = []
-        for row in results:
-            rev_2024 = float(row.revenues_2024 or 0)
-            rev_2025 = float(row.revenues_2025 or 0)
-            
-            # Only include items with revenue in at least one year
-            if rev_2024 == 0 and rev_2025 == 0:
-                continue
-            
-            # Calculate YoY growth percentage
-            yoy_growth = None
-            if rev_2024 > 0:
-                yoy_growth = ((rev_2025 - rev_2024) / rev_2024) * 100
-            elif rev_2025 > 0:
-                yoy_growth = 100  # Infinite growth (from 0 to positive)
-            else:
-                yoy_growth = 0  # No growth (both 0)
-            
-            # Get ASIN status (prefer ASIN status, fallback to item status)
-            asin_status = row.asin_status if row.asin_status else (row.item_status if row.item_status else None)
-            
-            items_data.append({
-                'item_id': row.item_id,
-                'essor_code': row.essor_code or '',
-                'essor_name': row.essor_name or '',
-                'revenues_2024': rev_2024,
-                'revenues_2025': rev_2025,
-                'yoy_growth': yoy_growth,
-                'asin_img_url': row.asin_img_url,
-                'asin_status': asin_status
-            })
-        
+        # Shared across workers, sorting and pagination are applied to the cached list
+        items_data = _assortment_items(channel_id=channel_id, brand_id=brand_id)
         print(f"[ASSORTMENT API] Built {len(items_data)} items (filtered to items with revenue)")
         
         # Sort based on sort_by and sort_order
@@ -1030,6 +1076,8 @@ def upload_asin_mapping():
         'errors': []
     }
     
+    error_sink = ImportErrorSink().activate()
+    
     try:
         # Read CSV file
         stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
@@ -1091,19 +1139,8 @@ def upload_asin_mapping():
                 results['errors'].append(error_msg)
                 results['skipped'] += 1
                 
-                # Save import error
-                try:
-                    import_error = ImportError(
-                        import_channel='asin_mapping',
-                        import_date=datetime.utcnow(),
-                        error_data=json.dumps(row),
-                        error_message=error_msg,
-                        row_number=row_num
-                    )
-                    db.session.add(import_error)
-                    db.session.commit()
-                except:
-                    db.session.rollback()
+                # Save import error (grouped by the error sink, written outside this session)
+                record_import_error('asin_mapping', row, error_msg, row_num)
         
         db.session.commit()
         flash(f'Import completed: {results["processed"]} processed, {results["created"]} ASINs created, {results["updated"]} items updated, {results["skipped"]} skipped', 'success')
@@ -1112,6 +1149,8 @@ def upload_asin_mapping():
         db.session.rollback()
         flash(f'Error processing file: {str(e)}', 'error')
         results['errors'].append(f"File processing error: {str(e)}")
+    finally:
+        error_sink.close()
     
     return render_template('core/upload_asin.html', results=results)
 
@@ -1204,34 +1243,13 @@ def items_list():
 @core_bp.route('/items/export')
 @login_required
 def items_export():
-    """Export all items to CSV"""
-    items = Item.query.join(Brand).outerjoin(Category).order_by(Brand.name, Category.name, Item.essor_code).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Essor Code', 'Essor Name', 'Brand', 'Category'])
-    
-    # Write data
-    for item in items:
-        writer.writerow([
-            item.essor_code or '',
-            item.essor_name or '',
-            item.brand.name if item.brand else '',
-            item.category.name if item.category else ''
-        ])
-    
-    output.seek(0)
-    
-    # Create response with CSV
-    response = Response(
-        output.getvalue(),
+    """Export all items to CSV (streamed)"""
+    columns, stmt = build_export('items', request.args)
+    return Response(
+        stream_with_context(stream_csv(columns, stmt)),
         mimetype='text/csv',
         headers={'Content-Disposition': 'attachment; filename=items_export.csv'}
     )
-    
-    return response
 
 @core_bp.route('/items/create', methods=['GET', 'POST'])
 @login_required
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Streaming exports of the fact tables (and items) as CSV, gzipped CSV or Parquet
+
+Rows are read through a server-side cursor (yield_per) and written out batch by batch
+from a generator, so memory stays constant whatever the number of rows and the first
+bytes are sent before the query has finished.
+"""
+
+import csv
+import io
+import zlib
+from datetime import datetime
+from sqlalchemy import select
+from models import (db, Brand, Category, Channel, ChannelCustomer, Item, NetsuiteData, SellthroughData,
+                    FaireData, SpinsData, SpinsBrand, SpinsChannel, SpinsItem)
+
+BATCH_SIZE = 5000
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+# ==================== Datasets ====================
+# Each dataset: columns as (header, expression, kind), the filterable columns, the date column
+# used by date_from/date_to (inclusive, like the list views) and the export order.
+
+def _netsuite_dataset():
+    columns = [
+        ('Date', NetsuiteData.date, 'date'),
+        ('Brand', Brand.name, 'str'),
+        ('Essor Code', Item.essor_code, 'str'),
+        ('Essor Name', Item.essor_name, 'str'),
+        ('Channel', Channel.name, 'str'),
+        ('Customer', ChannelCustomer.name, 'str'),
+        ('Retailer Code', NetsuiteData.retailer_code, 'str'),
+        ('Internal ID', NetsuiteData.internal_id, 'str'),
+        ('Revenues', NetsuiteData.revenues, 'decimal'),
+        ('Units', NetsuiteData.units, 'int'),
+    ]
+    stmt = select(*[column for _, column, _ in columns]).select_from(NetsuiteData) \
+        .outerjoin(Brand, NetsuiteData.brand_id == Brand.id) \
+        .outerjoin(Item, NetsuiteData.item_id == Item.id) \
+        .outerjoin(Channel, NetsuiteData.channel_id == Channel.id) \
+        .outerjoin(ChannelCustomer, NetsuiteData.customer_id == ChannelCustomer.id)
+    filters = {
+        'brand_id': NetsuiteData.brand_id,
+        'item_id': NetsuiteData.item_id,
+        'channel_id': NetsuiteData.channel_id,
+        'customer_id': NetsuiteData.customer_id,
+    }
+    return columns, stmt, filters, NetsuiteData.date, [NetsuiteData.date, NetsuiteData.id]
+
+
+def _sellthrough_dataset():
+    columns = [
+        ('Date', SellthroughData.date, 'date'),
+        ('Brand', Brand.name, 'str'),
+        ('Essor Code', Item.essor_code, 'str'),
+        ('Essor Name', Item.essor_name, 'str'),
+        ('Channel', Channel.name, 'str'),
+        ('Customer', ChannelCustomer.name, 'str'),
+        ('Channel Code', SellthroughData.channel_code, 'str'),
+        ('Revenues', SellthroughData.revenues, 'decimal'),
+        ('Units', SellthroughData.units, 'int'),
+        ('Stores', SellthroughData.stores, 'int'),
+        ('OOS', SellthroughData.oos, 'decimal'),
+        ('USD PSPW', SellthroughData.usd_pspw, 'decimal'),
+        ('Units PSPW', SellthroughData.units_pspw, 'decimal'),
+        ('In Stock', SellthroughData.instock, 'decimal'),
+    ]
+    stmt = select(*[column for _, column, _ in columns]).select_from(SellthroughData) \
+        .outerjoin(Brand, SellthroughData.brand_id == Brand.id) \
+        .outerjoin(Item, SellthroughData.item_id == Item.id) \
+        .outerjoin(Channel, SellthroughData.channel_id == Channel.id) \
+        .outerjoin(ChannelCustomer, SellthroughData.customer_id == ChannelCustomer.id)
+    filters = {
+        'brand_id': SellthroughData.brand_id,
+        'item_id': SellthroughData.item_id,
+        'channel_id': SellthroughData.channel_id,
+        'customer_id': SellthroughData.customer_id,
+    }
+    return columns, stmt, filters, SellthroughData.date, [SellthroughData.date, SellthroughData.id]
+
+
+def _faire_dataset():
+    columns = [
+        ('Date', FaireData.date, 'date'),
+        ('Brand', Brand.name, 'str'),
+        ('Essor Code', Item.essor_code, 'str'),
+        ('Essor Name', Item.essor_name, 'str'),
+        ('Customer', ChannelCustomer.name, 'str'),
+        ('Revenues', FaireData.revenues, 'decimal'),
+        ('Units', FaireData.units, 'int'),
+    ]
+    stmt = select(*[column for _, column, _ in columns]).select_from(FaireData) \
+        .outerjoin(Brand, FaireData.brand_id == Brand.id) \
+        .outerjoin(Item, FaireData.item_id == Item.id) \
+        .outerjoin(ChannelCustomer, FaireData.customer_id == ChannelCustomer.id)
+    filters = {
+        'brand_id': FaireData.brand_id,
+        'item_id': FaireData.item_id,
+        'customer_id': FaireData.customer_id,
+    }
+    return columns, stmt, filters, FaireData.date, [FaireData.date, FaireData.id]
+
+
+def _spins_dataset():
+    columns = [
+        ('Week', SpinsData.week, 'date'),
+        ('Brand', SpinsBrand.name, 'str'),
+        ('UPC', SpinsItem.upc, 'str'),
+        ('Item', SpinsItem.name, 'str'),
+        ('Channel', SpinsChannel.name, 'str'),
+        ('Stores Total', SpinsData.stores_total, 'int'),
+        ('Stores Selling', SpinsData.stores_selling, 'decimal'),
+        ('Revenues', SpinsData.revenues, 'decimal'),
+        ('Units', SpinsData.units, 'int'),
+        ('ARP', SpinsData.arp, 'decimal'),
+        ('Avg Weekly Revenues per Selling Item', SpinsData.average_weekly_revenues_per_selling_item, 'decimal'),
+        ('Avg Weekly Units per Selling Item', SpinsData.average_weekly_units_per_selling_item, 'decimal'),
+    ]
+    stmt = select(*[column for _, column, _ in columns]).select_from(SpinsData) \
+        .join(SpinsBrand, SpinsData.brand_id == SpinsBrand.id) \
+        .join(SpinsItem, SpinsData.item_id == SpinsItem.id) \
+        .join(SpinsChannel, SpinsData.channel_id == SpinsChannel.id)
+    filters = {
+        'brand_id': SpinsData.brand_id,
+        'item_id': SpinsData.item_id,
+        'channel_id': SpinsData.channel_id,
+    }
+    return columns, stmt, filters, SpinsData.week, [SpinsData.week, SpinsData.id]
+
+
+def _items_dataset():
+    columns = [
+        ('Essor Code', Item.essor_code, 'str'),
+        ('Essor Name', Item.essor_name, 'str'),
+        ('Brand', Brand.name, 'str'),
+        ('Category', Category.name, 'str'),
+    ]
+    stmt = select(*[column for _, column, _ in columns]).select_from(Item) \
+        .join(Brand, Item.brand_id == Brand.id) \
+        .outerjoin(Category, Item.category_id == Category.id)
+    filters = {
+        'brand_id': Item.brand_id,
+        'category_id': Item.category_id,
+    }
+    return columns, stmt, filters, None, [Brand.name, Category.name, Item.essor_code]
+
+
+DATASETS = {
+    'netsuite': _netsuite_dataset,
+    'sellthrough': _sellthrough_dataset,
+    'faire': _faire_dataset,
+    'spins': _spins_dataset,
+    'items': _items_dataset,
+}
+
+
+def build_export(dataset, args):
+    """Columns and filtered statement of a dataset
+
+    Args:
+        dataset: key of DATASETS
+        args: request args (brand_id, item_id, channel_id, customer_id, category_id, date_from, date_to)
+
+    Returns:
+        (columns, statement), raises ValueError on unknown dataset or bad dates
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown dataset: {dataset}')
+    columns, stmt, filters, date_column, order_by = DATASETS[dataset]()
+
+    for name, column in filters.items():
+        value = args.get(name, type=int)
+        if value:
+            stmt = stmt.where(column == value)
+
+    if date_column is not None:
+        try:
+            if args.get('date_from'):
+                stmt = stmt.where(date_column >= datetime.strptime(args['date_from'], '%Y-%m-%d').date())
+            if args.get('date_to'):
+                stmt = stmt.where(date_column <= datetime.strptime(args['date_to'], '%Y-%m-%d').date())
+        except ValueError:
+            raise ValueError('Dates must use the YYYY-MM-DD format')
+
+    return columns, stmt.order_by(*order_by)
+
+
+# ==================== Writers ====================
+
+def _batches(stmt):
+    """Rows of stmt in lists of BATCH_SIZE, read through a server-side cursor"""
+    result = db.session.execute(stmt.execution_options(yield_per=BATCH_SIZE))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def stream_csv(columns, stmt, compress=False):
+    """Generate the CSV export (gzip-compressed with compress) chunk by chunk"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow([header for header, _, _ in columns])
+    yield flush()
+
+    for rows in _batches(stmt):
+        writer.writerows(rows)
+        chunk = flush()
+        if chunk:
+            yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object collecting what the Parquet writer produces, drained after each row group"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer.write(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def stream_parquet(columns, stmt):
+    """Generate the Parquet export, one row group per batch (requires pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {'date': pa.date32(), 'int': pa.int64(), 'decimal': pa.float64(), 'str': pa.string()}
+    schema = pa.schema([(header, arrow_types[kind]) for header, _, kind in columns])
+    decimal_positions = [index for index, (_, _, kind) in enumerate(columns) if kind == 'decimal']
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for rows in _batches(stmt):
+            values = [list(column) for column in zip(*rows)]
+            for index in decimal_positions:
+                values[index] = [float(value) if value is not None else None for value in values[index]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def parquet_available():
+    """Whether pyarrow is installed"""
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Conditional GET caching of the JSON chart APIs
+
+The ETag of a response is a hash of the endpoint, its normalized query string, the
+version counters of the tables it reads (core.refdata), which imports bump on commit,
+and the current day, since views compute relative periods (last 12 months, year to date)
+from today.
+A browser revalidating with If-None-Match gets a 304 without the view running, and
+recent payloads are kept in a bounded in-process LRU, so flipping back to filters
+already seen by anyone on the worker costs one version read.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from flask import request, make_response, Response
+from core.refdata import table_versions
+
+MAX_ENTRIES = 256
+MAX_PAYLOAD_BYTES = 2 * 1024 * 1024
+
+_payloads = OrderedDict()
+_payloads_lock = threading.Lock()
+
+
+def _etag(tables):
+    """ETag of the current request, None when the data versions can't be read"""
+    versions = table_versions(tables)
+    if versions is None:
+        return None
+    # Empty values are the same as missing filters, parameter order doesn't matter
+    args = [(key, [value for value in values if value != '']) for key, values in sorted(request.args.lists())]
+    key = repr((request.endpoint, [(name, values) for name, values in args if values], versions, date.today().isoformat()))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _get_payload(etag):
+    with _payloads_lock:
+        body = _payloads.get(etag)
+        if body is not None:
+            _payloads.move_to_end(etag)
+        return body
+
+
+def _store_payload(etag, body):
+    if len(body) > MAX_PAYLOAD_BYTES:
+        return
+    with _payloads_lock:
+        _payloads[etag] = body
+        _payloads.move_to_end(etag)
+        while len(_payloads) > MAX_ENTRIES:
+            _payloads.popitem(last=False)
+
+
+def clear():
+    """Drop the cached payloads of this process (benchmarks of cold requests)"""
+    with _payloads_lock:
+        _payloads.clear()
+
+
+def _conditional_response(body, etag, status=200):
+    response = Response(body, status=status, mimetype='application/json')
+    response.set_etag(etag)
+    # Login-protected data, and the browser must revalidate since imports change it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def etag_cached(*tables):
+    """Cache a JSON view by ETag, keyed on the versions of the tables it reads and on the day
+    
+    Only 200 JSON responses are cached, errors always go through the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = _etag(tables)
+            if etag is None:
+                return view(*args, **kwargs)
+            if etag in request.if_none_match:
+                return _conditional_response(b'', etag, status=304)
+            
+            body = _get_payload(etag)
+            if body is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.mimetype != 'application/json':
+                    return response
+                body = response.get_data()
+                _store_payload(etag, body)
+            return _conditional_response(body, etag)
+        return wrapper
+    return decorator
+
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Keyset (seek) pagination for large listings
+
+Instead of OFFSET + COUNT(*), each page is fetched with a WHERE on the sort key of the
+last row seen (e.g. (date, id) < (:date, :id)), so any page costs the same as the
+first one when an index matches the sort. Cursors are opaque url-safe strings, and the
+total can be the planner's estimate (EXPLAIN) instead of an exact count.
+"""
+
+import json
+import base64
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import and_, or_, tuple_
+from models import db
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query"""
+
+    def __init__(self, items, per_page, has_next, has_prev, next_cursor, prev_cursor, total=None, total_is_estimate=False):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+
+# ==================== Cursors ====================
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'n': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'n' in value:
+            return Decimal(value['n'])
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    """Encode the sort key of a row into an opaque cursor"""
+    payload = json.dumps({'dir': direction, 'key': [_encode_value(value) for value in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (direction, values), raises ValueError if it is invalid"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        direction = payload['dir']
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return direction, [_decode_value(value) for value in payload['key']]
+    except Exception as e:
+        raise ValueError(f'Invalid cursor: {str(e)}')
+
+
+# ==================== Counting ====================
+
+def estimate_count(query):
+    """Row count estimated by the planner (EXPLAIN, nothing is scanned), None if unavailable"""
+    statement = query.order_by(None).statement
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    try:
+        with db.session.begin_nested():
+            plan = db.session.connection().exec_driver_sql(
+                f'EXPLAIN (FORMAT JSON) {compiled.string}', compiled.params
+            ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        print(f"  ⚠ Could not estimate row count: {str(e)}")
+        return None
+
+
+# ==================== Pagination ====================
+
+def _seek_condition(keys, values, backwards):
+    """Rows strictly after (or before, when going backwards) the given key values"""
+    def goes_down(order):
+        return (order == 'desc') != backwards
+
+    orders = {order for _, order in keys}
+    if len(orders) == 1:
+        # Same direction on every key: row value comparison, served by a matching composite index
+        columns = tuple_(*[column for column, _ in keys])
+        return columns < tuple_(*values) if goes_down(keys[0][1]) else columns > tuple_(*values)
+
+    # Mixed directions: (k1 op v1) OR (k1 = v1 AND k2 op v2) OR ...
+    conditions = []
+    for index, (column, order) in enumerate(keys):
+        equal_prefix = [keys[i][0] == values[i] for i in range(index)]
+        step = column < values[index] if goes_down(order) else column > values[index]
+        conditions.append(and_(*equal_prefix, step))
+    return or_(*conditions)
+
+
+def keyset_paginate(query, keys, cursor=None, per_page=50, count='estimate', having=False):
+    """Fetch one page of query ordered by keys
+
+    Args:
+        query: filtered query (its own ordering is replaced)
+        keys: list of (expression, 'asc'|'desc'), the last one must make the order unique (e.g. id);
+              expressions must not be NULL (wrap nullable columns in coalesce)
+        cursor: cursor from a previous page (None or invalid = first page)
+        per_page: rows per page
+        count: 'estimate' (planner statistics), 'exact' (COUNT(*)) or None
+        having: apply the seek condition with HAVING (keys are aggregates of a grouped query)
+
+    Returns:
+        KeysetPage (items are entities for single-entity queries, rows otherwise)
+    """
+    direction, values = 'next', None
+    if cursor:
+        try:
+            direction, values = decode_cursor(cursor)
+            if len(values) != len(keys):
+                direction, values = 'next', None
+        except ValueError:
+            direction, values = 'next', None
+    backwards = direction == 'prev'
+
+    single_entity = len(query.column_descriptions) == 1
+    page_query = query
+    if values is not None:
+        condition = _seek_condition(keys, values, backwards)
+        page_query = page_query.having(condition) if having else page_query.filter(condition)
+
+    order_by = [
+        column.desc() if (order == 'desc') != backwards else column.asc()
+        for column, order in keys
+    ]
+    rows = page_query.add_columns(
+        *[column.label(f'_keyset_{index}') for index, (column, _) in enumerate(keys)]
+    ).order_by(None).order_by(*order_by).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    key_count = len(keys)
+    items = [row[0] if single_entity else row for row in rows]
+    first_key = list(rows[0][-key_count:]) if rows else None
+    last_key = list(rows[-1][-key_count:]) if rows else None
+
+    if backwards:
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = values is not None, has_more
+
+    total = None
+    if count == 'exact':
+        total = query.order_by(None).count()
+    elif count == 'estimate':
+        total = estimate_count(query)
+
+    return KeysetPage(
+        items=items,
+        per_page=per_page,
+        has_next=has_next and last_key is not None,
+        has_prev=has_prev and first_key is not None,
+        next_cursor=encode_cursor(last_key, 'next') if last_key is not None else None,
+        prev_cursor=encode_cursor(first_key, 'prev') if first_key is not None else None,
+        total=total,
+        total_is_estimate=count == 'estimate'
+    )
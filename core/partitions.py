@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Range partitions of the fact tables (netsuite_data, faire_data, sellthrough_data, spins_data)
+
+Each table is partitioned on its date (week for SPINS) by year or quarter, with a
+DEFAULT partition catching rows outside every range. Queries filtering on a date
+range only scan the partitions of that range. ensure_partitions() creates the
+partitions of the coming periods ahead of time and moves rows that landed in the
+DEFAULT partition into their own partition.
+
+A full reload of a period fills a staging table inside reload_partition(), which then
+swaps it in place of the period's partition in one short transaction: readers see the
+old rows or the new ones, and the reload leaves no dead tuples behind.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from datetime import date
+from sqlalchemy import text, insert, table as table_clause, column
+from sqlalchemy.exc import OperationalError
+from models import db
+
+# Interval of new partitions, changing it only affects partitions created afterwards
+PARTITIONED_TABLES = {
+    'netsuite_data': {'column': 'date', 'interval': 'year'},
+    'faire_data': {'column': 'date', 'interval': 'year'},
+    'sellthrough_data': {'column': 'date', 'interval': 'year'},
+    'spins_data': {'column': 'week', 'interval': 'year'},
+}
+
+# Partitions created ahead of the current period
+FUTURE_PERIODS = 1
+
+CHUNK_SIZE = 1000
+
+# DETACH locks the whole parent table: give up after this long waiting on its readers
+# rather than queueing every new reader behind the swap, and retry a few times
+SWAP_LOCK_TIMEOUT = '5s'
+SWAP_ATTEMPTS = 3
+SWAP_RETRY_DELAY = 10
+
+LOCK_NOT_AVAILABLE = '55P03'  # SQLSTATE of an expired lock_timeout
+
+_BOUND_PATTERN = re.compile(r"FROM \('([0-9-]+)'\) TO \('([0-9-]+)'\)")
+
+
+# ==================== Periods ====================
+
+def period_start(day, interval):
+    """First day of the year or quarter of day"""
+    if interval == 'quarter':
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return date(day.year, 1, 1)
+
+
+def next_period(start, interval):
+    """First day of the period following the one starting on start"""
+    if interval == 'quarter':
+        month = start.month + 3
+        return date(start.year + (month > 12), (month - 1) % 12 + 1, 1)
+    return date(start.year + 1, 1, 1)
+
+
+def partition_name(table_name, start, interval):
+    """netsuite_data_2025, or netsuite_data_2025q1 for quarters"""
+    if interval == 'quarter':
+        return f'{table_name}_{start.year}q{(start.month - 1) // 3 + 1}'
+    return f'{table_name}_{start.year}'
+
+
+# ==================== Catalog ====================
+
+def is_partitioned(table_name, conn=None):
+    """Whether table_name is a partitioned table (False before the partitioning migration)"""
+    if conn is None:
+        with db.engine.connect() as own_conn:
+            return is_partitioned(table_name, own_conn)
+    if conn.dialect.name != 'postgresql':
+        return False
+    return conn.execute(
+        text('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))'),
+        {'name': table_name}
+    ).scalar()
+
+
+def list_partitions(table_name, conn):
+    """[(name, start, end)] of the partitions of table_name, start and end are None for DEFAULT"""
+    rows = conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:name)
+        ORDER BY c.relname
+    """), {'name': table_name}).all()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_PATTERN.search(bound or '')
+        if match:
+            partitions.append((name, date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2))))
+        else:
+            partitions.append((name, None, None))
+    return partitions
+
+
+def _lock(conn, table_name):
+    """Serialize partition maintenance and reloads of a table"""
+    conn.execute(text('SELECT pg_advisory_xact_lock(hashtext(:key))'), {'key': f'offline:partitions:{table_name}'})
+
+
+def _default_partition(partitions):
+    return next((name for name, start, _ in partitions if start is None), None)
+
+
+def _create_partition(conn, table_name, start, end, partitions):
+    """Create the partition [start, end) of table_name, moving its rows out of the DEFAULT partition"""
+    settings = PARTITIONED_TABLES[table_name]
+    name = partition_name(table_name, start, settings['interval'])
+    period = f"{settings['column']} >= '{start.isoformat()}' AND {settings['column']} < '{end.isoformat()}'"
+    conn.execute(text(f'CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    default = _default_partition(partitions)
+    if default:
+        moved = conn.execute(text(f'INSERT INTO {name} SELECT * FROM {default} WHERE {period}')).rowcount
+        if moved:
+            conn.execute(text(f'DELETE FROM {default} WHERE {period}'))
+            print(f"  ↻ Moved {moved} rows of {table_name} from {default} to {name}")
+    conn.execute(text(
+        f"ALTER TABLE {table_name} ATTACH PARTITION {name} FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    partitions.append((name, start, end))
+    return name
+
+
+def _covering_partition(partitions, day):
+    return next(((name, start, end) for name, start, end in partitions if start is not None and start <= day < end), None)
+
+
+# ==================== Maintenance ====================
+
+def ensure_partitions(table_names=None, today=None):
+    """Create the partitions of the current and coming periods, and of the periods found in DEFAULT
+
+    Returns:
+        dict table name -> list of partitions created
+    """
+    today = today or date.today()
+    created = {}
+    for table_name in table_names or PARTITIONED_TABLES:
+        settings = PARTITIONED_TABLES[table_name]
+        interval = settings['interval']
+        with db.engine.begin() as conn:
+            if not is_partitioned(table_name, conn):
+                print(f"  ⏭ {table_name} is not partitioned, skipped")
+                continue
+            _lock(conn, table_name)
+            partitions = list_partitions(table_name, conn)
+
+            needed = set()
+            start = period_start(today, interval)
+            for _ in range(FUTURE_PERIODS + 1):
+                needed.add(start)
+                start = next_period(start, interval)
+            default = _default_partition(partitions)
+            if default:
+                needed.update(period_start(day, interval) for day, in conn.execute(text(
+                    f"SELECT DISTINCT date_trunc('{interval}', {settings['column']})::date FROM {default}"
+                )))
+
+            created[table_name] = []
+            for start in sorted(needed):
+                end = next_period(start, interval)
+                # Skip periods overlapping an existing partition (e.g. a year when switching to quarters)
+                if any(s is not None and s < end and start < e for _, s, e in partitions):
+                    continue
+                created[table_name].append(_create_partition(conn, table_name, start, end, partitions))
+        if created.get(table_name):
+            print(f"✓ Created partitions {', '.join(created[table_name])}")
+    return created
+
+
+# ==================== Reloads ====================
+
+def _staging_ddl(conn, table_name, staging):
+    """Constraints and indexes of the parent table, rebuilt on the staging table so ATTACH only has to match them"""
+    statements = []
+    constraints = conn.execute(text("""
+        SELECT pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = to_regclass(:name) AND contype IN ('p', 'u', 'f')
+        ORDER BY contype, conname
+    """), {'name': table_name}).scalars().all()
+    for number, definition in enumerate(constraints):
+        statements.append(f'ALTER TABLE {staging} ADD CONSTRAINT {staging}_c{number} {definition}')
+
+    indexes = conn.execute(text("""
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = to_regclass(:name)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        ORDER BY i.indexrelid
+    """), {'name': table_name}).scalars().all()
+    for number, definition in enumerate(indexes):
+        statements.append(re.sub(
+            r'^CREATE (UNIQUE )?INDEX \S+ ON ONLY \S+',
+            lambda match: f'CREATE {match.group(1) or ""}INDEX {staging}_i{number} ON {staging}',
+            definition
+        ))
+    return statements
+
+
+def insert_rows(conn, staging, rows):
+    """Insert row dicts (same keys) into the staging table of reload_partition()"""
+    if not rows:
+        return 0
+    target = table_clause(staging, *[column(key) for key in rows[0]])
+    for start in range(0, len(rows), CHUNK_SIZE):
+        conn.execute(insert(target), rows[start:start + CHUNK_SIZE])
+    return len(rows)
+
+
+@contextmanager
+def reload_partition(table_name, day):
+    """Replace the whole partition holding day with the rows loaded inside the block
+
+    Yields (conn, staging): fill the staging table on conn (see insert_rows). When the
+    block exits without error, the staging table gets the parent's constraints and
+    indexes and statistics, then replaces the partition (detach, drop, attach) and the
+    transaction commits. An error in the block rolls everything back, the partition is
+    untouched, as it is when readers hold the table past SWAP_ATTEMPTS lock timeouts
+    (RuntimeError).
+    """
+    settings = PARTITIONED_TABLES[table_name]
+    interval = settings['interval']
+    with db.engine.begin() as conn:
+        if not is_partitioned(table_name, conn):
+            raise RuntimeError(f'{table_name} is not partitioned, run the partitioning migration first')
+        _lock(conn, table_name)
+        partitions = list_partitions(table_name, conn)
+        partition = _covering_partition(partitions, day)
+        if partition is None:
+            start = period_start(day, interval)
+            _create_partition(conn, table_name, start, next_period(start, interval), partitions)
+            partition = _covering_partition(partitions, day)
+        name, start, end = partition
+
+        staging = f'{name}_r{int(time.time())}'
+        conn.execute(text(f'CREATE TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+        yield conn, staging
+
+        # Built before touching the parent, ATTACH then skips the range scan and index builds
+        conn.execute(text(
+            f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_range CHECK "
+            f"({settings['column']} >= '{start.isoformat()}' AND {settings['column']} < '{end.isoformat()}')"
+        ))
+        for statement in _staging_ddl(conn, table_name, staging):
+            conn.execute(text(statement))
+        # Statistics stay with the table through the rename, out of the locked swap
+        conn.execute(text(f'ANALYZE {staging}'))
+
+        conn.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+        for attempt in range(1, SWAP_ATTEMPTS + 1):
+            try:
+                with conn.begin_nested():
+                    _swap(conn, table_name, name, staging, start, end)
+                break
+            except OperationalError as e:
+                if getattr(e.orig, 'pgcode', None) != LOCK_NOT_AVAILABLE:
+                    raise
+                if attempt == SWAP_ATTEMPTS:
+                    raise RuntimeError(
+                        f'{table_name} stayed locked by readers, {name} was not replaced '
+                        f'({SWAP_ATTEMPTS} attempts of {SWAP_LOCK_TIMEOUT})'
+                    ) from e
+                print(f"  ⏳ {table_name} locked by readers, retrying the swap of {name} in {SWAP_RETRY_DELAY}s...")
+                time.sleep(SWAP_RETRY_DELAY)
+    print(f"✓ Swapped partition {name} of {table_name}")
+
+
+def _swap(conn, table_name, name, staging, start, end):
+    """Replace the partition name by the staging table, under an ACCESS EXCLUSIVE lock of table_name"""
+    conn.execute(text(f'ALTER TABLE {table_name} DETACH PARTITION {name}'))
+    conn.execute(text(f'DROP TABLE {name}'))
+    conn.execute(text(f'ALTER TABLE {staging} RENAME TO {name}'))
+    conn.execute(text(
+        f"ALTER TABLE {table_name} ATTACH PARTITION {name} FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    conn.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT {staging}_range'))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Period filters on date columns as half-open date ranges
+
+extract('year', date) == 2025 hides the column behind a function: the planner can
+neither use the (brand_id, date) style indexes nor prune the yearly partitions of the
+fact tables (core/partitions.py), so every such filter scans the whole table.
+in_period() expresses the same filter as date >= '2025-01-01' AND date < '2026-01-01',
+which both can use. Grouping or selecting on extract('month', ...) is fine, only
+predicates need to go through these helpers.
+"""
+
+from datetime import date
+from sqlalchemy import and_
+
+
+def period_bounds(year, month=None, quarter=None):
+    """(start, end) of a year, or of one of its months or quarters; end is excluded"""
+    if month is not None:
+        start = date(year, month, 1)
+        return start, date(year + month // 12, month % 12 + 1, 1)
+    if quarter is not None:
+        first_month = (quarter - 1) * 3 + 1
+        start = date(year, first_month, 1)
+        return start, date(year + (first_month + 3 > 12), (first_month + 2) % 12 + 1, 1)
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def in_period(column, year, month=None, quarter=None):
+    """column within the year (or month / quarter of it), as a sargable range predicate"""
+    start, end = period_bounds(year, month, quarter)
+    return and_(column >= start, column < end)
+
+
+def in_years(column, first_year, last_year):
+    """column between January 1st of first_year and December 31st of last_year"""
+    return and_(column >= date(first_year, 1, 1), column < date(last_year + 1, 1, 1))
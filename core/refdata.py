@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Process-wide cache of reference data used to fill filter dropdowns
+
+Lists are stored as lightweight named tuples and keyed by the version counters of
+the tables they are built from (reference_data_versions). Any ORM write to one of
+those tables bumps its counter on commit, so every gunicorn worker sees the change
+on its next request. Versions are read once per request.
+
+The fact tables read by the dashboard APIs are versioned the same way (DATA_TABLES),
+their counters key the ETags of core.http_cache.
+"""
+
+import threading
+from collections import namedtuple
+from datetime import datetime
+from flask import g, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from models import (db, Brand, Category, Channel, ChannelCustomer, Item,
+                    SpinsBrand, SpinsChannel, SpinsItem, ReferenceDataVersion)
+
+BrandRef = namedtuple('BrandRef', 'id name')
+ChannelRef = namedtuple('ChannelRef', 'id name netsuite_include')
+CategoryRef = namedtuple('CategoryRef', 'id name brand_id brand_name')
+CustomerRef = namedtuple('CustomerRef', 'id name channel_id channel_name')
+ItemRef = namedtuple('ItemRef', 'id essor_code essor_name brand_id brand_name category_id')
+SpinsItemRef = namedtuple('SpinsItemRef', 'id upc name')
+
+REFERENCE_TABLES = {
+    model.__tablename__
+    for model in (Brand, Category, Channel, ChannelCustomer, Item, SpinsBrand, SpinsChannel, SpinsItem)
+}
+
+# Fact tables whose versions key cached API responses (core.http_cache), and asins whose
+# status/image the shared assortment results show (core.result_cache)
+DATA_TABLES = {'netsuite_data', 'faire_data', 'sellthrough_data', 'sellthrough_weekly', 'spins_data', 'asins'}
+
+VERSIONED_TABLES = REFERENCE_TABLES | DATA_TABLES
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+# ==================== Versions ====================
+
+def _current_versions():
+    """Version counters of all reference tables (read once per request/app context)"""
+    versions = g.get('refdata_versions') if has_app_context() else None
+    if versions is None:
+        try:
+            # Own connection: a failure here must not abort the request transaction
+            with db.engine.connect() as conn:
+                versions = dict(conn.execute(
+                    select(ReferenceDataVersion.name, ReferenceDataVersion.version)
+                ).all())
+        except Exception as e:
+            print(f"  ⚠ Could not read reference data versions: {str(e)}")
+            return None
+        if has_app_context():
+            g.refdata_versions = versions
+    return versions
+
+
+def table_versions(tables):
+    """Version counters of tables (0 if never written), None when they can't be read"""
+    versions = _current_versions()
+    if versions is None:
+        return None
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def bump_versions(table_names):
+    """Bump the version counter of the given versioned tables (invalidates every worker's cache)"""
+    table_names = sorted(set(table_names) & VERSIONED_TABLES)
+    if not table_names:
+        return
+    table = ReferenceDataVersion.__table__
+    now = datetime.utcnow()
+    try:
+        with db.engine.begin() as conn:
+            stmt = insert(table).values([{'name': name, 'version': 1, 'updated_at': now} for name in table_names])
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.name],
+                set_={'version': table.c.version + 1, 'updated_at': now}
+            ))
+    except Exception as e:
+        print(f"  ⚠ Could not bump data versions for {', '.join(table_names)}: {str(e)}")
+    if has_app_context():
+        g.pop('refdata_versions', None)
+
+
+def touch_tables(table_names, session=None):
+    """Bump the versions of tables written with raw SQL when the current transaction commits"""
+    session = session or db.session()
+    session.info.setdefault('refdata_written', set()).update(set(table_names) & VERSIONED_TABLES)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    """Remember which versioned tables were written in this transaction"""
+    written = {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if getattr(obj, '__table__', None) is not None and obj.__table__.name in VERSIONED_TABLES
+    }
+    if written:
+        session.info.setdefault('refdata_written', set()).update(written)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_tables(orm_execute_state):
+    """Query.update()/delete() bypass the flush, catch them here"""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        table_name = orm_execute_state.bind_mapper.local_table.name
+        if table_name in VERSIONED_TABLES:
+            orm_execute_state.session.info.setdefault('refdata_written', set()).add(table_name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    written = session.info.pop('refdata_written', None)
+    if written:
+        bump_versions(written)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('refdata_written', None)
+
+
+# ==================== Cache ====================
+
+def _cached(key, tables, loader):
+    """Return the cached list for key, rebuilding it when one of its tables changed version"""
+    version_key = table_versions(tables)
+    if version_key is None:
+        return loader()
+
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == version_key:
+        return entry[1]
+
+    data = loader()
+    with _cache_lock:
+        _cache[key] = (version_key, data)
+    return data
+
+
+def get_brands():
+    """All brands ordered by name"""
+    return _cached('brands', ('brands',), lambda: [
+        BrandRef(*row) for row in db.session.query(Brand.id, Brand.name).order_by(Brand.name).all()
+    ])
+
+
+def get_channels(netsuite_only=False):
+    """All channels ordered by name (only those included in Netsuite with netsuite_only)"""
+    channels = _cached('channels', ('channels',), lambda: [
+        ChannelRef(*row) for row in db.session.query(
+            Channel.id, Channel.name, Channel.netsuite_include
+        ).order_by(Channel.name).all()
+    ])
+    if netsuite_only:
+        return [channel for channel in channels if channel.netsuite_include]
+    return channels
+
+
+def get_categories():
+    """Categories with their brand, ordered by brand then name"""
+    return _cached('categories', ('categories', 'brands'), lambda: [
+        CategoryRef(*row) for row in db.session.query(
+            Category.id, Category.name, Category.brand_id, Brand.name
+        ).join(Brand).order_by(Brand.name, Category.name).all()
+    ])
+
+
+def get_customers(channel_id=None):
+    """Channel customers ordered by channel then name (or by name within one channel)"""
+    customers = _cached('customers', ('channel_customers', 'channels'), lambda: [
+        CustomerRef(*row) for row in db.session.query(
+            ChannelCustomer.id, ChannelCustomer.name, ChannelCustomer.channel_id, Channel.name
+        ).join(Channel).order_by(Channel.name, ChannelCustomer.name).all()
+    ])
+    if channel_id is not None:
+        return [customer for customer in customers if customer.channel_id == channel_id]
+    return customers
+
+
+def get_items(by_brand=False):
+    """Items ordered by essor_code, or by brand then essor_code (items with a brand only)"""
+    if by_brand:
+        return _cached('items_by_brand', ('items', 'brands'), lambda: [
+            ItemRef(*row) for row in db.session.query(
+                Item.id, Item.essor_code, Item.essor_name, Item.brand_id, Brand.name, Item.category_id
+            ).join(Brand).order_by(Brand.name, Item.essor_code).all()
+        ])
+    return _cached('items', ('items', 'brands'), lambda: [
+        ItemRef(*row) for row in db.session.query(
+            Item.id, Item.essor_code, Item.essor_name, Item.brand_id, Brand.name, Item.category_id
+        ).outerjoin(Brand).order_by(Item.essor_code).all()
+    ])
+
+
+def get_spins_brands():
+    """All SPINS brands ordered by name"""
+    return _cached('spins_brands', ('spins_brands',), lambda: [
+        BrandRef(*row) for row in db.session.query(SpinsBrand.id, SpinsBrand.name).order_by(SpinsBrand.name).all()
+    ])
+
+
+def get_spins_channels():
+    """All SPINS channels ordered by name"""
+    return _cached('spins_channels', ('spins_channels',), lambda: [
+        ChannelRef(*row, True) for row in db.session.query(SpinsChannel.id, SpinsChannel.name).order_by(SpinsChannel.name).all()
+    ])
+
+
+def get_spins_items():
+    """All SPINS items ordered by UPC"""
+    return _cached('spins_items', ('spins_items',), lambda: [
+        SpinsItemRef(*row) for row in db.session.query(SpinsItem.id, SpinsItem.upc, SpinsItem.name).order_by(SpinsItem.upc).all()
+    ])
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Query result cache shared by every worker and replica (query_result_cache)
+
+Expensive aggregates are stored as JSON in an UNLOGGED table, keyed on the cached
+function name and its parameters. An entry is valid while the versions of the tables
+it reads (core.refdata) are unchanged and its TTL has not expired; least recently hit
+entries are evicted beyond MAX_ENTRIES. Concurrent misses on the same key are
+single-flighted with an advisory lock: one worker computes and writes its result on
+the lock's connection, the others wait and read it.
+
+Each entry counts the requests it served. After imports, warm() recomputes the most
+requested parameter combinations of the last days, so the first dashboard loads of
+the morning are hits. Without Postgres (or with RESULT_CACHE_BACKEND=local) an
+in-process LocalBackend stands in.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+from sqlalchemy import text
+from models import db
+from core.refdata import table_versions
+
+DEFAULT_TTL = 24 * 3600
+MAX_ENTRIES = 2000
+LOCK_TIMEOUT = '60s'  # Waiting longer than this on another worker's computation, compute it ourselves
+WARM_LIMIT = 50
+WARM_WINDOW_DAYS = 7
+
+# name -> (function, tables, ttl), filled by @shared_result
+_registry = {}
+
+
+# ==================== Backends ====================
+
+class PostgresBackend:
+    """Entries in the UNLOGGED query_result_cache table, each operation on its own connection"""
+
+    _GET_SQL = text("""
+        SELECT value FROM query_result_cache
+        WHERE key = :key AND versions = :versions AND expires_at > :now
+    """)
+
+    _HIT_SQL = text("""
+        UPDATE query_result_cache SET hits = hits + 1, last_hit_at = :now
+        WHERE key = :key AND versions = :versions AND expires_at > :now
+        RETURNING value
+    """)
+
+    _PUT_SQL = text("""
+        INSERT INTO query_result_cache (key, name, params, versions, value, created_at, expires_at, last_hit_at, hits)
+        VALUES (:key, :name, :params, :versions, :value, :now, :expires_at, :now, :hits)
+        ON CONFLICT (key) DO UPDATE SET
+            versions = EXCLUDED.versions,
+            value = EXCLUDED.value,
+            created_at = EXCLUDED.created_at,
+            expires_at = EXCLUDED.expires_at,
+            last_hit_at = CASE WHEN EXCLUDED.hits > 0 THEN EXCLUDED.last_hit_at ELSE query_result_cache.last_hit_at END,
+            hits = query_result_cache.hits + EXCLUDED.hits
+    """)
+
+    # Expired entries are kept (their hit counts drive warming) until they fall out of the LRU
+    _EVICT_SQL = text("""
+        DELETE FROM query_result_cache
+        WHERE last_hit_at < :stale_before
+           OR key IN (SELECT key FROM query_result_cache ORDER BY last_hit_at DESC OFFSET :max_entries)
+    """)
+
+    _TOP_SQL = text("""
+        SELECT name, params FROM query_result_cache
+        WHERE last_hit_at >= :since
+        ORDER BY hits DESC
+        LIMIT :limit
+    """)
+
+    def _get(self, conn, key, versions, count_hit):
+        sql = self._HIT_SQL if count_hit else self._GET_SQL
+        return conn.execute(sql, {'key': key, 'versions': versions, 'now': datetime.utcnow()}).scalar()
+
+    def _put(self, conn, key, name, params, versions, value, ttl, hits):
+        now = datetime.utcnow()
+        conn.execute(self._PUT_SQL, {
+            'key': key, 'name': name, 'params': params, 'versions': versions, 'value': value,
+            'now': now, 'expires_at': now + timedelta(seconds=ttl), 'hits': hits
+        })
+        conn.execute(self._EVICT_SQL, {
+            'stale_before': now - timedelta(days=WARM_WINDOW_DAYS), 'max_entries': MAX_ENTRIES
+        })
+
+    def get(self, key, versions, count_hit=True):
+        with db.engine.begin() as conn:
+            return self._get(conn, key, versions, count_hit)
+
+    def put(self, key, name, params, versions, value, ttl, hits):
+        with db.engine.begin() as conn:
+            self._put(conn, key, name, params, versions, value, ttl, hits)
+
+    @contextmanager
+    def single_flight(self, key):
+        """Hold a transaction-level advisory lock on key while the block computes the value
+        
+        Yields the entries as seen from the lock's connection: the holder reads and writes
+        on it, and put() or a get() finding the value commits, which releases the lock
+        (and keeps the hit counted), so a miss costs one connection besides the request's
+        own session.
+        """
+        conn = db.engine.connect()
+        trans = conn.begin()
+        try:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            conn.execute(text('SELECT pg_advisory_xact_lock(hashtext(:key))'), {'key': f'offline:result_cache:{key}'})
+        except Exception as e:
+            print(f"  ⚠ Result cache lock not acquired, computing without it: {str(e)}")
+            trans.rollback()
+            conn.close()
+            yield self
+            return
+        try:
+            yield _LockedEntries(self, conn, trans)
+        finally:
+            if trans.is_active:
+                trans.rollback()  # Releases the lock
+            conn.close()
+
+    def top(self, limit, days):
+        with db.engine.connect() as conn:
+            return conn.execute(self._TOP_SQL, {
+                'since': datetime.utcnow() - timedelta(days=days), 'limit': limit
+            }).all()
+
+
+class _LockedEntries:
+    """get/put of a PostgresBackend on the connection holding a single-flight lock"""
+
+    def __init__(self, backend, conn, trans):
+        self._backend = backend
+        self._conn = conn
+        self._trans = trans
+
+    def get(self, key, versions, count_hit=True):
+        value = self._backend._get(self._conn, key, versions, count_hit)
+        if value is not None:
+            self._trans.commit()  # Keeps the hit counted, and releases the lock
+        return value
+
+    def put(self, key, name, params, versions, value, ttl, hits):
+        self._backend._put(self._conn, key, name, params, versions, value, ttl, hits)
+        self._trans.commit()  # The value is visible to the waiters as they get the lock
+
+
+class LocalBackend:
+    """In-process stand-in with the same behaviour, for local databases and development"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, versions, count_hit=True):
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['versions'] != versions or entry['expires_at'] <= now:
+                return None
+            if count_hit:
+                entry['hits'] += 1
+                entry['last_hit_at'] = now
+                self._entries.move_to_end(key)
+            return entry['value']
+
+    def put(self, key, name, params, versions, value, ttl, hits):
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key) or {'name': name, 'params': params, 'hits': 0, 'last_hit_at': now}
+            entry.update(versions=versions, value=value, expires_at=now + timedelta(seconds=ttl))
+            if hits:
+                entry['hits'] += hits
+                entry['last_hit_at'] = now
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    @contextmanager
+    def single_flight(self, key):
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            yield self
+
+    def top(self, limit, days):
+        since = datetime.utcnow() - timedelta(days=days)
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if entry['last_hit_at'] >= since]
+        entries.sort(key=lambda entry: -entry['hits'])
+        return [(entry['name'], entry['params']) for entry in entries[:limit]]
+
+
+_backends = {}
+
+
+def get_backend():
+    """Backend from RESULT_CACHE_BACKEND ('postgres' or 'local'), by default Postgres when the app runs on it"""
+    name = os.getenv('RESULT_CACHE_BACKEND')
+    if name not in ('postgres', 'local'):
+        name = 'postgres' if db.engine.dialect.name == 'postgresql' else 'local'
+    if name not in _backends:
+        _backends[name] = PostgresBackend() if name == 'postgres' else LocalBackend()
+    return _backends[name]
+
+
+def clear_local():
+    """Drop the in-process LocalBackend entries (benchmarks of cold requests)"""
+    _backends.pop('local', None)
+
+
+# ==================== Cached calls ====================
+
+def _safe(operation, *args):
+    """Run a cache operation, a failing cache must never fail the request"""
+    try:
+        return operation(*args)
+    except Exception as e:
+        print(f"  ⚠ Result cache {operation.__name__} failed: {str(e)}")
+        return None
+
+
+def _get_or_compute(name, params, count_hit=True):
+    """(result, computed) of the registered function name for params"""
+    func, tables, ttl = _registry[name]
+    versions = table_versions(tables)
+    if versions is None:
+        return func(**params), True
+    versions = '.'.join(str(version) for version in versions)
+    params_json = json.dumps(params, sort_keys=True)
+    key = hashlib.sha1(f'{name}:{params_json}'.encode()).hexdigest()
+    backend = get_backend()
+
+    value = _safe(backend.get, key, versions, count_hit)
+    if value is not None:
+        return json.loads(value), False
+
+    with backend.single_flight(key) as entries:
+        # Another worker may have computed it while we waited for the lock
+        value = _safe(entries.get, key, versions, count_hit)
+        if value is not None:
+            return json.loads(value), False
+        result = func(**params)
+        _safe(entries.put, key, name, params_json, versions, json.dumps(result), ttl, 1 if count_hit else 0)
+    return result, True
+
+
+def shared_result(name, tables, ttl=DEFAULT_TTL):
+    """Cache the JSON-serializable result of a function called with keyword arguments
+
+    Args:
+        name: cache name of the function (stored with the entries, used by the warmer)
+        tables: versioned tables the result is computed from
+        ttl: seconds an entry stays valid when its tables don't change
+    """
+    def decorator(func):
+        _registry[name] = (func, tuple(tables), ttl)
+
+        @wraps(func)
+        def wrapper(**params):
+            return _get_or_compute(name, params)[0]
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+# ==================== Warming ====================
+
+def warm(limit=WARM_LIMIT, days=WARM_WINDOW_DAYS):
+    """Recompute the most requested entries of the last days that are stale or expired"""
+    results = {'candidates': 0, 'warmed': 0, 'fresh': 0, 'errors': 0}
+    entries = _safe(get_backend().top, limit, days) or []
+    results['candidates'] = len(entries)
+    for name, params in entries:
+        if name not in _registry:
+            continue
+        try:
+            _, computed = _get_or_compute(name, json.loads(params), count_hit=False)
+            results['warmed' if computed else 'fresh'] += 1
+        except Exception as e:
+            db.session.rollback()
+            results['errors'] += 1
+            print(f"  ⚠ Could not warm {name} {params}: {str(e)}")
+    print(f"✓ Warmed {results['warmed']} result cache entries ({results['fresh']} already fresh, {results['errors']} errors)")
+    return results
+
+
+def start_warm_job():
+    """Warm the cache in the background (after an import, off the request path)"""
+    from scheduler.jobs import run_job_in_background
+    run_job_in_background('result_cache_warm', trigger='import')
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Ranked typeahead search over items, customers and SPINS items
+
+Matching uses ILIKE substring and pg_trgm similarity (the % operator), both served by
+the gin_trgm_ops indexes. Results are ranked exact match first, then prefix match,
+then substring match, then by trigram similarity, so typos still find the record.
+"""
+
+from sqlalchemy import case, func, or_
+from models import db, Brand, Channel, ChannelCustomer, Item, SpinsItem
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def _escape_like(term):
+    """Escape LIKE wildcards typed by the user"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def match_filter(columns, term):
+    """Substring or fuzzy match on any of the columns"""
+    pattern = f'%{_escape_like(term)}%'
+    conditions = []
+    for column in columns:
+        conditions.append(column.ilike(pattern, escape='\\'))
+        conditions.append(column.op('%')(term))
+    return or_(*conditions)
+
+
+def match_rank_keys(columns, term):
+    """Match rank (3 exact, 2 prefix, 1 substring) and best trigram similarity expressions"""
+    escaped = _escape_like(term)
+    match_rank = case(
+        *[(func.lower(column) == term.lower(), 3) for column in columns],
+        *[(column.ilike(f'{escaped}%', escape='\\'), 2) for column in columns],
+        *[(column.ilike(f'%{escaped}%', escape='\\'), 1) for column in columns],
+        else_=0
+    )
+    similarity = func.greatest(*[func.coalesce(func.similarity(column, term), 0) for column in columns]) \
+        if len(columns) > 1 else func.coalesce(func.similarity(columns[0], term), 0)
+    return [match_rank, similarity]
+
+
+def rank_by_match(columns, term):
+    """Order by exact > prefix > substring, then best trigram similarity"""
+    return [key.desc() for key in match_rank_keys(columns, term)]
+
+
+def _clamp_limit(limit):
+    return max(1, min(limit or DEFAULT_LIMIT, MAX_LIMIT))
+
+
+def search_items(term, limit=DEFAULT_LIMIT, brand_id=None, category_id=None, ids=None):
+    """Search items by essor code and name"""
+    term = (term or '').strip()
+    query = db.session.query(
+        Item.id, Item.essor_code, Item.essor_name, Item.brand_id, Item.category_id, Brand.name.label('brand_name')
+    ).outerjoin(Brand, Item.brand_id == Brand.id)
+    if ids:
+        query = query.filter(Item.id.in_(ids))
+    if brand_id:
+        query = query.filter(Item.brand_id == brand_id)
+    if category_id:
+        query = query.filter(Item.category_id == category_id)
+
+    columns = [Item.essor_code, Item.essor_name]
+    if term:
+        query = query.filter(match_filter(columns, term)).order_by(*rank_by_match(columns, term), Item.essor_code)
+    else:
+        query = query.order_by(Brand.name, Item.essor_code)
+
+    return [{
+        'id': row.id,
+        'essor_code': row.essor_code or '',
+        'essor_name': row.essor_name or '',
+        'brand_id': row.brand_id,
+        'brand_name': row.brand_name or '',
+        'category_id': row.category_id,
+        'label': f"{row.brand_name or 'N/A'} - {row.essor_code or 'N/A'} - {row.essor_name or 'N/A'}"
+    } for row in query.limit(_clamp_limit(limit)).all()]
+
+
+def search_customers(term, limit=DEFAULT_LIMIT, channel_id=None, ids=None):
+    """Search channel customers by name"""
+    term = (term or '').strip()
+    query = db.session.query(
+        ChannelCustomer.id, ChannelCustomer.name, ChannelCustomer.channel_id, Channel.name.label('channel_name')
+    ).join(Channel, ChannelCustomer.channel_id == Channel.id)
+    if ids:
+        query = query.filter(ChannelCustomer.id.in_(ids))
+    if channel_id:
+        query = query.filter(ChannelCustomer.channel_id == channel_id)
+
+    columns = [ChannelCustomer.name]
+    if term:
+        query = query.filter(match_filter(columns, term)).order_by(*rank_by_match(columns, term), ChannelCustomer.name)
+    else:
+        query = query.order_by(Channel.name, ChannelCustomer.name)
+
+    return [{
+        'id': row.id,
+        'name': row.name,
+        'channel_id': row.channel_id,
+        'channel_name': row.channel_name,
+        'label': row.name if channel_id else f"{row.channel_name} - {row.name}"
+    } for row in query.limit(_clamp_limit(limit)).all()]
+
+
+def search_spins_items(term, limit=DEFAULT_LIMIT, brand_id=None, ids=None):
+    """Search SPINS items by UPC and name (brand_id filters on the dominant brand)"""
+    term = (term or '').strip()
+    query = db.session.query(SpinsItem.id, SpinsItem.upc, SpinsItem.name)
+    if ids:
+        query = query.filter(SpinsItem.id.in_(ids))
+    if brand_id:
+        query = query.filter(SpinsItem.dominant_brand_id == brand_id)
+
+    columns = [SpinsItem.upc, SpinsItem.name]
+    if term:
+        query = query.filter(match_filter(columns, term)).order_by(*rank_by_match(columns, term), SpinsItem.upc)
+    else:
+        query = query.order_by(SpinsItem.upc)
+
+    return [{
+        'id': row.id,
+        'upc': row.upc,
+        'name': row.name or '',
+        'label': f"{row.upc} - {row.name or 'N/A'}"
+    } for row in query.limit(_clamp_limit(limit)).all()]
+
+
+SEARCHES = {
+    'items': (search_items, {'brand_id': int, 'category_id': int}),
+    'customers': (search_customers, {'channel_id': int}),
+    'spins-items': (search_spins_items, {'brand_id': int}),
+}
+
+
+def get_selected_label(kind, record_id, **filters):
+    """Label of the currently selected record, to prefill a picker"""
+    if not record_id or kind not in SEARCHES:
+        return ''
+    results = SEARCHES[kind][0]('', limit=1, ids=[record_id], **filters)
+    return results[0]['label'] if results else ''
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Record/replay of Snowflake query results, to run the importers without Snowflake
+
+SNOWFLAKE_MODE selects what get_snowflake_connection() returns:
+- unset or 'live': the real connection
+- 'record': the real connection, each query's description and rows are also saved
+  to a Parquet file in SNOWFLAKE_REPLAY_DIR (default snowflake/replay)
+- 'replay': a fake connection answering the recorded queries from those files, with
+  the same cursor().execute / fetchone / fetchmany / fetchall / description surface
+
+Recordings are keyed on the query with its string literals replaced, so incremental
+imports (WHERE REPORT_DATE >= '<last date>') replay the recorded rows whatever their
+date. SNOWFLAKE_REPLAY_SPEED=1 replays at the recorded query and fetch times (2 is twice
+as fast); the default 0 answers immediately. Requires pyarrow.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+
+MODES = ('live', 'record', 'replay')
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'snowflake', 'replay')
+
+_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'")
+
+
+def get_mode():
+    mode = (os.getenv('SNOWFLAKE_MODE') or 'live').lower()
+    if mode not in MODES:
+        raise ValueError(f"SNOWFLAKE_MODE must be one of {', '.join(MODES)}, got {mode}")
+    return mode
+
+
+def get_replay_dir():
+    return os.getenv('SNOWFLAKE_REPLAY_DIR') or DEFAULT_DIR
+
+
+def _speed():
+    return float(os.getenv('SNOWFLAKE_REPLAY_SPEED') or 0)
+
+
+def _normalize(query):
+    return ' '.join(query.split())
+
+
+def query_key(query):
+    """Recording key of a query: its text without whitespace differences and string literals"""
+    template = _LITERAL_PATTERN.sub('?', _normalize(query))
+    return hashlib.sha1(template.encode()).hexdigest()[:16]
+
+
+def recording_path(query, replay_dir=None):
+    return os.path.join(replay_dir or get_replay_dir(), f'{query_key(query)}.parquet')
+
+
+# ==================== Recordings ====================
+
+def save_recording(query, description, rows, execute_seconds, fetch_seconds, replay_dir=None):
+    """Write the result of a query to its Parquet recording"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    names = [column[0] for column in description]
+    arrays = [pa.array([row[index] for row in rows]) for index in range(len(names))]
+    table = pa.Table.from_arrays(arrays, names=names)
+    table = table.replace_schema_metadata({
+        'query': _normalize(query),
+        'description': json.dumps([list(column)[:7] for column in description], default=str),
+        'execute_seconds': str(execute_seconds),
+        'fetch_seconds': str(fetch_seconds),
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    })
+    path = recording_path(query, replay_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path)
+    print(f"  💾 Recorded {len(rows)} Snowflake rows to {path}")
+    return path
+
+
+def load_recording(query, replay_dir=None):
+    """(description, rows, execute_seconds, fetch_seconds) recorded for a query"""
+    import pyarrow.parquet as pq
+
+    path = recording_path(query, replay_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No Snowflake recording for this query ({path}), run the import once with SNOWFLAKE_MODE=record"
+        )
+    table = pq.read_table(path)
+    metadata = {key.decode(): value.decode() for key, value in (table.schema.metadata or {}).items()}
+    if metadata.get('query') != _normalize(query):
+        print(f"  ⚠ Replaying {os.path.basename(path)} recorded for the same query with other literals")
+    columns = [table.column(index).to_pylist() for index in range(table.num_columns)]
+    rows = list(zip(*columns)) if columns else []
+    description = [tuple(column) for column in json.loads(metadata.get('description', '[]'))]
+    return description, rows, float(metadata.get('execute_seconds', 0)), float(metadata.get('fetch_seconds', 0))
+
+
+# ==================== Cursors ====================
+
+class _BufferedCursor:
+    """Cursor serving a fetched result from memory, with the DB-API fetch methods"""
+
+    arraysize = 1000
+
+    def __init__(self):
+        self.description = None
+        self.rowcount = -1
+        self._rows = []
+        self._position = 0
+        self._row_seconds = 0.0
+
+    def _load(self, description, rows, row_seconds=0.0):
+        self.description = description
+        self.rowcount = len(rows)
+        self._rows = rows
+        self._position = 0
+        self._row_seconds = row_seconds
+
+    def _take(self, count):
+        rows = self._rows[self._position:self._position + count]
+        self._position += len(rows)
+        if self._row_seconds and rows:
+            time.sleep(self._row_seconds * len(rows))
+        return rows
+
+    def fetchone(self):
+        rows = self._take(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size=None):
+        return self._take(size or self.arraysize)
+
+    def fetchall(self):
+        return self._take(len(self._rows) - self._position)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ReplayCursor(_BufferedCursor):
+    """Answers execute() from the recordings"""
+
+    def __init__(self, replay_dir=None):
+        super().__init__()
+        self._replay_dir = replay_dir
+
+    def execute(self, query, params=None):
+        description, rows, execute_seconds, fetch_seconds = load_recording(query, self._replay_dir)
+        speed = _speed()
+        if speed > 0:
+            time.sleep(execute_seconds / speed)
+        row_seconds = fetch_seconds / speed / len(rows) if speed > 0 and rows else 0.0
+        self._load(description, rows, row_seconds)
+        return self
+
+
+class RecordingCursor(_BufferedCursor):
+    """Runs execute() on the real cursor, records the whole result, then serves it"""
+
+    def __init__(self, cursor, replay_dir=None):
+        super().__init__()
+        self._cursor = cursor
+        self._replay_dir = replay_dir
+
+    def execute(self, query, params=None):
+        started = time.perf_counter()
+        if params is None:
+            self._cursor.execute(query)
+        else:
+            self._cursor.execute(query, params)
+        executed = time.perf_counter()
+        rows = self._cursor.fetchall() if self._cursor.description else []
+        fetched = time.perf_counter()
+        description = [tuple(column) for column in (self._cursor.description or [])]
+        if description:
+            save_recording(query, description, rows, executed - started, fetched - executed, self._replay_dir)
+        self._load(description or None, rows)
+        return self
+
+    def close(self):
+        super().close()
+        self._cursor.close()
+
+
+# ==================== Connections ====================
+
+class ReplayConnection:
+    """Stand-in for snowflake.connector connections in replay mode (no network)"""
+
+    def __init__(self, replay_dir=None):
+        self._replay_dir = replay_dir
+
+    def cursor(self):
+        return ReplayCursor(self._replay_dir)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RecordingConnection:
+    """Real connection whose cursors record their results"""
+
+    def __init__(self, conn, replay_dir=None):
+        self._conn = conn
+        self._replay_dir = replay_dir
+
+    def cursor(self):
+        return RecordingCursor(self._conn.cursor(), self._replay_dir)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def replay_connection():
+    """A ReplayConnection in replay mode, else None (connect to Snowflake as usual)"""
+    if get_mode() == 'replay':
+        return ReplayConnection()
+    return None
+
+
+def wrap_connection(conn):
+    """Wrap a real Snowflake connection so its results are recorded in record mode"""
+    if get_mode() == 'record':
+        return RecordingConnection(conn)
+    return conn
@@ -9,13 +9,120 @@ from datetime import datetime, date, timedelta
 from calendar import monthrange
 from models import db, CrmTicket, CrmTicketType, CrmTicketFlag, ChannelCustomer, User, crm_tickets_x_flags, Brand
 from auth.blueprint import login_required, admin_required
-from sqlalchemy import or_, case, and_
+from sqlalchemy import or_, case, and_, func, tuple_
+from sqlalchemy.orm import selectinload, joinedload
 from db_utils import get_connection
+from core.refdata import get_brands
+from core.search import get_selected_label
+from crm.search import search_condition
 from psycopg2.extras import RealDictCursor
 
 crm_bp = Blueprint('crm', __name__, template_folder='templates')
 
 
+def _ticket_list_options():
+    """Eager loads for ticket listings: flags in one batched query, the to-one relations joined"""
+    return (
+        selectinload(CrmTicket.flags),
+        joinedload(CrmTicket.ticket_type),
+        joinedload(CrmTicket.creator),
+        joinedload(CrmTicket.owner),
+        joinedload(CrmTicket.customer).joinedload(ChannelCustomer.channel),
+    )
+
+
+# ==================== Due date buckets ====================
+
+# Due date filters of the ticket list, also counted by the workload summary
+DUE_DATE_BUCKETS = {
+    'past_due': 'Past Due',
+    'current_week': 'Current Week',
+    'next_week': 'Next Week',
+    'current_and_next_week': 'Current & Next Week',
+    'current_month': 'Current Month',
+    'next_month': 'Next Month',
+    'month_2': 'Month +2',
+    'month_3': 'Month +3',
+}
+
+
+def _month_range(today, months_ahead):
+    """First and last day of the month months_ahead months after today's"""
+    month_index = today.month - 1 + months_ahead
+    year, month = today.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def _week_range(today):
+    """From today to the next Sunday (inclusive, today if it is Sunday)"""
+    return today, today + timedelta(days=6 - today.weekday())
+
+
+def _next_week_range(today):
+    """Monday to Sunday of next week"""
+    next_monday = today + timedelta(days=7 - today.weekday())
+    return next_monday, next_monday + timedelta(days=6)
+
+
+def _due_date_condition(bucket, today):
+    """Filter of a DUE_DATE_BUCKETS entry"""
+    if bucket == 'past_due':
+        # Past due: ticket is opened and (no due date OR due date < today)
+        return and_(
+            CrmTicket.status == 'opened',
+            or_(CrmTicket.due_date.is_(None), CrmTicket.due_date < today)
+        )
+    if bucket == 'current_week':
+        first_day, last_day = _week_range(today)
+    elif bucket == 'next_week':
+        first_day, last_day = _next_week_range(today)
+    elif bucket == 'current_and_next_week':
+        first_day, last_day = _week_range(today)[0], _next_week_range(today)[1]
+    else:
+        months_ahead = {'current_month': 0, 'next_month': 1, 'month_2': 2, 'month_3': 3}[bucket]
+        first_day, last_day = _month_range(today, months_ahead)
+    return and_(CrmTicket.due_date >= first_day, CrmTicket.due_date <= last_day)
+
+
+def ticket_workload(today, brand_id=None, owner_id=None):
+    """Open tickets per due date bucket: overall, per owner and per brand, in one query
+    
+    Returns:
+        dict with 'totals' ({bucket: count, 'open': count}), 'by_owner' ({owner_id: counts})
+        and 'by_brand' ({brand_id: counts})
+    """
+    counts = [func.count().filter(_due_date_condition(bucket, today)).label(bucket) for bucket in DUE_DATE_BUCKETS]
+    query = db.session.query(
+        func.grouping(CrmTicket.owner_id).label('all_owners'),
+        func.grouping(ChannelCustomer.brand_id).label('all_brands'),
+        CrmTicket.owner_id,
+        ChannelCustomer.brand_id,
+        func.count().label('open'),
+        *counts
+    ).join(ChannelCustomer, CrmTicket.customer_id == ChannelCustomer.id).filter(CrmTicket.status == 'opened')
+    
+    if brand_id:
+        query = query.filter(ChannelCustomer.brand_id == brand_id)
+    if owner_id:
+        query = query.filter(CrmTicket.owner_id == owner_id)
+    
+    # GROUPING SETS: one row per owner, one per brand and the grand total
+    rows = query.group_by(func.grouping_sets(
+        tuple_(CrmTicket.owner_id), tuple_(ChannelCustomer.brand_id), tuple_()
+    )).all()
+    
+    workload = {'totals': dict.fromkeys(['open', *DUE_DATE_BUCKETS], 0), 'by_owner': {}, 'by_brand': {}}
+    for row in rows:
+        row_counts = {name: getattr(row, name) for name in ['open', *DUE_DATE_BUCKETS]}
+        if row.all_owners and row.all_brands:
+            workload['totals'] = row_counts
+        elif not row.all_owners:
+            workload['by_owner'][row.owner_id] = row_counts
+        else:
+            workload['by_brand'][row.brand_id] = row_counts
+    return workload
+
+
 @crm_bp.route('/customers/<int:customer_id>/tickets')
 @login_required
 def customer_tickets(customer_id):
@@ -23,7 +130,7 @@ def customer_tickets(customer_id):
     customer = ChannelCustomer.query.get_or_404(customer_id)
     
     # Order by due_date DESC if not null, then by created_at DESC
-    tickets = CrmTicket.query.filter_by(customer_id=customer_id).order_by(
+    tickets = CrmTicket.query.options(*_ticket_list_options()).filter_by(customer_id=customer_id).order_by(
         case(
             (CrmTicket.due_date.isnot(None), CrmTicket.due_date),
             else_=None
@@ -306,12 +413,40 @@ def api_ticket_flags():
     })
 
 
+@crm_bp.route('/api/ticket-summary')
+@login_required
+def api_ticket_summary():
+    """Open ticket counts per due date bucket, overall, per owner and per brand (optional brand_id/owner_id filters)"""
+    brand_id = request.args.get('brand_id', type=int)
+    owner_id = request.args.get('owner_id', type=int)
+    today = date.today()
+    
+    workload = ticket_workload(today, brand_id=brand_id, owner_id=owner_id)
+    
+    owner_names = {}
+    if workload['by_owner']:
+        owner_names = dict(db.session.query(User.id, User.username).filter(User.id.in_(workload['by_owner'])).all())
+    brand_names = {brand.id: brand.name for brand in get_brands()}
+    
+    return jsonify({
+        'today': today.isoformat(),
+        'buckets': [{'key': key, 'label': label} for key, label in DUE_DATE_BUCKETS.items()],
+        'totals': workload['totals'],
+        'by_owner': [
+            {'owner_id': key, 'owner': owner_names.get(key, 'Unknown'), **counts}
+            for key, counts in sorted(workload['by_owner'].items(), key=lambda item: -item[1]['open'])
+        ],
+        'by_brand': [
+            {'brand_id': key, 'brand': brand_names.get(key, 'No brand'), **counts}
+            for key, counts in sorted(workload['by_brand'].items(), key=lambda item: -item[1]['open'])
+        ]
+    })
+
+
 @crm_bp.route('/tickets')
 @login_required
 def all_tickets():
     """List all tickets with filtering"""
-    from models import Channel
-    
     # Get filter parameters
     customer_id = request.args.get('customer_id', type=int)
     owner_id = request.args.get('owner_id', type=int)
@@ -325,7 +460,7 @@ def all_tickets():
     per_page = 30
     
     # Build query
-    query = CrmTicket.query
+    query = CrmTicket.query.options(*_ticket_list_options())
     
     if customer_id:
         query = query.filter_by(customer_id=customer_id)
@@ -336,163 +471,22 @@ def all_tickets():
     if ticket_type_id:
         query = query.filter_by(ticket_type_id=ticket_type_id)
     if flag_id:
-        # Filter by flag using the many-to-many relationship
-        query = query.join(crm_tickets_x_flags).filter(crm_tickets_x_flags.c.flag_id == flag_id).group_by(CrmTicket.id)
-    
-    # Handle brand filter and search together (both need ChannelCustomer join)
-    needs_customer_join = brand_id or search_query
-    if needs_customer_join:
-        from models import Channel
-        query = query.join(ChannelCustomer)
-        
-        if brand_id:
-            query = query.filter(ChannelCustomer.brand_id == brand_id)
-        
-        if search_query:
-            query = query.join(Channel)
-            search_pattern = f'%{search_query}%'
-            query = query.filter(
-                or_(
-                    CrmTicket.description.ilike(search_pattern),
-                    ChannelCustomer.name.ilike(search_pattern),
-                    Channel.name.ilike(search_pattern)
-                )
-            )
+        # Filter by flag with EXISTS on the many-to-many table (no join, no GROUP BY)
+        query = query.filter(CrmTicket.flags.any(CrmTicketFlag.id == flag_id))
+    
+    if brand_id:
+        query = query.join(ChannelCustomer, CrmTicket.customer_id == ChannelCustomer.id).filter(ChannelCustomer.brand_id == brand_id)
+    
+    # Full-text search over description, customer and channel names (GIN-indexed search_vector)
+    if search_query:
+        condition = search_condition(search_query)
+        if condition is not None:
+            query = query.filter(condition)
     
     # Due date filtering
     today = date.today()
-    
-    def get_month_range(year, month):
-        """Get first and last day of a month"""
-        first_day = date(year, month, 1)
-        last_day = date(year, month, monthrange(year, month)[1])
-        return first_day, last_day
-    
-    def get_week_range(start_date):
-        """Get the week range from start_date to next Sunday (inclusive)"""
-        # Get the day of week (0=Monday, 6=Sunday)
-        # Calculate days until next Sunday
-        current_weekday = start_date.weekday()  # 0=Monday, 6=Sunday
-        if current_weekday == 6:
-            # If it's Sunday, the week ends today
-            end_date = start_date
-        else:
-            # Calculate days until next Sunday
-            # Sunday is day 6, so if today is Tuesday (1), we need 5 more days (6-1=5)
-            days_until_sunday = 6 - current_weekday
-            end_date = start_date + timedelta(days=days_until_sunday)
-        return start_date, end_date
-    
-    def get_next_week_range():
-        """Get next week's Monday to Sunday"""
-        # Find next Monday
-        current_weekday = today.weekday()  # 0=Monday, 6=Sunday
-        if current_weekday == 0:
-            # If today is Monday, next Monday is in 7 days
-            next_monday = today + timedelta(days=7)
-        else:
-            # Calculate days until next Monday
-            # If today is Tuesday (1), next Monday is in 6 days (7-1=6)
-            days_until_monday = 7 - current_weekday
-            next_monday = today + timedelta(days=days_until_monday)
-        # Next Sunday is 6 days after next Monday
-        next_sunday = next_monday + timedelta(days=6)
-        return next_monday, next_sunday
-    
-    if due_date_filter == 'past_due':
-        # Past due: ticket is opened and (no due date OR due date < today)
-        query = query.filter(
-            CrmTicket.status == 'opened',
-            or_(
-                CrmTicket.due_date.is_(None),
-                CrmTicket.due_date < today
-            )
-        )
-    elif due_date_filter == 'current_month':
-        # Current month: due date is in the current month
-        first_day, last_day = get_month_range(today.year, today.month)
-        query = query.filter(
-            and_(
-                CrmTicket.due_date >= first_day,
-                CrmTicket.due_date <= last_day
-            )
-        )
-    elif due_date_filter == 'next_month':
-        # Next month: due date is in the next month
-        if today.month == 12:
-            next_year, next_month = today.year + 1, 1
-        else:
-            next_year, next_month = today.year, today.month + 1
-        first_day, last_day = get_month_range(next_year, next_month)
-        query = query.filter(
-            and_(
-                CrmTicket.due_date >= first_day,
-                CrmTicket.due_date <= last_day
-            )
-        )
-    elif due_date_filter == 'month_2':
-        # Month +2: due date is in 2 months from now
-        month_2 = today.month + 2
-        year_2 = today.year
-        if month_2 > 12:
-            month_2 -= 12
-            year_2 += 1
-        first_day, last_day = get_month_range(year_2, month_2)
-        query = query.filter(
-            and_(
-                CrmTicket.due_date >= first_day,
-                CrmTicket.due_date <= last_day
-            )
-        )
-    elif due_date_filter == 'month_3':
-        # Month +3: due date is in 3 months from now
-        month_3 = today.month + 3
-        year_3 = today.year
-        if month_3 > 12:
-            month_3 -= 12
-            year_3 += 1
-        first_day, last_day = get_month_range(year_3, month_3)
-        query = query.filter(
-            and_(
-                CrmTicket.due_date >= first_day,
-                CrmTicket.due_date <= last_day
-            )
-        )
-    elif due_date_filter == 'current_week':
-        # Current week: from today to next Sunday
-        first_day, last_day = get_week_range(today)
-        query = query.filter(
-            and_(
-                CrmTicket.due_date >= first_day,
-                CrmTicket.due_date <= last_day
-            )
-        )
-    elif due_date_filter == 'next_week':
-        # Next week: Monday to Sunday of next week
-        first_day, last_day = get_next_week_range()
-        query = query.filter(
-            and_(
-                CrmTicket.due_date >= first_day,
-                CrmTicket.due_date <= last_day
-            )
-        )
-    elif due_date_filter == 'current_and_next_week':
-        # Current & Next week: from today to end of next week
-        current_start, current_end = get_week_range(today)
-        next_start, next_end = get_next_week_range()
-        # Combine both ranges
-        query = query.filter(
-            or_(
-                and_(
-                    CrmTicket.due_date >= current_start,
-                    CrmTicket.due_date <= current_end
-                ),
-                and_(
-                    CrmTicket.due_date >= next_start,
-                    CrmTicket.due_date <= next_end
-                )
-            )
-        )
+    if due_date_filter in DUE_DATE_BUCKETS:
+        query = query.filter(_due_date_condition(due_date_filter, today))
     
     # Order by due_date DESC if not null, then by created_at DESC
     # Use pagination
@@ -506,8 +500,7 @@ def all_tickets():
     
     tickets = tickets_pagination.items
     
-    # Get all customers and users for filters
-    customers = ChannelCustomer.query.join(Channel).order_by(Channel.name, ChannelCustomer.name).all()
+    # Get users for filters (customers use the async picker)
     conn = get_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     try:
@@ -525,17 +518,20 @@ def all_tickets():
     # Get ticket types, flags, and brands for the overlay and filters
     ticket_types = CrmTicketType.query.order_by(CrmTicketType.name).all()
     flags = CrmTicketFlag.query.order_by(CrmTicketFlag.name).all()
-    brands = Brand.query.order_by(Brand.name).all()
+    brands = get_brands()
+    
+    # Workload badges (open tickets per due date bucket for the selected brand/owner)
+    workload = ticket_workload(today, brand_id=brand_id, owner_id=owner_id)
     
     return render_template('crm/all_tickets.html',
                          tickets=tickets,
                          pagination=tickets_pagination,
-                         customers=customers,
                          users=users,
                          ticket_types=ticket_types,
                          flags=flags,
                          brands=brands,
                          selected_customer_id=customer_id,
+                         selected_customer_label=get_selected_label('customers', customer_id),
                          selected_owner_id=owner_id,
                          selected_status=status,
                          selected_due_date_filter=due_date_filter,
@@ -543,6 +539,8 @@ def all_tickets():
                          selected_flag_id=flag_id,
                          selected_brand_id=brand_id,
                          search_query=search_query,
+                         workload=workload['totals'],
+                         due_date_buckets=DUE_DATE_BUCKETS,
                          today=today)
 
 
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Full-text search over CRM tickets (crm_tickets.search_vector)
+
+search_vector holds the ticket description (weight A) and the customer and channel
+names (weight B), indexed with GIN. Tickets written through the ORM, and tickets of
+renamed customers or channels, are re-indexed right after the commit.
+"""
+
+import re
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.orm import Session
+from models import db, CrmTicket, ChannelCustomer, Channel
+
+# No stemming: names are proper nouns, and prefix matching covers plurals
+SEARCH_CONFIG = 'simple'
+
+_REFRESH_SQL = text("""
+    UPDATE crm_tickets t
+    SET search_vector = setweight(to_tsvector('simple', coalesce(t.description, '')), 'A')
+                     || setweight(to_tsvector('simple', coalesce(c.name, '') || ' ' || coalesce(ch.name, '')), 'B')
+    FROM channel_customers c
+    JOIN channels ch ON ch.id = c.channel_id
+    WHERE c.id = t.customer_id
+      AND (t.id = ANY(:ticket_ids) OR t.customer_id = ANY(:customer_ids) OR c.channel_id = ANY(:channel_ids))
+""")
+
+
+def search_condition(search_query):
+    """Filter matching every word of search_query as a prefix, None if it has no words"""
+    words = re.findall(r'\w+', search_query.lower())
+    if not words:
+        return None
+    ts_query = ' & '.join(f'{word}:*' for word in words)
+    return CrmTicket.search_vector.op('@@')(func.to_tsquery(SEARCH_CONFIG, ts_query))
+
+
+def refresh_search_vectors(ticket_ids=(), customer_ids=(), channel_ids=(), conn=None):
+    """Recompute search_vector of the given tickets and of the tickets of the given customers/channels"""
+    params = {'ticket_ids': sorted(ticket_ids), 'customer_ids': sorted(customer_ids), 'channel_ids': sorted(channel_ids)}
+    if conn is None:
+        with db.engine.begin() as own_conn:
+            return own_conn.execute(_REFRESH_SQL, params).rowcount
+    return conn.execute(_REFRESH_SQL, params).rowcount
+
+
+# ==================== Session events ====================
+
+def _changed(obj, *attributes):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tickets(session, flush_context):
+    """Tickets added or edited, and customers/channels renamed, in this flush"""
+    pending = session.info.setdefault('crm_search', {'tickets': set(), 'customers': set(), 'channels': set()})
+    for obj in session.new:
+        if isinstance(obj, CrmTicket):
+            pending['tickets'].add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, CrmTicket) and _changed(obj, 'description', 'customer_id'):
+            pending['tickets'].add(obj.id)
+        elif isinstance(obj, ChannelCustomer) and _changed(obj, 'name', 'channel_id'):
+            pending['customers'].add(obj.id)
+        elif isinstance(obj, Channel) and _changed(obj, 'name'):
+            pending['channels'].add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_after_commit(session):
+    pending = session.info.pop('crm_search', None)
+    if pending and any(pending.values()):
+        try:
+            refresh_search_vectors(pending['tickets'], pending['customers'], pending['channels'])
+        except Exception as e:
+            print(f"  ⚠ Could not refresh CRM ticket search: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('crm_search', None)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Check that the key dashboard endpoints read the fact tables through indexes
+
+Calls each endpoint with the test client, captures the SELECTs it sends to
+netsuite_data, faire_data and sellthrough_data, and runs EXPLAIN on each of them.
+A plan with a sequential scan on a fact table (or one of its partitions) fails the
+check; the partitions scanned show whether the date filters are pruned to the
+requested years. Run it against a copy of production, on a small development
+database the planner rightly prefers sequential scans.
+
+Usage: python database/check_query_plans.py [--verbose]
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A fresh in-process result cache, so cached aggregates are computed (and explained)
+os.environ['RESULT_CACHE_BACKEND'] = 'local'
+
+from sqlalchemy import event, func
+from app import create_app
+from models import db, NetsuiteData, FaireData
+
+FACT_TABLES = ('netsuite_data', 'faire_data', 'sellthrough_data')
+
+
+def _sample_ids():
+    """Busiest brand, item and customers, so the plans are the ones of real dashboards"""
+    def busiest(column):
+        return db.session.query(column).filter(column.isnot(None)).group_by(column).order_by(func.count().desc()).limit(1).scalar()
+    return {
+        'brand_id': busiest(NetsuiteData.brand_id),
+        'item_id': busiest(NetsuiteData.item_id),
+        'customer_id': busiest(NetsuiteData.customer_id),
+        'faire_customer_id': busiest(FaireData.customer_id),
+    }
+
+
+def _checks(ids):
+    """(name, url) of the endpoints to check"""
+    checks = [
+        ('Netsuite totals by brand', f"/netsuite/api/totals?brand_id={ids['brand_id']}"),
+        ('Netsuite chart by brand', f"/netsuite/api/chart-data?brand_id={ids['brand_id']}"),
+        ('Netsuite chart by item', f"/netsuite/api/chart-data?item_id={ids['item_id']}"),
+        ('Faire totals by brand', f"/faire/api/totals?brand_id={ids['brand_id']}"),
+        ('Faire chart by brand', f"/faire/api/chart-data?brand_id={ids['brand_id']}"),
+    ]
+    if ids['customer_id']:
+        checks += [
+            ('Customer assortment', f"/core/customers/{ids['customer_id']}/api/assortment"),
+            ('Customer monthly revenues', f"/core/customers/{ids['customer_id']}/api/monthly-revenues"),
+        ]
+    if ids['faire_customer_id']:
+        checks.append(('Faire customer assortment', f"/core/customers/{ids['faire_customer_id']}/api/assortment"))
+    return checks
+
+
+def _plan_scans(node, scans):
+    """(node type, relation, index) of every scan node of a JSON plan"""
+    if 'Relation Name' in node:
+        scans.append((node['Node Type'], node['Relation Name'], node.get('Index Name')))
+    for child in node.get('Plans', []):
+        _plan_scans(child, scans)
+    return scans
+
+
+def _fact_table(relation):
+    return next((table for table in FACT_TABLES if relation == table or relation.startswith(f'{table}_')), None)
+
+
+def check_query_plans(verbose=False):
+    """Run every check, returns the number of statements with a sequential scan on a fact table"""
+    app = create_app()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and any(table in statement for table in FACT_TABLES):
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("❌ EXPLAIN checks need the Postgres database")
+            return 1
+        ids = _sample_ids()
+        if not ids['brand_id']:
+            print("❌ No Netsuite data to check the plans with")
+            return 1
+        event.listen(db.engine, 'before_cursor_execute', capture)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+
+    failures = 0
+    print("="*60)
+    print("🔍 Checking query plans of the dashboard endpoints")
+    print("="*60)
+    for name, url in _checks(ids):
+        captured.clear()
+        response = client.get(url)
+        if response.status_code != 200:
+            print(f"\n❌ {name}: {url} returned {response.status_code}")
+            failures += 1
+            continue
+
+        print(f"\n📊 {name} ({url}): {len(captured)} statement(s)")
+        with app.app_context():
+            with db.engine.connect() as conn:
+                for statement, parameters in list(captured):
+                    plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+                    scans = [scan for scan in _plan_scans(plan[0]['Plan'], []) if _fact_table(scan[1])]
+                    seq_scans = sorted({relation for node_type, relation, _ in scans if node_type == 'Seq Scan'})
+                    partitions = sorted({relation for _, relation, _ in scans})
+                    indexes = sorted({index for _, _, index in scans if index})
+                    if seq_scans:
+                        failures += 1
+                        print(f"  ❌ Sequential scan on {', '.join(seq_scans)}")
+                        print(f"     {' '.join(statement.split())[:300]}")
+                    else:
+                        print(f"  ✓ {', '.join(indexes) or 'no fact table scan'} on {', '.join(partitions) or '-'}")
+                    if verbose:
+                        for node_type, relation, index in scans:
+                            print(f"     {node_type} {relation}{f' using {index}' if index else ''}")
+
+    print("\n" + "="*60)
+    if failures:
+        print(f"❌ {failures} statement(s) scan a fact table sequentially")
+    else:
+        print("✓ Every fact table read uses an index")
+    print("="*60)
+    return failures
+
+
+if __name__ == '__main__':
+    sys.exit(1 if check_query_plans(verbose='--verbose' in sys.argv) else 0)
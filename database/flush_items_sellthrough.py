@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Script to flush (delete) all items and sellthrough_data from the database
-This will also delete related channel_items due to cascade relationships
+This will also delete related channel_items due to cascade relationships, and empty
+the sellthrough_weekly rollup built from sellthrough_data
 """
 
 import sys
@@ -12,7 +13,8 @@ from flask import Flask
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
-from models import db, Item, SellthroughData, ChannelItem
+from models import db, Item, SellthroughData, SellthroughWeekly, ChannelItem
+from core.refdata import touch_tables
 
 def flush_items_and_sellthrough():
     """Delete all items and sellthrough_data from the database"""
@@ -26,6 +28,7 @@ def flush_items_and_sellthrough():
         # Count records before deletion
         item_count = Item.query.count()
         sellthrough_count = SellthroughData.query.count()
+        weekly_count = SellthroughWeekly.query.count()
         channel_item_count = ChannelItem.query.count()
         
         print(f"\n📊 Current database state:")
@@ -51,6 +54,12 @@ def flush_items_and_sellthrough():
             SellthroughData.query.delete()
             print("  ✓ Sellthrough data deleted")
             
+            # The rollup references items and isn't refreshed by bulk deletes (see sellthrough/weekly.py)
+            print(f"  Deleting {weekly_count} sellthrough_weekly records...")
+            SellthroughWeekly.query.delete()
+            touch_tables(['sellthrough_data', 'sellthrough_weekly'])
+            print("  ✓ Sellthrough weekly rollup deleted")
+            
             # Delete channel_items (will be deleted automatically due to cascade, but let's be explicit)
             print(f"  Deleting {channel_item_count} channel_item records...")
             ChannelItem.query.delete()
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Fill a local database with synthetic data shaped like production
+
+Brands, items, channels, customers and Netsuite / Faire / sellthrough / SPINS facts
+with the same skew as the real data: a few brands, items and customers make most of
+the revenue (Pareto weights), Q4 peaks, and each year grows on the previous one.
+--scale multiplies the fact volumes (1, 10 or 100); reference data grows with the
+square root of the scale, like it does in production. Derived tables (sellthrough
+cube, target pacing, SPINS item stats, partitions) are rebuilt at the end.
+
+Only runs against the local database (postgre-local section of config.ini or DB_*
+variables with DB_TYPE=local), and refuses non-local hosts unless --force is given.
+
+Usage: python database/generate_synthetic_data.py --scale 10 [--years 2024 2025] [--seed 42] [--reset] [--yes]
+"""
+
+import sys
+import os
+import math
+import random
+import argparse
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DB_TYPE'] = 'local'  # app.py creates its app on import
+
+from sqlalchemy import insert, text
+from app import create_app
+from db_utils import get_db_params
+from models import (db, Brand, Category, Channel, ChannelCustomerType, ChannelCustomer, Item, ChannelItem,
+                    NetsuiteCode, NetsuiteData, FaireData, SellthroughData, SpinsChannel, SpinsBrand,
+                    SpinsItem, SpinsData, TargetData)
+
+CHUNK_SIZE = 5000
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1', 'db', 'postgres')
+
+# Fact rows per year at scale 1 (production order of magnitude / 10)
+BASE_ROWS = {'netsuite': 40000, 'faire': 6000, 'sellthrough': 15000, 'spins': 25000}
+
+# Reference data at scale 1
+BASE_COUNTS = {'brands': 25, 'items': 500, 'customers': 300, 'spins_brands': 60, 'spins_items': 1500}
+
+# Channels the importers address by id (see sellthrough process_*_row and FAIRE_CHANNEL_ID)
+FIXED_CHANNELS = {
+    1: ('Target', False), 2: ('Walmart', False), 3: ('CVS', False), 5: ('Sprouts', False),
+    11: ('Faire', True), 76: ('Erewhon', False), 77: ('Fresh Thyme', False),
+}
+NETSUITE_CHANNELS = ['Amazon', 'Wholesale', 'Distributors', 'Independents', 'Export', 'Marketplaces']
+SELLTHROUGH_CHANNEL_IDS = [1, 2, 3, 5, 76, 77]
+FAIRE_CHANNEL_ID = 11
+SPINS_CHANNELS = ['TARGET CORP - RMA', 'WALMART CORP - RMA', 'KROGER CORP - RMA', 'CVS CORP - RMA', 'TOTAL US - MULO']
+
+# Revenue share of each month (Q4 peak)
+SEASONALITY = [0.070, 0.068, 0.078, 0.078, 0.080, 0.078, 0.076, 0.080, 0.084, 0.092, 0.100, 0.116]
+YEARLY_GROWTH = 1.15
+
+_WORDS = ['Pure', 'Bright', 'Fresh', 'Daily', 'Wild', 'Good', 'Happy', 'Simple', 'Bold', 'Green',
+          'Golden', 'Nordic', 'Coastal', 'Urban', 'Little', 'Honest', 'True', 'Clever', 'Sunny', 'Silver']
+_NOUNS = ['Leaf', 'Bee', 'Oak', 'River', 'Harvest', 'Fox', 'Moon', 'Field', 'Stone', 'Bloom',
+          'Cloud', 'Pine', 'Spark', 'Wave', 'Root', 'Ridge', 'Nest', 'Grove', 'Tide', 'Peak']
+_PRODUCTS = ['Toothpaste', 'Shampoo', 'Body Wash', 'Deodorant', 'Lip Balm', 'Sunscreen', 'Hand Soap',
+             'Face Serum', 'Conditioner', 'Mouthwash', 'Lotion', 'Dry Shampoo']
+
+
+# ==================== Helpers ====================
+
+def _pareto_weights(count, rng, alpha=0.9):
+    """Cumulative weights where ~20% of the entries carry ~80% of the mass (for a few hundred entries)"""
+    weights = sorted((rng.paretovariate(alpha) for _ in range(count)), reverse=True)
+    cumulative, total = [], 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+def _pick(population, cum_weights, rng, k=1):
+    return rng.choices(population, cum_weights=cum_weights, k=k)
+
+
+def _name(rng, used, suffix=''):
+    """Unique two-word name"""
+    while True:
+        name = f"{rng.choice(_WORDS)} {rng.choice(_NOUNS)}{suffix}"
+        if name not in used:
+            used.add(name)
+            return name
+        suffix = f" {len(used)}"
+
+
+def _year_factor(year, years):
+    return YEARLY_GROWTH ** (year - years[0])
+
+
+def _insert(table, rows):
+    """Bulk insert row dicts in chunks, returns the number of rows"""
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(table), rows[start:start + CHUNK_SIZE])
+    return len(rows)
+
+
+def _flush(table, batch, final=False):
+    """Insert and clear the batch of a generator once it holds a chunk (or at the end of a year)
+
+    Keeps memory flat at any --scale: a year of facts at scale 100 is millions of rows.
+    """
+    if not batch or (len(batch) < CHUNK_SIZE and not final):
+        return 0
+    count = _insert(table, batch)
+    batch.clear()
+    return count
+
+
+def _days(year):
+    day = date(year, 1, 1)
+    while day.year == year:
+        yield day
+        day += timedelta(days=1)
+
+
+def _weekdays(year, weekday):
+    """Every date of year falling on weekday (0 Monday, 6 Sunday)"""
+    day = date(year, 1, 1)
+    day += timedelta(days=(weekday - day.weekday()) % 7)
+    while day.year == year:
+        yield day
+        day += timedelta(weeks=1)
+
+
+def _money(value):
+    return Decimal(str(round(value, 2)))
+
+
+# ==================== Reference data ====================
+
+def generate_reference_data(rng, scale):
+    """Brands, categories, items, channels, customers and SPINS dimensions, returns the ids and weights"""
+    factor = math.sqrt(scale)
+    counts = {name: int(count * factor) for name, count in BASE_COUNTS.items()}
+    now = datetime.utcnow()
+    used_names = set()
+
+    # Channels (fixed ids first, then the Netsuite-only ones from the sequence)
+    for channel_id, (name, netsuite_include) in FIXED_CHANNELS.items():
+        db.session.execute(insert(Channel.__table__), [{'id': channel_id, 'name': name, 'netsuite_include': netsuite_include}])
+    for name in NETSUITE_CHANNELS:
+        db.session.execute(insert(Channel.__table__), [{'id': 100 + NETSUITE_CHANNELS.index(name), 'name': name, 'netsuite_include': True}])
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text("SELECT setval(pg_get_serial_sequence('channels', 'id'), (SELECT MAX(id) FROM channels))"))
+    netsuite_channel_ids = [channel.id for channel in Channel.query.filter_by(netsuite_include=True)]
+
+    customer_types = []
+    for name, color in [('Retailer', '#2563eb'), ('Distributor', '#16a34a'), ('Boutique', '#db2777')]:
+        customer_type = ChannelCustomerType(name=name, color=color)
+        db.session.add(customer_type)
+        customer_types.append(customer_type)
+
+    brands = [Brand(name=_name(rng, used_names), code=f'B{index:04d}') for index in range(counts['brands'])]
+    db.session.add_all(brands)
+    db.session.flush()
+    brand_ids = [brand.id for brand in brands]
+    brand_weights = _pareto_weights(len(brand_ids), rng)
+
+    categories = {}
+    for brand_id in brand_ids:
+        for product in rng.sample(_PRODUCTS, 3):
+            category = Category(name=product, brand_id=brand_id)
+            db.session.add(category)
+            categories.setdefault(brand_id, []).append(category)
+    db.session.flush()
+
+    # Items: big brands have more items
+    item_rows = []
+    brand_of_item = _pick(brand_ids, brand_weights, rng, counts['items'])
+    for index, brand_id in enumerate(brand_of_item):
+        category = rng.choice(categories[brand_id])
+        item_rows.append({
+            'essor_code': f'ESS{index:06d}', 'essor_name': f'{category.name} {rng.randint(2, 32)}oz #{index}',
+            'brand_id': brand_id, 'category_id': category.id,
+            'status': rng.choices(['active', 'discontinued'], weights=[9, 1])[0],
+            'created_at': now, 'updated_at': now,
+        })
+    _insert(Item.__table__, item_rows)
+    items = [(item_id, brand_id) for item_id, brand_id in db.session.query(Item.id, Item.brand_id).order_by(Item.id)]
+    item_weights = _pareto_weights(len(items), rng)
+
+    # Channel listings of the retail chains (sellthrough imports link on channel_code)
+    channel_item_rows = []
+    for channel_id in SELLTHROUGH_CHANNEL_IDS:
+        for item_id, _ in rng.sample(items, k=max(1, len(items) // 3)):
+            channel_item_rows.append({'channel_id': channel_id, 'item_id': item_id,
+                                      'channel_code': f'{channel_id}-{item_id:07d}', 'channel_name': f'Item {item_id}'})
+    _insert(ChannelItem.__table__, channel_item_rows)
+
+    # Customers: Faire boutiques and Netsuite accounts, each with a retailer code
+    customer_rows = []
+    customer_channels = [FAIRE_CHANNEL_ID] * (counts['customers'] // 2) + \
+        [rng.choice(netsuite_channel_ids) for _ in range(counts['customers'] - counts['customers'] // 2)]
+    for index, channel_id in enumerate(customer_channels):
+        customer_rows.append({
+            'channel_id': channel_id, 'brand_id': rng.choice(brand_ids), 'customer_type_id': rng.choice(customer_types).id,
+            'name': f'Customer {index:05d}', 'description': None, 'created_at': now, 'updated_at': now,
+        })
+    _insert(ChannelCustomer.__table__, customer_rows)
+    customers = db.session.query(ChannelCustomer.id, ChannelCustomer.channel_id).order_by(ChannelCustomer.id).all()
+    faire_customers = [customer_id for customer_id, channel_id in customers if channel_id == FAIRE_CHANNEL_ID]
+    netsuite_customers = [(customer_id, channel_id) for customer_id, channel_id in customers if channel_id != FAIRE_CHANNEL_ID]
+    _insert(NetsuiteCode.__table__, [
+        {'netsuite_code': f'R{customer_id:04d}'[:10], 'netsuite_name': f'Customer {customer_id}',
+         'channel_id': channel_id, 'customer_id': customer_id}
+        for customer_id, channel_id in netsuite_customers
+    ])
+
+    # SPINS: our brands plus competitors, items identified by UPC
+    spins_channels = [SpinsChannel(name=name, short_name=name.split()[0]) for name in SPINS_CHANNELS]
+    spins_brands = [SpinsBrand(name=_name(rng, used_names).upper()) for _ in range(counts['spins_brands'])]
+    db.session.add_all(spins_channels + spins_brands)
+    db.session.flush()
+    spins_item_rows = [{'name': f'{rng.choice(_PRODUCTS)} {rng.randint(2, 32)}oz', 'upc': f'00-{index // 100000:05d}-{index % 100000:05d}'}
+                       for index in range(counts['spins_items'])]
+    _insert(SpinsItem.__table__, spins_item_rows)
+    spins_brand_ids = [brand.id for brand in spins_brands]
+    spins_items = [(item_id, rng.choice(spins_brand_ids)) for item_id, in db.session.query(SpinsItem.id).order_by(SpinsItem.id)]
+
+    db.session.commit()
+    print(f"✓ Reference data: {len(brand_ids)} brands, {len(items)} items, {len(customers)} customers, "
+          f"{len(spins_items)} SPINS items")
+    return {
+        'brand_ids': brand_ids,
+        'items': items,
+        'item_weights': item_weights,
+        'faire_customers': faire_customers,
+        'faire_weights': _pareto_weights(len(faire_customers), rng),
+        'netsuite_customers': netsuite_customers,
+        'netsuite_weights': _pareto_weights(len(netsuite_customers), rng),
+        'netsuite_channel_ids': netsuite_channel_ids,
+        'channel_items': [(row['channel_id'], row['item_id']) for row in channel_item_rows],
+        'spins_channel_ids': [channel.id for channel in spins_channels],
+        'spins_items': spins_items,
+        'spins_weights': _pareto_weights(len(spins_items), rng),
+    }
+
+
+# ==================== Facts ====================
+
+def _rows_per_period(total, periods, year, years):
+    """Rows of each period of a year, following the seasonality"""
+    per_month = [total * share * _year_factor(year, years) for share in SEASONALITY]
+    counts = {}
+    for period in periods:
+        counts[period] = per_month[period.month - 1] / sum(1 for other in periods if other.month == period.month)
+    return counts
+
+
+def _draw(rng, expected, draw_key):
+    """{key: draws} of about expected distinct keys; a key drawn again sells more instead of adding a row"""
+    target = int(expected) + (rng.random() < expected % 1)
+    draws, attempts = {}, 0
+    while len(draws) < target and attempts < target * 4:
+        key = draw_key()
+        draws[key] = draws.get(key, 0) + 1
+        attempts += 1
+    return draws
+
+
+def generate_netsuite(rng, ref, years, rows_per_year):
+    """Daily rows per (channel, item, customer)"""
+    total = 0
+    now = datetime.utcnow()
+    for year in years:
+        batch, inserted = [], 0
+        days = list(_days(year))
+        for day, expected in _rows_per_period(rows_per_year, days, year, years).items():
+            draws = _draw(rng, expected, lambda: (_pick(ref['netsuite_customers'], ref['netsuite_weights'], rng)[0],
+                                                  _pick(ref['items'], ref['item_weights'], rng)[0]))
+            for ((customer_id, channel_id), (item_id, brand_id)), count in draws.items():
+                units = max(1, int(count * rng.lognormvariate(2.5, 1.0)))
+                batch.append({
+                    'date': day, 'brand_id': brand_id, 'item_id': item_id, 'channel_id': channel_id,
+                    'customer_id': customer_id, 'revenues': _money(units * rng.uniform(4, 18)), 'units': units,
+                    'retailer_code': f'R{customer_id:04d}'[:5], 'created_at': now, 'updated_at': now,
+                })
+            inserted += _flush(NetsuiteData.__table__, batch)
+        inserted += _flush(NetsuiteData.__table__, batch, final=True)
+        db.session.commit()
+        print(f"  ✓ netsuite_data {year}: {inserted} rows")
+        total += inserted
+    return total
+
+
+def generate_faire(rng, ref, years, rows_per_year):
+    """Monthly rows (first day of month) per (item, customer)"""
+    total = 0
+    now = datetime.utcnow()
+    for year in years:
+        batch, inserted = [], 0
+        months = [date(year, month, 1) for month in range(1, 13)]
+        for month, expected in _rows_per_period(rows_per_year, months, year, years).items():
+            draws = _draw(rng, expected, lambda: (_pick(ref['faire_customers'], ref['faire_weights'], rng)[0],
+                                                  _pick(ref['items'], ref['item_weights'], rng)[0]))
+            for (customer_id, (item_id, brand_id)), count in draws.items():
+                units = max(1, int(count * rng.lognormvariate(1.8, 0.8)))
+                batch.append({
+                    'date': month, 'brand_id': brand_id, 'item_id': item_id, 'customer_id': customer_id,
+                    'revenues': _money(units * rng.uniform(3, 12)), 'units': units, 'created_at': now, 'updated_at': now,
+                })
+            inserted += _flush(FaireData.__table__, batch)
+        inserted += _flush(FaireData.__table__, batch, final=True)
+        db.session.commit()
+        print(f"  ✓ faire_data {year}: {inserted} rows")
+        total += inserted
+    return total
+
+
+def generate_sellthrough(rng, ref, years, rows_per_year):
+    """Weekly rows (Mondays) per (retail channel, listed item)"""
+    total = 0
+    now = datetime.utcnow()
+    brand_of_item = dict(ref['items'])
+    listings = ref['channel_items']
+    listing_weights = _pareto_weights(len(listings), rng)
+    for year in years:
+        batch, inserted = [], 0
+        weeks = list(_weekdays(year, 0))
+        for week, expected in _rows_per_period(rows_per_year, weeks, year, years).items():
+            draws = _draw(rng, expected, lambda: _pick(listings, listing_weights, rng)[0])
+            for (channel_id, item_id), count in draws.items():
+                stores = rng.randint(50, 4000)
+                units = max(1, int(count * stores * rng.uniform(0.2, 3)))
+                revenues = units * rng.uniform(4, 15)
+                batch.append({
+                    'date': week, 'brand_id': brand_of_item[item_id], 'item_id': item_id, 'channel_id': channel_id,
+                    'customer_id': None, 'revenues': _money(revenues), 'units': units, 'stores': stores,
+                    'oos': _money(rng.uniform(0, 15)), 'usd_pspw': _money(revenues / stores),
+                    'units_pspw': _money(units / stores), 'instock': _money(rng.uniform(85, 100)),
+                    'channel_code': f'{channel_id}-{item_id:07d}', 'created_at': now, 'updated_at': now,
+                })
+            inserted += _flush(SellthroughData.__table__, batch)
+        inserted += _flush(SellthroughData.__table__, batch, final=True)
+        db.session.commit()
+        print(f"  ✓ sellthrough_data {year}: {inserted} rows")
+        total += inserted
+    return total
+
+
+def generate_spins(rng, ref, years, rows_per_year):
+    """Weekly rows (week ending Sundays) per (channel, brand, item)"""
+    total = 0
+    now = datetime.utcnow()
+    for year in years:
+        batch, inserted = [], 0
+        weeks = list(_weekdays(year, 6))
+        for week, expected in _rows_per_period(rows_per_year, weeks, year, years).items():
+            for channel_id in ref['spins_channel_ids']:
+                draws = _draw(rng, expected / len(ref['spins_channel_ids']),
+                              lambda: _pick(ref['spins_items'], ref['spins_weights'], rng)[0])
+                for (item_id, brand_id), count in draws.items():
+                    stores_total = rng.randint(500, 5000)
+                    stores_selling = round(stores_total * rng.uniform(0.05, 0.98), 1)
+                    units = max(1, int(count * stores_selling * rng.uniform(0.5, 5)))
+                    revenues = units * rng.uniform(3, 14)
+                    batch.append({
+                        'week': week, 'channel_id': channel_id, 'brand_id': brand_id, 'item_id': item_id,
+                        'stores_total': stores_total, 'stores_selling': _money(stores_selling),
+                        'revenues': _money(revenues), 'units': units, 'arp': _money(revenues / units),
+                        'average_weekly_revenues_per_selling_item': _money(revenues / stores_selling),
+                        'average_weekly_units_per_selling_item': _money(units / stores_selling),
+                        'created_at': now, 'updated_at': now,
+                    })
+            inserted += _flush(SpinsData.__table__, batch)
+        inserted += _flush(SpinsData.__table__, batch, final=True)
+        db.session.commit()
+        print(f"  ✓ spins_data {year}: {inserted} rows")
+        total += inserted
+    return total
+
+
+def generate_targets(rng, ref, years):
+    """Monthly targets per brand and Netsuite channel, around the generated revenue"""
+    rows = []
+    now = datetime.utcnow()
+    actuals = db.session.query(NetsuiteData.brand_id, NetsuiteData.channel_id, db.func.sum(NetsuiteData.revenues)) \
+        .group_by(NetsuiteData.brand_id, NetsuiteData.channel_id).all()
+    for brand_id, channel_id, revenues in actuals:
+        yearly = float(revenues or 0) / len(years)
+        for year in years:
+            for month in range(1, 13):
+                rows.append({'date': date(year, month, 1), 'brand_id': brand_id, 'channel_id': channel_id,
+                             'revenue': _money(yearly * SEASONALITY[month - 1] * rng.uniform(0.95, 1.25)),
+                             'created_at': now, 'updated_at': now})
+    _insert(TargetData.__table__, rows)
+    db.session.commit()
+    print(f"  ✓ targets_data: {len(rows)} rows")
+    return len(rows)
+
+
+# ==================== Main ====================
+
+_RESET_TABLES = ['spins_data', 'spins_items', 'spins_brands', 'spins_channels', 'targets_data', 'targets_pacing_monthly',
+                 'sellthrough_weekly', 'sellthrough_data', 'faire_data', 'netsuite_data', 'netsuite_codes',
+                 'channel_items', 'channel_customers', 'channel_customer_types', 'items', 'categories', 'brands',
+                 'channels', 'query_result_cache']
+
+
+def _rebuild_derived(spins_item_ids):
+    """Derived tables the importers normally maintain"""
+    from core.partitions import ensure_partitions
+    from core.refdata import bump_versions, VERSIONED_TABLES
+    from sellthrough.weekly import rebuild_all as rebuild_sellthrough_weekly
+    from targets.pacing import rebuild_all as rebuild_target_pacing
+    from spins.item_stats import refresh_item_stats
+
+    ensure_partitions()
+    rebuild_sellthrough_weekly()
+    rebuild_target_pacing()
+    refresh_item_stats(spins_item_ids)
+    bump_versions(VERSIONED_TABLES)
+    with db.engine.connect() as conn:
+        conn.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM ANALYZE'))
+    print("✓ Derived tables rebuilt, statistics updated")
+
+
+def generate(scale=1, years=(2024, 2025), seed=42, reset=False):
+    """Generate the whole dataset, returns the number of rows per fact table"""
+    rng = random.Random(seed)
+    years = sorted(years)
+
+    if reset:
+        print("🗑️  Emptying the generated tables...")
+        db.session.execute(text(f"TRUNCATE {', '.join(_RESET_TABLES)} RESTART IDENTITY CASCADE"))
+        db.session.commit()
+    elif Brand.query.first() is not None:
+        raise RuntimeError('The database already has data, use --reset to replace it')
+
+    print(f"\n📦 Generating scale {scale}x for {', '.join(str(year) for year in years)} (seed {seed})")
+    ref = generate_reference_data(rng, scale)
+    totals = {
+        'netsuite_data': generate_netsuite(rng, ref, years, BASE_ROWS['netsuite'] * scale),
+        'faire_data': generate_faire(rng, ref, years, BASE_ROWS['faire'] * scale),
+        'sellthrough_data': generate_sellthrough(rng, ref, years, BASE_ROWS['sellthrough'] * scale),
+        'spins_data': generate_spins(rng, ref, years, BASE_ROWS['spins'] * scale),
+    }
+    totals['targets_data'] = generate_targets(rng, ref, years)
+    if db.engine.dialect.name == 'postgresql':
+        _rebuild_derived([item_id for item_id, _ in ref['spins_items']])
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill the local database with synthetic data')
+    parser.add_argument('--scale', type=int, default=1, help='Fact volume multiplier, e.g. 1, 10 or 100 (default: 1)')
+    parser.add_argument('--years', type=int, nargs='+', default=[2024, 2025], help='Years to generate (default: 2024 2025)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--reset', action='store_true', help='Empty the generated tables first')
+    parser.add_argument('--yes', action='store_true', help='Do not ask for confirmation')
+    parser.add_argument('--force', action='store_true', help='Allow a database host that does not look local')
+    args = parser.parse_args()
+
+    params = get_db_params('local')
+    print("="*60)
+    print(f"📊 Synthetic data for {params['database']} on {params['host']}:{params['port']}")
+    print("="*60)
+    if params['host'] not in LOCAL_HOSTS and not args.force:
+        print(f"❌ {params['host']} is not a local host, refusing to write synthetic data (use --force)")
+        return 1
+    if args.reset and not args.yes:
+        response = input("\n⚠ --reset empties brands, items, customers and every fact table. Proceed? (yes/no): ")
+        if response.lower() != 'yes':
+            print("❌ Operation cancelled.")
+            return 1
+
+    app = create_app(db_type='local')
+    with app.app_context():
+        try:
+            totals = generate(scale=args.scale, years=args.years, seed=args.seed, reset=args.reset)
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error generating data: {str(e)}")
+            return 1
+
+    print("\n" + "="*60)
+    for table_name, rows in totals.items():
+        print(f"  - {table_name}: {rows} rows")
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -51,6 +51,52 @@ def get_db_uri(db_type=None):
     params = get_db_params(db_type)
     return f"postgresql://{params['user']}:{params['password']}@{params['host']}:{params['port']}/{params['database']}"
 
+def get_worker_settings():
+    """Gunicorn worker model from the WEB_* environment variables (see gunicorn.conf.py)
+    
+    gthread (default) serves WEB_THREADS requests per worker, so a slow import or
+    assortment call only holds one thread; sync serves one request at a time; gevent
+    serves up to WEB_WORKER_CONNECTIONS requests per worker on greenlets.
+    """
+    worker_class = os.getenv('WEB_WORKER_CLASS', 'gthread')
+    return {
+        'worker_class': worker_class,
+        'workers': int(os.getenv('WEB_WORKERS', 2)),
+        # Gunicorn turns sync workers with several threads into gthread ones
+        'threads': int(os.getenv('WEB_THREADS', 4)) if worker_class == 'gthread' else 1,
+        'worker_connections': int(os.getenv('WEB_WORKER_CONNECTIONS', 50)),
+        'timeout': int(os.getenv('WEB_TIMEOUT', 120)),
+    }
+
+# Connections a request can hold at once: its session, plus the advisory lock connection
+# of a result cache miss (core/result_cache.py), the version reads and the after-commit
+# rollup refreshes, which each take their own connection
+CONNECTIONS_PER_REQUEST = 2
+# Background job threads (imports, remaps, warming) and the parallel pipeline steps
+JOB_CONNECTIONS = 6
+
+def get_engine_options(db_uri=None):
+    """SQLAlchemy connection pool options safe for the gunicorn worker model
+    
+    Each worker keeps CONNECTIONS_PER_REQUEST connections per request it serves at once
+    (threads for gthread, WEB_DB_POOL_SIZE overrides it, gevent defaults to 10 requests'
+    worth, greenlets beyond that wait for a connection), plus JOB_CONNECTIONS overflow for
+    the background jobs running in the worker. A pod opens at most
+    workers x (pool_size + max_overflow) connections: 2 x (8 + 6) = 28 with the defaults.
+    """
+    if db_uri and not db_uri.startswith('postgresql'):
+        return {}
+    settings = get_worker_settings()
+    concurrent_requests = 10 if settings['worker_class'] == 'gevent' else settings['threads']
+    pool_size = int(os.getenv('WEB_DB_POOL_SIZE', CONNECTIONS_PER_REQUEST * concurrent_requests))
+    return {
+        'pool_size': pool_size,
+        'max_overflow': JOB_CONNECTIONS,
+        'pool_timeout': 10 if settings['worker_class'] == 'gevent' else 30,
+        'pool_pre_ping': True,  # connections idle across deploys/failovers of the managed database
+        'pool_recycle': 1800,
+    }
+
 def get_connection():
     """Create PostgreSQL database connection"""
     try:
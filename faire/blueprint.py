@@ -7,7 +7,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from functools import wraps
 from datetime import datetime, timedelta, date as date_type
 from decimal import Decimal
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, text
 import snowflake.connector
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
@@ -15,7 +15,15 @@ import os
 import re
 import configparser
 from models import db, FaireData, Brand, Item, Channel, ChannelCustomer, ImportError
+from core.refdata import get_brands, get_customers, touch_tables
+from core.partitions import is_partitioned, reload_partition, insert_rows
+from core.snowflake_replay import replay_connection, wrap_connection
+from core.search import get_selected_label
+from core.periods import in_period
 from auth.blueprint import login_required, admin_required
+from core.http_cache import etag_cached
+from imports.error_sink import ImportErrorSink, record_import_error
+from targets.pacing import touch_months, defer_refresh, refresh_deferred
 import json
 
 faire_bp = Blueprint('faire', __name__, template_folder='templates')
@@ -41,6 +49,11 @@ def get_snowflake_config():
 
 def get_snowflake_connection():
     """Create Snowflake connection using private key authentication"""
+    # Recorded results instead of Snowflake when SNOWFLAKE_MODE=replay (see core/snowflake_replay.py)
+    replay = replay_connection()
+    if replay is not None:
+        return replay
+    
     config = get_snowflake_config()
     
     # Read private key - handle both PEM and PKCS8 formats
@@ -88,7 +101,7 @@ def get_snowflake_connection():
     # Create connection
     conn = snowflake.connector.connect(**conn_params)
     
-    return conn
+    return wrap_connection(conn)
 
 @faire_bp.route('/')
 @login_required
@@ -121,20 +134,16 @@ def index():
         page=page, per_page=per_page, error_out=False
     )
     
-    # Get filter options
-    brands = Brand.query.order_by(Brand.name).all()
-    items = Item.query.order_by(Item.essor_code).all()
+    # Get filter options (cached reference data), items use the async picker
+    brands = get_brands()
     # Get Faire customers (channel_id = 11)
-    faire_channel = Channel.query.filter_by(id=11).first()
-    customers = []
-    if faire_channel:
-        customers = ChannelCustomer.query.filter_by(channel_id=11).order_by(ChannelCustomer.name).all()
+    customers = sorted(get_customers(channel_id=11), key=lambda customer: customer.name)
     
     return render_template('faire/index.html', 
                          faire_data=faire_data,
                          brands=brands,
-                         items=items,
                          customers=customers,
+                         selected_item_label=get_selected_label('items', item_id),
                          current_filters={
                              'brand_id': brand_id,
                              'item_id': item_id,
@@ -155,25 +164,20 @@ def dashboard():
     item_id = request.args.get('item_id', type=int)
     customer_id = request.args.get('customer_id', type=int)
     
-    # Get all brands, items, and customers for filters
-    brands = Brand.query.order_by(Brand.name).all()
-    items = Item.query.join(Brand).order_by(Brand.name, Item.essor_code).all()
-    faire_channel = Channel.query.filter_by(id=11).first()
-    customers = []
-    if faire_channel:
-        customers = ChannelCustomer.query.filter_by(channel_id=11).order_by(ChannelCustomer.name).all()
+    # Get brands for filters (cached reference data), items and customers use async pickers
+    brands = get_brands()
     
     # Calculate total revenues for 2024 and 2025 with filters applied
     query_2024 = db.session.query(
         func.coalesce(func.sum(FaireData.revenues), 0)
     ).filter(
-        extract('year', FaireData.date) == 2024
+        in_period(FaireData.date, 2024)
     )
     
     query_2025 = db.session.query(
         func.coalesce(func.sum(FaireData.revenues), 0)
     ).filter(
-        extract('year', FaireData.date) == 2025
+        in_period(FaireData.date, 2025)
     )
     
     # Apply filters
@@ -195,13 +199,13 @@ def dashboard():
     
     return render_template('faire/dashboard.html',
                          brands=brands,
-                         items=items,
-                         customers=customers,
                          total_rev_2024=total_rev_2024,
                          total_rev_2025=total_rev_2025,
                          selected_brand_id=brand_id,
                          selected_item_id=item_id,
-                         selected_customer_id=customer_id)
+                         selected_item_label=get_selected_label('items', item_id),
+                         selected_customer_id=customer_id,
+                         selected_customer_label=get_selected_label('customers', customer_id, channel_id=11))
 
 @faire_bp.route('/api/totals')
 @login_required
@@ -219,13 +223,13 @@ def api_totals():
     query_2024 = db.session.query(
         func.coalesce(func.sum(FaireData.revenues), 0)
     ).filter(
-        extract('year', FaireData.date) == 2024
+        in_period(FaireData.date, 2024)
     )
     
     query_2025 = db.session.query(
         func.coalesce(func.sum(FaireData.revenues), 0)
     ).filter(
-        extract('year', FaireData.date) == 2025
+        in_period(FaireData.date, 2025)
     )
     
     # Apply filters
@@ -249,6 +253,7 @@ def api_totals():
 
 @faire_bp.route('/api/chart-data')
 @login_required
+@etag_cached('faire_data')
 def api_chart_data():
     """API endpoint to get chart data based on filters - returns 12 months for 2024 and 2025"""
     try:
@@ -269,7 +274,7 @@ def api_chart_data():
             func.sum(FaireData.units).label('total_units'),
             func.sum(FaireData.revenues).label('total_revenues')
         ).filter(
-            extract('year', FaireData.date) == 2024
+            in_period(FaireData.date, 2024)
         )
         
         # Query for 2025
@@ -278,7 +283,7 @@ def api_chart_data():
             func.sum(FaireData.units).label('total_units'),
             func.sum(FaireData.revenues).label('total_revenues')
         ).filter(
-            extract('year', FaireData.date) == 2025
+            in_period(FaireData.date, 2025)
         )
         
         # Apply filters
@@ -341,31 +346,8 @@ def api_chart_data():
         return jsonify({'error': str(e)}), 500
 
 def _save_import_error(import_channel, row_data, error_message, row_number=None):
-    """Helper function to save import errors to the database"""
-    try:
-        # Convert row_data to JSON string
-        if isinstance(row_data, dict):
-            error_data_json = json.dumps(row_data)
-        elif isinstance(row_data, (list, tuple)):
-            # Convert tuple/list to dict with column names if available
-            error_data_json = json.dumps(list(row_data))
-        else:
-            error_data_json = json.dumps(str(row_data))
-        
-        import_error = ImportError(
-            import_channel=import_channel,
-            error_data=error_data_json,
-            error_message=error_message,
-            row_number=row_number
-        )
-        db.session.add(import_error)
-        # Flush to ensure it's in the session (will be committed with batch)
-        db.session.flush()
-    except Exception as e:
-        # If we can't save the error, at least log it
-        print(f"  ⚠ Warning: Could not save import error to database: {str(e)}")
-        import traceback
-        print(f"  Traceback: {traceback.format_exc()}")
+    """Helper function to record import errors (grouped by the active ImportErrorSink)"""
+    record_import_error(import_channel, row_data, error_message, row_number)
 
 def _get_last_import_date():
     """Get the latest date from FaireData table"""
@@ -380,30 +362,15 @@ def _load_faire_query():
     with open(query_path, 'r') as f:
         return f.read()
 
-def _execute_faire_import(import_method='all', dry_run=False):
-    """Execute the Faire import with specified parameters
+def _extract_faire_rows(import_method='all'):
+    """Run the Faire query on Snowflake
     
     Args:
         import_method: 'all' to import all data, 'incremental' to import since last entry
-        dry_run: If True, only process first 10 rows and don't save to database
     
     Returns:
-        dict with import results
+        tuple (column_names, rows)
     """
-    max_rows = 10 if dry_run else None
-    
-    mode_text = "DRY-RUN (first 10 rows only, no database changes)" if dry_run else "LIVE IMPORT"
-    print("\n" + "="*60)
-    print(f"Starting Snowflake Import Process - {mode_text}")
-    print(f"Method: {import_method}")
-    print("="*60)
-    
-    # Connect to Snowflake
-    print("\n🔌 Connecting to Snowflake...")
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
-    print("✓ Connected to Snowflake")
-    
     # Get last import date if using incremental method
     last_date = None
     if import_method == 'incremental':
@@ -460,10 +427,215 @@ def _execute_faire_import(import_method='all', dry_run=False):
             )
             print(f"⚠ Using fallback date replacement: date >= '{replacement_date}' (import all)")
     
-    print("\n📊 Executing query...")
-    print(f"Query: {base_query[:200]}...")  # Print first 200 chars of query
-    cursor.execute(base_query)
-    print("✓ Query executed successfully")
+    # Connect to Snowflake
+    print("\n🔌 Connecting to Snowflake...")
+    conn = get_snowflake_connection()
+    cursor = conn.cursor()
+    print("✓ Connected to Snowflake")
+    
+    try:
+        print("\n📊 Executing query...")
+        print(f"Query: {base_query[:200]}...")  # Print first 200 chars of query
+        cursor.execute(base_query)
+        print("✓ Query executed successfully")
+        rows = cursor.fetchall()
+        # Get column names from cursor description
+        column_names = [desc[0] for desc in cursor.description]
+    finally:
+        cursor.close()
+        conn.close()
+        print("✓ Snowflake connection closed")
+    
+    return column_names, rows
+
+def _load_brand_lookups():
+    """Load brands into memory keyed by code and by name"""
+    all_brands = Brand.query.all()
+    return {brand.code: brand for brand in all_brands if brand.code}, {brand.name: brand for brand in all_brands}
+
+def _get_or_create_faire_item(netsuite_item_number, item_name, brand, results):
+    """Find an item by netsuite item number (essor_code), creating it if needed"""
+    item = None
+    if netsuite_item_number:
+        item = Item.query.filter_by(essor_code=netsuite_item_number).first()
+    
+    if not item:
+        # Create new item
+        print(f"  ➕ Creating new item: essor_code={netsuite_item_number}, essor_name={item_name}, brand={brand.name}")
+        item = Item(
+            essor_code=netsuite_item_number,
+            essor_name=item_name,
+            brand_id=brand.id
+        )
+        db.session.add(item)
+        db.session.flush()
+        results['created'] += 1
+    else:
+        print(f"  ✓ Found item: {netsuite_item_number}")
+    return item
+
+def _get_or_create_faire_customer(faire_customer_name, brand, results):
+    """Find a Faire customer by name (channel_id = 11), creating it if needed"""
+    if not faire_customer_name:
+        return None
+    
+    customer = ChannelCustomer.query.filter_by(
+        name=faire_customer_name,
+        channel_id=11
+    ).first()
+    
+    if not customer:
+        # Create new customer
+        print(f"  ➕ Creating new customer: name={faire_customer_name}, channel_id=11, brand_id={brand.id}")
+        customer = ChannelCustomer(
+            name=faire_customer_name,
+            channel_id=11,
+            brand_id=brand.id
+        )
+        db.session.add(customer)
+        db.session.flush()
+        results['created'] += 1
+    else:
+        print(f"  ✓ Found customer: {faire_customer_name}")
+    return customer
+
+def _ensure_faire_dimensions(column_names, rows):
+    """Create the items and customers referenced by extracted Faire rows
+    
+    Run before the fact merge so that concurrent loaders never race on creating
+    the same dimension rows. Rows without an item number are left to the loader.
+    
+    Returns:
+        dict with created count and errors
+    """
+    results = {'created': 0, 'errors': []}
+    all_brands, all_brands_by_name = _load_brand_lookups()
+    
+    items = {}
+    customers = {}
+    for row in rows:
+        row_dict = dict(zip(column_names, row))
+        brand_code = row_dict.get('BRAND')
+        brand = all_brands.get(brand_code) or all_brands_by_name.get(brand_code)
+        if not brand:
+            continue
+        if row_dict.get('NETSUITE_ITEM_NUMBER'):
+            items.setdefault(row_dict['NETSUITE_ITEM_NUMBER'], (row_dict.get('ITEM_NAME', ''), brand))
+        if row_dict.get('FAIRE_CUSTOMER_NAME'):
+            customers.setdefault(row_dict['FAIRE_CUSTOMER_NAME'], brand)
+    
+    print(f"\n🧱 Ensuring dimensions: {len(items)} items, {len(customers)} customers")
+    try:
+        for netsuite_item_number, (item_name, brand) in items.items():
+            _get_or_create_faire_item(netsuite_item_number, item_name, brand, results)
+        for faire_customer_name, brand in customers.items():
+            _get_or_create_faire_customer(faire_customer_name, brand, results)
+        db.session.commit()
+        print(f"✓ Dimensions ready ({results['created']} created)")
+    except Exception as e:
+        db.session.rollback()
+        error_msg = f'Error creating Faire dimensions: {str(e)}'
+        print(f"✗ ERROR: {error_msg}")
+        results['errors'].append(error_msg)
+    
+    return results
+
+def _write_faire_row(date, brand_id, item, customer_id, revenues, units, results):
+    """Update the faire_data row of (date, item, customer) or create it"""
+    if customer_id:
+        existing = FaireData.query.filter(
+            FaireData.date == date,
+            FaireData.item_id == item.id,
+            FaireData.customer_id == customer_id
+        ).first()
+    else:
+        existing = FaireData.query.filter(
+            FaireData.date == date,
+            FaireData.item_id == item.id,
+            FaireData.customer_id.is_(None)
+        ).first()
+    
+    if existing:
+        # Update existing record
+        print(f"  ↻ Updating existing faire data (ID: {existing.id}, date={date}, item={item.essor_code})")
+        existing.revenues = revenues
+        existing.units = units
+        existing.brand_id = brand_id
+        results['updated'] += 1
+    else:
+        # Create new record
+        print(f"  ➕ Creating new faire data: date={date}, item={item.essor_code}")
+        faire = FaireData(
+            date=date,
+            brand_id=brand_id,
+            item_id=item.id,
+            customer_id=customer_id,
+            revenues=revenues,
+            units=units
+        )
+        db.session.add(faire)
+        results['created'] += 1
+
+def _reload_faire_partitions(reload_rows, results):
+    """Replace the faire_data partition of every year in reload_rows by those rows
+    
+    Each year commits on its own, with the versions and pacing months it changed, so the
+    years swapped before a failing one are not served stale. Rows already in faire_data
+    keep their created_at.
+    """
+    by_year = {}
+    for row in reload_rows.values():
+        by_year.setdefault(row['date'].year, []).append(row)
+    
+    now = datetime.utcnow()
+    results['partitions_reloaded'] = []
+    for year, rows in sorted(by_year.items()):
+        with reload_partition('faire_data', date_type(year, 1, 1)) as (conn, staging):
+            created_at = {
+                (day, item_id, customer_id): created
+                for day, item_id, customer_id, created in conn.execute(text("""
+                    SELECT date, item_id, customer_id, min(created_at) FROM faire_data
+                    WHERE date >= :start AND date < :end
+                    GROUP BY date, item_id, customer_id
+                """), {'start': date_type(year, 1, 1), 'end': date_type(year + 1, 1, 1)})
+            }
+            insert_rows(conn, staging, [dict(row, created_at=created_at.get(_reload_key(row), now), updated_at=now)
+                                        for row in rows])
+        existing = sum(1 for row in rows if _reload_key(row) in created_at)
+        results['updated'] += existing
+        results['created'] += len(rows) - existing
+        
+        # Raw DDL bypasses the flush, register what the swap changed before committing
+        touch_months(date_type(year, month, 1) for month in range(1, 13))
+        touch_tables(['faire_data'])
+        db.session.commit()
+        results['partitions_reloaded'].append(year)
+        print(f"✓ Reloaded {year}: {len(rows)} rows")
+
+def _reload_key(row):
+    return (row['date'], row['item_id'], row['customer_id'])
+
+def _execute_faire_import(import_method='all', dry_run=False, rows=None, column_names=None):
+    """Execute the Faire import with specified parameters
+    
+    Args:
+        import_method: 'all' to import all data, 'incremental' to import since last entry
+        dry_run: If True, only process first 10 rows and don't save to database
+        rows, column_names: Already extracted data (see _extract_faire_rows), skips the Snowflake query
+    
+    Returns:
+        dict with import results
+    """
+    max_rows = 10 if dry_run else None
+    
+    mode_text = "DRY-RUN (first 10 rows only, no database changes)" if dry_run else "LIVE IMPORT"
+    print("\n" + "="*60)
+    print(f"Starting Snowflake Import Process - {mode_text}")
+    print(f"Method: {import_method}")
+    print("="*60)
+    
+    if rows is None:
+        column_names, rows = _extract_faire_rows(import_method)
     
     results = {
         'processed': 0,
@@ -473,20 +645,15 @@ def _execute_faire_import(import_method='all', dry_run=False):
         'errors': []
     }
     
-    rows = cursor.fetchall()
     total_rows = len(rows)
     rows_to_process = rows[:max_rows] if max_rows else rows
     
-    # Get column names from cursor description
-    column_names = [desc[0] for desc in cursor.description]
-    
     print(f"\n📊 Total rows to process: {len(rows_to_process)}" + (f" (limited to {max_rows} for dry-run)" if max_rows else ""))
     print("-"*60)
     
     # Load all brands into memory for faster lookup
     print("\n📦 Loading brands into memory...")
-    all_brands = {brand.code: brand for brand in Brand.query.all() if brand.code}
-    all_brands_by_name = {brand.name: brand for brand in Brand.query.all()}
+    all_brands, all_brands_by_name = _load_brand_lookups()
     print(f"✓ Loaded {len(all_brands)} brands with codes, {len(all_brands_by_name)} total brands")
     
     # Load Faire channel (id=11)
@@ -495,10 +662,18 @@ def _execute_faire_import(import_method='all', dry_run=False):
         error_msg = "Faire channel (id=11) does not exist. Please create it first."
         print(f"✗ ERROR: {error_msg}")
         results['errors'].append(error_msg)
-        cursor.close()
-        conn.close()
         return results
     
+    # A full import of a partitioned faire_data swaps whole years instead of updating row by row
+    reload_rows = {} if import_method == 'all' and not dry_run and is_partitioned('faire_data') else None
+    if reload_rows is not None:
+        print("\n🔁 Full reload: years will be swapped in as whole partitions")
+    
+    # Errors are grouped by signature and written per batch, outside the import session
+    error_sink = ImportErrorSink(persist=not dry_run).activate()
+    # Pacing months of every batch are refreshed once, at the end of the import
+    defer_refresh()
+    
     try:
         # Process rows in batches of 100
         BATCH_SIZE = 100
@@ -586,46 +761,11 @@ def _execute_faire_import(import_method='all', dry_run=False):
                     netsuite_item_number = row_dict.get('NETSUITE_ITEM_NUMBER')
                     item_name = row_dict.get('ITEM_NAME', '')
                     
-                    item = None
-                    if netsuite_item_number:
-                        item = Item.query.filter_by(essor_code=netsuite_item_number).first()
-                    
-                    if not item:
-                        # Create new item
-                        print(f"  ➕ Creating new item: essor_code={netsuite_item_number}, essor_name={item_name}, brand={brand.name}")
-                        item = Item(
-                            essor_code=netsuite_item_number,
-                            essor_name=item_name,
-                            brand_id=brand.id
-                        )
-                        db.session.add(item)
-                        db.session.flush()
-                        results['created'] += 1
-                    else:
-                        print(f"  ✓ Found item: {netsuite_item_number}")
+                    item = _get_or_create_faire_item(netsuite_item_number, item_name, brand, results)
                     
                     # Find or create customer by name (channel_id = 11)
                     faire_customer_name = row_dict.get('FAIRE_CUSTOMER_NAME')
-                    customer = None
-                    if faire_customer_name:
-                        customer = ChannelCustomer.query.filter_by(
-                            name=faire_customer_name,
-                            channel_id=11
-                        ).first()
-                    
-                    if not customer and faire_customer_name:
-                        # Create new customer
-                        print(f"  ➕ Creating new customer: name={faire_customer_name}, channel_id=11, brand_id={brand.id}")
-                        customer = ChannelCustomer(
-                            name=faire_customer_name,
-                            channel_id=11,
-                            brand_id=brand.id
-                        )
-                        db.session.add(customer)
-                        db.session.flush()
-                        results['created'] += 1
-                    elif customer:
-                        print(f"  ✓ Found customer: {faire_customer_name}")
+                    customer = _get_or_create_faire_customer(faire_customer_name, brand, results)
                     
                     # Parse numeric fields
                     faire_net_rev = Decimal(str(row_dict.get('FAIRE_NET_REV', 0) or 0))
@@ -633,42 +773,21 @@ def _execute_faire_import(import_method='all', dry_run=False):
                     
                     print(f"  📊 Parsed values: units={faire_net_units_sold}, revenues=${faire_net_rev}")
                     
-                    # Check for existing record
-                    if customer:
-                        existing = FaireData.query.filter(
-                            FaireData.date == date,
-                            FaireData.item_id == item.id,
-                            FaireData.customer_id == customer.id
-                        ).first()
-                    else:
-                        existing = FaireData.query.filter(
-                            FaireData.date == date,
-                            FaireData.item_id == item.id,
-                            FaireData.customer_id.is_(None)
-                        ).first()
-                    
-                    if existing:
-                        # Update existing record
-                        print(f"  ↻ Updating existing faire data (ID: {existing.id}, date={date}, item={item.essor_code})")
-                        existing.revenues = faire_net_rev
-                        existing.units = faire_net_units_sold
-                        existing.brand_id = brand.id
-                        results['updated'] += 1
-                        results['processed'] += 1
+                    if reload_rows is not None:
+                        # Full reload: rows are swapped in per year once all of them are resolved
+                        key = (date, item.id, customer.id if customer else None)
+                        reload_rows[key] = {
+                            'date': date,
+                            'brand_id': brand.id,
+                            'item_id': item.id,
+                            'customer_id': customer.id if customer else None,
+                            'revenues': faire_net_rev,
+                            'units': faire_net_units_sold
+                        }
                     else:
-                        # Create new record
-                        print(f"  ➕ Creating new faire data: date={date}, item={item.essor_code}")
-                        faire = FaireData(
-                            date=date,
-                            brand_id=brand.id,
-                            item_id=item.id,
-                            customer_id=customer.id if customer else None,
-                            revenues=faire_net_rev,
-                            units=faire_net_units_sold
-                        )
-                        db.session.add(faire)
-                        results['created'] += 1
-                        results['processed'] += 1
+                        _write_faire_row(date, brand.id, item, customer.id if customer else None,
+                                         faire_net_rev, faire_net_units_sold, results)
+                    results['processed'] += 1
                     
                 except Exception as e:
                     error_msg = f"Row {row_num}: {str(e)}"
@@ -677,30 +796,10 @@ def _execute_faire_import(import_method='all', dry_run=False):
                     traceback_str = traceback.format_exc()
                     print(f"  Traceback: {traceback_str}")
                     results['errors'].append(error_msg)
-                    # Save to ImportError table
-                    try:
-                        row_data = dict(zip(column_names, row)) if 'column_names' in locals() else list(row)
-                        if isinstance(row_data, dict):
-                            error_data_json = json.dumps(row_data)
-                        elif isinstance(row_data, (list, tuple)):
-                            error_data_json = json.dumps(list(row_data))
-                        else:
-                            error_data_json = json.dumps(str(row_data))
-                        
-                        import_error = ImportError(
-                            import_channel='snowflake',
-                            error_data=error_data_json,
-                            error_message=f"{error_msg}\n\n{traceback_str}",
-                            row_number=row_num
-                        )
-                        db.session.add(import_error)
-                        if not dry_run:
-                            db.session.commit()
-                    except Exception as save_error:
-                        print(f"  ⚠ Warning: Could not save error to ImportError table: {str(save_error)}")
+                    # Grouped by the error sink, written on the next flush (outside this session)
+                    row_data = dict(zip(column_names, row)) if 'column_names' in locals() else list(row)
+                    _save_import_error('snowflake', row_data, f"{error_msg}\n\n{traceback_str}", row_num)
                     results['skipped'] += 1
-                    if not dry_run:
-                        db.session.begin()
                     continue
             
             # Commit batch (only if not dry-run)
@@ -710,6 +809,7 @@ def _execute_faire_import(import_method='all', dry_run=False):
                 print(f"\n💾 Committing batch {batch_num + 1}/{total_batches}...")
                 try:
                     db.session.commit()
+                    error_sink.flush()
                     print(f"✓ Batch {batch_num + 1} committed successfully")
                     print(f"   Progress: {results['processed']} rows processed, {results['created']} created, {results['updated']} updated")
                 except Exception as e:
@@ -717,10 +817,17 @@ def _execute_faire_import(import_method='all', dry_run=False):
                     db.session.rollback()
                     raise
         
-        # Close Snowflake connection
-        cursor.close()
-        conn.close()
-        print("\n✓ Snowflake connection closed")
+        if reload_rows:
+            if results['skipped']:
+                # Swapping would drop the existing rows of the skipped ones, upsert instead
+                print(f"\n⚠ {results['skipped']} rows skipped, writing the reload row by row instead of swapping partitions")
+                items = {item.id: item for item in Item.query.filter(Item.id.in_({row['item_id'] for row in reload_rows.values()}))}
+                for row in reload_rows.values():
+                    _write_faire_row(row['date'], row['brand_id'], items[row['item_id']], row['customer_id'],
+                                     row['revenues'], row['units'], results)
+                db.session.commit()
+            else:
+                _reload_faire_partitions(reload_rows, results)
         
         # Prepare summary message
         mode_text = "DRY-RUN" if dry_run else "IMPORT"
@@ -746,12 +853,8 @@ def _execute_faire_import(import_method='all', dry_run=False):
         results['errors'].append(error_msg)
         return results
     finally:
-        # Ensure connection is closed
-        try:
-            cursor.close()
-            conn.close()
-        except:
-            pass
+        error_sink.close()
+        refresh_deferred()
 
 @faire_bp.route('/import', methods=['GET', 'POST'])
 @login_required
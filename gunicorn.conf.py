@@ -0,0 +1,33 @@
+"""
+Gunicorn settings, read from the WEB_* environment variables (see db_utils.get_worker_settings)
+
+gthread workers are the default: a slow import or assortment call holds one thread instead
+of a whole sync worker, and unlike gevent they need neither a green psycopg2 nor care for the
+background job threads and CPU-bound imports that would block the event loop. Compare the
+models on the synthetic dataset with benchmarks/load_test.py.
+"""
+
+import os
+from db_utils import get_worker_settings
+
+_settings = get_worker_settings()
+
+bind = f"0.0.0.0:{os.getenv('FLASK_PORT', '5000')}"
+worker_class = _settings['worker_class']
+workers = _settings['workers']
+threads = _settings['threads']
+worker_connections = _settings['worker_connections']
+timeout = _settings['timeout']
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_fork(server, worker):
+    """Make psycopg2 cooperative in gevent workers, otherwise each query blocks every greenlet"""
+    if worker_class != 'gevent':
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        server.log.warning("psycogreen is not installed, gevent workers run their queries one at a time")
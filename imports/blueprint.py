@@ -4,8 +4,10 @@ Import blueprint for managing import errors
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for
+from sqlalchemy import func, cast
 from models import db, ImportError
 from auth.blueprint import login_required, admin_required
+from core.pagination import keyset_paginate
 from datetime import datetime, timedelta
 import json
 
@@ -15,8 +17,8 @@ import_bp = Blueprint('imports', __name__, template_folder='templates')
 @login_required
 @admin_required
 def import_errors_list():
-    """List all import errors"""
-    page = request.args.get('page', 1, type=int)
+    """List import errors aggregated by error signature"""
+    cursor = request.args.get('cursor')
     per_page = 50
     
     # Get filter parameters
@@ -24,25 +26,47 @@ def import_errors_list():
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
     
-    query = ImportError.query
+    # Rows recorded before signatures existed are their own group
+    group_key = func.coalesce(ImportError.signature, cast(ImportError.id, db.String))
+    
+    query = ImportError.query.with_entities(
+        ImportError.import_channel,
+        group_key.label('group_key'),
+        func.sum(ImportError.occurrences).label('occurrences'),
+        func.count(ImportError.id).label('imports_count'),
+        func.min(ImportError.import_date).label('first_seen'),
+        func.max(ImportError.import_date).label('last_seen'),
+        func.max(ImportError.id).label('latest_id')
+    )
     
     if import_channel:
-        query = query.filter_by(import_channel=import_channel)
+        query = query.filter(ImportError.import_channel == import_channel)
     if date_from:
         query = query.filter(ImportError.import_date >= datetime.strptime(date_from, '%Y-%m-%d'))
     if date_to:
         query = query.filter(ImportError.import_date <= datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1))
     
-    import_errors = query.order_by(ImportError.import_date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    # Keyset pagination on (last seen, latest id) of each group
+    error_groups = keyset_paginate(
+        query.group_by(ImportError.import_channel, group_key),
+        [(func.max(ImportError.import_date), 'desc'), (func.max(ImportError.id), 'desc')],
+        cursor=cursor, per_page=per_page, count='exact', having=True
     )
     
+    # Latest occurrence of each group, for the message and the detail link
+    latest_ids = [group.latest_id for group in error_groups.items]
+    latest_errors = {
+        import_error.id: import_error
+        for import_error in ImportError.query.filter(ImportError.id.in_(latest_ids)).all()
+    } if latest_ids else {}
+    
     # Get unique import channels for filter
     import_channels = db.session.query(ImportError.import_channel).distinct().all()
     import_channels = [ch[0] for ch in import_channels]
     
     return render_template('imports/errors_list.html',
-                         import_errors=import_errors,
+                         error_groups=error_groups,
+                         latest_errors=latest_errors,
                          import_channels=import_channels,
                          current_filters={
                              'import_channel': import_channel,
@@ -64,9 +88,23 @@ def import_error_detail(error_id):
         # If it's not valid JSON, just use the raw string
         error_data = import_error.error_data
     
+    # Sample rows of grouped errors
+    samples = []
+    if import_error.sample_data:
+        try:
+            for sample in json.loads(import_error.sample_data):
+                try:
+                    sample['data'] = json.loads(sample['data'])
+                except (json.JSONDecodeError, TypeError):
+                    pass
+                samples.append(sample)
+        except (json.JSONDecodeError, TypeError):
+            samples = []
+    
     return render_template('imports/error_detail.html',
                          import_error=import_error,
-                         error_data=error_data)
+                         error_data=error_data,
+                         samples=samples)
 
 @import_bp.route('/errors/<int:error_id>/delete', methods=['POST'])
 @login_required
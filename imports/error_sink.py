@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Buffered, deduplicated sink for import errors
+
+Errors are grouped by signature (import channel + error message with row numbers
+and other digits normalized away). Each group keeps an occurrence count and a few
+sample rows, and is written with one bulk insert/update per flush on a separate
+connection, so recorded errors survive a rollback of the import session.
+"""
+
+import re
+import json
+import hashlib
+from datetime import datetime
+from flask import g, has_app_context
+from sqlalchemy import insert, update, bindparam
+from models import db, ImportError
+
+MAX_SAMPLES = 5
+
+_ROW_PREFIX = re.compile(r'^\s*Row\s+\d+\s*:\s*', re.IGNORECASE)
+_DIGITS = re.compile(r'\d+')
+
+
+def error_signature(import_channel, error_message):
+    """Stable signature for an error: channel + first line of the message without row numbers/digits"""
+    message = (error_message or '').split('\n\n', 1)[0].strip()
+    message = _ROW_PREFIX.sub('', message)
+    message = _DIGITS.sub('#', message)
+    return hashlib.sha1(f"{import_channel}|{message}".encode('utf-8')).hexdigest()
+
+
+def _to_json(row_data):
+    """Convert a row to JSON the same way the importers always did"""
+    if isinstance(row_data, dict):
+        return json.dumps(row_data, default=str)
+    elif isinstance(row_data, (list, tuple)):
+        return json.dumps(list(row_data), default=str)
+    return json.dumps(str(row_data))
+
+
+class ImportErrorSink:
+    """Collects import errors for one import run and writes them grouped by signature
+
+    Use as a context manager (or activate()/close()) so that _save_import_error helpers
+    called during the import record into this sink instead of the session.
+    """
+
+    def __init__(self, persist=True):
+        self.persist = persist
+        self.import_date = datetime.utcnow()
+        self.groups = {}
+        self.total = 0
+
+    def add(self, import_channel, row_data, error_message, row_number=None):
+        """Record one error occurrence (O(1), no database access)"""
+        self.total += 1
+        signature = error_signature(import_channel, error_message)
+        group = self.groups.get(signature)
+        if group is None:
+            group = {
+                'id': None,
+                'import_channel': import_channel,
+                'signature': signature,
+                'error_message': error_message,
+                'row_number': row_number,
+                'last_row_number': row_number,
+                'occurrences': 0,
+                'samples': [],
+                'dirty': True
+            }
+            self.groups[signature] = group
+        group['occurrences'] += 1
+        group['last_row_number'] = row_number
+        group['dirty'] = True
+        if len(group['samples']) < MAX_SAMPLES:
+            group['samples'].append({'row_number': row_number, 'data': _to_json(row_data)})
+
+    def flush(self):
+        """Write new groups with one bulk insert and changed groups with one bulk update"""
+        dirty = [group for group in self.groups.values() if group['dirty']]
+        if not dirty or not self.persist:
+            return
+
+        new_groups = [group for group in dirty if group['id'] is None]
+        changed_groups = [group for group in dirty if group['id'] is not None]
+        table = ImportError.__table__
+
+        try:
+            # Separate connection/transaction: independent from the import session
+            with db.engine.begin() as conn:
+                if new_groups:
+                    inserted = conn.execute(
+                        insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                        [{
+                            'import_channel': group['import_channel'],
+                            'import_date': self.import_date,
+                            'error_data': group['samples'][0]['data'],
+                            'error_message': group['error_message'],
+                            'row_number': group['row_number'],
+                            'last_row_number': group['last_row_number'],
+                            'signature': group['signature'],
+                            'occurrences': group['occurrences'],
+                            'sample_data': json.dumps(group['samples']),
+                            'created_at': datetime.utcnow()
+                        } for group in new_groups]
+                    )
+                    for group, row in zip(new_groups, inserted):
+                        group['id'] = row.id
+
+                if changed_groups:
+                    conn.execute(
+                        update(table).where(table.c.id == bindparam('b_id')).values(
+                            occurrences=bindparam('b_occurrences'),
+                            last_row_number=bindparam('b_last_row_number'),
+                            sample_data=bindparam('b_sample_data')
+                        ),
+                        [{
+                            'b_id': group['id'],
+                            'b_occurrences': group['occurrences'],
+                            'b_last_row_number': group['last_row_number'],
+                            'b_sample_data': json.dumps(group['samples'])
+                        } for group in changed_groups]
+                    )
+
+            for group in dirty:
+                group['dirty'] = False
+            print(f"  📋 Import errors flushed: {len(new_groups)} new, {len(changed_groups)} updated groups ({self.total} occurrences so far)")
+        except Exception as e:
+            # If we can't save the errors, at least log them
+            print(f"  ⚠ Warning: Could not save import errors to database: {str(e)}")
+
+    def activate(self):
+        """Make this the sink used by record_import_error in the current app context"""
+        g.setdefault('import_error_sinks', []).append(self)
+        return self
+
+    def close(self):
+        """Flush remaining errors and deactivate"""
+        try:
+            self.flush()
+        finally:
+            sinks = g.get('import_error_sinks') or []
+            if self in sinks:
+                sinks.remove(self)
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def get_active_sink():
+    """Get the innermost active sink for the current app context, if any"""
+    if not has_app_context():
+        return None
+    sinks = g.get('import_error_sinks')
+    return sinks[-1] if sinks else None
+
+
+def record_import_error(import_channel, row_data, error_message, row_number=None):
+    """Record an import error into the active sink, or write it right away if there is none"""
+    sink = get_active_sink()
+    if sink is not None:
+        sink.add(import_channel, row_data, error_message, row_number)
+        return
+
+    sink = ImportErrorSink()
+    sink.add(import_channel, row_data, error_message, row_number)
+    sink.flush()
@@ -0,0 +1,60 @@
+"""add_covering_dashboard_indexes
+
+Revision ID: e6f7a8b9c0d2
+Revises: d5e6f7a8b9c1
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f7a8b9c0d2'
+down_revision: Union[str, None] = 'd5e6f7a8b9c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, replaced index or None, new index, key columns, included columns)
+# The INCLUDE columns let the dashboard sums (revenues, units per brand/item/channel/customer
+# and date range) run as index-only scans instead of visiting the table rows
+COVERING_INDEXES = [
+    ('netsuite_data', 'idx_netsuite_brand_date', 'idx_netsuite_brand_date_cover', ['brand_id', 'date'], ['channel_id', 'revenues', 'units']),
+    ('netsuite_data', 'idx_netsuite_item_date', 'idx_netsuite_item_date_cover', ['item_id', 'date'], ['channel_id', 'revenues', 'units']),
+    ('netsuite_data', None, 'idx_netsuite_channel_date_cover', ['channel_id', 'date'], ['revenues', 'units']),
+    ('netsuite_data', None, 'idx_netsuite_customer_date_cover', ['customer_id', 'date'], ['brand_id', 'item_id', 'channel_id', 'revenues']),
+    ('faire_data', 'idx_faire_date', 'idx_faire_date_cover', ['date'], ['revenues', 'units']),
+    ('faire_data', 'idx_faire_brand_date', 'idx_faire_brand_date_cover', ['brand_id', 'date'], ['revenues', 'units']),
+    ('faire_data', 'idx_faire_item_date', 'idx_faire_item_date_cover', ['item_id', 'date'], ['revenues', 'units']),
+    ('faire_data', None, 'idx_faire_customer_date_cover', ['customer_id', 'date'], ['brand_id', 'item_id', 'revenues']),
+    ('sellthrough_data', None, 'idx_sellthrough_customer_date_cover', ['customer_id', 'date'], ['item_id', 'revenues']),
+]
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    for table_name, old_index, new_index, columns, include in COVERING_INDEXES:
+        indexes = [idx['name'] for idx in inspector.get_indexes(table_name)]
+        if new_index not in indexes:
+            op.create_index(new_index, table_name, columns, unique=False, postgresql_include=include)
+        if old_index and old_index in indexes:
+            op.drop_index(old_index, table_name=table_name)
+
+    # Fresh statistics so the planner costs the new indexes (autovacuum keeps the visibility map
+    # that index-only scans rely on up to date)
+    if bind.dialect.name == 'postgresql':
+        for table_name in sorted({table_name for table_name, *_ in COVERING_INDEXES}):
+            op.execute(f'ANALYZE {table_name}')
+
+
+def downgrade() -> None:
+    for table_name, old_index, new_index, columns, include in reversed(COVERING_INDEXES):
+        if old_index:
+            op.create_index(old_index, table_name, columns, unique=False)
+        op.drop_index(new_index, table_name=table_name)
@@ -0,0 +1,36 @@
+"""add_crm_open_tickets_due_index
+
+Revision ID: a2b3c4d5e6f8
+Revises: f1a2b3c4d5e7
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2b3c4d5e6f8'
+down_revision: Union[str, None] = 'f1a2b3c4d5e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Partial index on open tickets by due date (workload summary and due date filters)
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    indexes = [idx['name'] for idx in inspector.get_indexes('crm_tickets')]
+    
+    if 'idx_crm_ticket_open_due' not in indexes:
+        op.create_index('idx_crm_ticket_open_due', 'crm_tickets', ['due_date'], unique=False,
+                        postgresql_where=sa.text("status = 'opened'"))
+
+
+def downgrade() -> None:
+    # Drop partial index on open tickets
+    op.drop_index('idx_crm_ticket_open_due', table_name='crm_tickets')
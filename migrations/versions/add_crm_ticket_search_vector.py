@@ -0,0 +1,51 @@
+"""add_crm_ticket_search_vector
+
+Revision ID: f1a2b3c4d5e7
+Revises: e0f1a2b3c4d6
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a2b3c4d5e7'
+down_revision: Union[str, None] = 'e0f1a2b3c4d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add full-text search column to crm_tickets
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    columns = [col['name'] for col in inspector.get_columns('crm_tickets')]
+    indexes = [idx['name'] for idx in inspector.get_indexes('crm_tickets')]
+    
+    if 'search_vector' not in columns:
+        op.add_column('crm_tickets', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    
+    # Initial build (kept up to date by the app afterwards)
+    op.execute("""
+        UPDATE crm_tickets t
+        SET search_vector = setweight(to_tsvector('simple', coalesce(t.description, '')), 'A')
+                         || setweight(to_tsvector('simple', coalesce(c.name, '') || ' ' || coalesce(ch.name, '')), 'B')
+        FROM channel_customers c
+        JOIN channels ch ON ch.id = c.channel_id
+        WHERE c.id = t.customer_id
+    """)
+    
+    if 'idx_crm_ticket_search' not in indexes:
+        op.create_index('idx_crm_ticket_search', 'crm_tickets', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    # Remove full-text search column from crm_tickets
+    op.drop_index('idx_crm_ticket_search', table_name='crm_tickets')
+    op.drop_column('crm_tickets', 'search_vector')
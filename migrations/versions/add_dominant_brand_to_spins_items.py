@@ -0,0 +1,69 @@
+"""add_dominant_brand_to_spins_items
+
+Revision ID: c8d9e0f1a2b4
+Revises: b7c8d9e0f1a3
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d9e0f1a2b4'
+down_revision: Union[str, None] = 'b7c8d9e0f1a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns('spins_items')]
+    
+    if 'dominant_brand_id' not in columns:
+        op.add_column('spins_items', sa.Column('dominant_brand_id', sa.Integer(), nullable=True))
+        op.create_foreign_key('fk_spins_items_dominant_brand', 'spins_items', 'spins_brands',
+                              ['dominant_brand_id'], ['id'])
+    if 'first_seen_week' not in columns:
+        op.add_column('spins_items', sa.Column('first_seen_week', sa.Date(), nullable=True))
+    if 'last_seen_week' not in columns:
+        op.add_column('spins_items', sa.Column('last_seen_week', sa.Date(), nullable=True))
+    
+    indexes = [idx['name'] for idx in inspector.get_indexes('spins_items')]
+    if 'idx_spins_items_dominant_brand' not in indexes:
+        op.create_index('idx_spins_items_dominant_brand', 'spins_items', ['dominant_brand_id', 'upc'], unique=False)
+    
+    # One-off backfill from spins_data (the importer keeps it up to date afterwards)
+    op.execute("""
+        WITH counts AS (
+            SELECT item_id, brand_id, COUNT(*) AS rows_count
+            FROM spins_data
+            GROUP BY item_id, brand_id
+        ), dominant AS (
+            SELECT DISTINCT ON (item_id) item_id, brand_id
+            FROM counts
+            ORDER BY item_id, rows_count DESC, brand_id
+        ), seen AS (
+            SELECT item_id, MIN(week) AS first_week, MAX(week) AS last_week
+            FROM spins_data
+            GROUP BY item_id
+        )
+        UPDATE spins_items
+        SET dominant_brand_id = dominant.brand_id,
+            first_seen_week = seen.first_week,
+            last_seen_week = seen.last_week
+        FROM dominant JOIN seen ON seen.item_id = dominant.item_id
+        WHERE spins_items.id = dominant.item_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_spins_items_dominant_brand', table_name='spins_items')
+    op.drop_constraint('fk_spins_items_dominant_brand', 'spins_items', type_='foreignkey')
+    op.drop_column('spins_items', 'last_seen_week')
+    op.drop_column('spins_items', 'first_seen_week')
+    op.drop_column('spins_items', 'dominant_brand_id')
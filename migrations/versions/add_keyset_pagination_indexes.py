@@ -0,0 +1,46 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: b7c8d9e0f1a3
+Revises: a6b7c8d9e0f2
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c8d9e0f1a3'
+down_revision: Union[str, None] = 'a6b7c8d9e0f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, old single-column index, new composite index, columns)
+# The composite (date, id) indexes serve the keyset pagination seek and make the old ones redundant
+KEYSET_INDEXES = [
+    ('netsuite_data', 'idx_netsuite_date', 'idx_netsuite_date_id', ['date', 'id']),
+    ('sellthrough_data', 'idx_sellthrough_date', 'idx_sellthrough_date_id', ['date', 'id']),
+    ('spins_data', 'idx_spins_week', 'idx_spins_week_id', ['week', 'id']),
+]
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    for table_name, old_index, new_index, columns in KEYSET_INDEXES:
+        indexes = [idx['name'] for idx in inspector.get_indexes(table_name)]
+        if new_index not in indexes:
+            op.create_index(new_index, table_name, columns, unique=False)
+        if old_index in indexes:
+            op.drop_index(old_index, table_name=table_name)
+
+
+def downgrade() -> None:
+    for table_name, old_index, new_index, columns in reversed(KEYSET_INDEXES):
+        op.create_index(old_index, table_name, [columns[0]], unique=False)
+        op.drop_index(new_index, table_name=table_name)
@@ -0,0 +1,78 @@
+"""add_month_to_sellthrough_weekly
+
+Revision ID: f7a8b9c0d1e3
+Revises: e6f7a8b9c0d2
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a8b9c0d1e3'
+down_revision: Union[str, None] = 'e6f7a8b9c0d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add the month to the sellthrough_weekly grain (a week straddling two months gets a row per month)
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    columns = [col['name'] for col in inspector.get_columns('sellthrough_weekly')]
+    
+    if 'month' not in columns:
+        op.add_column('sellthrough_weekly', sa.Column('month', sa.Date(), nullable=True))
+    
+    # Rebuild the cube from sellthrough_data (kept up to date by the app afterwards)
+    op.execute("DELETE FROM sellthrough_weekly")
+    op.execute("""
+        INSERT INTO sellthrough_weekly (week, month, channel_id, brand_id, category_id, item_id, revenues, units, rows_count, stores,
+                                        usd_pspw_weighted, usd_pspw_stores, units_pspw_weighted, units_pspw_stores,
+                                        instock_weighted, instock_stores, oos_weighted, oos_stores)
+        SELECT date_trunc('week', s.date::timestamp)::date, date_trunc('month', s.date::timestamp)::date,
+               s.channel_id, s.brand_id, i.category_id, s.item_id,
+               SUM(s.revenues), SUM(s.units), COUNT(*), SUM(s.stores),
+               COALESCE(SUM(s.usd_pspw * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.usd_pspw IS NOT NULL), 0),
+               COALESCE(SUM(s.units_pspw * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.units_pspw IS NOT NULL), 0),
+               COALESCE(SUM(s.instock * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.instock IS NOT NULL), 0),
+               COALESCE(SUM(s.oos * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.oos IS NOT NULL), 0)
+        FROM sellthrough_data s
+        LEFT JOIN items i ON i.id = s.item_id
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """)
+    
+    op.alter_column('sellthrough_weekly', 'month', nullable=False)
+    indexes = [idx['name'] for idx in inspector.get_indexes('sellthrough_weekly')]
+    if 'idx_sellthrough_weekly_month' not in indexes:
+        op.create_index('idx_sellthrough_weekly_month', 'sellthrough_weekly', ['month'], unique=False)
+
+
+def downgrade() -> None:
+    # Back to one row per week (merge the month parts of straddling weeks)
+    op.drop_index('idx_sellthrough_weekly_month', table_name='sellthrough_weekly')
+    op.execute("""
+        CREATE TEMPORARY TABLE sellthrough_weekly_merged AS
+        SELECT week, channel_id, brand_id, category_id, item_id,
+               SUM(revenues) AS revenues, SUM(units) AS units, SUM(rows_count) AS rows_count, SUM(stores) AS stores,
+               SUM(usd_pspw_weighted) AS usd_pspw_weighted, SUM(usd_pspw_stores) AS usd_pspw_stores,
+               SUM(units_pspw_weighted) AS units_pspw_weighted, SUM(units_pspw_stores) AS units_pspw_stores,
+               SUM(instock_weighted) AS instock_weighted, SUM(instock_stores) AS instock_stores,
+               SUM(oos_weighted) AS oos_weighted, SUM(oos_stores) AS oos_stores
+        FROM sellthrough_weekly
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+    op.execute("DELETE FROM sellthrough_weekly")
+    op.execute("""
+        INSERT INTO sellthrough_weekly (week, channel_id, brand_id, category_id, item_id, revenues, units, rows_count, stores,
+                                        usd_pspw_weighted, usd_pspw_stores, units_pspw_weighted, units_pspw_stores,
+                                        instock_weighted, instock_stores, oos_weighted, oos_stores)
+        SELECT * FROM sellthrough_weekly_merged
+    """)
+    op.execute("DROP TABLE sellthrough_weekly_merged")
+    op.drop_column('sellthrough_weekly', 'month')
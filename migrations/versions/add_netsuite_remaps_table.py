@@ -0,0 +1,54 @@
+"""add_netsuite_remaps_table
+
+Revision ID: d3e4f5a6b7c9
+Revises: c2d3e4f5a6b7
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e4f5a6b7c9'
+down_revision: Union[str, None] = 'c2d3e4f5a6b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    # Index used by remaps and by the revenue-by-code aggregation
+    indexes = [idx['name'] for idx in inspector.get_indexes('netsuite_data')]
+    if 'idx_netsuite_retailer_code_date' not in indexes:
+        op.create_index('idx_netsuite_retailer_code_date', 'netsuite_data', ['retailer_code', 'date'], unique=False)
+    
+    # Create netsuite_remaps table
+    tables = inspector.get_table_names()
+    if 'netsuite_remaps' not in tables:
+        op.create_table('netsuite_remaps',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('retailer_code', sa.String(length=10), nullable=False),
+        sa.Column('channel_id', sa.Integer(), nullable=True),
+        sa.Column('customer_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('rows_updated', sa.Integer(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('requested_at', sa.DateTime(), nullable=False),
+        sa.Column('applied_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ),
+        sa.ForeignKeyConstraint(['customer_id'], ['channel_customers.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_netsuite_remap_status', 'netsuite_remaps', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_netsuite_remap_status', table_name='netsuite_remaps')
+    op.drop_table('netsuite_remaps')
+    op.drop_index('idx_netsuite_retailer_code_date', table_name='netsuite_data')
@@ -0,0 +1,49 @@
+"""add_query_result_cache_table
+
+Revision ID: c4d5e6f7a8b0
+Revises: b3c4d5e6f7a9
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d5e6f7a8b0'
+down_revision: Union[str, None] = 'b3c4d5e6f7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create query_result_cache table (UNLOGGED, shared result cache)
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    tables = inspector.get_table_names()
+    
+    if 'query_result_cache' not in tables:
+        op.create_table('query_result_cache',
+        sa.Column('key', sa.String(length=40), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('params', sa.Text(), nullable=False),
+        sa.Column('versions', sa.String(length=200), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('last_hit_at', sa.DateTime(), nullable=False),
+        sa.Column('hits', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+        prefixes=['UNLOGGED']
+        )
+        op.create_index('idx_query_result_cache_last_hit', 'query_result_cache', ['last_hit_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Drop query_result_cache table
+    op.drop_index('idx_query_result_cache_last_hit', table_name='query_result_cache')
+    op.drop_table('query_result_cache')
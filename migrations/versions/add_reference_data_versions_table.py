@@ -0,0 +1,38 @@
+"""add_reference_data_versions_table
+
+Revision ID: f5a6b7c8d9e1
+Revises: e4f5a6b7c8d0
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a6b7c8d9e1'
+down_revision: Union[str, None] = 'e4f5a6b7c8d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tables = inspector.get_table_names()
+    
+    # Create reference_data_versions table
+    if 'reference_data_versions' not in tables:
+        op.create_table('reference_data_versions',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('reference_data_versions')
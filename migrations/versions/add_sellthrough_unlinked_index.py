@@ -0,0 +1,34 @@
+"""add_sellthrough_unlinked_index
+
+Revision ID: e4f5a6b7c8d0
+Revises: d3e4f5a6b7c9
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f5a6b7c8d0'
+down_revision: Union[str, None] = 'd3e4f5a6b7c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    # Partial index covering only unlinked rows (grouping on the unlinked page and link updates)
+    indexes = [idx['name'] for idx in inspector.get_indexes('sellthrough_data')]
+    if 'idx_sellthrough_unlinked' not in indexes:
+        op.create_index('idx_sellthrough_unlinked', 'sellthrough_data', ['channel_id', 'channel_code'], unique=False,
+                        postgresql_where=sa.text('item_id IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('idx_sellthrough_unlinked', table_name='sellthrough_data')
@@ -0,0 +1,65 @@
+"""add_sellthrough_weekly_table
+
+Revision ID: d9e0f1a2b3c5
+Revises: c8d9e0f1a2b4
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e0f1a2b3c5'
+down_revision: Union[str, None] = 'c8d9e0f1a2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create sellthrough_weekly rollup table
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    tables = inspector.get_table_names()
+    
+    if 'sellthrough_weekly' not in tables:
+        op.create_table('sellthrough_weekly',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('week', sa.Date(), nullable=False),
+        sa.Column('channel_id', sa.Integer(), nullable=False),
+        sa.Column('brand_id', sa.Integer(), nullable=True),
+        sa.Column('item_id', sa.Integer(), nullable=True),
+        sa.Column('revenues', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('units', sa.BigInteger(), nullable=False),
+        sa.Column('rows_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ),
+        sa.ForeignKeyConstraint(['brand_id'], ['brands.id'], ),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_sellthrough_weekly_week', 'sellthrough_weekly', ['week'], unique=False)
+        op.create_index('idx_sellthrough_weekly_brand_week', 'sellthrough_weekly', ['brand_id', 'week'], unique=False)
+        op.create_index('idx_sellthrough_weekly_item_week', 'sellthrough_weekly', ['item_id', 'week'], unique=False)
+        op.create_index('idx_sellthrough_weekly_channel_week', 'sellthrough_weekly', ['channel_id', 'week'], unique=False)
+        
+        # Initial build from sellthrough_data (kept up to date by the app afterwards)
+        op.execute("""
+            INSERT INTO sellthrough_weekly (week, channel_id, brand_id, item_id, revenues, units, rows_count)
+            SELECT date_trunc('week', date::timestamp)::date, channel_id, brand_id, item_id,
+                   SUM(revenues), SUM(units), COUNT(*)
+            FROM sellthrough_data
+            GROUP BY 1, 2, 3, 4
+        """)
+
+
+def downgrade() -> None:
+    # Drop sellthrough_weekly table
+    op.drop_index('idx_sellthrough_weekly_channel_week', table_name='sellthrough_weekly')
+    op.drop_index('idx_sellthrough_weekly_item_week', table_name='sellthrough_weekly')
+    op.drop_index('idx_sellthrough_weekly_brand_week', table_name='sellthrough_weekly')
+    op.drop_index('idx_sellthrough_weekly_week', table_name='sellthrough_weekly')
+    op.drop_table('sellthrough_weekly')
@@ -0,0 +1,48 @@
+"""add_signature_to_import_errors
+
+Revision ID: c2d3e4f5a6b7
+Revises: b1c2d3e4f5a6
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d3e4f5a6b7'
+down_revision: Union[str, None] = 'b1c2d3e4f5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add grouping columns to import_errors (existing rows are single occurrences)
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    columns = [col['name'] for col in inspector.get_columns('import_errors')]
+    indexes = [idx['name'] for idx in inspector.get_indexes('import_errors')]
+    
+    if 'signature' not in columns:
+        op.add_column('import_errors', sa.Column('signature', sa.String(length=40), nullable=True))
+    if 'occurrences' not in columns:
+        op.add_column('import_errors', sa.Column('occurrences', sa.Integer(), nullable=False, server_default='1'))
+    if 'sample_data' not in columns:
+        op.add_column('import_errors', sa.Column('sample_data', sa.Text(), nullable=True))
+    if 'last_row_number' not in columns:
+        op.add_column('import_errors', sa.Column('last_row_number', sa.Integer(), nullable=True))
+    
+    if 'idx_import_error_channel_signature' not in indexes:
+        op.create_index('idx_import_error_channel_signature', 'import_errors', ['import_channel', 'signature'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_import_error_channel_signature', table_name='import_errors')
+    op.drop_column('import_errors', 'last_row_number')
+    op.drop_column('import_errors', 'sample_data')
+    op.drop_column('import_errors', 'occurrences')
+    op.drop_column('import_errors', 'signature')
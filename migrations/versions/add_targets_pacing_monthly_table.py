@@ -0,0 +1,75 @@
+"""add_targets_pacing_monthly_table
+
+Revision ID: b3c4d5e6f7a9
+Revises: a2b3c4d5e6f8
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c4d5e6f7a9'
+down_revision: Union[str, None] = 'a2b3c4d5e6f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create targets_pacing_monthly table (targets next to actuals)
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    tables = inspector.get_table_names()
+    
+    if 'targets_pacing_monthly' not in tables:
+        op.create_table('targets_pacing_monthly',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('brand_id', sa.Integer(), nullable=False),
+        sa.Column('channel_id', sa.Integer(), nullable=False),
+        sa.Column('target_revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('netsuite_revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('faire_revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('sellthrough_revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['brand_id'], ['brands.id'], ),
+        sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('month', 'brand_id', 'channel_id', name='uq_targets_pacing_unique')
+        )
+        op.create_index('idx_targets_pacing_brand_month', 'targets_pacing_monthly', ['brand_id', 'month'], unique=False)
+        op.create_index('idx_targets_pacing_channel_month', 'targets_pacing_monthly', ['channel_id', 'month'], unique=False)
+        
+        # Initial build (kept up to date by the app afterwards)
+        op.execute("""
+            INSERT INTO targets_pacing_monthly (month, brand_id, channel_id, target_revenue, netsuite_revenue,
+                                                faire_revenue, sellthrough_revenue, updated_at)
+            SELECT month, brand_id, channel_id, SUM(target), SUM(netsuite), SUM(faire), SUM(sellthrough), now()
+            FROM (
+                SELECT date_trunc('month', date)::date AS month, brand_id, channel_id,
+                       SUM(revenue) AS target, 0 AS netsuite, 0 AS faire, 0 AS sellthrough
+                FROM targets_data GROUP BY 1, 2, 3
+                UNION ALL
+                SELECT date_trunc('month', date)::date, brand_id, channel_id, 0, SUM(revenues), 0, 0
+                FROM netsuite_data WHERE channel_id IS NOT NULL GROUP BY 1, 2, 3
+                UNION ALL
+                SELECT date_trunc('month', date)::date, brand_id, 11, 0, 0, SUM(revenues), 0
+                FROM faire_data GROUP BY 1, 2
+                UNION ALL
+                SELECT date_trunc('month', date)::date, brand_id, channel_id, 0, 0, 0, SUM(revenues)
+                FROM sellthrough_data WHERE brand_id IS NOT NULL GROUP BY 1, 2, 3
+            ) sources
+            GROUP BY month, brand_id, channel_id
+        """)
+
+
+def downgrade() -> None:
+    # Drop targets_pacing_monthly table
+    op.drop_index('idx_targets_pacing_channel_month', table_name='targets_pacing_monthly')
+    op.drop_index('idx_targets_pacing_brand_month', table_name='targets_pacing_monthly')
+    op.drop_table('targets_pacing_monthly')
@@ -0,0 +1,48 @@
+"""add_trigram_search_indexes
+
+Revision ID: a6b7c8d9e0f2
+Revises: f5a6b7c8d9e1
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6b7c8d9e0f2'
+down_revision: Union[str, None] = 'f5a6b7c8d9e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, column)
+TRGM_INDEXES = [
+    ('idx_items_essor_code_trgm', 'items', 'essor_code'),
+    ('idx_items_essor_name_trgm', 'items', 'essor_name'),
+    ('idx_channel_customers_name_trgm', 'channel_customers', 'name'),
+    ('idx_spins_items_name_trgm', 'spins_items', 'name'),
+    ('idx_spins_items_upc_trgm', 'spins_items', 'upc'),
+    ('idx_crm_ticket_description_trgm', 'crm_tickets', 'description'),
+]
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    
+    for index_name, table_name, column_name in TRGM_INDEXES:
+        indexes = [idx['name'] for idx in inspector.get_indexes(table_name)]
+        if index_name not in indexes:
+            op.create_index(index_name, table_name, [column_name], unique=False,
+                            postgresql_using='gin', postgresql_ops={column_name: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    for index_name, table_name, column_name in reversed(TRGM_INDEXES):
+        op.drop_index(index_name, table_name=table_name)
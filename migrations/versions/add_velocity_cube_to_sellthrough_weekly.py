@@ -0,0 +1,69 @@
+"""add_velocity_cube_to_sellthrough_weekly
+
+Revision ID: e0f1a2b3c4d6
+Revises: d9e0f1a2b3c5
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e0f1a2b3c4d6'
+down_revision: Union[str, None] = 'd9e0f1a2b3c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+WEIGHTED_COLUMNS = ['usd_pspw', 'units_pspw', 'instock', 'oos']
+
+
+def upgrade() -> None:
+    # Add category and store-weighted velocity/in-stock columns to sellthrough_weekly
+    from sqlalchemy import inspect
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    columns = [col['name'] for col in inspector.get_columns('sellthrough_weekly')]
+    
+    if 'category_id' not in columns:
+        op.add_column('sellthrough_weekly', sa.Column('category_id', sa.Integer(), nullable=True))
+        op.create_foreign_key('fk_sellthrough_weekly_category', 'sellthrough_weekly', 'categories', ['category_id'], ['id'])
+        op.create_index('idx_sellthrough_weekly_category_week', 'sellthrough_weekly', ['category_id', 'week'], unique=False)
+    
+    if 'stores' not in columns:
+        op.add_column('sellthrough_weekly', sa.Column('stores', sa.BigInteger(), nullable=False, server_default='0'))
+        for name in WEIGHTED_COLUMNS:
+            op.add_column('sellthrough_weekly', sa.Column(f'{name}_weighted', sa.Numeric(precision=20, scale=4), nullable=False, server_default='0'))
+            op.add_column('sellthrough_weekly', sa.Column(f'{name}_stores', sa.BigInteger(), nullable=False, server_default='0'))
+    
+    # Rebuild the cube from sellthrough_data (kept up to date by the app afterwards)
+    op.execute("DELETE FROM sellthrough_weekly")
+    op.execute("""
+        INSERT INTO sellthrough_weekly (week, channel_id, brand_id, category_id, item_id, revenues, units, rows_count, stores,
+                                        usd_pspw_weighted, usd_pspw_stores, units_pspw_weighted, units_pspw_stores,
+                                        instock_weighted, instock_stores, oos_weighted, oos_stores)
+        SELECT date_trunc('week', s.date::timestamp)::date, s.channel_id, s.brand_id, i.category_id, s.item_id,
+               SUM(s.revenues), SUM(s.units), COUNT(*), SUM(s.stores),
+               COALESCE(SUM(s.usd_pspw * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.usd_pspw IS NOT NULL), 0),
+               COALESCE(SUM(s.units_pspw * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.units_pspw IS NOT NULL), 0),
+               COALESCE(SUM(s.instock * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.instock IS NOT NULL), 0),
+               COALESCE(SUM(s.oos * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.oos IS NOT NULL), 0)
+        FROM sellthrough_data s
+        LEFT JOIN items i ON i.id = s.item_id
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+
+def downgrade() -> None:
+    # Remove category and store-weighted columns from sellthrough_weekly
+    for name in reversed(WEIGHTED_COLUMNS):
+        op.drop_column('sellthrough_weekly', f'{name}_stores')
+        op.drop_column('sellthrough_weekly', f'{name}_weighted')
+    op.drop_column('sellthrough_weekly', 'stores')
+    op.drop_index('idx_sellthrough_weekly_category_week', table_name='sellthrough_weekly')
+    op.drop_constraint('fk_sellthrough_weekly_category', 'sellthrough_weekly', type_='foreignkey')
+    op.drop_column('sellthrough_weekly', 'category_id')
@@ -0,0 +1,112 @@
+"""partition_fact_tables_by_year
+
+Revision ID: d5e6f7a8b9c1
+Revises: c4d5e6f7a8b0
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e6f7a8b9c1'
+down_revision: Union[str, None] = 'c4d5e6f7a8b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Table -> partition column (kept in sync with core/partitions.py PARTITIONED_TABLES)
+TABLES = {
+    'netsuite_data': 'date',
+    'faire_data': 'date',
+    'sellthrough_data': 'date',
+    'spins_data': 'week',
+}
+
+
+def _is_partitioned(bind, table):
+    return bind.execute(
+        sa.text('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))'),
+        {'name': table}
+    ).scalar()
+
+
+def _definitions(bind, table):
+    """(constraints, indexes) of a table as (name, definition) / CREATE INDEX statements"""
+    constraints = bind.execute(sa.text("""
+        SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = to_regclass(:name) AND contype IN ('p', 'u', 'f', 'c')
+        ORDER BY contype, conname
+    """), {'name': table}).all()
+    indexes = bind.execute(sa.text("""
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = to_regclass(:name)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """), {'name': table}).scalars().all()
+    return constraints, indexes
+
+
+def _rebuild(bind, table, column, partitioned):
+    """Copy table into a new partitioned (by year on column) or plain table with the same constraints and indexes"""
+    constraints, indexes = _definitions(bind, table)
+    sequence = bind.execute(sa.text('SELECT pg_get_serial_sequence(:name, :column)'),
+                            {'name': table, 'column': 'id'}).scalar()
+    old = f'{table}_old'
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+
+    if partitioned:
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})')
+        first, last = bind.execute(sa.text(
+            f'SELECT EXTRACT(YEAR FROM MIN({column}))::int, EXTRACT(YEAR FROM MAX({column}))::int FROM {old}'
+        )).one()
+        current = date.today().year
+        for year in range(min(first or current, current), max(last or current, current + 1) + 1):
+            op.execute(f"CREATE TABLE {table}_{year} PARTITION OF {table} "
+                       f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')")
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    else:
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)')
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.execute(f'DROP TABLE {old}')
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+
+    # Constraints and indexes after the copy (faster), under their original names
+    for name, contype, definition in constraints:
+        if contype == 'p':
+            # Unique constraints of a partitioned table must include the partition column
+            definition = f'PRIMARY KEY (id, {column})' if partitioned else 'PRIMARY KEY (id)'
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    for definition in indexes:
+        op.execute(definition.replace(f' ON ONLY public.{table} ', f' ON public.{table} '))
+    op.execute(f'ANALYZE {table}')
+
+
+def upgrade() -> None:
+    # Convert the fact tables to range partitions by year
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    for table, column in TABLES.items():
+        if not _is_partitioned(bind, table):
+            _rebuild(bind, table, column, partitioned=True)
+
+
+def downgrade() -> None:
+    # Convert the fact tables back to plain tables
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    for table, column in TABLES.items():
+        if _is_partitioned(bind, table):
+            _rebuild(bind, table, column, partitioned=False)
@@ -5,6 +5,8 @@ Database models for offline team utilities
 
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import event, DDL
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 db = SQLAlchemy()
 
@@ -119,8 +121,11 @@ class ChannelCustomer(db.Model):
     faire_data = db.relationship('FaireData', back_populates='customer')
     netsuite_codes = db.relationship('NetsuiteCode', back_populates='customer')
     
-    # Unique constraint on name per channel
-    __table_args__ = (db.UniqueConstraint('name', 'channel_id', name='uq_customer_channel'),)
+    # Unique constraint on name per channel, trigram index for typeahead search
+    __table_args__ = (
+        db.UniqueConstraint('name', 'channel_id', name='uq_customer_channel'),
+        db.Index('idx_channel_customers_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
     
     def __repr__(self):
         return f'<ChannelCustomer {self.name} (Channel: {self.channel_id})>'
@@ -169,6 +174,12 @@ class Item(db.Model):
     faire_data = db.relationship('FaireData', back_populates='item')
     channel_items = db.relationship('ChannelItem', back_populates='item', cascade='all, delete-orphan')
     
+    # Trigram indexes for typeahead/substring search (requires the pg_trgm extension)
+    __table_args__ = (
+        db.Index('idx_items_essor_code_trgm', 'essor_code', postgresql_using='gin', postgresql_ops={'essor_code': 'gin_trgm_ops'}),
+        db.Index('idx_items_essor_name_trgm', 'essor_name', postgresql_using='gin', postgresql_ops={'essor_name': 'gin_trgm_ops'}),
+    )
+    
     def __repr__(self):
         return f'<Item {self.essor_code} - {self.essor_name}>'
 
@@ -196,7 +207,7 @@ class ChannelItem(db.Model):
 
 
 class SellthroughData(db.Model):
-    """Sellthrough data model"""
+    """Sellthrough data model (range-partitioned by year on date, primary key (id, date) in the database, see core/partitions.py)"""
     __tablename__ = 'sellthrough_data'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -224,9 +235,11 @@ class SellthroughData(db.Model):
     
     # Index for faster queries
     __table_args__ = (
-        db.Index('idx_sellthrough_date', 'date'),
+        db.Index('idx_sellthrough_date_id', 'date', 'id'),
         db.Index('idx_sellthrough_brand_date', 'brand_id', 'date'),
         db.Index('idx_sellthrough_item_date', 'item_id', 'date'),
+        db.Index('idx_sellthrough_customer_date_cover', 'customer_id', 'date', postgresql_include=['item_id', 'revenues']),
+        db.Index('idx_sellthrough_unlinked', 'channel_id', 'channel_code', postgresql_where=db.text('item_id IS NULL')),
         db.UniqueConstraint('date', 'channel_id', 'item_id', 'customer_id', name='uq_sellthrough_unique'),
     )
     
@@ -234,8 +247,54 @@ class SellthroughData(db.Model):
         return f'<SellthroughData {self.date} - Item: {self.item_id}>'
 
 
+class SellthroughWeekly(db.Model):
+    """Weekly cube of sellthrough_data by (channel, brand, category, item), weeks start on Monday,
+    maintained by sellthrough/weekly.py
+    
+    A week straddling two months has one row per month (month column), so month and quarter
+    totals add up exactly and never take days outside the requested months.
+    
+    Velocity and in-stock figures are kept as store-weighted sums (value * stores) next to the
+    stores they were weighted by, so any roll-up is SUM(*_weighted) / SUM(*_stores).
+    """
+    __tablename__ = 'sellthrough_weekly'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    week = db.Column(db.Date, nullable=False)
+    month = db.Column(db.Date, nullable=False)  # First day of the month of the rows
+    channel_id = db.Column(db.Integer, db.ForeignKey('channels.id'), nullable=False)
+    brand_id = db.Column(db.Integer, db.ForeignKey('brands.id'), nullable=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)  # Category of the item
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=True)
+    revenues = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    units = db.Column(db.BigInteger, nullable=False, default=0)
+    rows_count = db.Column(db.Integer, nullable=False, default=0)
+    stores = db.Column(db.BigInteger, nullable=False, default=0)  # Store-weeks
+    usd_pspw_weighted = db.Column(db.Numeric(20, 4), nullable=False, default=0)  # SUM(usd_pspw * stores)
+    usd_pspw_stores = db.Column(db.BigInteger, nullable=False, default=0)  # SUM(stores) where usd_pspw is set
+    units_pspw_weighted = db.Column(db.Numeric(20, 4), nullable=False, default=0)
+    units_pspw_stores = db.Column(db.BigInteger, nullable=False, default=0)
+    instock_weighted = db.Column(db.Numeric(20, 4), nullable=False, default=0)
+    instock_stores = db.Column(db.BigInteger, nullable=False, default=0)
+    oos_weighted = db.Column(db.Numeric(20, 4), nullable=False, default=0)
+    oos_stores = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    # Index for faster queries
+    __table_args__ = (
+        db.Index('idx_sellthrough_weekly_week', 'week'),
+        db.Index('idx_sellthrough_weekly_month', 'month'),
+        db.Index('idx_sellthrough_weekly_category_week', 'category_id', 'week'),
+        db.Index('idx_sellthrough_weekly_brand_week', 'brand_id', 'week'),
+        db.Index('idx_sellthrough_weekly_item_week', 'item_id', 'week'),
+        db.Index('idx_sellthrough_weekly_channel_week', 'channel_id', 'week'),
+    )
+    
+    def __repr__(self):
+        return f'<SellthroughWeekly {self.week} - Item: {self.item_id}>'
+
+
 class NetsuiteData(db.Model):
-    """Netsuite revenue data model"""
+    """Netsuite revenue data model (range-partitioned by year on date, primary key (id, date) in the database, see core/partitions.py)"""
     __tablename__ = 'netsuite_data'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -259,9 +318,13 @@ class NetsuiteData(db.Model):
     
     # Index for faster queries
     __table_args__ = (
-        db.Index('idx_netsuite_date', 'date'),
-        db.Index('idx_netsuite_brand_date', 'brand_id', 'date'),
-        db.Index('idx_netsuite_item_date', 'item_id', 'date'),
+        db.Index('idx_netsuite_date_id', 'date', 'id'),
+        # Covering indexes: dashboard sums are answered from the index (index-only scans)
+        db.Index('idx_netsuite_brand_date_cover', 'brand_id', 'date', postgresql_include=['channel_id', 'revenues', 'units']),
+        db.Index('idx_netsuite_item_date_cover', 'item_id', 'date', postgresql_include=['channel_id', 'revenues', 'units']),
+        db.Index('idx_netsuite_channel_date_cover', 'channel_id', 'date', postgresql_include=['revenues', 'units']),
+        db.Index('idx_netsuite_customer_date_cover', 'customer_id', 'date', postgresql_include=['brand_id', 'item_id', 'channel_id', 'revenues']),
+        db.Index('idx_netsuite_retailer_code_date', 'retailer_code', 'date'),
         db.UniqueConstraint('date', 'channel_id', 'item_id', 'customer_id', name='uq_netsuite_unique'),
     )
     
@@ -270,7 +333,7 @@ class NetsuiteData(db.Model):
 
 
 class FaireData(db.Model):
-    """Faire revenue data model"""
+    """Faire revenue data model (range-partitioned by year on date, primary key (id, date) in the database, see core/partitions.py)"""
     __tablename__ = 'faire_data'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -290,9 +353,11 @@ class FaireData(db.Model):
     
     # Index for faster queries
     __table_args__ = (
-        db.Index('idx_faire_date', 'date'),
-        db.Index('idx_faire_brand_date', 'brand_id', 'date'),
-        db.Index('idx_faire_item_date', 'item_id', 'date'),
+        # Covering indexes: dashboard sums are answered from the index (index-only scans)
+        db.Index('idx_faire_date_cover', 'date', postgresql_include=['revenues', 'units']),
+        db.Index('idx_faire_brand_date_cover', 'brand_id', 'date', postgresql_include=['revenues', 'units']),
+        db.Index('idx_faire_item_date_cover', 'item_id', 'date', postgresql_include=['revenues', 'units']),
+        db.Index('idx_faire_customer_date_cover', 'customer_id', 'date', postgresql_include=['brand_id', 'item_id', 'revenues']),
         db.UniqueConstraint('date', 'item_id', 'customer_id', name='uq_faire_unique'),
     )
     
@@ -326,6 +391,33 @@ class NetsuiteCode(db.Model):
         return f'<NetsuiteCode {self.netsuite_code} -> Channel: {self.channel_id}>'
 
 
+class NetsuiteRemap(db.Model):
+    """NetsuiteRemap model - queued code -> channel/customer changes applied to netsuite_data in the background"""
+    __tablename__ = 'netsuite_remaps'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    retailer_code = db.Column(db.String(10), nullable=False)
+    channel_id = db.Column(db.Integer, db.ForeignKey('channels.id'), nullable=True)  # None = keep current value
+    customer_id = db.Column(db.Integer, db.ForeignKey('channel_customers.id'), nullable=True)  # None = keep current value
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, done, error
+    rows_updated = db.Column(db.Integer, nullable=False, default=0)
+    error_message = db.Column(db.Text, nullable=True)
+    requested_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    applied_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationships
+    channel = db.relationship('Channel')
+    customer = db.relationship('ChannelCustomer')
+    
+    # Index for faster queries
+    __table_args__ = (
+        db.Index('idx_netsuite_remap_status', 'status', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<NetsuiteRemap {self.retailer_code} -> Channel: {self.channel_id}, Customer: {self.customer_id} ({self.status})>'
+
+
 class ImportError(db.Model):
     """ImportError model - stores import errors for debugging"""
     __tablename__ = 'import_errors'
@@ -335,12 +427,17 @@ class ImportError(db.Model):
     import_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     error_data = db.Column(db.Text, nullable=False)  # JSON string of the problematic row
     error_message = db.Column(db.Text, nullable=True)  # Error message
-    row_number = db.Column(db.Integer, nullable=True)  # Row number if available
+    row_number = db.Column(db.Integer, nullable=True)  # Row number if available (first occurrence)
+    last_row_number = db.Column(db.Integer, nullable=True)  # Row number of the last occurrence
+    signature = db.Column(db.String(40), nullable=True)  # Hash of channel + normalized error message
+    occurrences = db.Column(db.Integer, nullable=False, default=1)  # Number of rows with this error in the import
+    sample_data = db.Column(db.Text, nullable=True)  # JSON list of sample rows [{row_number, data}]
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Index for faster queries
     __table_args__ = (
         db.Index('idx_import_error_channel_date', 'import_channel', 'import_date'),
+        db.Index('idx_import_error_channel_signature', 'import_channel', 'signature'),
     )
     
     def __repr__(self):
@@ -397,12 +494,21 @@ class SpinsItem(db.Model):
     scrapped_json = db.Column(db.Text, nullable=True)
     scrapped_at = db.Column(db.DateTime, nullable=True)
     
+    # Stats from spins_data, maintained by the importer (spins/item_stats.py)
+    dominant_brand_id = db.Column(db.Integer, db.ForeignKey('spins_brands.id'), nullable=True)  # Brand with the most rows
+    first_seen_week = db.Column(db.Date, nullable=True)
+    last_seen_week = db.Column(db.Date, nullable=True)
+    
     # Relationships
     spins_data = db.relationship('SpinsData', back_populates='item')
+    dominant_brand = db.relationship('SpinsBrand')
     
     # Index for faster queries
     __table_args__ = (
         db.Index('idx_spins_item_upc', 'upc'),
+        db.Index('idx_spins_items_dominant_brand', 'dominant_brand_id', 'upc'),
+        db.Index('idx_spins_items_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('idx_spins_items_upc_trgm', 'upc', postgresql_using='gin', postgresql_ops={'upc': 'gin_trgm_ops'}),
     )
     
     def __repr__(self):
@@ -410,7 +516,7 @@ class SpinsItem(db.Model):
 
 
 class SpinsData(db.Model):
-    """SPINS data model - weekly financial data"""
+    """SPINS data model - weekly financial data (range-partitioned by year on week, primary key (id, week) in the database, see core/partitions.py)"""
     __tablename__ = 'spins_data'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -435,7 +541,7 @@ class SpinsData(db.Model):
     
     # Index for faster queries
     __table_args__ = (
-        db.Index('idx_spins_week', 'week'),
+        db.Index('idx_spins_week_id', 'week', 'id'),
         db.Index('idx_spins_channel_week', 'channel_id', 'week'),
         db.Index('idx_spins_brand_week', 'brand_id', 'week'),
         db.Index('idx_spins_item_week', 'item_id', 'week'),
@@ -475,6 +581,7 @@ class CrmTicket(db.Model):
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    search_vector = db.Column(TSVECTOR, nullable=True)  # Description + customer and channel names, maintained by crm/search.py
     
     # Relationships
     customer = db.relationship('ChannelCustomer', backref='crm_tickets')
@@ -487,10 +594,13 @@ class CrmTicket(db.Model):
         db.Index('idx_crm_ticket_customer', 'customer_id'),
         db.Index('idx_crm_ticket_status', 'status'),
         db.Index('idx_crm_ticket_due_date', 'due_date'),
+        db.Index('idx_crm_ticket_open_due', 'due_date', postgresql_where=db.text("status = 'opened'")),
+        db.Index('idx_crm_ticket_description_trgm', 'description', postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}),
+        db.Index('idx_crm_ticket_search', 'search_vector', postgresql_using='gin'),
     )
     
-    # Many-to-many relationship with flags
-    flags = db.relationship('CrmTicketFlag', secondary='crm_tickets_x_flags', back_populates='tickets', lazy='dynamic')
+    # Many-to-many relationship with flags (a plain list so listings can selectinload it)
+    flags = db.relationship('CrmTicketFlag', secondary='crm_tickets_x_flags', back_populates='tickets')
     
     def __repr__(self):
         return f'<CrmTicket {self.id} - {self.status}>'
@@ -549,3 +659,92 @@ class TargetData(db.Model):
     def __repr__(self):
         return f'<TargetData {self.date} - Brand: {self.brand_id}, Channel: {self.channel_id}>'
 
+
+class TargetPacing(db.Model):
+    """Monthly targets next to actual revenues by brand and channel, maintained by targets/pacing.py"""
+    __tablename__ = 'targets_pacing_monthly'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Date, nullable=False)  # First day of the month
+    brand_id = db.Column(db.Integer, db.ForeignKey('brands.id'), nullable=False)
+    channel_id = db.Column(db.Integer, db.ForeignKey('channels.id'), nullable=False)
+    target_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    netsuite_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    faire_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    sellthrough_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Index for faster queries
+    __table_args__ = (
+        db.UniqueConstraint('month', 'brand_id', 'channel_id', name='uq_targets_pacing_unique'),
+        db.Index('idx_targets_pacing_brand_month', 'brand_id', 'month'),
+        db.Index('idx_targets_pacing_channel_month', 'channel_id', 'month'),
+    )
+    
+    def __repr__(self):
+        return f'<TargetPacing {self.month} - Brand: {self.brand_id}, Channel: {self.channel_id}>'
+
+
+
+class JobRun(db.Model):
+    """Job run model - one row per scheduled/triggered background job execution"""
+    __tablename__ = 'job_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(100), nullable=False)
+    trigger = db.Column(db.String(50), nullable=False, default='cron')  # cron, http, manual
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, success, error, skipped
+    host = db.Column(db.String(255), nullable=True)  # Hostname of the replica that ran the job
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    duration_seconds = db.Column(db.Float, nullable=True)
+    summary = db.Column(db.Text, nullable=True)  # JSON string with the job results summary
+    error_message = db.Column(db.Text, nullable=True)
+    
+    # Index for faster queries
+    __table_args__ = (
+        db.Index('idx_job_runs_name_started', 'job_name', 'started_at'),
+    )
+    
+    def __repr__(self):
+        return f'<JobRun {self.job_name} {self.status} {self.started_at}>'
+
+
+class ReferenceDataVersion(db.Model):
+    """Reference data version model - one counter per reference table, bumped on every write"""
+    __tablename__ = 'reference_data_versions'
+    
+    name = db.Column(db.String(100), primary_key=True)  # Table name (brands, items, channels...)
+    version = db.Column(db.BigInteger, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ReferenceDataVersion {self.name} v{self.version}>'
+
+
+class QueryResultCache(db.Model):
+    """Query result cache model - JSON results shared by all workers, maintained by core/result_cache.py"""
+    __tablename__ = 'query_result_cache'
+    
+    key = db.Column(db.String(40), primary_key=True)  # sha1 of name + params
+    name = db.Column(db.String(100), nullable=False)  # Cached function name
+    params = db.Column(db.Text, nullable=False)  # JSON of the function parameters
+    versions = db.Column(db.String(200), nullable=False)  # Data versions the value was computed at
+    value = db.Column(db.Text, nullable=False)  # JSON result
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    last_hit_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    hits = db.Column(db.BigInteger, nullable=False, default=0)  # Requests served, drives warming
+    
+    # Index for LRU eviction
+    __table_args__ = (
+        db.Index('idx_query_result_cache_last_hit', 'last_hit_at'),
+    )
+    
+    def __repr__(self):
+        return f'<QueryResultCache {self.name} {self.params}>'
+
+
+# Disposable content: skip the WAL (Postgres empties the table after a crash)
+event.listen(QueryResultCache.__table__, 'after_create',
+             DDL('ALTER TABLE query_result_cache SET UNLOGGED').execute_if(dialect='postgresql'))
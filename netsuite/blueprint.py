@@ -15,10 +15,22 @@ import os
 import configparser
 from models import db, NetsuiteData, Brand, Item, Channel, ChannelCustomer, NetsuiteCode, ImportError
 from auth.blueprint import login_required, admin_required
+from core.http_cache import etag_cached
+from imports.error_sink import ImportErrorSink, record_import_error
+from targets.pacing import defer_refresh, refresh_deferred
+from core.refdata import get_brands, get_channels, get_customers
+from core.pagination import keyset_paginate
+from core.snowflake_replay import replay_connection, wrap_connection
+from core.search import get_selected_label
+from core.periods import in_period, in_years
+from netsuite.remap import queue_remaps, start_remap_job, parse_remap_lines, apply_mapping_changes, get_remap_status
 import json
 
 netsuite_bp = Blueprint('netsuite', __name__, template_folder='templates')
 
+# Groupings supported by the retailer code drilldown API
+DATA_BY_CODE_GROUPINGS = ('none', 'month', 'item')
+
 def get_snowflake_config():
     """Get Snowflake configuration from config.ini"""
     config = configparser.ConfigParser()
@@ -40,6 +52,11 @@ def get_snowflake_config():
 
 def get_snowflake_connection():
     """Create Snowflake connection using private key authentication"""
+    # Recorded results instead of Snowflake when SNOWFLAKE_MODE=replay (see core/snowflake_replay.py)
+    replay = replay_connection()
+    if replay is not None:
+        return replay
+    
     config = get_snowflake_config()
     
     # Read private key - handle both PEM and PKCS8 formats
@@ -87,13 +104,13 @@ def get_snowflake_connection():
     # Create connection
     conn = snowflake.connector.connect(**conn_params)
     
-    return conn
+    return wrap_connection(conn)
 
 @netsuite_bp.route('/')
 @login_required
 def index():
     """Netsuite data list"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 50
     
     # Get filter parameters
@@ -116,21 +133,21 @@ def index():
     if date_to:
         query = query.filter(NetsuiteData.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
     
-    netsuite_data = query.order_by(NetsuiteData.date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    # Keyset pagination on (date, id), total from planner statistics
+    netsuite_data = keyset_paginate(
+        query, [(NetsuiteData.date, 'desc'), (NetsuiteData.id, 'desc')], cursor=cursor, per_page=per_page
     )
     
-    # Get filter options
-    brands = Brand.query.order_by(Brand.name).all()
-    items = Item.query.order_by(Item.essor_code).all()
+    # Get filter options (cached reference data), items use the async picker
+    brands = get_brands()
     # Only include channels where netsuite_include is True
-    channels = Channel.query.filter_by(netsuite_include=True).order_by(Channel.name).all()
+    channels = get_channels(netsuite_only=True)
     
     return render_template('netsuite/index.html', 
                          netsuite_data=netsuite_data,
                          brands=brands,
-                         items=items,
                          channels=channels,
+                         selected_item_label=get_selected_label('items', item_id),
                          current_filters={
                              'brand_id': brand_id,
                              'item_id': item_id,
@@ -281,24 +298,23 @@ def dashboard():
     item_id = request.args.get('item_id', type=int)
     channel_id = request.args.get('channel_id', type=int)
     
-    # Get all brands, items, and channels for filters
-    brands = Brand.query.order_by(Brand.name).all()
-    items = Item.query.join(Brand).order_by(Brand.name, Item.essor_code).all()
+    # Get brands and channels for filters (cached reference data), items use the async picker
+    brands = get_brands()
     # Only include channels where netsuite_include is True
-    channels = Channel.query.filter_by(netsuite_include=True).order_by(Channel.name).all()
+    channels = get_channels(netsuite_only=True)
     
     # Calculate total revenues for 2024 and 2025 with filters applied
     query_2024 = db.session.query(
         func.coalesce(func.sum(NetsuiteData.revenues), 0)
     ).join(Channel).filter(
-        extract('year', NetsuiteData.date) == 2024,
+        in_period(NetsuiteData.date, 2024),
         Channel.netsuite_include == True
     )
     
     query_2025 = db.session.query(
         func.coalesce(func.sum(NetsuiteData.revenues), 0)
     ).join(Channel).filter(
-        extract('year', NetsuiteData.date) == 2025,
+        in_period(NetsuiteData.date, 2025),
         Channel.netsuite_include == True
     )
     
@@ -321,16 +337,17 @@ def dashboard():
     
     return render_template('netsuite/dashboard.html',
                          brands=brands,
-                         items=items,
                          channels=channels,
                          total_rev_2024=total_rev_2024,
                          total_rev_2025=total_rev_2025,
                          selected_brand_id=brand_id,
                          selected_item_id=item_id,
+                         selected_item_label=get_selected_label('items', item_id),
                          selected_channel_id=channel_id)
 
 @netsuite_bp.route('/api/totals')
 @login_required
+@etag_cached('netsuite_data', 'channels')
 def api_totals():
     """API endpoint to get filtered total revenues"""
     from models import NetsuiteData, db
@@ -345,14 +362,14 @@ def api_totals():
     query_2024 = db.session.query(
         func.coalesce(func.sum(NetsuiteData.revenues), 0)
     ).join(Channel).filter(
-        extract('year', NetsuiteData.date) == 2024,
+        in_period(NetsuiteData.date, 2024),
         Channel.netsuite_include == True
     )
     
     query_2025 = db.session.query(
         func.coalesce(func.sum(NetsuiteData.revenues), 0)
     ).join(Channel).filter(
-        extract('year', NetsuiteData.date) == 2025,
+        in_period(NetsuiteData.date, 2025),
         Channel.netsuite_include == True
     )
     
@@ -378,6 +395,7 @@ def api_totals():
 
 @netsuite_bp.route('/api/chart-data')
 @login_required
+@etag_cached('netsuite_data', 'channels')
 def api_chart_data():
     """API endpoint to get chart data based on filters - returns 12 months for 2024 and 2025"""
     try:
@@ -398,7 +416,7 @@ def api_chart_data():
             func.sum(NetsuiteData.units).label('total_units'),
             func.sum(NetsuiteData.revenues).label('total_revenues')
         ).join(Channel).filter(
-            extract('year', NetsuiteData.date) == 2024,
+            in_period(NetsuiteData.date, 2024),
             Channel.netsuite_include == True
         )
         
@@ -408,7 +426,7 @@ def api_chart_data():
             func.sum(NetsuiteData.units).label('total_units'),
             func.sum(NetsuiteData.revenues).label('total_revenues')
         ).join(Channel).filter(
-            extract('year', NetsuiteData.date) == 2025,
+            in_period(NetsuiteData.date, 2025),
             Channel.netsuite_include == True
         )
         
@@ -474,7 +492,7 @@ def api_chart_data():
 @netsuite_bp.route('/api/target-data')
 @login_required
 def api_target_data():
-    """API endpoint to get 2026 target data based on brand and channel filters"""
+    """API endpoint to get the monthly targets of a year (default current) based on brand and channel filters"""
     try:
         from models import TargetData
         from sqlalchemy import extract
@@ -482,14 +500,13 @@ def api_target_data():
         # Get filter parameters
         brand_id = request.args.get('brand_id', type=int)
         channel_id = request.args.get('channel_id', type=int)
-        year = 2026  # Always get 2026 targets
+        year = request.args.get('year', type=int) or datetime.now().year
         
-        # Query for 2026 targets
         query = db.session.query(
             extract('month', TargetData.date).label('month'),
             func.sum(TargetData.revenue).label('total_revenue')
         ).filter(
-            extract('year', TargetData.date) == year
+            in_period(TargetData.date, year)
         )
         
         # Apply filters
@@ -528,31 +545,8 @@ def api_target_data():
         return jsonify({'error': str(e)}), 500
 
 def _save_import_error(import_channel, row_data, error_message, row_number=None):
-    """Helper function to save import errors to the database"""
-    try:
-        # Convert row_data to JSON string
-        if isinstance(row_data, dict):
-            error_data_json = json.dumps(row_data)
-        elif isinstance(row_data, (list, tuple)):
-            # Convert tuple/list to dict with column names if available
-            error_data_json = json.dumps(list(row_data))
-        else:
-            error_data_json = json.dumps(str(row_data))
-        
-        import_error = ImportError(
-            import_channel=import_channel,
-            error_data=error_data_json,
-            error_message=error_message,
-            row_number=row_number
-        )
-        db.session.add(import_error)
-        # Flush to ensure it's in the session (will be committed with batch)
-        db.session.flush()
-    except Exception as e:
-        # If we can't save the error, at least log it
-        print(f"  ⚠ Warning: Could not save import error to database: {str(e)}")
-        import traceback
-        print(f"  Traceback: {traceback.format_exc()}")
+    """Helper function to record import errors (grouped by the active ImportErrorSink)"""
+    record_import_error(import_channel, row_data, error_message, row_number)
 
 def _get_last_import_date():
     """Get the latest date from NetsuiteData table"""
@@ -561,32 +555,18 @@ def _get_last_import_date():
         return last_record.date
     return None
 
-def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
-    """Execute the Netsuite import with specified parameters
+NETSUITE_COLUMN_NAMES = ['revenues', 'units', 'brand', 'date', 'essor_code', 'retailer_code', 'retailer']
+
+def _extract_netsuite_rows(table_name, import_method='all'):
+    """Run the Netsuite revenue query on Snowflake and return all rows
     
     Args:
         table_name: Name of the Snowflake table (NET_REVENUE_OFFLINE_CHANNELS or NET_REVENUE_OFFLINE_CHANNELS_2024)
         import_method: 'all' to import all data, 'incremental' to import since last entry
-        dry_run: If True, only process first 10 rows and don't save to database
     
     Returns:
-        dict with import results
+        list of row tuples (see NETSUITE_COLUMN_NAMES)
     """
-    max_rows = 10 if dry_run else None
-    
-    mode_text = "DRY-RUN (first 10 rows only, no database changes)" if dry_run else "LIVE IMPORT"
-    print("\n" + "="*60)
-    print(f"Starting Snowflake Import Process - {mode_text}")
-    print(f"Table: {table_name}")
-    print(f"Method: {import_method}")
-    print("="*60)
-    
-    # Connect to Snowflake
-    print("\n🔌 Connecting to Snowflake...")
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
-    print("✓ Connected to Snowflake")
-    
     # Get last import date if using incremental method
     last_date = None
     if import_method == 'incremental':
@@ -621,11 +601,146 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
     """
     
     query = base_query.format(table_name=table_name)
+    
+    # Connect to Snowflake
+    print("\n🔌 Connecting to Snowflake...")
+    conn = get_snowflake_connection()
+    cursor = conn.cursor()
+    print("✓ Connected to Snowflake")
+    
+    try:
+        print("\n📊 Executing query...")
+        print(f"Query: {query[:200]}...")  # Print first 200 chars of query
+        cursor.execute(query)
+        print("✓ Query executed successfully")
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+        print("✓ Snowflake connection closed")
+    
+    return rows
+
+def _get_or_create_netsuite_code(retailer_code, retailer_name, results):
+    """Find the NetsuiteCode mapping for a retailer code, creating an unmapped one if needed"""
+    netsuite_code_mapping = NetsuiteCode.query.filter_by(netsuite_code=retailer_code).first()
+    if not netsuite_code_mapping:
+        # Create NetsuiteCode with no channel_id and no customer_id
+        print(f"  ➕ Creating new netsuite_code: {retailer_code} (no channel_id, no customer_id) - will import with channel_id=null")
+        netsuite_code_mapping = NetsuiteCode(
+            netsuite_code=retailer_code,
+            netsuite_name=retailer_name,
+            channel_id=None,
+            customer_id=None
+        )
+        db.session.add(netsuite_code_mapping)
+        db.session.flush()
+        results['created'] += 1
+    return netsuite_code_mapping
+
+def _get_or_create_brand(brand_name, results):
+    """Find a brand by name, then by code, creating it if needed"""
+    # Try to find brand by name first
+    brand = Brand.query.filter_by(name=brand_name).first()
+    
+    # If not found by name, try to find by code
+    if not brand:
+        brand = Brand.query.filter_by(code=brand_name).first()
+        if brand:
+            print(f"  ✓ Found brand by code: {brand_name} -> {brand.name}")
+    
+    # If still not found, create new brand
+    if not brand:
+        print(f"  ➕ Creating new brand: {brand_name}")
+        brand = Brand(name=brand_name, code=brand_name)
+        db.session.add(brand)
+        db.session.flush()
+        results['created'] += 1
+    elif brand.name == brand_name:
+        print(f"  ✓ Found brand by name: {brand_name}")
+    return brand
+
+def _get_or_create_item(essor_code, brand, results):
+    """Find an item by essor_code, creating it under the given brand if needed"""
+    item = Item.query.filter_by(essor_code=essor_code).first()
+    if not item:
+        # Create new item with essor_code and brand
+        print(f"  ➕ Creating new item: essor_code={essor_code}, brand={brand.name}")
+        item = Item(
+            essor_code=essor_code,
+            essor_name=None,  # Can be set later if needed
+            brand_id=brand.id
+        )
+        db.session.add(item)
+        db.session.flush()
+        results['created'] += 1
+    else:
+        print(f"  ✓ Found item: {essor_code}")
+    return item
+
+def _ensure_netsuite_dimensions(rows):
+    """Create the netsuite codes, brands and items referenced by extracted rows
+    
+    Run before the fact merge so that concurrent loaders never race on creating
+    the same dimension rows.
+    
+    Returns:
+        dict with created count and errors
+    """
+    results = {'created': 0, 'errors': []}
+    
+    retailer_codes = {}
+    brand_items = {}
+    for row in rows:
+        if row[5]:
+            retailer_codes.setdefault(row[5], row[6])
+        if row[2] and row[4]:
+            brand_items.setdefault(row[4], row[2])
+    
+    print(f"\n🧱 Ensuring dimensions: {len(retailer_codes)} retailer codes, {len(brand_items)} items")
+    try:
+        for retailer_code, retailer_name in retailer_codes.items():
+            _get_or_create_netsuite_code(retailer_code, retailer_name, results)
+        
+        brands = {}
+        for essor_code, brand_name in brand_items.items():
+            if brand_name not in brands:
+                brands[brand_name] = _get_or_create_brand(brand_name, results)
+            _get_or_create_item(essor_code, brands[brand_name], results)
         
-    print("\n📊 Executing query...")
-    print(f"Query: {query[:200]}...")  # Print first 200 chars of query
-    cursor.execute(query)
-    print("✓ Query executed successfully")
+        db.session.commit()
+        print(f"✓ Dimensions ready ({results['created']} created)")
+    except Exception as e:
+        db.session.rollback()
+        error_msg = f'Error creating Netsuite dimensions: {str(e)}'
+        print(f"✗ ERROR: {error_msg}")
+        results['errors'].append(error_msg)
+    
+    return results
+
+def _execute_netsuite_import(table_name, import_method='all', dry_run=False, rows=None):
+    """Execute the Netsuite import with specified parameters
+    
+    Args:
+        table_name: Name of the Snowflake table (NET_REVENUE_OFFLINE_CHANNELS or NET_REVENUE_OFFLINE_CHANNELS_2024)
+        import_method: 'all' to import all data, 'incremental' to import since last entry
+        dry_run: If True, only process first 10 rows and don't save to database
+        rows: Already extracted rows (see _extract_netsuite_rows), skips the Snowflake query
+    
+    Returns:
+        dict with import results
+    """
+    max_rows = 10 if dry_run else None
+    
+    mode_text = "DRY-RUN (first 10 rows only, no database changes)" if dry_run else "LIVE IMPORT"
+    print("\n" + "="*60)
+    print(f"Starting Snowflake Import Process - {mode_text}")
+    print(f"Table: {table_name}")
+    print(f"Method: {import_method}")
+    print("="*60)
+    
+    if rows is None:
+        rows = _extract_netsuite_rows(table_name, import_method)
     
     results = {
         'processed': 0,
@@ -635,16 +750,20 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
         'errors': []
     }
     
-    rows = cursor.fetchall()
     total_rows = len(rows)
     rows_to_process = rows[:max_rows] if max_rows else rows
     
     # Get column names for error logging
-    column_names = ['revenues', 'units', 'brand', 'date', 'essor_code', 'retailer_code', 'retailer']
+    column_names = NETSUITE_COLUMN_NAMES
     
     print(f"\n📊 Total rows to process: {len(rows_to_process)}" + (f" (limited to {max_rows} for dry-run)" if max_rows else ""))
     print("-"*60)
     
+    # Errors are grouped by signature and written per batch, outside the import session
+    error_sink = ImportErrorSink(persist=not dry_run).activate()
+    # Pacing months of every batch are refreshed once, at the end of the import
+    defer_refresh()
+    
     try:
         
         # Process rows in batches of 100
@@ -732,26 +851,13 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
                     channel = None
                     customer_id = None
                     if retailer_code:
-                        netsuite_code_mapping = NetsuiteCode.query.filter_by(netsuite_code=retailer_code).first()
-                        if netsuite_code_mapping:
-                            channel = netsuite_code_mapping.channel
-                            customer_id = netsuite_code_mapping.customer_id
-                            if channel:
-                                print(f"  ✓ Found channel via netsuite_code mapping: {retailer_code} -> {channel.name}")
-                            else:
-                                print(f"  ⚠ NetsuiteCode {retailer_code} exists but has no channel_id mapped - will import with channel_id=null")
+                        netsuite_code_mapping = _get_or_create_netsuite_code(retailer_code, retailer_name, results)
+                        channel = netsuite_code_mapping.channel
+                        customer_id = netsuite_code_mapping.customer_id
+                        if channel:
+                            print(f"  ✓ Found channel via netsuite_code mapping: {retailer_code} -> {channel.name}")
                         else:
-                            # Create NetsuiteCode with no channel_id and no customer_id
-                            print(f"  ➕ Creating new netsuite_code: {retailer_code} (no channel_id, no customer_id) - will import with channel_id=null")
-                            netsuite_code_mapping = NetsuiteCode(
-                                netsuite_code=retailer_code,
-                                netsuite_name=retailer_name,
-                                channel_id=None,
-                                customer_id=None
-                            )
-                            db.session.add(netsuite_code_mapping)
-                            db.session.flush()
-                            results['created'] += 1
+                            print(f"  ⚠ NetsuiteCode {retailer_code} has no channel_id mapped - will import with channel_id=null")
                     
                     # Note: channel can be None - we'll import with channel_id=null
                     # Channel mapping can be set later in Netsuite Codes
@@ -766,26 +872,7 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
                         results['skipped'] += 1
                         continue
                     
-                    # Try to find brand by name first
-                    brand = Brand.query.filter_by(name=brand_name).first()
-                    
-                    # If not found by name, try to find by code
-                    if not brand:
-                        brand = Brand.query.filter_by(code=brand_name).first()
-                        if brand:
-                            print(f"  ✓ Found brand by code: {brand_name} -> {brand.name}")
-                    
-                    # If still not found, create new brand
-                    if not brand:
-                        print(f"  ➕ Creating new brand: {brand_name}")
-                        brand = Brand(name=brand_name, code=brand_name)
-                        db.session.add(brand)
-                        db.session.flush()
-                        results['created'] += 1
-                    else:
-                        if brand.name == brand_name:
-                            print(f"  ✓ Found brand by name: {brand_name}")
-                        # Already printed if found by code above
+                    brand = _get_or_create_brand(brand_name, results)
                     
                     # Find or create item by essor_code
                     essor_code = row[4]  # TRIM(SPLIT_PART(ITEM, ':', 2))
@@ -797,20 +884,7 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
                         results['skipped'] += 1
                         continue
                     
-                    item = Item.query.filter_by(essor_code=essor_code).first()
-                    if not item:
-                        # Create new item with essor_code and brand
-                        print(f"  ➕ Creating new item: essor_code={essor_code}, brand={brand.name}")
-                        item = Item(
-                            essor_code=essor_code,
-                            essor_name=None,  # Can be set later if needed
-                            brand_id=brand.id
-                        )
-                        db.session.add(item)
-                        db.session.flush()
-                        results['created'] += 1
-                    else:
-                        print(f"  ✓ Found item: {essor_code}")
+                    item = _get_or_create_item(essor_code, brand, results)
                     
                     # Parse numeric fields
                     revenues = Decimal(str(row[0] or 0))  # AMOUNT
@@ -896,35 +970,10 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
                     traceback_str = traceback.format_exc()
                     print(f"  Traceback: {traceback_str}")
                     results['errors'].append(error_msg)
-                    # Save to ImportError table - use a separate session to avoid rollback issues
-                    try:
-                        row_data = dict(zip(column_names, row)) if 'column_names' in locals() else list(row)
-                        # Save error in a way that won't be rolled back
-                        if isinstance(row_data, dict):
-                            error_data_json = json.dumps(row_data)
-                        elif isinstance(row_data, (list, tuple)):
-                            error_data_json = json.dumps(list(row_data))
-                        else:
-                            error_data_json = json.dumps(str(row_data))
-                        
-                        import_error = ImportError(
-                            import_channel='snowflake',
-                            error_data=error_data_json,
-                            error_message=f"{error_msg}\n\n{traceback_str}",
-                            row_number=row_num
-                        )
-                        db.session.add(import_error)
-                        # Commit error immediately in a separate transaction
-                        if not dry_run:
-                            db.session.commit()
-                    except Exception as save_error:
-                        print(f"  ⚠ Warning: Could not save error to ImportError table: {str(save_error)}")
-                        import traceback
-                        print(f"  Save error traceback: {traceback.format_exc()}")
+                    # Grouped by the error sink, written on the next flush (outside this session)
+                    row_data = dict(zip(column_names, row)) if 'column_names' in locals() else list(row)
+                    _save_import_error('snowflake', row_data, f"{error_msg}\n\n{traceback_str}", row_num)
                     results['skipped'] += 1
-                    if not dry_run:
-                        # Start a new transaction for the next row
-                        db.session.begin()
                     continue
             
             # Commit batch (only if not dry-run)
@@ -934,6 +983,7 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
                 print(f"\n💾 Committing batch {batch_num + 1}/{total_batches}...")
                 try:
                     db.session.commit()
+                    error_sink.flush()
                     print(f"✓ Batch {batch_num + 1} committed successfully")
                     print(f"   Progress: {results['processed']} rows processed, {results['created']} created, {results['updated']} updated")
                 except Exception as e:
@@ -941,11 +991,6 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
                     db.session.rollback()
                     raise
         
-        # Close Snowflake connection
-        cursor.close()
-        conn.close()
-        print("\n✓ Snowflake connection closed")
-        
         # Prepare summary message
         mode_text = "DRY-RUN" if dry_run else "IMPORT"
         print("\n" + "="*60)
@@ -970,12 +1015,8 @@ def _execute_netsuite_import(table_name, import_method='all', dry_run=False):
         results['errors'].append(error_msg)
         return results
     finally:
-        # Ensure connection is closed
-        try:
-            cursor.close()
-            conn.close()
-        except:
-            pass
+        error_sink.close()
+        refresh_deferred()
 
 @netsuite_bp.route('/import', methods=['GET', 'POST'])
 @login_required
@@ -1032,7 +1073,7 @@ def import_data():
 @login_required
 def netsuite_codes_list():
     """List all netsuite codes"""
-    from sqlalchemy import extract
+    from sqlalchemy import case
     
     # Get filter parameter
     filter_no_channel = request.args.get('filter_no_channel') == '1'
@@ -1049,22 +1090,15 @@ def netsuite_codes_list():
     # Get all retailer codes from the filtered netsuite codes
     retailer_codes = [code.netsuite_code for code in netsuite_codes]
     
-    # Calculate revenues for all codes in a single query (2024)
-    rev_2024_results = db.session.query(
-        NetsuiteData.retailer_code,
-        func.coalesce(func.sum(NetsuiteData.revenues), 0).label('total_rev')
-    ).filter(
-        NetsuiteData.retailer_code.in_(retailer_codes),
-        extract('year', NetsuiteData.date) == 2024
-    ).group_by(NetsuiteData.retailer_code).all()
-    
-    # Calculate revenues for all codes in a single query (2025)
-    rev_2025_results = db.session.query(
+    # Revenues for 2024 and 2025 in a single pass over both years
+    year_2025_start = date_type(2025, 1, 1)
+    rev_results = db.session.query(
         NetsuiteData.retailer_code,
-        func.coalesce(func.sum(NetsuiteData.revenues), 0).label('total_rev')
+        func.coalesce(func.sum(case((NetsuiteData.date < year_2025_start, NetsuiteData.revenues), else_=0)), 0).label('rev_2024'),
+        func.coalesce(func.sum(case((NetsuiteData.date >= year_2025_start, NetsuiteData.revenues), else_=0)), 0).label('rev_2025')
     ).filter(
         NetsuiteData.retailer_code.in_(retailer_codes),
-        extract('year', NetsuiteData.date) == 2025
+        in_years(NetsuiteData.date, 2024, 2025)
     ).group_by(NetsuiteData.retailer_code).all()
     
     # Build dictionary of revenues by code
@@ -1072,29 +1106,25 @@ def netsuite_codes_list():
     for code in retailer_codes:
         revenues_by_code[code] = {'2024': 0.0, '2025': 0.0}
     
-    # Populate 2024 revenues
-    for result in rev_2024_results:
-        if result.retailer_code:
-            revenues_by_code[result.retailer_code]['2024'] = float(result.total_rev)
-    
-    # Populate 2025 revenues
-    for result in rev_2025_results:
-        if result.retailer_code:
-            revenues_by_code[result.retailer_code]['2025'] = float(result.total_rev)
+    for result in rev_results:
+        if result.retailer_code in revenues_by_code:
+            revenues_by_code[result.retailer_code]['2024'] = float(result.rev_2024)
+            revenues_by_code[result.retailer_code]['2025'] = float(result.rev_2025)
     
     return render_template('netsuite/netsuite_codes_list.html', 
                          netsuite_codes=netsuite_codes,
                          filter_no_channel=filter_no_channel,
-                         revenues_by_code=revenues_by_code)
+                         revenues_by_code=revenues_by_code,
+                         remap_status=get_remap_status())
 
 @netsuite_bp.route('/netsuite-codes/create', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def create_netsuite_code():
     """Create a new netsuite code mapping"""
-    channels = Channel.query.order_by(Channel.name).all()
-    customers = ChannelCustomer.query.join(Channel).order_by(Channel.name, ChannelCustomer.name).all()
-    brands = Brand.query.order_by(Brand.name).all()
+    channels = get_channels()
+    customers = get_customers()
+    brands = get_brands()
     
     if request.method == 'POST':
         netsuite_code = request.form.get('netsuite_code', '').strip().upper()
@@ -1169,23 +1199,15 @@ def create_netsuite_code():
         db.session.add(netsuite_code_obj)
         db.session.flush()  # Get the ID
         
-        # Update all existing netsuite_data records with this netsuite_code
-        update_data = {}
-        if channel_id:
-            update_data['channel_id'] = channel_id
-        if customer_id:
-            update_data['customer_id'] = customer_id
-        
-        updated_count = 0
-        if update_data:
-            updated_count = NetsuiteData.query.filter_by(retailer_code=netsuite_code).update(
-                update_data, synchronize_session=False
-            )
-        
+        # Existing netsuite_data records are remapped by the background job (chunked)
+        queued = queue_remaps([{'retailer_code': netsuite_code, 'channel_id': channel_id, 'customer_id': customer_id}])
         db.session.commit()
+        if queued:
+            start_remap_job()
         
         channel_text = f'channel "{Channel.query.get(channel_id).name}"' if channel_id else 'no channel'
-        flash(f'Netsuite code "{netsuite_code}" created and mapped to {channel_text}. Updated {updated_count} existing Netsuite records.', 'success')
+        remap_text = ' Existing Netsuite records are being updated in the background.' if queued else ''
+        flash(f'Netsuite code "{netsuite_code}" created and mapped to {channel_text}.{remap_text}', 'success')
         return redirect(url_for('netsuite.netsuite_codes_list'))
     
     return render_template('netsuite/edit_netsuite_code.html', channels=channels, customers=customers, brands=brands)
@@ -1196,9 +1218,9 @@ def create_netsuite_code():
 def edit_netsuite_code(netsuite_code_id):
     """Edit a netsuite code mapping"""
     netsuite_code_obj = NetsuiteCode.query.get_or_404(netsuite_code_id)
-    channels = Channel.query.order_by(Channel.name).all()
-    customers = ChannelCustomer.query.join(Channel).order_by(Channel.name, ChannelCustomer.name).all()
-    brands = Brand.query.order_by(Brand.name).all()
+    channels = get_channels()
+    customers = get_customers()
+    brands = get_brands()
     
     if request.method == 'POST':
         netsuite_code = request.form.get('netsuite_code', '').strip().upper()
@@ -1263,7 +1285,6 @@ def edit_netsuite_code(netsuite_code_id):
                 flash('Selected customer does not belong to the selected channel', 'error')
                 return render_template('netsuite/edit_netsuite_code.html', netsuite_code=netsuite_code_obj, channels=channels, customers=customers, brands=brands)
         
-        old_channel_id = netsuite_code_obj.channel_id
         old_netsuite_code = netsuite_code_obj.netsuite_code
         
         netsuite_code_obj.netsuite_code = netsuite_code
@@ -1272,41 +1293,94 @@ def edit_netsuite_code(netsuite_code_id):
         netsuite_code_obj.customer_id = customer_id
         db.session.flush()
         
-        # Update all existing netsuite_data records with this netsuite_code
-        update_data = {}
-        if channel_id:
-            update_data['channel_id'] = channel_id
-        if customer_id:
-            update_data['customer_id'] = customer_id
-        
-        updated_count = 0
-        if update_data:
-            # If the netsuite_code changed, update both old and new codes
-            if old_netsuite_code != netsuite_code:
-                # Update records with old code
-                NetsuiteData.query.filter_by(retailer_code=old_netsuite_code).update(
-                    update_data, synchronize_session=False
-                )
-                # Update records with new code
-                updated_count = NetsuiteData.query.filter_by(retailer_code=netsuite_code).update(
-                    update_data, synchronize_session=False
-                )
-            else:
-                # Code didn't change, just update records with this netsuite_code
-                updated_count = NetsuiteData.query.filter_by(retailer_code=netsuite_code).update(
-                    update_data, synchronize_session=False
-                )
-        
+        # Existing netsuite_data records are remapped by the background job (chunked)
+        # If the netsuite_code changed, remap both old and new codes
+        changes = [{'retailer_code': netsuite_code, 'channel_id': channel_id, 'customer_id': customer_id}]
+        if old_netsuite_code != netsuite_code:
+            changes.insert(0, {'retailer_code': old_netsuite_code, 'channel_id': channel_id, 'customer_id': customer_id})
+        queued = queue_remaps(changes)
         db.session.commit()
         
-        if updated_count > 0:
-            flash(f'Netsuite code updated successfully. Updated {updated_count} existing Netsuite records.', 'success')
+        if queued:
+            start_remap_job()
+            flash('Netsuite code updated successfully. Existing Netsuite records are being updated in the background.', 'success')
         else:
             flash(f'Netsuite code updated successfully.', 'success')
         return redirect(url_for('netsuite.netsuite_codes_list'))
     
     return render_template('netsuite/edit_netsuite_code.html', netsuite_code=netsuite_code_obj, channels=channels, customers=customers, brands=brands)
 
+@netsuite_bp.route('/netsuite-codes/bulk-remap', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def bulk_remap_netsuite_codes():
+    """Remap many netsuite codes to channels/customers at once (applied in the background)"""
+    channels = get_channels()
+    customers = get_customers()
+    
+    if request.method == 'POST':
+        mappings = request.form.get('mappings', '')
+        changes, errors = parse_remap_lines(mappings)
+        if not changes and not errors:
+            flash('Please enter at least one mapping', 'error')
+            return render_template('netsuite/bulk_remap.html', channels=channels, customers=customers, mappings=mappings)
+        
+        queued, mapping_errors = apply_mapping_changes(changes)
+        errors.extend(mapping_errors)
+        db.session.commit()
+        if queued:
+            start_remap_job()
+        
+        if errors:
+            flash(f'{len(errors)} mapping(s) rejected: ' + '; '.join(errors[:10]), 'error')
+        if queued:
+            flash(f'{queued} netsuite code(s) remapped. Existing Netsuite records are being updated in the background.', 'success')
+            return redirect(url_for('netsuite.netsuite_codes_list'))
+        return render_template('netsuite/bulk_remap.html', channels=channels, customers=customers, mappings=mappings)
+    
+    return render_template('netsuite/bulk_remap.html', channels=channels, customers=customers, mappings='')
+
+@netsuite_bp.route('/netsuite-codes/api/remap', methods=['POST'])
+@login_required
+@admin_required
+def api_remap_netsuite_codes():
+    """Remap many netsuite codes from JSON: {"changes": [{"netsuite_code", "channel_id", "customer_id"}, ...]}"""
+    data = request.get_json(silent=True) or {}
+    changes = [{
+        'retailer_code': (change.get('netsuite_code') or '').strip().upper(),
+        'channel_id': change.get('channel_id'),
+        'customer_id': change.get('customer_id')
+    } for change in data.get('changes', []) if (change.get('netsuite_code') or '').strip()]
+    
+    if not changes:
+        return jsonify({'error': 'No changes provided'}), 400
+    
+    try:
+        queued, errors = apply_mapping_changes(changes)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    if queued:
+        start_remap_job()
+    return jsonify({'queued': queued, 'errors': errors})
+
+@netsuite_bp.route('/netsuite-codes/api/remap-status')
+@login_required
+def api_remap_status():
+    """Progress of queued remaps"""
+    return jsonify(get_remap_status())
+
+@netsuite_bp.route('/netsuite-codes/remap/run', methods=['POST'])
+@login_required
+@admin_required
+def run_remaps():
+    """Start applying pending remaps now"""
+    start_remap_job()
+    flash('Applying pending remaps in the background.', 'info')
+    return redirect(url_for('netsuite.netsuite_codes_list'))
+
 @netsuite_bp.route('/netsuite-codes/<int:netsuite_code_id>/delete', methods=['POST'])
 @login_required
 @admin_required
@@ -1324,34 +1398,96 @@ def delete_netsuite_code(netsuite_code_id):
 @netsuite_bp.route('/api/netsuite-data-by-code')
 @login_required
 def api_netsuite_data_by_code():
-    """API endpoint to get netsuite data by retailer_code"""
+    """API endpoint to get netsuite data by retailer_code, one page at a time
+    
+    Query params:
+        retailer_code: required
+        group_by: none (records, newest first), month (newest first) or item (top revenues first)
+        cursor: next_cursor of the previous page
+        limit: rows per page (default 200, max 1000)
+    
+    The page is returned column by column: {"columns": [...], "data": {"column": [values]}}
+    """
     retailer_code = request.args.get('retailer_code')
     if not retailer_code:
         return jsonify({'error': 'retailer_code parameter is required'}), 400
     
-    # Get netsuite data for this retailer_code
-    netsuite_data = NetsuiteData.query.filter_by(retailer_code=retailer_code).order_by(
-        NetsuiteData.date.desc()
-    ).all()
-    
-    # Format the data for JSON response
-    data = []
-    for record in netsuite_data:
-        data.append({
-            'id': record.id,
-            'date': record.date.strftime('%Y-%m-%d') if record.date else None,
-            'brand': record.brand.name if record.brand else None,
-            'item': record.item.essor_code if record.item else None,
-            'channel': record.channel.name if record.channel else None,
-            'customer': record.customer.name if record.customer else None,
-            'revenues': float(record.revenues) if record.revenues else 0,
-            'units': record.units if record.units else 0
-        })
+    group_by = request.args.get('group_by', 'none')
+    if group_by not in DATA_BY_CODE_GROUPINGS:
+        return jsonify({'error': f'group_by must be one of: {", ".join(DATA_BY_CODE_GROUPINGS)}'}), 400
+    limit = max(1, min(request.args.get('limit', 200, type=int), 1000))
+    
+    # Single joined projection, no per-record lazy loads
+    revenues = func.sum(NetsuiteData.revenues)
+    units = func.sum(NetsuiteData.units)
+    if group_by == 'month':
+        month = func.date_trunc('month', NetsuiteData.date)
+        columns = ['month', 'revenues', 'units', 'records']
+        query = db.session.query(
+            month.label('month'), revenues.label('revenues'), units.label('units'),
+            func.count(NetsuiteData.id).label('records')
+        ).filter(NetsuiteData.retailer_code == retailer_code).group_by(month)
+        keys, having = [(month, 'desc')], False
+    elif group_by == 'item':
+        # Rows without item form a "No item" group, so the groups add up to the totals
+        item_key = func.coalesce(NetsuiteData.item_id, 0)
+        columns = ['item', 'item_name', 'brand', 'revenues', 'units', 'records']
+        query = db.session.query(
+            Item.essor_code.label('item'), func.coalesce(Item.essor_name, 'No item').label('item_name'),
+            Brand.name.label('brand'), revenues.label('revenues'), units.label('units'),
+            func.count(NetsuiteData.id).label('records')
+        ).outerjoin(Item, NetsuiteData.item_id == Item.id).outerjoin(Brand, Item.brand_id == Brand.id).filter(
+            NetsuiteData.retailer_code == retailer_code
+        ).group_by(item_key, Item.essor_code, Item.essor_name, Brand.name)
+        keys, having = [(func.coalesce(revenues, 0), 'desc'), (item_key, 'asc')], True
+    else:
+        columns = ['id', 'date', 'brand', 'item', 'channel', 'customer', 'revenues', 'units']
+        query = db.session.query(
+            NetsuiteData.id.label('id'), NetsuiteData.date.label('date'), Brand.name.label('brand'),
+            Item.essor_code.label('item'), Channel.name.label('channel'), ChannelCustomer.name.label('customer'),
+            NetsuiteData.revenues.label('revenues'), NetsuiteData.units.label('units')
+        ).outerjoin(Brand, NetsuiteData.brand_id == Brand.id).outerjoin(
+            Item, NetsuiteData.item_id == Item.id
+        ).outerjoin(Channel, NetsuiteData.channel_id == Channel.id).outerjoin(
+            ChannelCustomer, NetsuiteData.customer_id == ChannelCustomer.id
+        ).filter(NetsuiteData.retailer_code == retailer_code)
+        keys, having = [(NetsuiteData.date, 'desc'), (NetsuiteData.id, 'desc')], False
+    
+    page = keyset_paginate(
+        query, keys, cursor=request.args.get('cursor'), per_page=limit, count=None, having=having
+    )
+    
+    def encode(column, value):
+        if value is None:
+            return 0 if column in ('revenues', 'units') else None
+        if column == 'month':
+            return value.strftime('%Y-%m')
+        if column == 'date':
+            return value.strftime('%Y-%m-%d')
+        if column == 'revenues':
+            return float(value)
+        if column == 'units':
+            return int(value)
+        return value
+    
+    data = {column: [encode(column, getattr(row, column)) for row in page.items] for column in columns}
+    
+    # Totals over every row of the code (served by idx_netsuite_retailer_code_date)
+    totals = db.session.query(
+        func.count(NetsuiteData.id), func.coalesce(revenues, 0), func.coalesce(units, 0)
+    ).filter(NetsuiteData.retailer_code == retailer_code).one()
     
     return jsonify({
         'retailer_code': retailer_code,
-        'count': len(data),
-        'data': data
+        'group_by': group_by,
+        'count': len(page.items),
+        'total_records': totals[0],
+        'total_revenues': float(totals[1]),
+        'total_units': int(totals[2]),
+        'columns': columns,
+        'data': data,
+        'has_next': page.has_next,
+        'next_cursor': page.next_cursor if page.has_next else None
     })
 
 @netsuite_bp.route('/import/cron', methods=['GET', 'POST'])
@@ -1374,14 +1510,22 @@ def import_cron():
         print("Starting Automated Cron Import")
         print("="*60)
         
-        results = _execute_netsuite_import(
-            table_name='NET_REVENUE_OFFLINE_CHANNELS',
-            import_method='incremental',
-            dry_run=False
-        )
+        # Runs under the scheduler lock so concurrent triggers (other replica, cron) don't race
+        from scheduler.jobs import run_job
+        run = run_job('netsuite', trigger='http')
+        
+        if run['status'] == 'already_running':
+            return jsonify({
+                'status': 'already_running',
+                'message': 'Netsuite import is already running on another worker'
+            }), 200
+        
+        results = run['results']
         
         return jsonify({
             'status': 'success',
+            'run_id': run['run_id'],
+            'duration_seconds': run['duration_seconds'],
             'processed': results['processed'],
             'created': results['created'],
             'updated': results['updated'],
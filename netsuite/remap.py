@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Bulk remapping of Netsuite codes to channels/customers
+
+Changes are queued in netsuite_remaps by the request and applied to netsuite_data
+by the 'netsuite_remap' background job in chunked batches (using the
+retailer_code index), with progress stored on the job run.
+"""
+
+from datetime import datetime
+from sqlalchemy import text
+from models import db, NetsuiteCode, NetsuiteRemap
+from targets.pacing import touch_months
+from core.refdata import touch_tables
+
+CHUNK_SIZE = 5000
+
+
+def queue_remaps(changes):
+    """Queue code -> channel/customer changes
+    
+    Args:
+        changes: list of dicts with retailer_code, channel_id and customer_id (None = keep current value)
+    
+    Returns:
+        number of remaps queued (changes without channel_id nor customer_id are ignored)
+    """
+    queued = 0
+    for change in changes:
+        if not change.get('retailer_code') or not (change.get('channel_id') or change.get('customer_id')):
+            continue
+        db.session.add(NetsuiteRemap(
+            retailer_code=change['retailer_code'],
+            channel_id=change.get('channel_id'),
+            customer_id=change.get('customer_id'),
+            status='pending'
+        ))
+        queued += 1
+    return queued
+
+
+def start_remap_job():
+    """Start the remap job in the background (no-op if it is already running, it picks up new remaps)"""
+    from scheduler.jobs import run_job_in_background
+    run_job_in_background('netsuite_remap', trigger='http')
+
+
+def _apply_remap_chunk(remap):
+    """Update one chunk of netsuite_data rows for a remap, returns the number of rows updated"""
+    assignments = []
+    differs = []
+    params = {'retailer_code': remap.retailer_code, 'chunk_size': CHUNK_SIZE}
+    if remap.channel_id:
+        assignments.append('channel_id = :channel_id')
+        differs.append('channel_id IS DISTINCT FROM :channel_id')
+        params['channel_id'] = remap.channel_id
+    if remap.customer_id:
+        assignments.append('customer_id = :customer_id')
+        differs.append('customer_id IS DISTINCT FROM :customer_id')
+        params['customer_id'] = remap.customer_id
+    
+    # Only rows that still differ, so each chunk makes progress and re-runs are no-ops
+    dates = db.session.execute(text(f"""
+        UPDATE netsuite_data SET {', '.join(assignments)}
+        WHERE id IN (
+            SELECT id FROM netsuite_data
+            WHERE retailer_code = :retailer_code AND ({' OR '.join(differs)})
+            LIMIT :chunk_size
+        )
+        RETURNING date
+    """), params).scalars().all()
+    
+    # Bulk updates bypass the flush, register the pacing months whose channel totals change
+    # and the netsuite_data version keying the cached chart responses
+    touch_months(dates)
+    if dates:
+        touch_tables(['netsuite_data'])
+    return len(dates)
+
+
+def apply_pending_remaps(refresh=True):
+    """Apply all pending remaps in chunked batches, then refresh the rollups depending on netsuite_data
+    
+    Remaps queued while the job runs are picked up before it exits. With refresh=False the
+    caller refreshes the rollups (the pipeline does it once for all sources).
+    
+    Returns:
+        dict with remaps applied, rows updated, rollups refreshed and errors
+    """
+    from scheduler.jobs import report_progress
+    from scheduler.pipeline import refresh_rollups
+    
+    results = {'remaps': 0, 'rows_updated': 0, 'rollups_refreshed': [], 'errors': []}
+    
+    while True:
+        pending = NetsuiteRemap.query.filter_by(status='pending').order_by(NetsuiteRemap.id).all()
+        if not pending:
+            break
+        
+        total = len(pending)
+        print(f"\n🔀 Applying {total} Netsuite code remaps...")
+        for index, remap in enumerate(pending, start=1):
+            # Fold the change into the next queued one for the same code, which keeps the
+            # fields this one sets unless it sets them itself (None = keep current value)
+            newer = NetsuiteRemap.query.filter(
+                NetsuiteRemap.retailer_code == remap.retailer_code,
+                NetsuiteRemap.status == 'pending',
+                NetsuiteRemap.id > remap.id
+            ).order_by(NetsuiteRemap.id).first()
+            if newer:
+                if newer.channel_id is None:
+                    newer.channel_id = remap.channel_id
+                if newer.customer_id is None:
+                    newer.customer_id = remap.customer_id
+                remap.status = 'done'
+                remap.applied_at = datetime.utcnow()
+                db.session.commit()
+                continue
+            
+            try:
+                rows_updated = 0
+                while True:
+                    chunk_rows = _apply_remap_chunk(remap)
+                    remap.rows_updated = rows_updated = rows_updated + chunk_rows
+                    db.session.commit()
+                    report_progress(
+                        remaps_done=index - 1,
+                        remaps_total=total,
+                        current_code=remap.retailer_code,
+                        current_rows_updated=rows_updated,
+                        rows_updated=results['rows_updated'] + rows_updated
+                    )
+                    if chunk_rows < CHUNK_SIZE:
+                        break
+                
+                remap.status = 'done'
+                remap.applied_at = datetime.utcnow()
+                db.session.commit()
+                results['remaps'] += 1
+                results['rows_updated'] += rows_updated
+                print(f"  ✓ {remap.retailer_code}: {rows_updated} rows updated")
+            except Exception as e:
+                db.session.rollback()
+                error_msg = f"Remap {remap.retailer_code}: {str(e)}"
+                print(f"  ✗ ERROR: {error_msg}")
+                results['errors'].append(error_msg)
+                remap = db.session.get(NetsuiteRemap, remap.id)
+                remap.status = 'error'
+                remap.error_message = str(e)
+                db.session.commit()
+        
+        report_progress(remaps_done=total, remaps_total=total, rows_updated=results['rows_updated'])
+    
+    if refresh and results['rows_updated']:
+        print("\n🔁 Refreshing rollups depending on netsuite_data...")
+        refreshed, timings, errors = refresh_rollups({'netsuite_data'})
+        results['rollups_refreshed'] = refreshed
+        results['errors'].extend(errors)
+    
+    return results
+
+
+def get_remap_status():
+    """Counts of queued/applied remaps and the latest job run, for progress polling"""
+    from sqlalchemy import func
+    from scheduler.jobs import get_latest_run
+    
+    counts = dict(
+        db.session.query(NetsuiteRemap.status, func.count(NetsuiteRemap.id)).group_by(NetsuiteRemap.status).all()
+    )
+    latest_run = get_latest_run('netsuite_remap')
+    return {
+        'pending': counts.get('pending', 0),
+        'done': counts.get('done', 0),
+        'error': counts.get('error', 0),
+        'job': {
+            'status': latest_run.status,
+            'started_at': latest_run.started_at.isoformat(),
+            'finished_at': latest_run.finished_at.isoformat() if latest_run.finished_at else None,
+            'summary': latest_run.summary
+        } if latest_run else None
+    }
+
+
+def parse_remap_lines(text_value):
+    """Parse 'code,channel_id,customer_id' lines (ids may be empty) into change dicts
+    
+    Returns:
+        tuple (changes, errors)
+    """
+    changes = []
+    errors = []
+    for line_num, line in enumerate((text_value or '').splitlines(), start=1):
+        line = line.strip()
+        if not line or line.lower().startswith('code') or line.lower().startswith('netsuite_code'):
+            continue
+        parts = [part.strip() for part in line.split(',')]
+        parts += [''] * (3 - len(parts))
+        try:
+            changes.append({
+                'retailer_code': parts[0].upper(),
+                'channel_id': int(parts[1]) if parts[1] else None,
+                'customer_id': int(parts[2]) if parts[2] else None
+            })
+        except ValueError:
+            errors.append(f"Line {line_num}: invalid channel/customer id in '{line}'")
+    return changes, errors
+
+
+def apply_mapping_changes(changes):
+    """Update NetsuiteCode mappings for many codes and queue the data remaps (caller commits)
+    
+    Returns:
+        tuple (changes queued, errors)
+    """
+    from models import Channel, ChannelCustomer
+    
+    channel_ids = {channel_id for (channel_id,) in db.session.query(Channel.id).all()}
+    customers = dict(db.session.query(ChannelCustomer.id, ChannelCustomer.channel_id).all())
+    codes = {code.netsuite_code: code for code in NetsuiteCode.query.filter(
+        NetsuiteCode.netsuite_code.in_([change['retailer_code'] for change in changes])
+    ).all()} if changes else {}
+    
+    valid = []
+    errors = []
+    for change in changes:
+        code = change['retailer_code']
+        channel_id = change.get('channel_id')
+        customer_id = change.get('customer_id')
+        if channel_id and channel_id not in channel_ids:
+            errors.append(f"{code}: invalid channel {channel_id}")
+            continue
+        if customer_id and customer_id not in customers:
+            errors.append(f"{code}: invalid customer {customer_id}")
+            continue
+        if customer_id and channel_id and customers[customer_id] != channel_id:
+            errors.append(f"{code}: customer {customer_id} does not belong to channel {channel_id}")
+            continue
+        
+        netsuite_code = codes.get(code)
+        if not netsuite_code:
+            netsuite_code = NetsuiteCode(netsuite_code=code)
+            db.session.add(netsuite_code)
+            codes[code] = netsuite_code
+        netsuite_code.channel_id = channel_id
+        netsuite_code.customer_id = customer_id
+        valid.append(change)
+    
+    return queue_remaps(valid), errors
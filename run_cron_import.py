@@ -1,53 +1,71 @@
 #!/usr/bin/env python3
 """
-Cron script to run Netsuite import
-This script is called by cron to import 2025 data since last entry
+Cron script to run scheduled jobs (nightly pipeline, Netsuite, Faire, ASIN status sync)
+Each job runs under a Postgres advisory lock, so when several replicas fire the
+same cron entry only one of them does the work and the others report "already running".
+
+Usage:
+    python3 run_cron_import.py [pipeline|netsuite|faire|asin_sync]   # default: netsuite
+    python3 run_cron_import.py --crontab                              # print crontab for all jobs
 """
 
 import os
 import sys
-from app import create_app
-from netsuite.blueprint import _execute_netsuite_import
+import argparse
+from scheduler.jobs import JOBS, run_job, build_crontab
 
 def main():
-    """Run the automated Netsuite import"""
+    """Run a scheduled job"""
+    parser = argparse.ArgumentParser(description='Run a scheduled job')
+    parser.add_argument('job', nargs='?', default='netsuite', choices=list(JOBS.keys()),
+                        help='Job to run (default: netsuite)')
+    parser.add_argument('--crontab', action='store_true',
+                        help='Print the crontab entries for all jobs and exit')
+    args = parser.parse_args()
+    
+    if args.crontab:
+        sys.stdout.write(build_crontab())
+        sys.exit(0)
+    
+    from app import create_app
+    
     # Create app context
     app = create_app(db_type=None)  # Use remote database
     
     with app.app_context():
         try:
             print("\n" + "="*60)
-            print("Starting Automated Cron Import")
+            print(f"Starting Automated Cron Job: {args.job}")
             print("="*60)
             
-            results = _execute_netsuite_import(
-                table_name='NET_REVENUE_OFFLINE_CHANNELS',
-                import_method='incremental',
-                dry_run=False
-            )
+            run = run_job(args.job, trigger='cron')
+            
+            if run['status'] == 'already_running':
+                print(f"\n⚠ {args.job} is already running on another replica, nothing to do")
+                sys.exit(0)
+            
+            results = run['results']
             
             print("\n" + "="*60)
-            print("Cron Import Summary:")
-            print(f"  ✓ Processed: {results['processed']} rows")
-            print(f"  ➕ Created: {results['created']} records")
-            print(f"  ↻ Updated: {results['updated']} records")
-            print(f"  ⚠ Skipped: {results['skipped']} rows")
-            if results['errors']:
+            print(f"Cron Job Summary ({args.job}, {run['duration_seconds']}s):")
+            for key, value in results.items():
+                if key != 'errors':
+                    print(f"  • {key}: {value}")
+            if results.get('errors'):
                 print(f"  ✗ Errors: {len(results['errors'])} errors occurred")
             print("="*60 + "\n")
             
             # Exit with error code if there were errors
-            if results['errors']:
+            if results.get('errors'):
                 sys.exit(1)
             else:
                 sys.exit(0)
                 
         except Exception as e:
-            print(f"\n✗ ERROR in cron import: {str(e)}")
+            print(f"\n✗ ERROR in cron job {args.job}: {str(e)}")
             import traceback
             print(traceback.format_exc())
             sys.exit(1)
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Background job registry and runner (Netsuite, Faire, ASIN status sync and rollups)
+
+Every job runs under a Postgres advisory lock so that only one worker/replica
+executes it at a time, and each execution is recorded in the job_runs table.
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+from contextlib import ExitStack
+from datetime import datetime
+from flask import current_app, g, has_app_context
+from sqlalchemy import update
+from models import db, JobRun
+from scheduler.locks import advisory_lock
+
+
+def _run_netsuite_import(import_method='incremental', dry_run=False):
+    """Incremental Netsuite import from NET_REVENUE_OFFLINE_CHANNELS"""
+    from netsuite.blueprint import _execute_netsuite_import
+    return _execute_netsuite_import(
+        table_name='NET_REVENUE_OFFLINE_CHANNELS',
+        import_method=import_method,
+        dry_run=dry_run
+    )
+
+
+def _run_faire_import(import_method='incremental', dry_run=False):
+    """Incremental Faire import"""
+    from faire.blueprint import _execute_faire_import
+    return _execute_faire_import(import_method=import_method, dry_run=dry_run)
+
+
+def _run_asin_sync():
+    """Item status & ASIN sync from Snowflake"""
+    from sync.blueprint import _execute_sync
+    return _execute_sync()
+
+
+def _run_pipeline(import_method='incremental'):
+    """Full nightly refresh of all sources"""
+    from scheduler.pipeline import run_pipeline
+    return run_pipeline(import_method=import_method)
+
+
+def _run_netsuite_remap():
+    """Apply queued Netsuite code remaps to netsuite_data"""
+    from netsuite.remap import apply_pending_remaps
+    return apply_pending_remaps()
+
+
+def _run_sellthrough_weekly():
+    """Full rebuild of the sellthrough_weekly cube"""
+    from sellthrough.weekly import rebuild_all
+    return rebuild_all()
+
+
+def _run_target_pacing():
+    """Full rebuild of the targets_pacing_monthly table"""
+    from targets.pacing import rebuild_all
+    return rebuild_all()
+
+
+def _run_partitions():
+    """Create the coming partitions of the fact tables"""
+    from core.partitions import ensure_partitions
+    return ensure_partitions()
+
+
+def _run_result_cache_warm():
+    """Recompute the most requested shared cache entries"""
+    from core.result_cache import warm
+    return warm()
+
+
+# Default schedules are cron expressions, override with JOB_SCHEDULE_<NAME> (e.g. JOB_SCHEDULE_FAIRE)
+# 'off' disables the cron entry, the job can still be run by hand.
+# 'locks' lists other jobs whose lock must also be held (the pipeline covers the single-source jobs).
+JOBS = {
+    'pipeline': {
+        'description': 'Nightly pipeline (Netsuite, Faire, ASIN sync, rollups)',
+        'schedule': '0 0 * * *',
+        'func': _run_pipeline,
+        'locks': ['netsuite', 'faire', 'asin_sync', 'netsuite_remap'],
+    },
+    'netsuite': {
+        'description': 'Netsuite incremental import',
+        'schedule': 'off',
+        'func': _run_netsuite_import,
+    },
+    'faire': {
+        'description': 'Faire incremental import',
+        'schedule': 'off',
+        'func': _run_faire_import,
+    },
+    'asin_sync': {
+        'description': 'Item status & ASIN sync',
+        'schedule': 'off',
+        'func': _run_asin_sync,
+    },
+    'netsuite_remap': {
+        'description': 'Apply queued Netsuite code remaps',
+        'schedule': 'off',  # Started right after remaps are queued; the nightly pipeline drains leftovers
+        'func': _run_netsuite_remap,
+    },
+    'sellthrough_weekly': {
+        'description': 'Rebuild the weekly sellthrough cube (totals, velocity, in-stock)',
+        'schedule': '0 3 * * 0',  # App writes refresh their weeks on commit, this catches writes made outside the app
+        'func': _run_sellthrough_weekly,
+    },
+    'target_pacing': {
+        'description': 'Rebuild monthly targets vs actuals (pacing)',
+        'schedule': '30 3 * * 0',  # App writes refresh their months on commit, this catches writes made outside the app
+        'func': _run_target_pacing,
+    },
+    'partitions': {
+        'description': 'Create the coming yearly partitions of the fact tables',
+        'schedule': '0 2 1 * *',  # Monthly, partitions are created one period ahead
+        'func': _run_partitions,
+    },
+    'result_cache_warm': {
+        'description': 'Warm the shared result cache (most requested filters)',
+        'schedule': '0 6 * * *',  # Also started after the pipeline and SPINS imports
+        'func': _run_result_cache_warm,
+    },
+}
+
+
+def get_schedule(job_name):
+    """Get the cron schedule for a job (environment override or default)"""
+    return os.getenv(f'JOB_SCHEDULE_{job_name.upper()}', JOBS[job_name]['schedule'])
+
+
+def build_crontab(command='cd /app && /usr/local/bin/python3 run_cron_import.py', log_path='/var/log/cron.log'):
+    """Build crontab lines for all jobs with a schedule"""
+    lines = []
+    for job_name in JOBS:
+        schedule = get_schedule(job_name).strip()
+        if not schedule or schedule.lower() == 'off':
+            continue
+        lines.append(f"{schedule} {command} {job_name} >> {log_path} 2>&1")
+    return '\n'.join(lines) + '\n'
+
+
+def _summarize(results):
+    """Turn a job results dict into a compact JSON summary"""
+    if not isinstance(results, dict):
+        return None
+    summary = {k: v for k, v in results.items() if k != 'errors'}
+    errors = results.get('errors') or []
+    summary['errors_count'] = len(errors)
+    summary['errors'] = errors[:10]
+    return json.dumps(summary, default=str)
+
+
+def _mark_interrupted_runs(job_name):
+    """Close 'running' rows left behind by a process that died (we hold the lock, so nothing else is running)"""
+    JobRun.query.filter_by(job_name=job_name, status='running').update({
+        'status': 'error',
+        'finished_at': datetime.utcnow(),
+        'error_message': 'Interrupted (process exited before completion)'
+    }, synchronize_session=False)
+
+
+def run_job(job_name, trigger='cron', **kwargs):
+    """Run a registered job under its advisory lock and record the run
+    
+    Returns a dict with 'status' ('success' or 'already_running'), the run id,
+    the duration and the job results. Exceptions from the job are recorded and re-raised.
+    """
+    if job_name not in JOBS:
+        raise ValueError(f"Unknown job: {job_name}")
+    
+    job = JOBS[job_name]
+    host = socket.gethostname()
+    
+    with ExitStack() as locks:
+        # Stops at the first lock already held; the ones acquired are released on exit
+        acquired = all(locks.enter_context(advisory_lock(name)) for name in [job_name] + job.get('locks', []))
+        if not acquired:
+            print(f"⚠ Job '{job_name}' is already running on another worker/replica, skipping")
+            run = JobRun(
+                job_name=job_name,
+                trigger=trigger,
+                status='skipped',
+                host=host,
+                started_at=datetime.utcnow(),
+                finished_at=datetime.utcnow(),
+                duration_seconds=0,
+                error_message='Already running'
+            )
+            db.session.add(run)
+            db.session.commit()
+            return {'status': 'already_running', 'job': job_name, 'run_id': run.id}
+        
+        _mark_interrupted_runs(job_name)
+        run = JobRun(job_name=job_name, trigger=trigger, status='running', host=host, started_at=datetime.utcnow())
+        db.session.add(run)
+        db.session.commit()
+        run_id = run.id
+        
+        print(f"\n▶ Job '{job_name}' started (run #{run_id}, trigger: {trigger}, host: {host})")
+        g.job_run_id = run_id
+        start = time.time()
+        try:
+            results = job['func'](**kwargs)
+        except Exception as e:
+            db.session.rollback()
+            run = db.session.get(JobRun, run_id)
+            run.status = 'error'
+            run.finished_at = datetime.utcnow()
+            run.duration_seconds = round(time.time() - start, 3)
+            run.error_message = str(e)
+            db.session.commit()
+            print(f"✗ Job '{job_name}' failed after {run.duration_seconds}s: {str(e)}")
+            raise
+        
+        duration = round(time.time() - start, 3)
+        db.session.rollback()  # Discard anything the job left uncommitted
+        run = db.session.get(JobRun, run_id)
+        run.status = 'success'
+        run.finished_at = datetime.utcnow()
+        run.duration_seconds = duration
+        run.summary = _summarize(results)
+        db.session.commit()
+        print(f"✓ Job '{job_name}' finished in {duration}s")
+        
+        return {
+            'status': 'success',
+            'job': job_name,
+            'run_id': run_id,
+            'duration_seconds': duration,
+            'results': results
+        }
+
+
+def report_progress(**progress):
+    """Store progress of the running job in its job_runs row (visible from every worker right away)"""
+    run_id = g.get('job_run_id') if has_app_context() else None
+    if not run_id:
+        return
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(JobRun.__table__).where(JobRun.__table__.c.id == run_id).values(
+                    summary=json.dumps({'progress': progress}, default=str)
+                )
+            )
+    except Exception as e:
+        print(f"  ⚠ Could not report progress for run #{run_id}: {str(e)}")
+
+
+def run_job_in_background(job_name, trigger='http', **kwargs):
+    """Start run_job in a daemon thread with its own app context (off the request path)"""
+    app = current_app._get_current_object()
+    
+    def target():
+        with app.app_context():
+            try:
+                run_job(job_name, trigger=trigger, **kwargs)
+            except Exception as e:
+                print(f"✗ Background job '{job_name}' failed: {str(e)}")
+    
+    thread = threading.Thread(target=target, name=f'job-{job_name}', daemon=True)
+    thread.start()
+    return thread
+
+
+def get_latest_run(job_name):
+    """Get the most recent run of a job"""
+    return JobRun.query.filter_by(job_name=job_name).order_by(JobRun.started_at.desc()).first()
+
+
+def get_recent_runs(limit=20):
+    """Get the most recent job runs"""
+    return JobRun.query.order_by(JobRun.started_at.desc()).limit(limit).all()
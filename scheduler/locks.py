@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Postgres advisory locks used to make sure a job only runs once across workers and replicas
+"""
+
+from contextlib import contextmanager
+from sqlalchemy import text
+from models import db
+
+LOCK_NAMESPACE = 'offline:job:'
+
+
+@contextmanager
+def advisory_lock(name):
+    """Try to take a session-level advisory lock on a dedicated connection
+    
+    Yields True if the lock was acquired, False if another process already holds it.
+    The lock is released when the block exits (or by Postgres if the process dies).
+    """
+    key = LOCK_NAMESPACE + name
+    conn = db.engine.connect()
+    acquired = False
+    try:
+        acquired = bool(conn.execute(
+            text('SELECT pg_try_advisory_lock(hashtext(:key))'), {'key': key}
+        ).scalar())
+        # Don't keep a transaction open while the job runs - the lock is session-level
+        conn.commit()
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                conn.execute(text('SELECT pg_advisory_unlock(hashtext(:key))'), {'key': key})
+                conn.commit()
+            except Exception as e:
+                # Never hand a connection that may still hold the lock back to the pool
+                print(f"⚠ Could not release advisory lock '{key}': {str(e)}")
+                conn.invalidate()
+        conn.close()
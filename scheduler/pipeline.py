@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Nightly multi-source pipeline (Netsuite, Faire, ASIN status)
+
+Stages:
+    1. extract     - Snowflake queries for all sources, in parallel
+    2. dimensions  - brands/items/codes/customers/ASIN links, serialized
+    3. facts       - netsuite_data and faire_data merges, in parallel, then queued code remaps
+    4. rollups     - downstream refreshes, only for inputs that changed
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import text
+from models import db
+
+NETSUITE_TABLE = 'NET_REVENUE_OFFLINE_CHANNELS'
+
+
+def _analyze(table_name):
+    """Refresh planner statistics after a bulk load"""
+    db.session.execute(text(f'ANALYZE {table_name}'))
+    db.session.commit()
+
+
+def _refresh_targets_pacing():
+    """Pacing months collected over the imports, refreshed once"""
+    from targets.pacing import refresh_pending
+    return refresh_pending()
+
+
+def _warm_result_cache():
+    """Recompute the most requested shared cache entries on the new data"""
+    from core.result_cache import warm
+    return warm()
+
+
+# Downstream refreshes, each fired only when one of its input tables changed
+ROLLUPS = {
+    'analyze_netsuite_data': {
+        'inputs': ['netsuite_data'],
+        'func': lambda: _analyze('netsuite_data'),
+    },
+    'analyze_faire_data': {
+        'inputs': ['faire_data'],
+        'func': lambda: _analyze('faire_data'),
+    },
+    'targets_pacing': {
+        'inputs': ['netsuite_data', 'faire_data', 'sellthrough_data', 'targets_data'],
+        'func': _refresh_targets_pacing,
+    },
+    'warm_result_cache': {
+        'inputs': ['netsuite_data', 'faire_data'],
+        'func': _warm_result_cache,
+    },
+}
+
+
+def _run_in_context(app, func, *args, **kwargs):
+    """Run func inside its own app context (own DB session) and time it"""
+    start = time.time()
+    with app.app_context():
+        try:
+            return func(*args, **kwargs), None, round(time.time() - start, 3)
+        except Exception as e:
+            db.session.rollback()
+            import traceback
+            traceback.print_exc()
+            return None, str(e), round(time.time() - start, 3)
+
+
+def _run_parallel(app, tasks):
+    """Run {name: (func, args)} tasks in parallel threads
+    
+    Returns:
+        dict name -> (result, error, seconds)
+    """
+    with ThreadPoolExecutor(max_workers=len(tasks) or 1) as executor:
+        futures = {
+            name: executor.submit(_run_in_context, app, func, *args)
+            for name, (func, args) in tasks.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def refresh_rollups(changed):
+    """Refresh the rollups with at least one input in changed (set of table names)
+    
+    Returns:
+        tuple (refreshed rollup names, timings dict, errors list)
+    """
+    app = current_app._get_current_object()
+    refreshed = []
+    timings = {}
+    errors = []
+    for name, rollup in ROLLUPS.items():
+        if not set(changed).intersection(rollup['inputs']):
+            print(f"  ⏭ {name}: inputs unchanged, skipped")
+            continue
+        result, error, seconds = _run_in_context(app, rollup['func'])
+        timings[f'rollup.{name}'] = seconds
+        if error:
+            errors.append(f"rollup.{name}: {error}")
+            print(f"  ✗ {name} failed after {seconds}s: {error}")
+        else:
+            refreshed.append(name)
+            print(f"  ✓ {name} refreshed in {seconds}s")
+    return refreshed, timings, errors
+
+
+def _compact(results):
+    """Keep the counters of a step result (errors are reported separately)"""
+    if not isinstance(results, dict):
+        return results
+    return {k: v for k, v in results.items() if k != 'errors'}
+
+
+def run_pipeline(import_method='incremental'):
+    """Run the full refresh: extract all sources, then dimensions, facts and rollups
+    
+    Returns:
+        dict with per-stage timings, per-source summaries, refreshed rollups and errors
+    """
+    from netsuite.blueprint import _extract_netsuite_rows, _ensure_netsuite_dimensions, _execute_netsuite_import
+    from faire.blueprint import _extract_faire_rows, _ensure_faire_dimensions, _execute_faire_import
+    from sync.blueprint import _extract_asin_status_rows, _execute_sync
+    from targets.pacing import hold_deferred
+    
+    app = current_app._get_current_object()
+    pipeline_start = time.time()
+    timings = {}
+    summary = {'netsuite': {}, 'faire': {}, 'asin_sync': {}}
+    errors = []
+    changed = set()
+    
+    def record(step, result, error, seconds):
+        timings[step] = seconds
+        if error:
+            errors.append(f"{step}: {error}")
+            print(f"✗ {step} failed after {seconds}s: {error}")
+        elif isinstance(result, dict) and result.get('errors'):
+            errors.extend(f"{step}: {e}" for e in result['errors'])
+    
+    print("\n" + "="*60)
+    print(f"Starting Pipeline ({import_method})")
+    print("="*60)
+    
+    # Stage 1: extracts are independent, run them in parallel
+    print("\n📥 Stage 1: Extracting Netsuite, Faire and ASIN status from Snowflake (parallel)...")
+    stage_start = time.time()
+    extracts = _run_parallel(app, {
+        'extract.netsuite': (_extract_netsuite_rows, (NETSUITE_TABLE, import_method)),
+        'extract.faire': (_extract_faire_rows, (import_method,)),
+        'extract.asin_status': (_extract_asin_status_rows, ()),
+    })
+    for step, (result, error, seconds) in extracts.items():
+        record(step, None, error, seconds)
+    timings['stage.extract'] = round(time.time() - stage_start, 3)
+    
+    netsuite_rows = extracts['extract.netsuite'][0]
+    faire_extract = extracts['extract.faire'][0]
+    asin_rows = extracts['extract.asin_status'][0]
+    
+    # Stage 2: dimension creation is serialized (Netsuite and Faire both create items)
+    print("\n🧱 Stage 2: Creating dimensions (serialized)...")
+    stage_start = time.time()
+    if netsuite_rows is not None:
+        result, error, seconds = _run_in_context(app, _ensure_netsuite_dimensions, netsuite_rows)
+        record('dimensions.netsuite', result, error, seconds)
+        summary['netsuite']['dimensions'] = _compact(result)
+    if faire_extract is not None:
+        result, error, seconds = _run_in_context(app, _ensure_faire_dimensions, *faire_extract)
+        record('dimensions.faire', result, error, seconds)
+        summary['faire']['dimensions'] = _compact(result)
+    if asin_rows is not None:
+        # Runs after item creation so new items get linked to their ASIN
+        result, error, seconds = _run_in_context(app, _execute_sync, asin_rows)
+        record('dimensions.asin_sync', result, error, seconds)
+        summary['asin_sync'] = _compact(result)
+        if result and (result['asins_updated'] or result['items_updated'] or result['asins_created']):
+            changed.update(['asins', 'items'])
+    timings['stage.dimensions'] = round(time.time() - stage_start, 3)
+    
+    # Pacing months of the imports are kept for the targets_pacing rollup of stage 4
+    with hold_deferred():
+        # Stage 3: fact merges touch different tables, run them in parallel
+        print("\n📊 Stage 3: Merging facts (parallel)...")
+        stage_start = time.time()
+        fact_tasks = {}
+        if netsuite_rows is not None:
+            fact_tasks['facts.netsuite'] = (_execute_netsuite_import, (NETSUITE_TABLE, import_method, False, netsuite_rows))
+        if faire_extract is not None:
+            faire_column_names, faire_rows = faire_extract
+            fact_tasks['facts.faire'] = (_execute_faire_import, (import_method, False, faire_rows, faire_column_names))
+        facts = _run_parallel(app, fact_tasks) if fact_tasks else {}
+        for step, (result, error, seconds) in facts.items():
+            record(step, result, error, seconds)
+            source = step.split('.', 1)[1]
+            summary[source]['facts'] = _compact(result)
+            if result and result['processed']:
+                changed.add(f'{source}_data')
+        
+        # Remaps queued but not applied yet (e.g. queued while a remap run was finishing)
+        from netsuite.remap import apply_pending_remaps
+        result, error, seconds = _run_in_context(app, apply_pending_remaps, refresh=False)
+        record('facts.netsuite_remap', result, error, seconds)
+        if result and result['rows_updated']:
+            changed.add('netsuite_data')
+        timings['stage.facts'] = round(time.time() - stage_start, 3)
+        
+        # Stage 4: rollups whose inputs changed
+        print(f"\n🔁 Stage 4: Refreshing rollups (changed inputs: {', '.join(sorted(changed)) or 'none'})...")
+        stage_start = time.time()
+        rollups_refreshed, rollup_timings, rollup_errors = refresh_rollups(changed)
+        timings.update(rollup_timings)
+        errors.extend(rollup_errors)
+        timings['stage.rollups'] = round(time.time() - stage_start, 3)
+    timings['total'] = round(time.time() - pipeline_start, 3)
+    
+    print("\n" + "="*60)
+    print("Pipeline Timings:")
+    for step, seconds in timings.items():
+        print(f"  {step:<28} {seconds:>9.3f}s")
+    if errors:
+        print(f"  ✗ Errors: {len(errors)} errors occurred")
+    print("="*60 + "\n")
+    
+    return {
+        'stages': timings,
+        'sources': summary,
+        'changed': sorted(changed),
+        'rollups_refreshed': rollups_refreshed,
+        'errors': errors
+    }
@@ -9,42 +9,51 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import csv
 import io
-from sqlalchemy import func
+from sqlalchemy import func, cast
 from sqlalchemy.orm import joinedload
-from models import db, SellthroughData, Brand, Item, Channel, ChannelCustomer, ChannelItem, Category, ImportError
+from models import db, SellthroughData, SellthroughWeekly, Brand, Item, Channel, ChannelCustomer, ChannelItem, Category, ImportError
 from auth.blueprint import login_required, admin_required
+from core.http_cache import etag_cached
+from core.refdata import get_categories, get_channels, get_brands
+from core.pagination import keyset_paginate
+from core.search import search_items, get_selected_label
+from imports.error_sink import ImportErrorSink, record_import_error
+from sellthrough.weekly import touch_dates, week_start
+from targets.pacing import touch_months
 import json
 
 sellthrough_bp = Blueprint('sellthrough', __name__, template_folder='templates')
 
+# Chart resolutions and how their buckets are labelled
+CHART_RESOLUTIONS = {
+    'week': lambda bucket: bucket.strftime('%Y-%m-%d'),
+    'month': lambda bucket: bucket.strftime('%Y-%m'),
+    'quarter': lambda bucket: f"{bucket.year}-Q{(bucket.month - 1) // 3 + 1}",
+}
+# Auto resolution: the finest one whose span (days) covers the range, quarter beyond
+AUTO_RESOLUTION_SPANS = [('week', 400), ('month', 1100)]
+
+# Velocity metrics of the weekly cube: (store-weighted sum, stores it was weighted by)
+VELOCITY_METRICS = {
+    'usd_pspw': (SellthroughWeekly.usd_pspw_weighted, SellthroughWeekly.usd_pspw_stores),
+    'units_pspw': (SellthroughWeekly.units_pspw_weighted, SellthroughWeekly.units_pspw_stores),
+    'instock': (SellthroughWeekly.instock_weighted, SellthroughWeekly.instock_stores),
+    'oos': (SellthroughWeekly.oos_weighted, SellthroughWeekly.oos_stores),
+}
+VELOCITY_GROUPINGS = ('none', 'channel', 'brand', 'category', 'item')
+VELOCITY_MAX_SERIES = 25
+VELOCITY_PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
 def _save_import_error(import_channel, row_data, error_message, row_number=None):
-    """Helper function to save import errors to the database"""
-    try:
-        # Convert row_data to JSON string
-        if isinstance(row_data, dict):
-            error_data_json = json.dumps(row_data)
-        elif isinstance(row_data, (list, tuple)):
-            error_data_json = json.dumps(list(row_data))
-        else:
-            error_data_json = json.dumps(str(row_data))
-        
-        import_error = ImportError(
-            import_channel=import_channel,
-            error_data=error_data_json,
-            error_message=error_message,
-            row_number=row_number
-        )
-        db.session.add(import_error)
-        # Don't commit here - let the batch commit handle it
-    except Exception as e:
-        # If we can't save the error, at least log it
-        print(f"  ⚠ Warning: Could not save import error to database: {str(e)}")
+    """Helper function to record import errors (grouped by the active ImportErrorSink)"""
+    record_import_error(import_channel, row_data, error_message, row_number)
 
 @sellthrough_bp.route('/')
 @login_required
 def index():
     """Sellthrough data list"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 50
     
     # Get filter parameters
@@ -67,19 +76,19 @@ def index():
     if date_to:
         query = query.filter(SellthroughData.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
     
-    sellthrough_data = query.order_by(SellthroughData.date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    # Keyset pagination on (date, id), total from planner statistics
+    sellthrough_data = keyset_paginate(
+        query, [(SellthroughData.date, 'desc'), (SellthroughData.id, 'desc')], cursor=cursor, per_page=per_page
     )
     
-    # Get filter options
-    brands = Brand.query.order_by(Brand.name).all()
-    items = Item.query.order_by(Item.essor_code).all()
-    channels = Channel.query.order_by(Channel.name).all()
+    # Get filter options (cached reference data), items use the async picker
+    brands = get_brands()
+    channels = get_channels()
     
     return render_template('sellthrough/index.html', 
                          sellthrough_data=sellthrough_data,
                          brands=brands,
-                         items=items,
+                         selected_item_label=get_selected_label('items', item_id),
                          channels=channels,
                          current_filters={
                              'brand_id': brand_id,
@@ -258,103 +267,274 @@ def dashboard():
         SellthroughData.revenues > 0
     ).distinct().order_by(Brand.name).all()
     
-    categories = Category.query.join(Brand).order_by(Brand.name, Category.name).all()
-    items = Item.query.join(Brand).order_by(Brand.name, Item.essor_code).all()
-    channels = Channel.query.order_by(Channel.name).all()
+    categories = get_categories()
+    channels = get_channels()
     
     return render_template('sellthrough/dashboard.html',
                          brands=brands,
                          categories=categories,
-                         items=items,
                          channels=channels)
 
+def _chart_period(args):
+    """(start_date, end_date) of the time_period (or custom date_from/date_to) of a chart request"""
+    time_period = args.get('time_period', 'last_12_months')
+    date_from = args.get('date_from')
+    date_to = args.get('date_to')
+    
+    today = datetime.now().date()
+    if time_period == 'last_12_months':
+        start_date = today - timedelta(days=365)
+        end_date = today
+    elif time_period == 'last_3_months':
+        start_date = today - timedelta(days=90)
+        end_date = today
+    elif time_period == 'year_to_date':
+        start_date = datetime(today.year, 1, 1).date()
+        end_date = today
+    elif time_period == 'since_jan_2024':
+        start_date = datetime(2024, 1, 1).date()
+        end_date = today
+    elif time_period == 'custom':
+        if date_from:
+            start_date = datetime.strptime(date_from, '%Y-%m-%d').date()
+        else:
+            start_date = today - timedelta(days=365)
+        if date_to:
+            end_date = datetime.strptime(date_to, '%Y-%m-%d').date()
+        else:
+            end_date = today
+    else:
+        start_date = today - timedelta(days=365)
+        end_date = today
+    return start_date, end_date
+
+
+def _chart_resolution(resolution, start_date, end_date):
+    """Resolution of a chart request (auto picks it from the range span), None if unknown"""
+    if resolution == 'auto':
+        span_days = (end_date - start_date).days
+        return next((name for name, max_days in AUTO_RESOLUTION_SPANS if span_days <= max_days), 'quarter')
+    return resolution if resolution in CHART_RESOLUTIONS else None
+
+
+def _bucket(resolution):
+    """Bucket of the sellthrough_weekly rows: their week, or the month/quarter of their month column"""
+    column = SellthroughWeekly.week if resolution == 'week' else SellthroughWeekly.month
+    return func.date_trunc(resolution, cast(column, db.DateTime))
+
+
+def _filter_weekly(query, args, start_date, end_date):
+    """Apply the period and the brand/category/item/channel filters of a chart request to a sellthrough_weekly query
+    
+    The cube has no day grain: the period is widened to the whole weeks holding its start and
+    end date (up to 6 days of rows before start_date or after end_date are included), then
+    the month column clips those weeks to the months of the period.
+    """
+    query = query.filter(
+        SellthroughWeekly.week >= week_start(start_date),
+        SellthroughWeekly.week <= end_date,
+        SellthroughWeekly.month >= start_date.replace(day=1),
+        SellthroughWeekly.month <= end_date
+    )
+    for name in ('brand_id', 'category_id', 'item_id', 'channel_id'):
+        value = args.get(name, type=int)
+        if value:
+            query = query.filter(getattr(SellthroughWeekly, name) == value)
+    return query
+
+
 @sellthrough_bp.route('/api/chart-data')
 @login_required
+@etag_cached('sellthrough_weekly')
 def api_chart_data():
     """API endpoint to get chart data based on filters"""
     try:
-        # Get filter parameters
-        time_period = request.args.get('time_period', 'last_12_months')
         metric = request.args.get('metric', 'revenues')  # 'units' or 'revenues'
-        brand_id = request.args.get('brand_id', type=int)
-        category_id = request.args.get('category_id', type=int)
-        item_id = request.args.get('item_id', type=int)
-        channel_id = request.args.get('channel_id', type=int)
-        date_from = request.args.get('date_from')
-        date_to = request.args.get('date_to')
-        
-        # Calculate date range based on time period
-        today = datetime.now().date()
-        if time_period == 'last_12_months':
-            start_date = today - timedelta(days=365)
-            end_date = today
-        elif time_period == 'last_3_months':
-            start_date = today - timedelta(days=90)
-            end_date = today
-        elif time_period == 'year_to_date':
-            start_date = datetime(today.year, 1, 1).date()
-            end_date = today
-        elif time_period == 'custom':
-            if date_from:
-                start_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-            else:
-                start_date = today - timedelta(days=365)
-            if date_to:
-                end_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-            else:
-                end_date = today
-        else:
-            start_date = today - timedelta(days=365)
-            end_date = today
+        start_date, end_date = _chart_period(request.args)
         
-        # Build query - join Item if we need to filter by category
-        needs_item_join = category_id is not None
+        # Resolution: one point per week, month or quarter (auto picks it from the range span)
+        resolution = _chart_resolution(request.args.get('resolution', 'auto'), start_date, end_date)
+        if resolution is None:
+            return jsonify({'error': f'resolution must be one of: auto, {", ".join(CHART_RESOLUTIONS)}'}), 400
         
-        base_query = db.session.query(
-            SellthroughData.date,
-            func.sum(SellthroughData.units).label('total_units'),
-            func.sum(SellthroughData.revenues).label('total_revenues')
-        ).filter(
-            SellthroughData.date >= start_date,
-            SellthroughData.date <= end_date
-        )
-        
-        # Join Item if filtering by category
-        if needs_item_join:
-            base_query = base_query.join(Item, SellthroughData.item_id == Item.id)
-        
-        query = base_query
-        
-        # Apply filters
-        if brand_id:
-            query = query.filter(SellthroughData.brand_id == brand_id)
-        if category_id:
-            # Item join already done above
-            query = query.filter(Item.category_id == category_id)
-        if item_id:
-            query = query.filter(SellthroughData.item_id == item_id)
-        if channel_id:
-            query = query.filter(SellthroughData.channel_id == channel_id)
+        # Bucketed on the weekly rollup (weeks start on Monday, months and quarters on the rows' month)
+        metric_column = SellthroughWeekly.units if metric == 'units' else SellthroughWeekly.revenues
+        bucket = _bucket(resolution)
+        query = _filter_weekly(db.session.query(
+            bucket.label('bucket'),
+            func.sum(metric_column).label('total')
+        ), request.args, start_date, end_date)
         
-        # Group by date and order by date
-        query = query.group_by(SellthroughData.date).order_by(SellthroughData.date)
-        
-        # Execute query
-        results = query.all()
+        results = query.group_by(bucket).order_by(bucket).all()
         
         # Prepare data for chart
-        dates = [result.date.strftime('%Y-%m-%d') for result in results]
-        if metric == 'units':
-            values = [float(result.total_units) if result.total_units else 0 for result in results]
-            metric_label = 'Units'
-        else:  # revenues
-            values = [float(result.total_revenues) if result.total_revenues else 0 for result in results]
-            metric_label = 'Revenues ($)'
+        dates = [CHART_RESOLUTIONS[resolution](result.bucket) for result in results]
+        values = [float(result.total) if result.total else 0 for result in results]
+        metric_label = 'Units' if metric == 'units' else 'Revenues ($)'
         
         return jsonify({
             'dates': dates,
             'values': values,
             'metric_label': metric_label,
+            'resolution': resolution,
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d')
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ==================== Velocity ====================
+
+def _weighted(metric):
+    """Store-weighted value of a velocity metric over the grouped cube rows"""
+    weighted, stores = VELOCITY_METRICS[metric]
+    return func.sum(weighted) / func.nullif(func.sum(stores), 0)
+
+
+def _velocity_values(row):
+    return {metric: round(float(getattr(row, metric)), 4) if getattr(row, metric) is not None else None
+            for metric in VELOCITY_METRICS}
+
+
+def _velocity_dimension(group_by):
+    """(key column, label column, join target, join condition) of a velocity grouping"""
+    if group_by == 'channel':
+        return SellthroughWeekly.channel_id, Channel.name, Channel, SellthroughWeekly.channel_id == Channel.id
+    if group_by == 'brand':
+        return SellthroughWeekly.brand_id, Brand.name, Brand, SellthroughWeekly.brand_id == Brand.id
+    if group_by == 'category':
+        return SellthroughWeekly.category_id, Category.name, Category, SellthroughWeekly.category_id == Category.id
+    label = func.concat(Item.essor_code, ' - ', Item.essor_name)
+    return SellthroughWeekly.item_id, label, Item, SellthroughWeekly.item_id == Item.id
+
+
+def _percentile(sorted_values, fraction):
+    """Linear-interpolated percentile of an ascending list (like percentile_cont)"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+@sellthrough_bp.route('/api/velocity-trend')
+@login_required
+def api_velocity_trend():
+    """Store-weighted velocity and in-stock per week/month/quarter, overall or per channel/brand/category/item
+    
+    Same filters as /api/chart-data; group_by (none, channel, brand, category, item) returns one
+    series per group for the top `limit` groups by revenues.
+    """
+    try:
+        start_date, end_date = _chart_period(request.args)
+        resolution = _chart_resolution(request.args.get('resolution', 'auto'), start_date, end_date)
+        if resolution is None:
+            return jsonify({'error': f'resolution must be one of: auto, {", ".join(CHART_RESOLUTIONS)}'}), 400
+        group_by = request.args.get('group_by', 'none')
+        if group_by not in VELOCITY_GROUPINGS:
+            return jsonify({'error': f'group_by must be one of: {", ".join(VELOCITY_GROUPINGS)}'}), 400
+        limit = min(max(request.args.get('limit', 10, type=int), 1), VELOCITY_MAX_SERIES)
+        
+        bucket = _bucket(resolution).label('bucket')
+        measures = [_weighted(metric).label(metric) for metric in VELOCITY_METRICS]
+        measures.append(func.sum(SellthroughWeekly.stores).label('stores'))
+        
+        if group_by == 'none':
+            query = _filter_weekly(db.session.query(bucket, *measures), request.args, start_date, end_date)
+            rows = query.group_by(bucket).order_by(bucket).all()
+            groups = [{'id': None, 'name': 'All'}]
+            points = {(None, row.bucket): row for row in rows}
+        else:
+            key, label, target, condition = _velocity_dimension(group_by)
+            top = _filter_weekly(
+                db.session.query(key.label('key'), label.label('name')).join(target, condition),
+                request.args, start_date, end_date
+            ).group_by(key, label).order_by(func.sum(SellthroughWeekly.revenues).desc()).limit(limit).all()
+            groups = [{'id': row.key, 'name': row.name} for row in top]
+            query = _filter_weekly(db.session.query(key.label('key'), bucket, *measures), request.args, start_date, end_date)
+            rows = query.filter(key.in_([group['id'] for group in groups])).group_by(key, bucket).order_by(bucket).all()
+            points = {(row.key, row.bucket): row for row in rows}
+        
+        buckets = sorted({bucket_value for _, bucket_value in points})
+        series = []
+        for group in groups:
+            values = {metric: [] for metric in list(VELOCITY_METRICS) + ['stores']}
+            for bucket_value in buckets:
+                row = points.get((group['id'], bucket_value))
+                point = _velocity_values(row) if row else dict.fromkeys(VELOCITY_METRICS)
+                point['stores'] = int(row.stores or 0) if row else None
+                for metric, value in point.items():
+                    values[metric].append(value)
+            series.append({**group, **values})
+        
+        return jsonify({
+            'dates': [CHART_RESOLUTIONS[resolution](bucket_value) for bucket_value in buckets],
+            'series': series,
+            'group_by': group_by,
+            'resolution': resolution,
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d')
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@sellthrough_bp.route('/api/velocity-distribution')
+@login_required
+def api_velocity_distribution():
+    """Distribution of the store-weighted value of one metric across items/brands/categories/channels over a period
+    
+    Same filters as /api/chart-data; metric (usd_pspw, units_pspw, instock, oos), by (item, brand,
+    category, channel), min_stores (store-weeks a group needs to be counted) and bins (histogram).
+    """
+    try:
+        start_date, end_date = _chart_period(request.args)
+        metric = request.args.get('metric', 'usd_pspw')
+        if metric not in VELOCITY_METRICS:
+            return jsonify({'error': f'metric must be one of: {", ".join(VELOCITY_METRICS)}'}), 400
+        by = request.args.get('by', 'item')
+        if by not in VELOCITY_GROUPINGS or by == 'none':
+            return jsonify({'error': f'by must be one of: {", ".join(VELOCITY_GROUPINGS[1:])}'}), 400
+        min_stores = max(request.args.get('min_stores', 1, type=int), 1)
+        bins = min(max(request.args.get('bins', 10, type=int), 1), 50)
+        
+        key, label, target, condition = _velocity_dimension(by)
+        weight = func.sum(VELOCITY_METRICS[metric][1])
+        query = _filter_weekly(db.session.query(
+            key.label('key'),
+            label.label('name'),
+            _weighted(metric).label('value'),
+            weight.label('stores'),
+            func.sum(VELOCITY_METRICS[metric][0]).label('weighted')
+        ).join(target, condition), request.args, start_date, end_date)
+        rows = query.group_by(key, label).having(weight >= min_stores).order_by(_weighted(metric).desc()).all()
+        
+        groups = [{'id': row.key, 'name': row.name, 'value': round(float(row.value), 4), 'stores': int(row.stores)}
+                  for row in rows]
+        values = sorted(group['value'] for group in groups)
+        total_stores = sum(int(row.stores) for row in rows)
+        overall = float(sum(row.weighted for row in rows)) / total_stores if total_stores else None
+        
+        histogram = []
+        if values:
+            low, high = values[0], values[-1]
+            width = (high - low) / bins if high > low else 1
+            counts = [0] * bins
+            for value in values:
+                counts[min(int((value - low) / width), bins - 1)] += 1
+            histogram = [{'from': round(low + index * width, 4), 'to': round(low + (index + 1) * width, 4), 'count': count}
+                         for index, count in enumerate(counts)]
+        
+        return jsonify({
+            'metric': metric,
+            'by': by,
+            'groups': groups,
+            'count': len(groups),
+            'weighted_value': round(overall, 4) if overall is not None else None,
+            'percentiles': {f'p{int(fraction * 100)}': round(_percentile(values, fraction), 4) if values else None for fraction in VELOCITY_PERCENTILES},
+            'histogram': histogram,
             'start_date': start_date.strftime('%Y-%m-%d'),
             'end_date': end_date.strftime('%Y-%m-%d')
         })
@@ -1054,6 +1234,9 @@ def import_data():
         flash('Please upload a CSV file', 'error')
         return render_template('sellthrough/import.html')
     
+    # Errors are grouped by signature and written once at the end, outside the import session
+    error_sink = ImportErrorSink(persist=not dry_run).activate()
+    
     # Read CSV file
     try:
         mode_text = "DRY-RUN (first 10 rows only, no database changes)" if dry_run else "LIVE IMPORT"
@@ -1156,15 +1339,27 @@ def import_data():
         db.session.rollback()
         flash(f'Error processing CSV file: {str(e)}', 'error')
         return render_template('sellthrough/import.html')
+    finally:
+        error_sink.close()
 
 @sellthrough_bp.route('/unlinked')
 @login_required
 def unlinked():
     """List sellthrough data without item_id and brand_id, grouped by channel_code"""
     channel_id = request.args.get('channel_id', type=int)
+    page = request.args.get('page', 1, type=int)
+    per_page = 50
     
-    # Query for sellthrough data without item_id and brand_id
-    query = SellthroughData.query.filter(
+    # Group unlinked rows in SQL (one row per channel_id/channel_code)
+    query = SellthroughData.query.with_entities(
+        SellthroughData.channel_id,
+        SellthroughData.channel_code,
+        func.count(SellthroughData.id).label('count'),
+        func.min(SellthroughData.date).label('first_date'),
+        func.max(SellthroughData.date).label('last_date'),
+        func.coalesce(func.sum(SellthroughData.revenues), 0).label('total_revenues'),
+        func.coalesce(func.sum(SellthroughData.units), 0).label('total_units')
+    ).filter(
         SellthroughData.item_id.is_(None),
         SellthroughData.brand_id.is_(None)
     )
@@ -1172,41 +1367,30 @@ def unlinked():
     if channel_id:
         query = query.filter(SellthroughData.channel_id == channel_id)
     
-    # Get all unlinked data
-    unlinked_data = query.order_by(SellthroughData.channel_id, SellthroughData.channel_code, SellthroughData.date.desc()).all()
-    
-    # Group by channel_code and channel_id (use composite key)
-    grouped_data = {}
-    for data in unlinked_data:
-        channel_code = data.channel_code or 'NO_CODE'
-        # Create a composite key to handle same channel_code in different channels
-        group_key = f"{data.channel_id}_{channel_code}"
-        
-        if group_key not in grouped_data:
-            grouped_data[group_key] = {
-                'channel_code': channel_code,
-                'channel_id': data.channel_id,
-                'channel_name': data.channel.name if data.channel else 'Unknown',
-                'count': 0,
-                'first_date': data.date,
-                'last_date': data.date,
-                'total_revenues': Decimal('0'),
-                'total_units': 0
-            }
-        
-        grouped_data[group_key]['count'] += 1
-        if data.date < grouped_data[group_key]['first_date']:
-            grouped_data[group_key]['first_date'] = data.date
-        if data.date > grouped_data[group_key]['last_date']:
-            grouped_data[group_key]['last_date'] = data.date
-        grouped_data[group_key]['total_revenues'] += data.revenues or Decimal('0')
-        grouped_data[group_key]['total_units'] += data.units or 0
-    
-    # Get channels for filter
-    channels = Channel.query.order_by(Channel.name).all()
+    groups = query.group_by(
+        SellthroughData.channel_id, SellthroughData.channel_code
+    ).order_by(
+        SellthroughData.channel_id, SellthroughData.channel_code
+    ).paginate(page=page, per_page=per_page, error_out=False)
+    
+    # Get channels for filter (and names for the groups)
+    channels = get_channels()
+    channel_names = {channel.id: channel.name for channel in channels}
+    
+    grouped_data = [{
+        'channel_code': group.channel_code or 'NO_CODE',
+        'channel_id': group.channel_id,
+        'channel_name': channel_names.get(group.channel_id, 'Unknown'),
+        'count': group.count,
+        'first_date': group.first_date,
+        'last_date': group.last_date,
+        'total_revenues': group.total_revenues,
+        'total_units': group.total_units
+    } for group in groups.items]
     
     return render_template('sellthrough/unlinked.html',
                          grouped_data=grouped_data,
+                         groups=groups,
                          channels=channels,
                          selected_channel_id=channel_id)
 
@@ -1218,24 +1402,68 @@ def api_search_items():
     if not search_term:
         return jsonify([])
     
-    # Search in essor_code and essor_name
-    search_pattern = f'%{search_term}%'
-    items = Item.query.filter(
-        db.or_(
-            Item.essor_code.ilike(search_pattern),
-            Item.essor_name.ilike(search_pattern)
-        )
-    ).order_by(Item.essor_code).limit(50).all()
+    # Ranked prefix/fuzzy search in essor_code and essor_name (trigram indexes)
+    items = search_items(search_term, limit=50)
     
     return jsonify([{
-        'id': item.id,
-        'essor_code': item.essor_code or '',
-        'essor_name': item.essor_name or '',
-        'brand_id': item.brand_id,
-        'brand_name': item.brand.name if item.brand else '',
-        'display': f"{item.essor_code or 'N/A'} - {item.essor_name or 'N/A'}"
+        **item,
+        'display': f"{item['essor_code'] or 'N/A'} - {item['essor_name'] or 'N/A'}"
     } for item in items])
 
+def _link_channel_code(channel_id, channel_code, item):
+    """Link unlinked sellthrough_data rows of a channel_code to an item (single UPDATE) and upsert its channel_item
+    
+    Returns:
+        number of sellthrough_data rows updated
+    """
+    unlinked_rows = SellthroughData.query.filter(
+        SellthroughData.channel_id == channel_id,
+        SellthroughData.channel_code == channel_code,
+        SellthroughData.item_id.is_(None)
+    )
+    
+    # Bulk updates bypass the flush, register the weeks and months whose rollups change
+    dates = [row.date for row in unlinked_rows.with_entities(SellthroughData.date).distinct()]
+    touch_dates(dates)
+    touch_months(dates)
+    
+    updated_count = unlinked_rows.update({
+        SellthroughData.item_id: item.id,
+        SellthroughData.brand_id: item.brand_id,
+        SellthroughData.updated_at: datetime.utcnow()
+    }, synchronize_session=False)
+    
+    if not updated_count:
+        return 0
+    
+    # Check if channel_item already exists
+    channel_item = ChannelItem.query.filter_by(
+        channel_id=channel_id,
+        item_id=item.id
+    ).first()
+    
+    # Get channel_name from item
+    channel_name = item.essor_name or item.essor_code or channel_code
+    
+    # If channel_item doesn't exist, create it
+    if not channel_item:
+        channel_item = ChannelItem(
+            channel_id=channel_id,
+            item_id=item.id,
+            channel_code=channel_code,
+            channel_name=channel_name
+        )
+        db.session.add(channel_item)
+        db.session.flush()
+    else:
+        # Update channel_code and channel_name if they're different
+        if channel_item.channel_code != channel_code:
+            channel_item.channel_code = channel_code
+        if channel_item.channel_name != channel_name:
+            channel_item.channel_name = channel_name
+    
+    return updated_count
+
 @sellthrough_bp.route('/link-item', methods=['POST'])
 @login_required
 def link_item():
@@ -1254,55 +1482,61 @@ def link_item():
         if not item:
             return jsonify({'error': 'Item not found'}), 404
         
-        brand_id = item.brand_id
-        
-        # Get all sellthrough_data entries with this channel_code and channel_id that don't have item_id
-        sellthrough_entries = SellthroughData.query.filter(
-            SellthroughData.channel_code == channel_code,
-            SellthroughData.channel_id == channel_id,
-            SellthroughData.item_id.is_(None),
-            SellthroughData.brand_id.is_(None)
-        ).all()
-        
-        if not sellthrough_entries:
+        updated_count = _link_channel_code(channel_id, channel_code, item)
+        if not updated_count:
+            db.session.rollback()
             return jsonify({'error': 'No unlinked sellthrough data found for this channel_code'}), 404
         
-        # Check if channel_item already exists
-        channel_item = ChannelItem.query.filter_by(
-            channel_id=channel_id,
-            item_id=item_id
-        ).first()
-        
-        # Get channel_name from item
-        channel_name = item.essor_name or item.essor_code or channel_code
-        
-        # If channel_item doesn't exist, create it
-        if not channel_item:
-            channel_item = ChannelItem(
-                channel_id=channel_id,
-                item_id=item_id,
-                channel_code=channel_code,
-                channel_name=channel_name
-            )
-            db.session.add(channel_item)
-        else:
-            # Update channel_code and channel_name if they're different
-            if channel_item.channel_code != channel_code:
-                channel_item.channel_code = channel_code
-            if channel_item.channel_name != channel_name:
-                channel_item.channel_name = channel_name
+        db.session.commit()
         
-        # Update all sellthrough_data entries
-        for entry in sellthrough_entries:
-            entry.item_id = item_id
-            entry.brand_id = brand_id
+        return jsonify({
+            'success': True,
+            'updated_count': updated_count,
+            'message': f'Successfully linked {updated_count} entries to item {item.essor_code}'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@sellthrough_bp.route('/link-items', methods=['POST'])
+@login_required
+def link_items():
+    """Link many channel_codes to items in one call
+    
+    Body: {"links": [{"channel_id", "channel_code", "item_id"}, ...]}
+    """
+    try:
+        data = request.get_json() or {}
+        links = data.get('links') or []
+        if not links:
+            return jsonify({'error': 'No links provided'}), 400
+        
+        item_ids = {link.get('item_id') for link in links if link.get('item_id')}
+        items = {item.id: item for item in Item.query.filter(Item.id.in_(item_ids)).all()} if item_ids else {}
+        
+        results = []
+        total_updated = 0
+        for link in links:
+            channel_code = link.get('channel_code')
+            channel_id = link.get('channel_id')
+            item = items.get(link.get('item_id'))
+            if not channel_code or not channel_id or not item:
+                results.append({'channel_id': channel_id, 'channel_code': channel_code, 'error': 'Missing fields or item not found'})
+                continue
+            
+            updated_count = _link_channel_code(channel_id, channel_code, item)
+            total_updated += updated_count
+            results.append({'channel_id': channel_id, 'channel_code': channel_code, 'item_id': item.id, 'updated_count': updated_count})
         
         db.session.commit()
         
+        linked = sum(1 for result in results if result.get('updated_count'))
         return jsonify({
             'success': True,
-            'updated_count': len(sellthrough_entries),
-            'message': f'Successfully linked {len(sellthrough_entries)} entries to item {item.essor_code}'
+            'updated_count': total_updated,
+            'results': results,
+            'message': f'Successfully linked {linked} channel codes ({total_updated} entries)'
         })
     
     except Exception as e:
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Weekly cube of sellthrough_data (sellthrough_weekly) used by the dashboard charts and
+the velocity APIs
+
+Weeks touched by ORM writes to sellthrough_data (imports, create/edit/delete) are
+collected on flush and rebuilt right after the commit; bulk updates register their
+weeks with touch_dates(). Category changes on items are copied onto their cube rows.
+The 'sellthrough_weekly' job rebuilds everything as a safety net for writes made
+outside the app. Every rebuild bumps the 'sellthrough_weekly' data version once its
+rows are committed, invalidating the cached chart responses.
+
+The grain includes the month of the rows, so a week straddling two months is split in
+two cube rows and month/quarter buckets don't borrow days from the neighbouring month.
+"""
+
+from datetime import timedelta
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+from models import db, SellthroughData, Item
+from core.refdata import bump_versions
+
+LOCK_KEY = 'offline:rollup:sellthrough_weekly'
+
+_WEEK = "date_trunc('week', s.date::timestamp)::date"
+_MONTH = "date_trunc('month', s.date::timestamp)::date"
+
+_COLUMNS = ("week, month, channel_id, brand_id, category_id, item_id, revenues, units, rows_count, stores, "
+            "usd_pspw_weighted, usd_pspw_stores, units_pspw_weighted, units_pspw_stores, "
+            "instock_weighted, instock_stores, oos_weighted, oos_stores")
+
+# Store-weighted sums only count rows where the figure is set (NULL = not reported)
+_SELECT = f"""
+    SELECT {_WEEK}, {_MONTH}, s.channel_id, s.brand_id, i.category_id, s.item_id,
+           SUM(s.revenues), SUM(s.units), COUNT(*), SUM(s.stores),
+           COALESCE(SUM(s.usd_pspw * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.usd_pspw IS NOT NULL), 0),
+           COALESCE(SUM(s.units_pspw * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.units_pspw IS NOT NULL), 0),
+           COALESCE(SUM(s.instock * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.instock IS NOT NULL), 0),
+           COALESCE(SUM(s.oos * s.stores), 0), COALESCE(SUM(s.stores) FILTER (WHERE s.oos IS NOT NULL), 0)
+    FROM sellthrough_data s
+    LEFT JOIN items i ON i.id = s.item_id
+"""
+
+_DELETE_WEEKS_SQL = text("DELETE FROM sellthrough_weekly WHERE week = ANY(:weeks)")
+
+_INSERT_WEEKS_SQL = text(f"""
+    INSERT INTO sellthrough_weekly ({_COLUMNS})
+    {_SELECT}
+    WHERE s.date >= :start AND s.date < :end AND {_WEEK} = ANY(:weeks)
+    GROUP BY 1, 2, 3, 4, 5, 6
+""")
+
+_REBUILD_SQL = text(f"""
+    INSERT INTO sellthrough_weekly ({_COLUMNS})
+    {_SELECT}
+    GROUP BY 1, 2, 3, 4, 5, 6
+""")
+
+_SET_CATEGORY_SQL = text("UPDATE sellthrough_weekly SET category_id = :category_id WHERE item_id = :item_id")
+
+
+def week_start(day):
+    """Monday of the week of day (same as date_trunc('week'))"""
+    return day - timedelta(days=day.weekday())
+
+
+def refresh_weeks(weeks, conn=None):
+    """Rebuild the cube rows of the given weeks (Mondays), returns the number of rows written"""
+    weeks = sorted(set(weeks))
+    if not weeks:
+        return 0
+    params = {'weeks': weeks, 'start': weeks[0], 'end': weeks[-1] + timedelta(weeks=1)}
+    if conn is None:
+        with db.engine.begin() as own_conn:
+            rows = refresh_weeks(weeks, own_conn)
+        bump_versions(['sellthrough_weekly'])
+        return rows
+    # Serialize refreshes so two commits rebuilding the same week can't both insert it
+    conn.execute(text('SELECT pg_advisory_xact_lock(hashtext(:key))'), {'key': LOCK_KEY})
+    conn.execute(_DELETE_WEEKS_SQL, params)
+    return conn.execute(_INSERT_WEEKS_SQL, params).rowcount
+
+
+def rebuild_all():
+    """Rebuild the whole cube from sellthrough_data"""
+    with db.engine.begin() as conn:
+        conn.execute(text('SELECT pg_advisory_xact_lock(hashtext(:key))'), {'key': LOCK_KEY})
+        conn.execute(text('DELETE FROM sellthrough_weekly'))
+        rows = conn.execute(_REBUILD_SQL).rowcount
+    bump_versions(['sellthrough_weekly'])
+    print(f"✓ Rebuilt sellthrough_weekly ({rows} rows)")
+    return {'rows': rows}
+
+
+def set_item_categories(categories, conn=None):
+    """Copy new item categories ({item_id: category_id}) onto the cube rows of those items"""
+    if conn is None:
+        with db.engine.begin() as own_conn:
+            set_item_categories(categories, own_conn)
+        bump_versions(['sellthrough_weekly'])
+        return
+    conn.execute(text('SELECT pg_advisory_xact_lock(hashtext(:key))'), {'key': LOCK_KEY})
+    params = [{'item_id': item_id, 'category_id': category_id} for item_id, category_id in categories.items()]
+    conn.execute(_SET_CATEGORY_SQL, params)
+
+
+def touch_dates(dates, session=None):
+    """Mark the weeks of dates for refresh when the current transaction commits"""
+    session = session or db.session()
+    session.info.setdefault('sellthrough_weeks', set()).update(week_start(day) for day in dates if day)
+
+
+# ==================== Session events ====================
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_weeks(session, flush_context):
+    """Weeks of sellthrough_data rows added, changed (old and new date) or deleted in this flush"""
+    dates = []
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, SellthroughData):
+            dates.append(obj.date)
+    for obj in session.dirty:
+        if isinstance(obj, SellthroughData):
+            history = inspect(obj).attrs.date.history
+            dates.extend([obj.date] + list(history.deleted or []))
+    if dates:
+        touch_dates(dates, session)
+    for obj in session.dirty:
+        if isinstance(obj, Item) and inspect(obj).attrs.category_id.history.has_changes():
+            session.info.setdefault('sellthrough_item_categories', {})[obj.id] = obj.category_id
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_after_commit(session):
+    weeks = session.info.pop('sellthrough_weeks', None)
+    if weeks:
+        try:
+            rows = refresh_weeks(weeks)
+            print(f"  ✓ Refreshed {len(weeks)} week(s) of sellthrough_weekly ({rows} rows)")
+        except Exception as e:
+            print(f"  ⚠ Could not refresh sellthrough_weekly: {str(e)}")
+    categories = session.info.pop('sellthrough_item_categories', None)
+    if categories:
+        try:
+            set_item_categories(categories)
+            print(f"  ✓ Updated the category of {len(categories)} item(s) in sellthrough_weekly")
+        except Exception as e:
+            print(f"  ⚠ Could not update categories in sellthrough_weekly: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('sellthrough_weeks', None)
+    session.info.pop('sellthrough_item_categories', None)
@@ -11,8 +11,16 @@ import csv
 import io
 import re
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from models import db, SpinsData, SpinsChannel, SpinsBrand, SpinsItem, ImportError
+from core.refdata import get_spins_brands, get_spins_channels
+from core.pagination import keyset_paginate
+from core.search import get_selected_label
 from auth.blueprint import login_required, admin_required
+from core.http_cache import etag_cached
+from core.result_cache import shared_result, start_warm_job
+from imports.error_sink import ImportErrorSink, record_import_error
+from spins.item_stats import refresh_item_stats
 import json
 import requests
 import configparser
@@ -114,26 +122,8 @@ def extract_and_compute_upc(upc_string):
     return computed_upc
 
 def _save_import_error(import_channel, row_data, error_message, row_number=None):
-    """Helper function to save import errors to the database"""
-    try:
-        # Convert row_data to JSON string
-        if isinstance(row_data, dict):
-            error_data_json = json.dumps(row_data)
-        elif isinstance(row_data, (list, tuple)):
-            error_data_json = json.dumps(list(row_data))
-        else:
-            error_data_json = json.dumps(str(row_data))
-        
-        import_error = ImportError(
-            import_channel=import_channel,
-            error_data=error_data_json,
-            error_message=error_message,
-            row_number=row_number
-        )
-        db.session.add(import_error)
-        db.session.flush()
-    except Exception as e:
-        print(f"  ⚠ Warning: Could not save import error to database: {str(e)}")
+    """Helper function to record import errors (grouped by the active ImportErrorSink)"""
+    record_import_error(import_channel, row_data, error_message, row_number)
 
 def _parse_time_frame(time_frame_str):
     """Parse TIME FRAME field to extract date from format like '1 Week End 12/29/2024'"""
@@ -184,7 +174,7 @@ def _parse_number(value_str):
 @login_required
 def index():
     """SPINS data list"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 50
     
     # Get filter parameters
@@ -207,19 +197,19 @@ def index():
     if date_to:
         query = query.filter(SpinsData.week <= datetime.strptime(date_to, '%Y-%m-%d').date())
     
-    spins_data = query.order_by(SpinsData.week.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    # Keyset pagination on (week, id), total from planner statistics
+    spins_data = keyset_paginate(
+        query, [(SpinsData.week, 'desc'), (SpinsData.id, 'desc')], cursor=cursor, per_page=per_page
     )
     
-    # Get filter options
-    brands = SpinsBrand.query.order_by(SpinsBrand.name).all()
-    items = SpinsItem.query.order_by(SpinsItem.upc).all()
-    channels = SpinsChannel.query.order_by(SpinsChannel.name).all()
+    # Get filter options (cached reference data), items use the async picker
+    brands = get_spins_brands()
+    channels = get_spins_channels()
     
     return render_template('spins/index.html', 
                          spins_data=spins_data,
                          brands=brands,
-                         items=items,
+                         selected_item_label=get_selected_label('spins-items', item_id),
                          channels=channels,
                          current_filters={
                              'brand_id': brand_id,
@@ -245,6 +235,7 @@ def dashboard():
 
 @spins_bp.route('/api/chart-data')
 @login_required
+@etag_cached('spins_data', 'spins_brands')
 def api_chart_data():
     """API endpoint to get chart data based on filters"""
     try:
@@ -285,70 +276,58 @@ def api_chart_data():
             start_date = today - timedelta(weeks=12)
             end_date = today
         
-        # Build base filter for getting all weeks (apply channel/item filters if specified)
-        base_week_filter = db.session.query(SpinsData.week).filter(
+        metric_column = SpinsData.units if metric == 'units' else SpinsData.revenues
+        metric_label = 'Units' if metric == 'units' else 'Revenues ($)'
+        
+        # Remove duplicates from brand_ids and unknown brands (names come from the reference data cache)
+        brand_names = {brand.id: brand.name for brand in get_spins_brands()}
+        brand_ids = [brand_id for brand_id in dict.fromkeys(brand_ids) if brand_id in brand_names]
+        
+        # Single query for every series: GROUP BY week (and brand when comparing brands)
+        group_columns = [SpinsData.week, SpinsData.brand_id] if brand_ids else [SpinsData.week]
+        query = db.session.query(
+            *group_columns,
+            func.sum(metric_column).label('total')
+        ).filter(
             SpinsData.week >= start_date,
             SpinsData.week <= end_date
         )
-        
-        # Apply channel and item filters to week query too
+        if brand_ids:
+            query = query.filter(SpinsData.brand_id.in_(brand_ids))
         if item_id:
-            base_week_filter = base_week_filter.filter(SpinsData.item_id == item_id)
+            query = query.filter(SpinsData.item_id == item_id)
         if channel_id:
-            base_week_filter = base_week_filter.filter(SpinsData.channel_id == channel_id)
-        
-        # Get all unique weeks in the date range (with filters applied)
-        all_weeks_query = base_week_filter.distinct().order_by(SpinsData.week)
-        all_weeks = [w.week for w in all_weeks_query.all()]
+            query = query.filter(SpinsData.channel_id == channel_id)
+        results = query.group_by(*group_columns).all()
+        
+        # Pivot in memory: {brand_id or None: {week: total}}
+        series = {}
+        for result in results:
+            key = result.brand_id if brand_ids else None
+            series.setdefault(key, {})[result.week] = float(result.total) if result.total else 0
+        
+        # Densified week axis: every 7 days from the first to the last week with data
+        all_weeks = sorted({week for totals in series.values() for week in totals})
+        if all_weeks:
+            week, last_week = all_weeks[0], all_weeks[-1]
+            while week < last_week:
+                week += timedelta(weeks=1)
+                all_weeks.append(week)
+            all_weeks = sorted(set(all_weeks))
         dates = [week.strftime('%Y-%m-%d') for week in all_weeks]
         
         # If no brands selected, return aggregated data
         if not brand_ids:
-            # Build query - group by week
-            query = db.session.query(
-                SpinsData.week,
-                func.sum(SpinsData.units).label('total_units'),
-                func.sum(SpinsData.revenues).label('total_revenues')
-            ).filter(
-                SpinsData.week >= start_date,
-                SpinsData.week <= end_date
-            )
-            
-            # Apply filters
-            if item_id:
-                query = query.filter(SpinsData.item_id == item_id)
-            if channel_id:
-                query = query.filter(SpinsData.channel_id == channel_id)
-            
-            # Group by week and order by week
-            query = query.group_by(SpinsData.week).order_by(SpinsData.week)
-            
-            # Execute query
-            results = query.all()
-            
-            # Create a dictionary for quick lookup
-            week_data = {result.week: result for result in results}
-            
-            # Prepare data for chart
-            if metric == 'units':
-                values = [float(week_data[week].total_units) if week in week_data and week_data[week].total_units else 0 for week in all_weeks]
-                metric_label = 'Units'
-            else:  # revenues
-                values = [float(week_data[week].total_revenues) if week in week_data and week_data[week].total_revenues else 0 for week in all_weeks]
-                metric_label = 'Revenues ($)'
-            
+            totals = series.get(None, {})
             return jsonify({
                 'dates': dates,
-                'values': values,
+                'values': [totals.get(week, 0) for week in all_weeks],
                 'metric_label': metric_label,
                 'start_date': start_date.strftime('%Y-%m-%d'),
                 'end_date': end_date.strftime('%Y-%m-%d')
             })
         
         # Multiple brands selected - return data per brand
-        # Remove duplicates from brand_ids
-        brand_ids = list(dict.fromkeys(brand_ids))  # Preserves order while removing duplicates
-        brands_data = []
         brand_colors = [
             'rgb(159, 122, 234)',  # Purple
             'rgb(66, 153, 225)',   # Blue
@@ -361,52 +340,14 @@ def api_chart_data():
             'rgb(236, 72, 153)',   # Pink
             'rgb(20, 184, 166)',    # Teal
         ]
-        
+        brands_data = []
         for idx, brand_id in enumerate(brand_ids):
-            brand = SpinsBrand.query.get(brand_id)
-            if not brand:
-                continue
-            
-            # Build query - group by week and brand
-            query = db.session.query(
-                SpinsData.week,
-                func.sum(SpinsData.units).label('total_units'),
-                func.sum(SpinsData.revenues).label('total_revenues')
-            ).filter(
-                SpinsData.week >= start_date,
-                SpinsData.week <= end_date,
-                SpinsData.brand_id == brand_id
-            )
-            
-            # Apply filters
-            if item_id:
-                query = query.filter(SpinsData.item_id == item_id)
-            if channel_id:
-                query = query.filter(SpinsData.channel_id == channel_id)
-            
-            # Group by week and order by week
-            query = query.group_by(SpinsData.week).order_by(SpinsData.week)
-            
-            # Execute query
-            results = query.all()
-            
-            # Create a dictionary for quick lookup
-            week_data = {result.week: result for result in results}
-            
-            # Prepare data for chart
-            if metric == 'units':
-                values = [float(week_data[week].total_units) if week in week_data and week_data[week].total_units else 0 for week in all_weeks]
-                metric_label = 'Units'
-            else:  # revenues
-                values = [float(week_data[week].total_revenues) if week in week_data and week_data[week].total_revenues else 0 for week in all_weeks]
-                metric_label = 'Revenues ($)'
-            
-            color = brand_colors[idx % len(brand_colors)]
+            totals = series.get(brand_id, {})
             brands_data.append({
                 'brand_id': brand_id,
-                'brand_name': brand.name,
-                'values': values,
-                'color': color
+                'brand_name': brand_names[brand_id],
+                'values': [totals.get(week, 0) for week in all_weeks],
+                'color': brand_colors[idx % len(brand_colors)]
             })
         
         return jsonify({
@@ -446,6 +387,9 @@ def import_data():
         flash('Please upload a CSV file', 'error')
         return render_template('spins/import.html')
     
+    # Errors are grouped by signature and written once at the end, outside the import session
+    error_sink = ImportErrorSink(persist=not dry_run).activate()
+    
     # Read CSV file
     try:
         mode_text = "DRY-RUN (first 10 rows only, no database changes)" if dry_run else "LIVE IMPORT"
@@ -485,6 +429,9 @@ def import_data():
             'errors': []
         }
         
+        # Items with new or updated rows, their precomputed stats are refreshed after the commit
+        touched_item_ids = set()
+        
         total_rows = 0
         rows_to_process = []
         for row in csv_reader:
@@ -664,6 +611,7 @@ def import_data():
                     db.session.add(spins_data)
                     results['created'] += 1
                     results['processed'] += 1
+                touched_item_ids.add(item.id)
                 
             except Exception as e:
                 error_msg = f"Row {row_num}: {str(e)}"
@@ -672,16 +620,9 @@ def import_data():
                 traceback_str = traceback.format_exc()
                 print(f"  Traceback: {traceback_str}")
                 results['errors'].append(error_msg)
-                # Save to ImportError table
-                try:
-                    _save_import_error('csv', row, f"{error_msg}\n\n{traceback_str}", row_num)
-                    if not dry_run:
-                        db.session.commit()
-                except:
-                    pass
+                # Grouped by the error sink, written at the end of the import (outside this session)
+                _save_import_error('csv', row, f"{error_msg}\n\n{traceback_str}", row_num)
                 results['skipped'] += 1
-                if not dry_run:
-                    db.session.begin()
                 continue
         
         # Commit all changes (only if not dry-run)
@@ -697,6 +638,18 @@ def import_data():
                 print(f"✗ Error committing: {str(e)}")
                 db.session.rollback()
                 raise
+            
+            # Dominant brand and first/last seen week of the imported items
+            try:
+                refreshed = refresh_item_stats(touched_item_ids)
+                db.session.commit()
+                print(f"✓ Refreshed stats of {refreshed} SPINS items")
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠ Could not refresh SPINS item stats: {str(e)}")
+            
+            # Recompute the most requested ranks/charts for the new data
+            start_warm_job()
         
         # Prepare summary message
         mode_text = "DRY-RUN" if dry_run else "IMPORT"
@@ -732,6 +685,8 @@ def import_data():
         print(traceback.format_exc())
         flash(error_msg, 'error')
         return render_template('spins/import.html')
+    finally:
+        error_sink.close()
 
 # ==================== SPINS Brands ====================
 
@@ -833,46 +788,15 @@ def items_list():
     if search:
         query = query.filter(SpinsItem.name.ilike(f'%{search}%'))
     
-    # Apply brand filter (filter by items that have data with this brand)
+    # Apply brand filter (on the precomputed dominant brand, indexed)
     if brand_id:
-        # Get item IDs that have data with this brand
-        item_ids_with_brand = db.session.query(SpinsData.item_id).filter(
-            SpinsData.brand_id == brand_id
-        ).distinct().subquery()
-        query = query.filter(SpinsItem.id.in_(db.session.query(item_ids_with_brand.c.item_id)))
+        query = query.filter(SpinsItem.dominant_brand_id == brand_id)
     
     # Order and paginate
-    query = query.order_by(SpinsItem.upc)
+    query = query.options(joinedload(SpinsItem.dominant_brand)).order_by(SpinsItem.upc)
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     
-    # For each item, get the most common brand
-    items_with_brands = []
-    for item in pagination.items:
-        # Query to find the brand that appears most frequently for this item
-        brand_counts = db.session.query(
-            SpinsBrand.id,
-            SpinsBrand.name,
-            func.count(SpinsData.id).label('count')
-        ).join(
-            SpinsData, SpinsData.brand_id == SpinsBrand.id
-        ).filter(
-            SpinsData.item_id == item.id
-        ).group_by(
-            SpinsBrand.id,
-            SpinsBrand.name
-        ).order_by(
-            func.count(SpinsData.id).desc()
-        ).first()
-        
-        # Get the brand object if found
-        brand = None
-        if brand_counts:
-            brand = SpinsBrand.query.get(brand_counts.id)
-        
-        items_with_brands.append({
-            'item': item,
-            'brand': brand
-        })
+    items_with_brands = [{'item': item, 'brand': item.dominant_brand} for item in pagination.items]
     
     # Get all brands for filter dropdown
     all_brands = SpinsBrand.query.order_by(SpinsBrand.name).all()
@@ -977,25 +901,8 @@ def view_item_scraped_data(item_id):
         flash('Invalid scraped data format', 'error')
         return redirect(url_for('spins.items_list'))
     
-    # Get brand from most common brand in spins_data
-    brand = None
-    brand_counts = db.session.query(
-        SpinsBrand.id,
-        SpinsBrand.name,
-        func.count(SpinsData.id).label('count')
-    ).join(
-        SpinsData, SpinsData.brand_id == SpinsBrand.id
-    ).filter(
-        SpinsData.item_id == item.id
-    ).group_by(
-        SpinsBrand.id,
-        SpinsBrand.name
-    ).order_by(
-        func.count(SpinsData.id).desc()
-    ).first()
-    
-    if brand_counts:
-        brand = SpinsBrand.query.get(brand_counts.id)
+    # Most common brand in spins_data (precomputed)
+    brand = item.dominant_brand
     
     return render_template('spins/view_scraped_data.html', 
                          item=item, 
@@ -1267,6 +1174,137 @@ def delete_channel(channel_id):
 
 # ==================== SPINS Rankings ====================
 
+@shared_result('spins_item_ranks', tables=('spins_data', 'spins_items', 'spins_brands'))
+def _item_ranks(week, channel_id, metric):
+    """Items of a SPINS channel ranked by metric for one week (ISO date)"""
+    selected_week = datetime.strptime(week, '%Y-%m-%d').date()
+    
+    # Query to get aggregated data by item
+    query = db.session.query(
+        SpinsItem.id,
+        SpinsItem.upc,
+        SpinsItem.name,
+        SpinsItem.short_name,
+        SpinsItem.img_url,
+        SpinsItem.scrapped_name,
+        SpinsItem.scrapped_json,
+        SpinsBrand.id.label('brand_id'),
+        SpinsBrand.name.label('brand_name'),
+        func.sum(SpinsData.units).label('total_units'),
+        func.sum(SpinsData.revenues).label('total_revenues'),
+        func.avg(SpinsData.average_weekly_units_per_selling_item).label('avg_upspw'),
+        func.avg(SpinsData.average_weekly_revenues_per_selling_item).label('avg_pspw')
+    ).join(
+        SpinsData, SpinsData.item_id == SpinsItem.id
+    ).join(
+        SpinsBrand, SpinsData.brand_id == SpinsBrand.id
+    ).filter(
+        SpinsData.week == selected_week,
+        SpinsData.channel_id == channel_id
+    ).group_by(
+        SpinsItem.id,
+        SpinsItem.upc,
+        SpinsItem.name,
+        SpinsItem.short_name,
+        SpinsItem.img_url,
+        SpinsItem.scrapped_name,
+        SpinsItem.scrapped_json,
+        SpinsBrand.id,
+        SpinsBrand.name
+    )
+    
+    # Order by selected metric
+    if metric == 'units':
+        query = query.order_by(func.sum(SpinsData.units).desc())
+    elif metric == 'revenues':
+        query = query.order_by(func.sum(SpinsData.revenues).desc())
+    elif metric == 'upspw':
+        # Use nullslast() method for PostgreSQL compatibility
+        avg_upspw = func.avg(SpinsData.average_weekly_units_per_selling_item)
+        query = query.order_by(avg_upspw.desc().nullslast())
+    elif metric == 'pspw':
+        # Use nullslast() method for PostgreSQL compatibility
+        avg_pspw = func.avg(SpinsData.average_weekly_revenues_per_selling_item)
+        query = query.order_by(avg_pspw.desc().nullslast())
+    
+    results = query.all()
+    
+    # Build ranks list
+    ranks = []
+    for rank, result in enumerate(results, start=1):
+        ranks.append({
+            'rank': rank,
+            'item_id': result.id,
+            'upc': result.upc,
+            'name': result.name,
+            'short_name': result.short_name,
+            'img_url': result.img_url,
+            'scrapped_name': result.scrapped_name,
+            'scrapped_json': result.scrapped_json,
+            'brand_id': result.brand_id,
+            'brand_name': result.brand_name,
+            'units': float(result.total_units) if result.total_units else 0,
+            'revenues': float(result.total_revenues) if result.total_revenues else 0,
+            'upspw': float(result.avg_upspw) if result.avg_upspw is not None else None,
+            'pspw': float(result.avg_pspw) if result.avg_pspw is not None else None
+        })
+    
+    return ranks
+
+
+@shared_result('spins_brand_ranks', tables=('spins_data', 'spins_brands'))
+def _brand_ranks(week, channel_id, metric):
+    """Brands of a SPINS channel ranked by metric for one week (ISO date)"""
+    selected_week = datetime.strptime(week, '%Y-%m-%d').date()
+    
+    # Query to get aggregated data by brand
+    query = db.session.query(
+        SpinsBrand.id,
+        SpinsBrand.name,
+        SpinsBrand.short_name,
+        func.sum(SpinsData.units).label('total_units'),
+        func.sum(SpinsData.revenues).label('total_revenues')
+    ).join(
+        SpinsData, SpinsData.brand_id == SpinsBrand.id
+    ).filter(
+        SpinsData.week == selected_week,
+        SpinsData.channel_id == channel_id
+    ).group_by(
+        SpinsBrand.id,
+        SpinsBrand.name,
+        SpinsBrand.short_name
+    )
+    
+    # Order by selected metric
+    if metric == 'units':
+        query = query.order_by(func.sum(SpinsData.units).desc())
+    else:  # revenues
+        query = query.order_by(func.sum(SpinsData.revenues).desc())
+    
+    results = query.all()
+    
+    # Build ranks list
+    ranks = []
+    for rank, result in enumerate(results, start=1):
+        ranks.append({
+            'rank': rank,
+            'brand_id': result.id,
+            'name': result.name,
+            'short_name': result.short_name,
+            'units': float(result.total_units) if result.total_units else 0,
+            'revenues': float(result.total_revenues) if result.total_revenues else 0
+        })
+    
+    return ranks
+
+
+@shared_result('spins_weeks', tables=('spins_data',))
+def _available_weeks():
+    """Weeks with SPINS data, most recent first (ISO dates)"""
+    weeks = db.session.query(SpinsData.week).distinct().order_by(SpinsData.week.desc()).all()
+    return [w.week.isoformat() for w in weeks]
+
+
 @spins_bp.route('/items/ranks')
 @login_required
 def items_ranks():
@@ -1278,8 +1316,7 @@ def items_ranks():
     
     # Get all channels and available weeks for filters
     channels = SpinsChannel.query.order_by(SpinsChannel.name).all()
-    available_weeks = db.session.query(SpinsData.week).distinct().order_by(SpinsData.week.desc()).all()
-    available_weeks = [w.week for w in available_weeks]
+    available_weeks = [datetime.strptime(week, '%Y-%m-%d').date() for week in _available_weeks()]
     
     ranks = []
     selected_week = None
@@ -1289,75 +1326,7 @@ def items_ranks():
         try:
             selected_week = datetime.strptime(week_str, '%Y-%m-%d').date()
             selected_channel = SpinsChannel.query.get(channel_id)
-            
-            # Query to get aggregated data by item
-            query = db.session.query(
-                SpinsItem.id,
-                SpinsItem.upc,
-                SpinsItem.name,
-                SpinsItem.short_name,
-                SpinsItem.img_url,
-                SpinsItem.scrapped_name,
-                SpinsItem.scrapped_json,
-                SpinsBrand.id.label('brand_id'),
-                SpinsBrand.name.label('brand_name'),
-                func.sum(SpinsData.units).label('total_units'),
-                func.sum(SpinsData.revenues).label('total_revenues'),
-                func.avg(SpinsData.average_weekly_units_per_selling_item).label('avg_upspw'),
-                func.avg(SpinsData.average_weekly_revenues_per_selling_item).label('avg_pspw')
-            ).join(
-                SpinsData, SpinsData.item_id == SpinsItem.id
-            ).join(
-                SpinsBrand, SpinsData.brand_id == SpinsBrand.id
-            ).filter(
-                SpinsData.week == selected_week,
-                SpinsData.channel_id == channel_id
-            ).group_by(
-                SpinsItem.id,
-                SpinsItem.upc,
-                SpinsItem.name,
-                SpinsItem.short_name,
-                SpinsItem.img_url,
-                SpinsItem.scrapped_name,
-                SpinsItem.scrapped_json,
-                SpinsBrand.id,
-                SpinsBrand.name
-            )
-            
-            # Order by selected metric
-            if metric == 'units':
-                query = query.order_by(func.sum(SpinsData.units).desc())
-            elif metric == 'revenues':
-                query = query.order_by(func.sum(SpinsData.revenues).desc())
-            elif metric == 'upspw':
-                # Use nullslast() method for PostgreSQL compatibility
-                avg_upspw = func.avg(SpinsData.average_weekly_units_per_selling_item)
-                query = query.order_by(avg_upspw.desc().nullslast())
-            elif metric == 'pspw':
-                # Use nullslast() method for PostgreSQL compatibility
-                avg_pspw = func.avg(SpinsData.average_weekly_revenues_per_selling_item)
-                query = query.order_by(avg_pspw.desc().nullslast())
-            
-            results = query.all()
-            
-            # Build ranks list
-            for rank, result in enumerate(results, start=1):
-                ranks.append({
-                    'rank': rank,
-                    'item_id': result.id,
-                    'upc': result.upc,
-                    'name': result.name,
-                    'short_name': result.short_name,
-                    'img_url': result.img_url,
-                    'scrapped_name': result.scrapped_name,
-                    'scrapped_json': result.scrapped_json,
-                    'brand_id': result.brand_id,
-                    'brand_name': result.brand_name,
-                    'units': float(result.total_units) if result.total_units else 0,
-                    'revenues': float(result.total_revenues) if result.total_revenues else 0,
-                    'upspw': float(result.avg_upspw) if result.avg_upspw is not None else None,
-                    'pspw': float(result.avg_pspw) if result.avg_pspw is not None else None
-                })
+            ranks = _item_ranks(week=selected_week.isoformat(), channel_id=channel_id, metric=metric)
         except ValueError:
             flash('Invalid date format', 'error')
     
@@ -1381,8 +1350,7 @@ def brands_ranks():
     
     # Get all channels and available weeks for filters
     channels = SpinsChannel.query.order_by(SpinsChannel.name).all()
-    available_weeks = db.session.query(SpinsData.week).distinct().order_by(SpinsData.week.desc()).all()
-    available_weeks = [w.week for w in available_weeks]
+    available_weeks = [datetime.strptime(week, '%Y-%m-%d').date() for week in _available_weeks()]
     
     ranks = []
     selected_week = None
@@ -1392,43 +1360,7 @@ def brands_ranks():
         try:
             selected_week = datetime.strptime(week_str, '%Y-%m-%d').date()
             selected_channel = SpinsChannel.query.get(channel_id)
-            
-            # Query to get aggregated data by brand
-            query = db.session.query(
-                SpinsBrand.id,
-                SpinsBrand.name,
-                SpinsBrand.short_name,
-                func.sum(SpinsData.units).label('total_units'),
-                func.sum(SpinsData.revenues).label('total_revenues')
-            ).join(
-                SpinsData, SpinsData.brand_id == SpinsBrand.id
-            ).filter(
-                SpinsData.week == selected_week,
-                SpinsData.channel_id == channel_id
-            ).group_by(
-                SpinsBrand.id,
-                SpinsBrand.name,
-                SpinsBrand.short_name
-            )
-            
-            # Order by selected metric
-            if metric == 'units':
-                query = query.order_by(func.sum(SpinsData.units).desc())
-            else:  # revenues
-                query = query.order_by(func.sum(SpinsData.revenues).desc())
-            
-            results = query.all()
-            
-            # Build ranks list
-            for rank, result in enumerate(results, start=1):
-                ranks.append({
-                    'rank': rank,
-                    'brand_id': result.id,
-                    'name': result.name,
-                    'short_name': result.short_name,
-                    'units': float(result.total_units) if result.total_units else 0,
-                    'revenues': float(result.total_revenues) if result.total_revenues else 0
-                })
+            ranks = _brand_ranks(week=selected_week.isoformat(), channel_id=channel_id, metric=metric)
         except ValueError:
             flash('Invalid date format', 'error')
     
@@ -1464,6 +1396,7 @@ def brands_ranking_graph():
 
 @spins_bp.route('/api/brands-ranking-data')
 @login_required
+@etag_cached('spins_data', 'spins_brands')
 def api_brands_ranking_data():
     """API endpoint to get brand ranking data over time for the graph"""
     try:
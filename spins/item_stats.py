@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Per-item stats precomputed on spins_items from spins_data
+
+dominant_brand_id (brand with the most rows, lowest brand id on ties), first_seen_week
+and last_seen_week are refreshed for the items touched by an import, so listing items
+by brand is an indexed column filter instead of a GROUP BY per item.
+"""
+
+from sqlalchemy import text
+from models import db
+
+CHUNK_SIZE = 1000
+
+_REFRESH_SQL = text("""
+    WITH counts AS (
+        SELECT item_id, brand_id, COUNT(*) AS rows_count
+        FROM spins_data
+        WHERE item_id = ANY(:item_ids)
+        GROUP BY item_id, brand_id
+    ), dominant AS (
+        SELECT DISTINCT ON (item_id) item_id, brand_id
+        FROM counts
+        ORDER BY item_id, rows_count DESC, brand_id
+    ), seen AS (
+        SELECT item_id, MIN(week) AS first_week, MAX(week) AS last_week
+        FROM spins_data
+        WHERE item_id = ANY(:item_ids)
+        GROUP BY item_id
+    )
+    UPDATE spins_items
+    SET dominant_brand_id = dominant.brand_id,
+        first_seen_week = seen.first_week,
+        last_seen_week = seen.last_week
+    FROM dominant JOIN seen ON seen.item_id = dominant.item_id
+    WHERE spins_items.id = dominant.item_id
+""")
+
+
+def refresh_item_stats(item_ids):
+    """Recompute dominant brand and first/last seen week of the given items (caller commits)
+
+    Returns:
+        number of items updated
+    """
+    item_ids = sorted(set(item_ids))
+    updated = 0
+    for start in range(0, len(item_ids), CHUNK_SIZE):
+        chunk = item_ids[start:start + CHUNK_SIZE]
+        updated += db.session.execute(_REFRESH_SQL, {'item_ids': chunk}).rowcount
+    return updated
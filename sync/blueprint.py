@@ -12,6 +12,7 @@ import os
 import configparser
 from models import db, Asin, Item
 from auth.blueprint import login_required, admin_required
+from core.snowflake_replay import replay_connection, wrap_connection
 
 sync_bp = Blueprint('sync', __name__, template_folder='templates')
 
@@ -36,6 +37,11 @@ def get_snowflake_config():
 
 def get_snowflake_connection():
     """Create Snowflake connection using private key authentication"""
+    # Recorded results instead of Snowflake when SNOWFLAKE_MODE=replay (see core/snowflake_replay.py)
+    replay = replay_connection()
+    if replay is not None:
+        return replay
+    
     config = get_snowflake_config()
     
     # Read private key - handle both PEM and PKCS8 formats
@@ -83,7 +89,7 @@ def get_snowflake_connection():
     # Create connection
     conn = snowflake.connector.connect(**conn_params)
     
-    return conn
+    return wrap_connection(conn)
 
 def _load_asin_status_query():
     """Load the ASIN status query from asin_status.sql"""
@@ -98,23 +104,20 @@ def _load_asin_status_query():
 @admin_required
 def index():
     """Sync status & ASINs page"""
-    return render_template('sync/index.html')
+    from scheduler.jobs import get_recent_runs
+    job_runs = get_recent_runs(limit=20)
+    return render_template('sync/index.html', job_runs=job_runs)
 
-@sync_bp.route('/update', methods=['POST'])
-@login_required
-@admin_required
-def update():
-    """Execute the sync process"""
+def _extract_asin_status_rows():
+    """Fetch the latest item status & ASIN rows from Snowflake
+    
+    Returns:
+        list of dicts keyed by Snowflake column name
+    """
+    conn = get_snowflake_connection()
+    cursor = conn.cursor()
+    
     try:
-        print("\n" + "="*60)
-        print("Starting Item Status & ASIN Sync Process")
-        print("="*60)
-        
-        # Step 1: Get latest items information from Snowflake
-        print("\n📊 Step 1: Fetching data from Snowflake...")
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
         query = _load_asin_status_query()
         cursor.execute(query)
         
@@ -124,111 +127,153 @@ def update():
         for row in cursor.fetchall():
             row_dict = dict(zip(columns, row))
             snowflake_data.append(row_dict)
-        
+    finally:
         cursor.close()
         conn.close()
+    
+    return snowflake_data
+
+def _execute_sync(snowflake_data=None):
+    """Fetch item status & ASINs from Snowflake and update ASINs/items
+    
+    Args:
+        snowflake_data: Already extracted rows (see _extract_asin_status_rows), skips the Snowflake query
+    
+    Returns:
+        dict with asins_updated, items_updated, items_linked, asins_created and errors
+    """
+    print("\n" + "="*60)
+    print("Starting Item Status & ASIN Sync Process")
+    print("="*60)
+    
+    # Step 1: Get latest items information from Snowflake
+    if snowflake_data is None:
+        print("\n📊 Step 1: Fetching data from Snowflake...")
+        snowflake_data = _extract_asin_status_rows()
+    
+    print(f"✓ Fetched {len(snowflake_data)} records from Snowflake")
+    
+    # Create a mapping of ASIN -> status for quick lookup
+    asin_status_map = {}
+    # Create a mapping of NETSUITE_ITEM_NUMBER -> (ASIN, status) for items
+    item_asin_map = {}
+    
+    for row in snowflake_data:
+        asin = row.get('ASIN')
+        status = row.get('ALIAS_PRODUCT_STATUS')
+        netsuite_item_number = row.get('NETSUITE_ITEM_NUMBER')
         
-        print(f"✓ Fetched {len(snowflake_data)} records from Snowflake")
-        
-        # Create a mapping of ASIN -> status for quick lookup
-        asin_status_map = {}
-        # Create a mapping of NETSUITE_ITEM_NUMBER -> (ASIN, status) for items
-        item_asin_map = {}
-        
-        for row in snowflake_data:
-            asin = row.get('ASIN')
-            status = row.get('ALIAS_PRODUCT_STATUS')
-            netsuite_item_number = row.get('NETSUITE_ITEM_NUMBER')
-            
-            if asin and status:
-                asin_status_map[asin] = status
-            
-            if netsuite_item_number and asin and status:
-                item_asin_map[netsuite_item_number] = {
-                    'asin': asin,
-                    'status': status
-                }
-        
-        print(f"✓ Created mappings: {len(asin_status_map)} ASINs, {len(item_asin_map)} items")
-        
-        # Step 2: Get all ASINs from database and update their status
-        print("\n📦 Step 2: Updating ASIN status...")
-        all_asins = Asin.query.all()
-        asins_updated = 0
-        
-        for asin_obj in all_asins:
-            if asin_obj.asin in asin_status_map:
-                new_status = asin_status_map[asin_obj.asin]
-                if asin_obj.status != new_status:
-                    asin_obj.status = new_status
-                    asins_updated += 1
+        if asin and status:
+            asin_status_map[asin] = status
         
-        db.session.commit()
-        print(f"✓ Updated {asins_updated} ASINs")
+        if netsuite_item_number and asin and status:
+            item_asin_map[netsuite_item_number] = {
+                'asin': asin,
+                'status': status
+            }
+    
+    print(f"✓ Created mappings: {len(asin_status_map)} ASINs, {len(item_asin_map)} items")
+    
+    # Step 2: Get all ASINs from database and update their status
+    print("\n📦 Step 2: Updating ASIN status...")
+    all_asins = Asin.query.all()
+    asins_updated = 0
+    
+    for asin_obj in all_asins:
+        if asin_obj.asin in asin_status_map:
+            new_status = asin_status_map[asin_obj.asin]
+            if asin_obj.status != new_status:
+                asin_obj.status = new_status
+                asins_updated += 1
+    
+    db.session.commit()
+    print(f"✓ Updated {asins_updated} ASINs")
+    
+    # Step 3: Get all items from database
+    print("\n📋 Step 3: Processing items...")
+    all_items = Item.query.all()
+    items_updated = 0
+    items_linked = 0
+    asins_created = 0
+    
+    for item in all_items:
+        item_updated = False
         
-        # Step 3: Get all items from database
-        print("\n📋 Step 3: Processing items...")
-        all_items = Item.query.all()
-        items_updated = 0
-        items_linked = 0
-        asins_created = 0
+        # Step 3.1: If item doesn't have asin_id, try to get ASIN from Snowflake data
+        if not item.asin_id and item.essor_code:
+            if item.essor_code in item_asin_map:
+                asin_data = item_asin_map[item.essor_code]
+                asin_value = asin_data['asin']
+                
+                # Look up ASIN in database
+                asin_obj = Asin.query.filter_by(asin=asin_value).first()
+                
+                # If ASIN doesn't exist, create it
+                if not asin_obj:
+                    asin_obj = Asin(asin=asin_value, status=asin_data['status'])
+                    db.session.add(asin_obj)
+                    db.session.flush()  # Get the ID
+                    asins_created += 1
+                    print(f"  ➕ Created new ASIN: {asin_value}")
+                
+                # Link item to ASIN
+                item.asin_id = asin_obj.id
+                item_updated = True
+                items_linked += 1
+                print(f"  🔗 Linked item {item.essor_code} to ASIN {asin_value}")
         
-        for item in all_items:
-            item_updated = False
-            
-            # Step 3.1: If item doesn't have asin_id, try to get ASIN from Snowflake data
-            if not item.asin_id and item.essor_code:
-                if item.essor_code in item_asin_map:
-                    asin_data = item_asin_map[item.essor_code]
-                    asin_value = asin_data['asin']
-                    
-                    # Look up ASIN in database
-                    asin_obj = Asin.query.filter_by(asin=asin_value).first()
-                    
-                    # If ASIN doesn't exist, create it
-                    if not asin_obj:
-                        asin_obj = Asin(asin=asin_value, status=asin_data['status'])
-                        db.session.add(asin_obj)
-                        db.session.flush()  # Get the ID
-                        asins_created += 1
-                        print(f"  ➕ Created new ASIN: {asin_value}")
-                    
-                    # Link item to ASIN
-                    item.asin_id = asin_obj.id
-                    item_updated = True
-                    items_linked += 1
-                    print(f"  🔗 Linked item {item.essor_code} to ASIN {asin_value}")
-            
-            # Step 3.2: Update item status using status from Step 1
-            # Prioritize status from item_asin_map (more specific, tied to essor_code)
-            if item.essor_code and item.essor_code in item_asin_map:
-                new_status = item_asin_map[item.essor_code]['status']
+        # Step 3.2: Update item status using status from Step 1
+        # Prioritize status from item_asin_map (more specific, tied to essor_code)
+        if item.essor_code and item.essor_code in item_asin_map:
+            new_status = item_asin_map[item.essor_code]['status']
+            if item.status != new_status:
+                item.status = new_status
+                item_updated = True
+        # Fallback: update status from ASIN if item has an ASIN linked but no essor_code match
+        elif item.asin_id and item.asin_obj:
+            asin_value = item.asin_obj.asin
+            if asin_value in asin_status_map:
+                new_status = asin_status_map[asin_value]
                 if item.status != new_status:
                     item.status = new_status
                     item_updated = True
-            # Fallback: update status from ASIN if item has an ASIN linked but no essor_code match
-            elif item.asin_id and item.asin_obj:
-                asin_value = item.asin_obj.asin
-                if asin_value in asin_status_map:
-                    new_status = asin_status_map[asin_value]
-                    if item.status != new_status:
-                        item.status = new_status
-                        item_updated = True
-            
-            if item_updated:
-                items_updated += 1
         
-        db.session.commit()
-        
-        print(f"✓ Updated {items_updated} items")
-        print(f"✓ Linked {items_linked} items to ASINs")
-        print(f"✓ Created {asins_created} new ASINs")
+        if item_updated:
+            items_updated += 1
+    
+    db.session.commit()
+    
+    print(f"✓ Updated {items_updated} items")
+    print(f"✓ Linked {items_linked} items to ASINs")
+    print(f"✓ Created {asins_created} new ASINs")
+    
+    print("\n" + "="*60)
+    print("Sync completed successfully!")
+    print("="*60)
+    
+    return {
+        'asins_updated': asins_updated,
+        'items_updated': items_updated,
+        'items_linked': items_linked,
+        'asins_created': asins_created,
+        'errors': []
+    }
+
+@sync_bp.route('/update', methods=['POST'])
+@login_required
+@admin_required
+def update():
+    """Execute the sync process"""
+    from scheduler.jobs import run_job
+    try:
+        run = run_job('asin_sync', trigger='manual')
         
-        print("\n" + "="*60)
-        print("Sync completed successfully!")
-        print("="*60)
+        if run['status'] == 'already_running':
+            flash('A sync is already running, please try again in a few minutes.', 'info')
+            return redirect(url_for('sync.index'))
         
-        flash(f'Sync completed successfully! Updated {asins_updated} ASINs, {items_updated} items, linked {items_linked} items, and created {asins_created} new ASINs.', 'success')
+        results = run['results']
+        flash(f"Sync completed successfully! Updated {results['asins_updated']} ASINs, {results['items_updated']} items, linked {results['items_linked']} items, and created {results['asins_created']} new ASINs.", 'success')
         
     except Exception as e:
         db.session.rollback()
@@ -239,4 +284,3 @@ def update():
         flash(error_msg, 'error')
     
     return redirect(url_for('sync.index'))
-
@@ -5,10 +5,17 @@ Targets blueprint for managing revenue targets
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
 from datetime import datetime, date
+from decimal import Decimal
+import csv
+import io
 from models import db, TargetData, Brand, Channel
 from auth.blueprint import login_required
 from sqlalchemy import extract, and_
-from calendar import month_name
+from calendar import month_name, month_abbr
+from targets.bulk import save_targets, year_scope, parse_revenue
+from targets.pacing import compute_pacing, SOURCES, GROUPINGS
+from core.refdata import get_brands, get_channels
+from core.periods import in_period
 
 targets_bp = Blueprint('targets', __name__, template_folder='templates')
 
@@ -21,6 +28,79 @@ def brands_list():
     return render_template('targets/brands_list.html', brands=brands)
 
 
+# ==================== Pacing ====================
+
+def _pacing_args(args):
+    """(year, as_of, source, group_by) of a pacing request, raises ValueError on bad values"""
+    year = args.get('year', type=int) or datetime.now().year
+    as_of = args.get('as_of')
+    as_of = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else None
+    source = args.get('source', 'netsuite_faire')
+    if source not in SOURCES:
+        raise ValueError(f'source must be one of: {", ".join(SOURCES)}')
+    group_by = args.get('group_by', 'brand')
+    if group_by not in GROUPINGS:
+        raise ValueError(f'group_by must be one of: {", ".join(GROUPINGS)}')
+    return year, as_of, source, group_by
+
+
+def _name_pacing_groups(pacing):
+    """Add brand/channel names to the pacing groups (reference data cache, no query)"""
+    brand_names = {brand.id: brand.name for brand in get_brands()}
+    channel_names = {channel.id: channel.name for channel in get_channels()}
+    for group in pacing['groups']:
+        if 'brand_id' in group:
+            group['brand'] = brand_names.get(group['brand_id'], 'Unknown')
+        if 'channel_id' in group:
+            group['channel'] = channel_names.get(group['channel_id'], 'Unknown')
+    return pacing
+
+
+@targets_bp.route('/pacing')
+@login_required
+def pacing():
+    """Target pacing of all brands for a year"""
+    try:
+        year, as_of, source, group_by = _pacing_args(request.args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('targets.pacing'))
+    
+    data = _name_pacing_groups(compute_pacing(year, as_of=as_of, source=source, group_by='brand'))
+    current_year = datetime.now().year
+    return render_template('targets/pacing.html',
+                         pacing=data,
+                         year=year,
+                         source=source,
+                         sources=list(SOURCES),
+                         available_years=list(range(current_year + 1, current_year - 4, -1)))
+
+
+@targets_bp.route('/api/pacing')
+@login_required
+def api_pacing():
+    """Attainment, run-rate projection and gap to target for any year
+    
+    Query args: year (default current), as_of (YYYY-MM-DD, default today), source (netsuite_faire,
+    netsuite, faire, sellthrough), group_by (brand, channel, brand_channel), brand_id, channel_id.
+    """
+    try:
+        year, as_of, source, group_by = _pacing_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        data = compute_pacing(
+            year, as_of=as_of, source=source, group_by=group_by,
+            brand_id=request.args.get('brand_id', type=int),
+            channel_id=request.args.get('channel_id', type=int)
+        )
+        data['labels'] = list(month_abbr[1:])
+        return jsonify(_name_pacing_groups(data))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @targets_bp.route('/brands/<int:brand_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_brand_targets(brand_id):
@@ -42,57 +122,26 @@ def edit_brand_targets(brand_id):
             flash('Year is required', 'error')
             return redirect(url_for('targets.edit_brand_targets', brand_id=brand_id, year=year))
         
-        # Get all months data from form
-        # Form fields are: revenue_<channel_id>_<month>
-        saved_count = 0
-        for channel in channels:
-            for month in range(1, 13):
-                field_name = f'revenue_{channel.id}_{month}'
-                revenue_value = request.form.get(field_name, '').strip()
-                
-                if revenue_value:
-                    try:
-                        revenue = float(revenue_value)
-                        if revenue < 0:
-                            continue
-                    except ValueError:
-                        continue
-                else:
-                    revenue = 0
-                
-                # Create date for first day of the month
-                target_date = date(form_year, month, 1)
-                
-                # Check if target already exists
-                target = TargetData.query.filter_by(
-                    date=target_date,
-                    brand_id=brand_id,
-                    channel_id=channel.id
-                ).first()
-                
-                if target:
-                    # Update existing target
-                    if revenue > 0:
-                        target.revenue = revenue
-                        target.updated_at = datetime.utcnow()
-                        saved_count += 1
-                    else:
-                        # Delete target if revenue is 0
-                        db.session.delete(target)
-                else:
-                    # Create new target only if revenue > 0
-                    if revenue > 0:
-                        target = TargetData(
-                            date=target_date,
-                            brand_id=brand_id,
-                            channel_id=channel.id,
-                            revenue=revenue
-                        )
-                        db.session.add(target)
-                        saved_count += 1
+        # Form fields are: revenue_<channel_id>_<month>, empty means 0 (cleared),
+        # invalid, negative or out of range values leave the cell as it is
+        values = {}
+        scope = year_scope(form_year, brand_id, [channel.id for channel in channels])
+        for target_date, _, channel_id in list(scope):
+            revenue_value = request.form.get(f'revenue_{channel_id}_{target_date.month}', '').strip()
+            if not revenue_value:
+                continue
+            revenue = parse_revenue(revenue_value)
+            if revenue is None:
+                scope.discard((target_date, brand_id, channel_id))
+                continue
+            values[(target_date, brand_id, channel_id)] = revenue
         
+        # One load of the year, in-memory diff, one bulk upsert + one bulk delete
+        results = save_targets(values, scope)
         db.session.commit()
-        flash(f'Successfully saved {saved_count} target(s) for {brand.name} in {form_year}', 'success')
+        saved_count = results['created'] + results['updated'] + results['unchanged']
+        flash(f"Successfully saved {saved_count} target(s) for {brand.name} in {form_year} "
+              f"({results['created']} created, {results['updated']} updated, {results['deleted']} removed)", 'success')
         return redirect(url_for('targets.edit_brand_targets', brand_id=brand_id, year=form_year))
     
     # GET request - show edit form
@@ -103,7 +152,7 @@ def edit_brand_targets(brand_id):
     targets = TargetData.query.filter(
         and_(
             TargetData.brand_id == brand_id,
-            extract('year', TargetData.date) == year
+            in_period(TargetData.date, year)
         )
     ).all()
     
@@ -150,7 +199,7 @@ def view_brand_targets(brand_id):
         and_(
             TargetData.channel_id == Channel.id,
             TargetData.brand_id == brand_id,
-            extract('year', TargetData.date) == year
+            in_period(TargetData.date, year)
         )
     ).distinct().order_by(Channel.name).all()
     
@@ -158,7 +207,7 @@ def view_brand_targets(brand_id):
     targets = TargetData.query.filter(
         and_(
             TargetData.brand_id == brand_id,
-            extract('year', TargetData.date) == year
+            in_period(TargetData.date, year)
         )
     ).all()
     
@@ -187,3 +236,110 @@ def view_brand_targets(brand_id):
                          available_years=available_years,
                          month_names=list(month_name[1:]))  # Skip index 0
 
+
+
+# ==================== CSV import ====================
+
+def _month_columns(fieldnames):
+    """{month: column} for month columns named 1-12, Jan-Dec or January-December (any case)"""
+    names = {}
+    for month in range(1, 13):
+        for name in (str(month), f'{month:02d}', month_abbr[month], month_name[month]):
+            names[name.lower()] = month
+    return {names[field.strip().lower()]: field for field in fieldnames if field and field.strip().lower() in names}
+
+
+@targets_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_targets():
+    """Import full-year target plans for any number of brands from a CSV file
+    
+    One row per brand, channel and year with one column per month: each row replaces the
+    12 months of that brand/channel/year (empty months are cleared), other targets are kept.
+    """
+    if request.method == 'GET':
+        return render_template('targets/import.html')
+    
+    dry_run = request.form.get('dry_run') == 'true'
+    
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        flash('No file selected', 'error')
+        return render_template('targets/import.html')
+    if not file.filename.endswith('.csv'):
+        flash('Please upload a CSV file', 'error')
+        return render_template('targets/import.html')
+    
+    stream = io.StringIO(file.stream.read().decode('utf-8-sig'), newline=None)
+    csv_reader = csv.DictReader(stream)
+    fieldnames = csv_reader.fieldnames or []
+    columns = {field.strip().lower(): field for field in fieldnames if field}
+    month_columns = _month_columns(fieldnames)
+    missing = [name for name in ('brand', 'channel', 'year') if name not in columns]
+    if missing or len(month_columns) != 12:
+        flash('CSV must have brand, channel and year columns and one column per month (Jan to Dec)', 'error')
+        return render_template('targets/import.html')
+    
+    print("\n" + "="*60)
+    print(f"Starting Targets CSV Import - {'DRY-RUN' if dry_run else 'LIVE IMPORT'}")
+    print("="*60)
+    
+    # Brands match on name or code, channels on name
+    brands = {}
+    for brand in Brand.query.all():
+        brands[brand.name.strip().lower()] = brand.id
+        if brand.code:
+            brands.setdefault(brand.code.strip().lower(), brand.id)
+    channels = {channel.name.strip().lower(): channel.id for channel in Channel.query.all()}
+    
+    results = {'processed': 0, 'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'skipped': 0, 'errors': []}
+    values, scope = {}, set()
+    for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 (header is row 1)
+        try:
+            brand_name = (row.get(columns['brand']) or '').strip()
+            channel_name = (row.get(columns['channel']) or '').strip()
+            brand_id = brands.get(brand_name.lower())
+            if not brand_id:
+                raise ValueError(f"Unknown brand '{brand_name}'")
+            channel_id = channels.get(channel_name.lower())
+            if not channel_id:
+                raise ValueError(f"Unknown channel '{channel_name}'")
+            try:
+                year = int((row.get(columns['year']) or '').strip())
+            except ValueError:
+                raise ValueError(f"Invalid year '{row.get(columns['year'])}'")
+            
+            row_values = {}
+            for month, column in month_columns.items():
+                raw = (row.get(column) or '').strip().replace(',', '').replace('$', '')
+                revenue = parse_revenue(raw) if raw else Decimal(0)
+                if revenue is None:
+                    raise ValueError(f"Invalid {month_abbr[month]} value '{row.get(column)}'")
+                row_values[(date(year, month, 1), brand_id, channel_id)] = revenue
+            
+            values.update(row_values)
+            scope.update(row_values)
+            results['processed'] += 1
+        except ValueError as e:
+            error_msg = f"Row {row_num}: {str(e)}"
+            print(f"  ✗ ERROR: {error_msg}")
+            results['errors'].append(error_msg)
+            results['skipped'] += 1
+    
+    try:
+        results.update(save_targets(values, scope))
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"  ✗ ERROR: {str(e)}")
+        flash(f'Error importing targets: {str(e)}', 'error')
+        return render_template('targets/import.html')
+    
+    print(f"✓ {results['processed']} row(s): {results['created']} created, {results['updated']} updated, "
+          f"{results['deleted']} removed, {results['skipped']} skipped")
+    if not dry_run:
+        flash(f"Imported {results['processed']} target row(s)", 'success')
+    return render_template('targets/import.html', results=results, dry_run=dry_run)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Bulk saves of monthly targets (targets_data)
+
+A save covers a set of (date, brand_id, channel_id) cells: the current values of
+those cells are loaded in one query and diffed in memory, then changed cells are
+written with one INSERT ... ON CONFLICT (date, brand_id, channel_id) DO UPDATE and
+cells cleared to 0 with one DELETE (per chunk).
+"""
+
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from models import db, TargetData
+from targets.pacing import touch_months
+
+CHUNK_SIZE = 1000
+CENT = Decimal('0.01')
+MAX_REVENUE = Decimal(10) ** 10  # targets_data.revenue is Numeric(12, 2)
+
+
+def parse_revenue(value):
+    """Target revenue of a form/CSV value rounded to the cent, None if invalid, negative or too large"""
+    try:
+        revenue = Decimal(value).quantize(CENT)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    if not revenue.is_finite() or revenue < 0 or revenue >= MAX_REVENUE:
+        return None
+    return revenue
+
+
+def save_targets(values, scope):
+    """Write the target cells of scope (caller commits)
+
+    Args:
+        values: {(date, brand_id, channel_id): revenue} (cells with revenue <= 0 are cleared)
+        scope: iterable of (date, brand_id, channel_id) covered by the save; cells of scope
+               missing from values are cleared too, cells outside scope are never touched
+
+    Returns:
+        dict with created, updated, deleted and unchanged counts
+    """
+    scope = set(scope) | set(values)
+    results = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    if not scope:
+        return results
+
+    # One load of the current values of every brand/month in scope
+    table = TargetData.__table__
+    existing = {}
+    brand_ids = sorted({brand_id for _, brand_id, _ in scope})
+    dates = sorted({target_date for target_date, _, _ in scope})
+    rows = db.session.execute(
+        select(table.c.date, table.c.brand_id, table.c.channel_id, table.c.revenue).where(
+            table.c.brand_id.in_(brand_ids),
+            table.c.date >= dates[0],
+            table.c.date <= dates[-1]
+        )
+    )
+    for target_date, brand_id, channel_id, revenue in rows:
+        existing[(target_date, brand_id, channel_id)] = revenue
+
+    upserts, deletes = [], []
+    now = datetime.utcnow()
+    for key in scope:
+        revenue = Decimal(str(values.get(key) or 0)).quantize(CENT)
+        current = existing.get(key)
+        if revenue > 0:
+            if current is None:
+                results['created'] += 1
+            elif current != revenue:
+                results['updated'] += 1
+            else:
+                results['unchanged'] += 1
+                continue
+            target_date, brand_id, channel_id = key
+            upserts.append({'date': target_date, 'brand_id': brand_id, 'channel_id': channel_id,
+                            'revenue': revenue, 'created_at': now, 'updated_at': now})
+        elif current is not None:
+            deletes.append(key)
+            results['deleted'] += 1
+
+    for start in range(0, len(upserts), CHUNK_SIZE):
+        stmt = insert(table).values(upserts[start:start + CHUNK_SIZE])
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.date, table.c.brand_id, table.c.channel_id],
+            set_={'revenue': stmt.excluded.revenue, 'updated_at': stmt.excluded.updated_at}
+        ))
+
+    for start in range(0, len(deletes), CHUNK_SIZE):
+        db.session.execute(table.delete().where(
+            tuple_(table.c.date, table.c.brand_id, table.c.channel_id).in_(deletes[start:start + CHUNK_SIZE])
+        ))
+
+    # Core statements bypass the flush, register the pacing months they change
+    touch_months([row['date'] for row in upserts] + [key[0] for key in deletes])
+
+    return results
+
+
+def year_scope(year, brand_id, channel_ids):
+    """Every month of year for a brand and the given channels"""
+    return {(date(year, month, 1), brand_id, channel_id) for channel_id in channel_ids for month in range(1, 13)}
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Target vs actual pacing (targets_pacing_monthly)
+
+Monthly targets are materialized next to Netsuite, Faire and sellthrough revenues for
+each (month, brand, channel). Months touched by ORM writes to any of those tables are
+collected on flush and rebuilt right after the commit; bulk writes register their
+months with touch_months(). The 'target_pacing' job rebuilds everything as a safety
+net for writes made outside the app.
+
+Imports committing in batches defer the refresh (defer_refresh / refresh_deferred): their
+months are collected over the whole import and refreshed once at the end, or by the
+pipeline's 'targets_pacing' rollup while it holds them (hold_deferred).
+"""
+
+import calendar
+import threading
+from contextlib import contextmanager
+from datetime import date
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.orm import Session
+from models import db, TargetPacing, TargetData, NetsuiteData, FaireData, SellthroughData
+
+LOCK_KEY = 'offline:rollup:targets_pacing_monthly'
+
+# Faire orders are not tagged with a channel, they all belong to the Faire channel
+FAIRE_CHANNEL_ID = 11
+
+# Revenue compared to the targets: company revenue is Netsuite plus Faire orders
+SOURCES = {
+    'netsuite_faire': lambda: TargetPacing.netsuite_revenue + TargetPacing.faire_revenue,
+    'netsuite': lambda: TargetPacing.netsuite_revenue,
+    'faire': lambda: TargetPacing.faire_revenue,
+    'sellthrough': lambda: TargetPacing.sellthrough_revenue,
+}
+GROUPINGS = ('brand', 'channel', 'brand_channel')
+
+_MONTH = "date_trunc('month', date)::date"
+
+
+def _insert_sql(where):
+    """INSERT ... SELECT of the pacing rows, sources filtered by where"""
+    return text(f"""
+        INSERT INTO targets_pacing_monthly (month, brand_id, channel_id, target_revenue, netsuite_revenue,
+                                            faire_revenue, sellthrough_revenue, updated_at)
+        SELECT month, brand_id, channel_id, SUM(target), SUM(netsuite), SUM(faire), SUM(sellthrough), now()
+        FROM (
+            SELECT {_MONTH} AS month, brand_id, channel_id, SUM(revenue) AS target, 0 AS netsuite, 0 AS faire, 0 AS sellthrough
+            FROM targets_data WHERE {where} GROUP BY 1, 2, 3
+            UNION ALL
+            SELECT {_MONTH}, brand_id, channel_id, 0, SUM(revenues), 0, 0
+            FROM netsuite_data WHERE channel_id IS NOT NULL AND {where} GROUP BY 1, 2, 3
+            UNION ALL
+            SELECT {_MONTH}, brand_id, {FAIRE_CHANNEL_ID}, 0, 0, SUM(revenues), 0
+            FROM faire_data WHERE {where} GROUP BY 1, 2
+            UNION ALL
+            SELECT {_MONTH}, brand_id, channel_id, 0, 0, 0, SUM(revenues)
+            FROM sellthrough_data WHERE brand_id IS NOT NULL AND {where} GROUP BY 1, 2, 3
+        ) sources
+        GROUP BY month, brand_id, channel_id
+    """)
+
+
+_DELETE_MONTHS_SQL = text("DELETE FROM targets_pacing_monthly WHERE month = ANY(:months)")
+_INSERT_MONTHS_SQL = _insert_sql(f"date >= :start AND date < :end AND {_MONTH} = ANY(:months)")
+_REBUILD_SQL = _insert_sql('TRUE')
+
+
+def month_start(day):
+    """First day of the month of day"""
+    return day.replace(day=1)
+
+
+def refresh_months(months, conn=None):
+    """Rebuild the pacing rows of the given months (first days), returns the number of rows written"""
+    months = sorted(set(months))
+    if not months:
+        return 0
+    last = months[-1]
+    end = date(last.year + last.month // 12, last.month % 12 + 1, 1)
+    params = {'months': months, 'start': months[0], 'end': end}
+    if conn is None:
+        with db.engine.begin() as own_conn:
+            return refresh_months(months, own_conn)
+    conn.execute(text('SELECT pg_advisory_xact_lock(hashtext(:key))'), {'key': LOCK_KEY})
+    conn.execute(_DELETE_MONTHS_SQL, params)
+    return conn.execute(_INSERT_MONTHS_SQL, params).rowcount
+
+
+def rebuild_all():
+    """Rebuild the whole pacing table"""
+    with db.engine.begin() as conn:
+        conn.execute(text('SELECT pg_advisory_xact_lock(hashtext(:key))'), {'key': LOCK_KEY})
+        conn.execute(text('DELETE FROM targets_pacing_monthly'))
+        rows = conn.execute(_REBUILD_SQL).rowcount
+    print(f"✓ Rebuilt targets_pacing_monthly ({rows} rows)")
+    return {'rows': rows}
+
+
+def touch_months(dates, session=None):
+    """Mark the months of dates for refresh when the current transaction commits"""
+    session = session or db.session()
+    session.info.setdefault('pacing_months', set()).update(month_start(day) for day in dates if day)
+
+
+# ==================== Pacing ====================
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def compute_pacing(year, as_of=None, source='netsuite_faire', group_by='brand', brand_id=None, channel_id=None):
+    """Attainment, run-rate projection and gap to target of a year, per brand, channel or both
+
+    Args:
+        year: target year
+        as_of: pacing date (default today); months before it are complete, its month is prorated
+        source: key of SOURCES, the revenue compared to the targets
+        group_by: 'brand', 'channel' or 'brand_channel'
+        brand_id, channel_id: optional filters
+
+    Returns:
+        dict with the elapsed share of the year, one entry per group and the totals
+    """
+    as_of = as_of or date.today()
+    year_start, year_end = date(year, 1, 1), date(year, 12, 31)
+    year_days = (year_end - year_start).days + 1
+    elapsed_days = min(max((as_of - year_start).days + 1, 0), year_days)
+
+    # Share of each month's target due by as_of
+    month_shares = []
+    for month in range(1, 13):
+        days_in_month = calendar.monthrange(year, month)[1]
+        if (year, month) < (as_of.year, as_of.month):
+            month_shares.append(1.0)
+        elif (year, month) == (as_of.year, as_of.month):
+            month_shares.append(as_of.day / days_in_month)
+        else:
+            month_shares.append(0.0)
+
+    keys = {
+        'brand': [TargetPacing.brand_id],
+        'channel': [TargetPacing.channel_id],
+        'brand_channel': [TargetPacing.brand_id, TargetPacing.channel_id],
+    }[group_by]
+    query = db.session.query(
+        *keys,
+        TargetPacing.month,
+        func.sum(TargetPacing.target_revenue).label('target'),
+        func.sum(SOURCES[source]()).label('actual')
+    ).filter(TargetPacing.month >= year_start, TargetPacing.month <= year_end)
+    if brand_id:
+        query = query.filter(TargetPacing.brand_id == brand_id)
+    if channel_id:
+        query = query.filter(TargetPacing.channel_id == channel_id)
+    rows = query.group_by(*keys, TargetPacing.month).all()
+
+    groups = {}
+    for row in rows:
+        key = tuple(getattr(row, column.key) for column in keys)
+        group = groups.setdefault(key, {'target': [0.0] * 12, 'actual': [0.0] * 12})
+        group['target'][row.month.month - 1] = float(row.target or 0)
+        group['actual'][row.month.month - 1] = float(row.actual or 0)
+
+    def summarize(target, actual):
+        target_year = sum(target)
+        target_to_date = sum(value * share for value, share in zip(target, month_shares))
+        actual_to_date = sum(actual)
+        projection = actual_to_date / elapsed_days * year_days if elapsed_days else None
+        return {
+            'target_year': round(target_year, 2),
+            'target_to_date': round(target_to_date, 2),
+            'actual_to_date': round(actual_to_date, 2),
+            'attainment': _ratio(actual_to_date, target_to_date),
+            'projection': round(projection, 2) if projection is not None else None,
+            'projected_attainment': _ratio(projection, target_year) if projection is not None else None,
+            'gap_to_target': round(target_year - projection, 2) if projection is not None else None,
+            'remaining_to_target': round(max(target_year - actual_to_date, 0), 2),
+            'months': {'target': [round(value, 2) for value in target], 'actual': [round(value, 2) for value in actual]},
+        }
+
+    results = []
+    for key, group in groups.items():
+        entry = dict(zip([column.key for column in keys], key))
+        entry.update(summarize(group['target'], group['actual']))
+        results.append(entry)
+    results.sort(key=lambda entry: -entry['target_year'])
+
+    totals = summarize(
+        [sum(group['target'][index] for group in groups.values()) for index in range(12)],
+        [sum(group['actual'][index] for group in groups.values()) for index in range(12)]
+    )
+    return {
+        'year': year,
+        'as_of': as_of.isoformat(),
+        'elapsed': round(elapsed_days / year_days, 4),
+        'source': source,
+        'group_by': group_by,
+        'groups': results,
+        'totals': totals,
+    }
+
+
+# ==================== Deferred refreshes (imports) ====================
+
+_pending_months = set()
+_pending_lock = threading.Lock()
+_holds = 0
+
+
+def defer_refresh(session=None):
+    """Collect the months committed by session until refresh_deferred() instead of refreshing each commit"""
+    session = session or db.session()
+    session.info.setdefault('pacing_deferred', set())
+
+
+def refresh_deferred(session=None):
+    """End defer_refresh(): refresh the collected months once, unless the pipeline holds them"""
+    session = session or db.session()
+    months = session.info.pop('pacing_deferred', None)
+    if not months:
+        return
+    with _pending_lock:
+        _pending_months.update(months)
+        held = _holds > 0
+    if not held:
+        _refresh_pending_logged()
+
+
+def refresh_pending():
+    """Refresh the months collected by deferred imports, returns the number of rows written"""
+    with _pending_lock:
+        months = set(_pending_months)
+        _pending_months.clear()
+    if not months:
+        return 0
+    try:
+        rows = refresh_months(months)
+    except Exception:
+        with _pending_lock:
+            _pending_months.update(months)
+        raise
+    print(f"  ✓ Refreshed {len(months)} month(s) of targets_pacing_monthly ({rows} rows)")
+    return rows
+
+
+def _refresh_pending_logged():
+    try:
+        refresh_pending()
+    except Exception as e:
+        print(f"  ⚠ Could not refresh targets_pacing_monthly: {str(e)}")
+
+
+@contextmanager
+def hold_deferred():
+    """Keep the months of deferred imports pending until refresh_pending() (the pipeline's rollup stage)"""
+    global _holds
+    with _pending_lock:
+        _holds += 1
+    try:
+        yield
+    finally:
+        with _pending_lock:
+            _holds -= 1
+            released = _holds == 0
+        if released:
+            _refresh_pending_logged()
+
+
+# ==================== Session events ====================
+
+_SOURCE_MODELS = (TargetData, NetsuiteData, FaireData, SellthroughData)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_months(session, flush_context):
+    """Months of target/revenue rows added, changed (old and new date) or deleted in this flush"""
+    dates = []
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, _SOURCE_MODELS):
+            dates.append(obj.date)
+    for obj in session.dirty:
+        if isinstance(obj, _SOURCE_MODELS):
+            history = inspect(obj).attrs.date.history
+            dates.extend([obj.date] + list(history.deleted or []))
+    if dates:
+        touch_months(dates, session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_after_commit(session):
+    months = session.info.pop('pacing_months', None)
+    deferred = session.info.get('pacing_deferred')
+    if months and deferred is not None:
+        deferred.update(months)
+    elif months:
+        try:
+            rows = refresh_months(months)
+            print(f"  ✓ Refreshed {len(months)} month(s) of targets_pacing_monthly ({rows} rows)")
+        except Exception as e:
+            print(f"  ⚠ Could not refresh targets_pacing_monthly: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('pacing_months', None)